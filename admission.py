@@ -0,0 +1,148 @@
+"""
+Admission control for the webhook server.
+Bounds concurrent signal processing and sheds load with priority classes.
+"""
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+# Priority classes (lower value = served first)
+PRIORITY_URGENT = 0  # exits, stop losses, take profits
+PRIORITY_ENTRY = 1   # new entries
+
+
+class AdmissionController:
+    """
+    Bounded admission controller with a concurrency limit and queue depth.
+
+    Urgent requests may use every slot; entries may only use the slots left
+    after ``urgent_reserve`` and always yield to queued urgent requests.
+    Requests that cannot be admitted are rejected so the caller can answer
+    429 with ``Retry-After``.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int = None,
+        max_queue: int = None,
+        queue_timeout: float = None,
+        urgent_reserve: int = None,
+        retry_after: int = None
+    ):
+        """Initialize controller, falling back to environment configuration."""
+        if max_concurrent is None:
+            max_concurrent = int(os.getenv('ADMISSION_MAX_CONCURRENT', '16'))
+        if max_queue is None:
+            max_queue = int(os.getenv('ADMISSION_MAX_QUEUE', '64'))
+        if queue_timeout is None:
+            queue_timeout = float(os.getenv('ADMISSION_QUEUE_TIMEOUT', '5'))
+        if urgent_reserve is None:
+            urgent_reserve = int(os.getenv('ADMISSION_URGENT_RESERVE', '2'))
+        if retry_after is None:
+            retry_after = int(os.getenv('ADMISSION_RETRY_AFTER', '5'))
+
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.urgent_reserve = min(urgent_reserve, max(max_concurrent - 1, 0))
+        self.retry_after = retry_after
+        self.enabled = max_concurrent > 0
+
+        self._cond = threading.Condition()
+        self._active = 0
+        self._waiting = [0, 0]
+        self._admitted = [0, 0]
+        self._rejected = [0, 0]
+
+    def _has_slot(self, priority: int) -> bool:
+        """Return True if a request of this priority may start now (lock held)."""
+        if priority == PRIORITY_URGENT:
+            return self._active < self.max_concurrent
+        return (self._active < self.max_concurrent - self.urgent_reserve
+                and self._waiting[PRIORITY_URGENT] == 0)
+
+    def acquire(self, priority: int = PRIORITY_ENTRY) -> bool:
+        """
+        Try to admit a request, waiting in the queue if needed.
+
+        Args:
+            priority: PRIORITY_URGENT or PRIORITY_ENTRY
+
+        Returns:
+            True if admitted (caller must call release), False if shed
+        """
+        if not self.enabled:
+            return True
+
+        with self._cond:
+            if self._has_slot(priority):
+                self._active += 1
+                self._admitted[priority] += 1
+                return True
+
+            if self._waiting[priority] >= self.max_queue:
+                self._rejected[priority] += 1
+                return False
+
+            self._waiting[priority] += 1
+            deadline = time.monotonic() + self.queue_timeout
+            try:
+                while not self._has_slot(priority):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._rejected[priority] += 1
+                        return False
+                    self._cond.wait(remaining)
+                self._active += 1
+                self._admitted[priority] += 1
+                return True
+            finally:
+                self._waiting[priority] -= 1
+                # Entries blocked behind this urgent waiter may proceed now
+                if priority == PRIORITY_URGENT:
+                    self._cond.notify_all()
+
+    def release(self):
+        """Release a slot taken by a successful acquire."""
+        if not self.enabled:
+            return
+        with self._cond:
+            self._active -= 1
+            self._cond.notify_all()
+
+    @contextmanager
+    def admit(self, priority: int = PRIORITY_ENTRY) -> Iterator[bool]:
+        """
+        Context manager around acquire/release.
+
+        Yields:
+            True if the request was admitted, False if it should be rejected
+        """
+        admitted = self.acquire(priority)
+        try:
+            yield admitted
+        finally:
+            if admitted:
+                self.release()
+
+    def stats(self) -> Dict:
+        """Return current occupancy and counters."""
+        with self._cond:
+            return {
+                'enabled': self.enabled,
+                'active': self._active,
+                'max_concurrent': self.max_concurrent,
+                'queued_urgent': self._waiting[PRIORITY_URGENT],
+                'queued_entry': self._waiting[PRIORITY_ENTRY],
+                'admitted_urgent': self._admitted[PRIORITY_URGENT],
+                'admitted_entry': self._admitted[PRIORITY_ENTRY],
+                'rejected_urgent': self._rejected[PRIORITY_URGENT],
+                'rejected_entry': self._rejected[PRIORITY_ENTRY]
+            }
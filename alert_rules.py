@@ -0,0 +1,566 @@
+"""
+Compiled alert rules for the price monitor.
+Rules such as ``BTCUSDT crosses_above 50000 and change_5m > 2%`` are parsed
+once and compiled into a shared graph of closures: identical subexpressions
+(metrics, comparisons, boolean terms) become one node however many rules use
+them. A tick only recomputes nodes downstream of metrics that changed, and
+comparisons against constants are kept sorted per metric, so a price move
+touches just the thresholds it swept past.
+
+Grammar:
+    rule       := or_expr
+    or_expr    := and_expr ('or' and_expr)*
+    and_expr   := not_expr ('and' not_expr)*
+    not_expr   := 'not' not_expr | '(' or_expr ')' | comparison
+    comparison := operand (> | >= | < | <= | crosses_above | crosses_below) operand
+    operand    := number['%'] | [SYMBOL] [metric]
+    metric     := price | change_<window> | high_<window> | low_<window> | volatility_<window>
+    window     := <number>(s|m|h|d), e.g. 30s, 5m, 1h
+
+Terms without a symbol use the first symbol named in the rule (or the
+monitor's symbol). ``change`` is a fraction, so ``2%`` equals ``0.02``;
+``high``/``low`` cover the window before the current tick, so
+``price > high_1h`` is a breakout.
+"""
+
+import base64
+import bisect
+import heapq
+import json
+import operator
+import os
+import re
+from typing import Callable, Dict, List, Optional, Tuple
+from dotenv import load_dotenv
+from price_history import PriceHistory
+from symbols import clean_ticker
+
+load_dotenv()
+
+
+WINDOW_UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+METRICS = ('price', 'change', 'high', 'low', 'volatility')
+COMPARISONS = {'>': operator.gt, '>=': operator.ge, '<': operator.lt, '<=': operator.le}
+CROSSES = ('crosses_above', 'crosses_below')
+# Comparison with its operands swapped
+_FLIPPED = {'>': '<', '>=': '<=', '<': '>', '<=': '>=', 'crosses_above': 'crosses_below', 'crosses_below': 'crosses_above'}
+
+_TOKEN = re.compile(r"\s*(?:(?P<number>-?\d+(?:\.\d+)?%?)|(?P<op>>=|<=|>|<)|(?P<paren>[()])|(?P<word>[A-Za-z_][\w:.\-/]*))")
+_METRIC = re.compile(r"^(price)$|^(change|high|low|volatility)_(\d+(?:\.\d+)?)([smhd])$")
+
+
+class RuleSyntaxError(ValueError):
+    """Raised when a rule can't be parsed."""
+
+    def __init__(self, expression: str, position: int, message: str):
+        self.expression = expression
+        self.position = position
+        super().__init__(f"{message} at position {position}: {expression!r}")
+
+
+def parse_window(text: str) -> float:
+    """'5m' -> 300.0"""
+    return float(text[:-1]) * WINDOW_UNITS[text[-1]]
+
+
+def _tokenize(expression: str) -> List[Tuple[str, str, int]]:
+    tokens = []
+    position = 0
+    expression = expression.rstrip()
+    while position < len(expression):
+        match = _TOKEN.match(expression, position)
+        if not match:
+            raise RuleSyntaxError(expression, position, "Unexpected character")
+        kind = match.lastgroup
+        tokens.append((kind, match.group(kind), match.start(kind)))
+        position = match.end()
+    return tokens
+
+
+class _Parser:
+    """Recursive-descent parser producing an AST of tuples."""
+
+    def __init__(self, expression: str, default_symbol: Optional[str]):
+        self.expression = expression
+        self.tokens = _tokenize(expression)
+        self.index = 0
+        # Terms without a symbol use the first symbol named in the rule
+        self.symbol = next(
+            (clean_ticker(value) for kind, value, _ in self.tokens
+             if kind == 'word' and value.lower() not in ('and', 'or', 'not', *CROSSES) and not _METRIC.match(value)),
+            default_symbol and clean_ticker(default_symbol)
+        )
+
+    def error(self, message: str):
+        position = self.tokens[self.index][2] if self.index < len(self.tokens) else len(self.expression)
+        raise RuleSyntaxError(self.expression, position, message)
+
+    def peek(self) -> Tuple[Optional[str], Optional[str]]:
+        if self.index < len(self.tokens):
+            kind, value, _ = self.tokens[self.index]
+            return kind, value.lower() if kind == 'word' and value.lower() in ('and', 'or', 'not', *CROSSES) else value
+        return None, None
+
+    def take(self) -> Tuple[str, str]:
+        token = self.peek()
+        self.index += 1
+        return token
+
+    def parse(self):
+        if not self.tokens:
+            self.error("Empty rule")
+        node = self.or_expr()
+        if self.index < len(self.tokens):
+            self.error("Unexpected token")
+        return node
+
+    def or_expr(self):
+        terms = [self.and_expr()]
+        while self.peek() == ('word', 'or'):
+            self.take()
+            terms.append(self.and_expr())
+        return terms[0] if len(terms) == 1 else ('or', *terms)
+
+    def and_expr(self):
+        terms = [self.not_expr()]
+        while self.peek() == ('word', 'and'):
+            self.take()
+            terms.append(self.not_expr())
+        return terms[0] if len(terms) == 1 else ('and', *terms)
+
+    def not_expr(self):
+        token = self.peek()
+        if token == ('word', 'not'):
+            self.take()
+            return ('not', self.not_expr())
+        if token == ('paren', '('):
+            self.take()
+            node = self.or_expr()
+            if self.take() != ('paren', ')'):
+                self.index -= 1
+                self.error("Expected ')'")
+            return node
+        return self.comparison()
+
+    def comparison(self):
+        left = self.operand()
+        kind, value = self.peek()
+        if not ((kind == 'op' and value in COMPARISONS) or (kind == 'word' and value in CROSSES)):
+            self.error("Expected a comparison (>, >=, <, <=, crosses_above, crosses_below)")
+        self.take()
+        right = self.operand()
+        if left[0] == 'const' and right[0] == 'const':
+            self.index -= 1
+            self.error("Comparison needs at least one metric")
+        return (value, left, right)
+
+    def operand(self):
+        kind, value = self.take()
+        if kind == 'number':
+            return ('const', float(value[:-1]) / 100 if value.endswith('%') else float(value))
+        if kind != 'word' or value in ('and', 'or', 'not', *CROSSES):
+            self.index -= 1
+            self.error("Expected a number, symbol or metric")
+        if _METRIC.match(value):
+            symbol = self.symbol
+            metric = value
+        else:
+            symbol = clean_ticker(value)
+            next_kind, next_value = self.peek()
+            metric = 'price'
+            if next_kind == 'word' and _METRIC.match(next_value):
+                self.take()
+                metric = next_value
+        if symbol is None:
+            self.index -= 1
+            self.error("No symbol for metric")
+        match = _METRIC.match(metric)
+        if match.group(1):
+            return ('metric', symbol, 'price', None)
+        return ('metric', symbol, match.group(2), parse_window(f"{match.group(3)}{match.group(4)}"))
+
+
+def parse_rule(expression: str, default_symbol: str = None):
+    """
+    Parse a rule into an AST.
+
+    Args:
+        expression: Rule text
+        default_symbol: Symbol for metrics when the rule names none
+
+    Returns:
+        Nested tuples, e.g. ('and', ('crosses_above', metric, const), ...)
+
+    Raises:
+        RuleSyntaxError: If the rule is invalid
+    """
+    return _Parser(expression, default_symbol).parse()
+
+
+class _Node:
+    """One shared subexpression: a metric, comparison or boolean term."""
+
+    __slots__ = ('index', 'key', 'compute', 'value', 'parents', 'thresholds', 'indexed', 'state', 'pulse', 'rules')
+
+    def __init__(self, index: int, key: tuple):
+        self.index = index  # creation order, children before parents
+        self.key = key
+        self.compute: Callable[[], object] = None
+        self.value = None
+        self.parents: List['_Node'] = []
+        # Comparisons of this metric against constants, sorted by constant
+        self.thresholds: List[float] = []
+        self.indexed: List['_Node'] = []
+        self.state = None  # crosses: last relation between the operands
+        self.pulse = False  # crosses are true for one tick only
+        self.rules: List['Rule'] = []
+
+
+class _Feed:
+    """Price history and metric nodes of one symbol."""
+
+    def __init__(self):
+        self.history: Optional[PriceHistory] = None
+        self.windows = set()
+        self.now = None
+        self.before: List[_Node] = []  # metrics of the window before the tick (high/low)
+        self.after: List[_Node] = []
+
+
+class Rule:
+    """A named, compiled alert rule."""
+
+    def __init__(self, name: str, expression: str, node: _Node):
+        self.name = name
+        self.expression = expression
+        self.node = node
+
+    def __repr__(self) -> str:
+        return f"Rule({self.name!r}, {self.expression!r})"
+
+
+class RuleEngine:
+    """Evaluates compiled alert rules on price ticks."""
+
+    def __init__(self, default_symbol: str = None, capacity: int = None):
+        """
+        Args:
+            default_symbol: Symbol for rules that name none
+            capacity: Ticks of history kept per symbol
+        """
+        self.default_symbol = default_symbol
+        self.capacity = capacity or int(os.getenv('PRICE_HISTORY_SIZE', '4096'))
+        self.rules: List[Rule] = []
+        self._nodes: List[_Node] = []
+        self._interned: Dict[tuple, _Node] = {}
+        self._feeds: Dict[str, _Feed] = {}
+        self._pulsed: List[_Node] = []
+
+    # -- compilation ------------------------------------------------------
+
+    def add_rule(self, expression: str, name: str = None) -> Rule:
+        """
+        Parse and compile a rule.
+
+        Args:
+            expression: Rule text
+            name: Rule name used in alerts (defaults to the expression)
+
+        Returns:
+            Compiled rule
+
+        Raises:
+            RuleSyntaxError: If the rule is invalid
+        """
+        first_new = len(self._nodes)
+        node = self._compile(parse_rule(expression, self.default_symbol))
+        # Initialize new nodes from current state so they don't fire on the next unrelated tick
+        for new in self._nodes[first_new:]:
+            if new.key[0] != 'const':
+                new.value = new.compute()
+        rule = Rule(name or expression, expression, node)
+        node.rules.append(rule)
+        self.rules.append(rule)
+        return rule
+
+    def _intern(self, key: tuple) -> Tuple[_Node, bool]:
+        node = self._interned.get(key)
+        if node is not None:
+            return node, False
+        node = self._interned[key] = _Node(len(self._nodes), key)
+        self._nodes.append(node)
+        return node, True
+
+    def _compile(self, ast) -> _Node:
+        kind = ast[0]
+        if kind == 'const':
+            node, new = self._intern(ast)
+            node.value = ast[1]
+            return node
+        if kind == 'metric':
+            return self._compile_metric(*ast[1:])
+        if kind in ('and', 'or'):
+            children = [self._compile(child) for child in ast[1:]]
+            # Order-insensitive key so 'a and b' and 'b and a' share a node
+            unique = sorted({child.index: child for child in children}.items())
+            children = [child for _, child in unique]
+            node, new = self._intern((kind, *(index for index, _ in unique)))
+            if new:
+                combine = all if kind == 'and' else any
+                node.compute = lambda: combine(child.value for child in children)
+                for child in children:
+                    child.parents.append(node)
+            return node
+        if kind == 'not':
+            child = self._compile(ast[1])
+            node, new = self._intern(('not', child.index))
+            if new:
+                node.compute = lambda: not child.value
+                child.parents.append(node)
+            return node
+
+        # Comparison: keep the metric on the left when comparing against a constant
+        left, right = ast[1], ast[2]
+        if left[0] == 'const':
+            kind, left, right = _FLIPPED[kind], right, left
+        a, b = self._compile(left), self._compile(right)
+        node, new = self._intern((kind, a.index, b.index))
+        if not new:
+            return node
+        if kind in COMPARISONS:
+            compare = COMPARISONS[kind]
+
+            def compute():
+                x, y = a.value, b.value
+                return x is not None and y is not None and compare(x, y)
+        else:
+            above = kind == 'crosses_above'
+            node.pulse = True
+
+            def compute():
+                x, y = a.value, b.value
+                if x is None or y is None:
+                    node.state = None
+                    return False
+                relation = x >= y if above else x <= y
+                crossed = node.state is False and relation
+                node.state = relation
+                return crossed
+        node.compute = compute
+        if b.key[0] == 'const':
+            position = bisect.bisect_right(a.thresholds, b.value)
+            a.thresholds.insert(position, b.value)
+            a.indexed.insert(position, node)
+        else:
+            a.parents.append(node)
+            b.parents.append(node)
+        return node
+
+    def _compile_metric(self, symbol: str, metric: str, window: Optional[float]) -> _Node:
+        node, new = self._intern(('metric', symbol, metric, window))
+        if not new:
+            return node
+        feed = self._feeds.get(symbol)
+        if feed is None:
+            feed = self._feeds[symbol] = _Feed()
+            self._rebuild_history(feed)
+        if window is not None and window not in feed.windows:
+            feed.windows.add(window)
+            self._rebuild_history(feed)
+
+        if metric == 'price':
+            node.compute = lambda: feed.history.last_price
+        elif metric == 'change':
+            node.compute = lambda: feed.history.change(window)
+        elif metric == 'volatility':
+            node.compute = lambda: feed.history.volatility(window)
+        else:
+            extreme = PriceHistory.max if metric == 'high' else PriceHistory.min
+
+            def compute():
+                history = feed.history
+                if feed.now is None or not history.is_warm(window, feed.now):
+                    return None
+                return extreme(history, window)
+            node.compute = compute
+        (feed.before if metric in ('high', 'low') else feed.after).append(node)
+        return node
+
+    def _rebuild_history(self, feed: _Feed):
+        """Recreate a symbol's history with its current windows, replaying retained ticks."""
+        history = PriceHistory(capacity=self.capacity, windows=feed.windows or (60,))
+        if feed.history is not None and feed.history.count:
+            history.load_state(feed.history.dump_state())
+        feed.history = history
+
+    # -- evaluation -------------------------------------------------------
+
+    def symbols(self) -> List[str]:
+        """Symbols referenced by the rules."""
+        return list(self._feeds)
+
+    def update(self, symbol: str, price: float, ts: float) -> List[Rule]:
+        """
+        Feed one tick and return the rules that became true.
+
+        Rules fire on the transition from false to true, so a condition that
+        stays true alerts once. Crossings need a previous tick to compare
+        against and never fire on the first one.
+
+        Args:
+            symbol: Ticker of the tick
+            price: Price
+            ts: Tick time as Unix seconds
+
+        Returns:
+            Rules that fired
+        """
+        feed = self._feeds.get(clean_ticker(symbol))
+        if feed is None:
+            return []
+        feed.now = ts
+        before = [(node, node.compute()) for node in feed.before]
+        feed.history.update(price, ts)
+        after = [(node, node.compute()) for node in feed.after]
+
+        queue: List[Tuple[int, _Node]] = []
+        queued = set()
+
+        def schedule(node):
+            if node.index not in queued:
+                queued.add(node.index)
+                heapq.heappush(queue, (node.index, node))
+
+        # Crossings from the previous tick fall back to false
+        for node in self._pulsed:
+            schedule(node)
+        self._pulsed = []
+
+        for node, value in before + after:
+            old = node.value
+            if value == old:
+                continue
+            node.value = value
+            for parent in node.parents:
+                schedule(parent)
+            if not node.thresholds:
+                continue
+            if old is None or value is None:
+                affected = node.indexed
+            else:
+                # Only comparisons with a threshold between the old and new value can flip
+                low, high = (old, value) if old < value else (value, old)
+                start = bisect.bisect_left(node.thresholds, low)
+                end = bisect.bisect_right(node.thresholds, high)
+                affected = node.indexed[start:end]
+            for comparison in affected:
+                schedule(comparison)
+
+        fired = []
+        while queue:
+            _, node = heapq.heappop(queue)
+            value = node.compute()
+            if node.pulse and value:
+                self._pulsed.append(node)
+            if value == node.value:
+                continue
+            node.value = value
+            for parent in node.parents:
+                schedule(parent)
+            if value:
+                fired.extend(node.rules)
+        return fired
+
+    def stats(self) -> Dict:
+        return {'rules': len(self.rules), 'nodes': len(self._nodes), 'symbols': self.symbols()}
+
+    # -- checkpointing ----------------------------------------------------
+
+    def dump_state(self) -> bytes:
+        """Serialize price histories and node values for a checkpoint."""
+        return json.dumps({
+            'rules': [rule.expression for rule in self.rules],
+            'feeds': {
+                symbol: {'now': feed.now, 'history': base64.b64encode(feed.history.dump_state()).decode('ascii')}
+                for symbol, feed in self._feeds.items()
+            },
+            'nodes': [
+                [list(node.key), node.value, node.state] for node in self._nodes
+                if node.key[0] != 'const' and (node.value is not None or node.state is not None)
+            ],
+        }).encode('utf-8')
+
+    def load_state(self, buffer):
+        """
+        Restore state written by dump_state.
+
+        Node values are only restored when the rules are unchanged (node keys
+        refer to creation order); otherwise they are recomputed from the
+        restored histories, as for a newly added rule.
+        """
+        state = json.loads(bytes(buffer))
+        for symbol, saved in state.get('feeds', {}).items():
+            feed = self._feeds.get(symbol)
+            if feed is None:
+                continue
+            history = PriceHistory(capacity=self.capacity, windows=feed.windows or (60,))
+            history.load_state(base64.b64decode(saved['history']))
+            feed.history = history
+            feed.now = saved['now']
+        self._pulsed = []
+        if state.get('rules') == [rule.expression for rule in self.rules]:
+            for key, value, node_state in state.get('nodes', []):
+                node = self._interned.get(tuple(key))
+                if node is None:
+                    continue
+                node.value, node.state = value, node_state
+                if node.pulse and value:
+                    self._pulsed.append(node)
+        else:
+            for node in self._nodes:
+                if node.key[0] != 'const':
+                    node.value = node.compute()
+
+
+def load_rules(text: str) -> List[Tuple[Optional[str], str]]:
+    """
+    Split rule definitions into (name, expression) pairs.
+
+    One rule per line or ';'-separated, optionally named as ``name: expression``;
+    blank lines and lines starting with '#' are ignored.
+    """
+    rules = []
+    for line in re.split(r'[;\n]', text):
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        name, separator, expression = line.partition(': ')
+        if separator and re.fullmatch(r'[\w\- ]+', name):
+            rules.append((name.strip(), expression.strip()))
+        else:
+            rules.append((None, line))
+    return rules
+
+
+def create_rule_engine_from_env(default_symbol: str = None) -> Optional[RuleEngine]:
+    """
+    Create a rule engine from ALERT_RULES and/or ALERT_RULES_FILE.
+
+    Args:
+        default_symbol: Symbol for rules that name none (the monitored symbol)
+
+    Returns:
+        RuleEngine, or None if no rules are configured
+    """
+    text = os.getenv('ALERT_RULES', '')
+    path = os.getenv('ALERT_RULES_FILE')
+    if path:
+        with open(path, encoding='utf-8') as f:
+            text += '\n' + f.read()
+    definitions = load_rules(text)
+    if not definitions:
+        return None
+    engine = RuleEngine(default_symbol)
+    for name, expression in definitions:
+        engine.add_rule(expression, name)
+    return engine
@@ -0,0 +1,329 @@
+"""
+Microbenchmarks for the strategy hot path with regression gates.
+Times signal processing, deduplication, message formatting, threshold
+checks and payload JSON round trips with repeated measurements, stores
+baselines in a JSON file and fails when a benchmark gets slower than its
+baseline by more than a threshold.
+
+Usage:
+    python benchmarks.py run                  # measure and print
+    python benchmarks.py run --save           # measure and record baselines
+    python benchmarks.py compare              # exit 1 on regressions
+    python benchmarks.py compare --threshold 0.1 --filter dedup
+"""
+
+import argparse
+import gc
+import itertools
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Tuple
+from dotenv import load_dotenv
+
+# Fix Windows console encoding
+if sys.platform == 'win32':
+    try:
+        sys.stdout.reconfigure(encoding='utf-8')
+        sys.stderr.reconfigure(encoding='utf-8')
+    except (AttributeError, ValueError):
+        import io
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+        sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+
+load_dotenv()
+
+
+# Benchmark name -> factory returning the operation to time (setup runs untimed)
+BENCHMARKS: Dict[str, Callable[[], Callable[[], object]]] = {}
+
+
+def benchmark(name: str):
+    """Register a benchmark factory under ``name``."""
+    def register(factory):
+        BENCHMARKS[name] = factory
+        return factory
+    return register
+
+
+def _strategy():
+    from supremo_strategy import SupremoStrategy
+    strategy = SupremoStrategy()
+    # Pin the configuration so results don't depend on the local .env
+    strategy.enforce_entry_zones = False
+    strategy.enforce_trend_filter = False
+    strategy.max_signal_age = 0
+    return strategy
+
+
+_PAYLOAD = {
+    'ticker': 'BTCUSDT', 'action': 'buy', 'price': 45123.5, 'atr': 350.0,
+    'trend_bias': 'bullish', 'entry_level': 'ML', 'signal_type': 'entry', 'timestamp': 1700000000,
+}
+
+
+@benchmark('process_signal')
+def bench_process_signal():
+    strategy = _strategy()
+    window = strategy.deduplication_window
+    times = itertools.count(1700000000, window)
+    payload = dict(_PAYLOAD)
+
+    def run():
+        payload['timestamp'] = next(times)  # every call is a new, accepted signal
+        return strategy.process_signal(payload)
+    return run
+
+
+@benchmark('check_deduplication_100k')
+def bench_check_deduplication():
+    strategy = _strategy()
+    tickers = [f"T{i}USDT" for i in range(100000)]
+    strategy.last_signal_time.update((ticker, 1700000000) for ticker in tickers)
+    lookups = itertools.cycle(tickers[::97])
+    times = itertools.count(1700000000, 7)
+
+    def run():
+        return strategy.check_deduplication(next(lookups), next(times))
+    return run
+
+
+@benchmark('format_signal_message')
+def bench_format_signal_message():
+    strategy = _strategy()
+    signal = strategy.process_signal(dict(_PAYLOAD))
+
+    def run():
+        return strategy.format_signal_message(signal)
+    return run
+
+
+@benchmark('check_conditions')
+def bench_check_conditions():
+    from main import TradingBot
+    bot = TradingBot()
+    bot.threshold_above, bot.threshold_below = 50000.0, 45000.0
+    prices = itertools.cycle([44000.0, 47000.0, 51000.0, 47000.0])
+
+    def run():
+        price = next(prices)
+        alerts = bot.check_conditions(price)
+        bot.last_price = price
+        return alerts
+    return run
+
+
+@benchmark('payload_json_round_trip')
+def bench_payload_json_round_trip():
+    from signal_model import Signal, SignalPayload
+    body = json.dumps(_PAYLOAD)
+    signal = _strategy().process_signal(dict(_PAYLOAD))
+
+    def run():
+        SignalPayload.parse(json.loads(body))
+        return Signal.from_json(signal.to_json())
+    return run
+
+
+def _calibrate(op: Callable[[], object], min_time: float) -> int:
+    """Smallest power-of-two loop count that takes at least ``min_time``."""
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            op()
+        if time.perf_counter() - start >= min_time:
+            return loops
+        loops *= 2
+
+
+def measure(op: Callable[[], object], repeats: int = 7, min_time: float = 0.05) -> Dict:
+    """
+    Time an operation.
+
+    Each repeat runs the operation enough times to take ``min_time`` and
+    yields one per-call time; GC is disabled while timing, as in timeit.
+
+    Args:
+        op: Operation to time
+        repeats: Number of timed repeats
+        min_time: Minimum seconds per repeat
+
+    Returns:
+        Per-call statistics in microseconds
+    """
+    loops = _calibrate(op, min_time)
+    samples = []
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeats):
+            start = time.perf_counter()
+            for _ in range(loops):
+                op()
+            samples.append((time.perf_counter() - start) / loops * 1e6)
+    finally:
+        if gc_enabled:
+            gc.enable()
+    samples.sort()
+    median = statistics.median(samples)
+    stdev = statistics.stdev(samples) if len(samples) > 1 else 0.0
+    return {
+        'loops': loops,
+        'repeats': repeats,
+        'min_us': samples[0],
+        'median_us': median,
+        'mean_us': statistics.fmean(samples),
+        'stdev_us': stdev,
+        'max_us': samples[-1],
+        'cv': stdev / median if median else 0.0,
+    }
+
+
+def run(names: List[str] = None, repeats: int = 7, min_time: float = 0.05) -> Dict[str, Dict]:
+    """
+    Run benchmarks.
+
+    Args:
+        names: Benchmarks to run (all if None)
+        repeats: Timed repeats per benchmark
+        min_time: Minimum seconds per repeat
+
+    Returns:
+        Benchmark name -> statistics
+    """
+    results = {}
+    for name in names or list(BENCHMARKS):
+        results[name] = measure(BENCHMARKS[name](), repeats, min_time)
+    return results
+
+
+def load_baselines(path: str) -> Dict[str, Dict]:
+    """Read recorded baselines (empty if the file doesn't exist)."""
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f).get('benchmarks', {})
+    except FileNotFoundError:
+        return {}
+
+
+def save_baselines(path: str, results: Dict[str, Dict]):
+    """Record results as baselines, keeping entries for benchmarks not run."""
+    baselines = load_baselines(path)
+    baselines.update(results)
+    data = {
+        'recorded_at': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'benchmarks': baselines,
+    }
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def compare(results: Dict[str, Dict], baselines: Dict[str, Dict], threshold: float,
+            statistic: str = 'min_us') -> List[Tuple[str, float, float, float]]:
+    """
+    Find regressions against baselines.
+
+    Args:
+        results: Current statistics per benchmark
+        baselines: Baseline statistics per benchmark
+        threshold: Allowed slowdown as a fraction (0.2 = 20%)
+        statistic: Statistic to compare; the minimum is least affected by
+            scheduler and cache noise, the median reflects typical cost
+
+    Returns:
+        (name, baseline, current, change) for every regressed benchmark
+    """
+    regressions = []
+    for name, stats in results.items():
+        baseline = baselines.get(name)
+        if not baseline or not baseline.get(statistic):
+            continue
+        change = stats[statistic] / baseline[statistic] - 1
+        if change > threshold:
+            regressions.append((name, baseline[statistic], stats[statistic], change))
+    return regressions
+
+
+def format_results(results: Dict[str, Dict], baselines: Dict[str, Dict] = None,
+                   statistic: str = 'min_us') -> str:
+    """Render results (and the change vs baselines, if given) as a table."""
+    header = f"{'Benchmark':<26} | {'median µs':>10} | {'min µs':>9} | {'cv':>7} | {'loops':>7}"
+    if baselines is not None:
+        header += f" | {'baseline':>9} | {'change':>7}"
+    lines = [header, '-' * len(header)]
+    for name, stats in results.items():
+        line = (
+            f"{name:<26} | {stats['median_us']:>10.3f} | {stats['min_us']:>9.3f} | "
+            f"{stats['cv']:>7.1%} | {stats['loops']:>7}"
+        )
+        if baselines is not None:
+            baseline = baselines.get(name, {}).get(statistic)
+            if baseline:
+                line += f" | {baseline:>9.3f} | {stats[statistic] / baseline - 1:>+7.1%}"
+            else:
+                line += f" | {'-':>9} | {'new':>7}"
+        lines.append(line)
+    return '\n'.join(lines)
+
+
+def main(argv: List[str] = None) -> int:
+    """Command line entry point; returns the exit status."""
+    parser = argparse.ArgumentParser(description='Strategy hot path microbenchmarks')
+    parser.add_argument('mode', choices=('run', 'compare'), help="'run' measures, 'compare' gates on baselines")
+    parser.add_argument('--baseline', default=os.getenv('BENCH_BASELINE_FILE', 'benchmark_baselines.json'),
+                        help='Baselines file')
+    parser.add_argument('--save', action='store_true', help='Record the results as baselines')
+    parser.add_argument('--threshold', type=float, default=float(os.getenv('BENCH_REGRESSION_THRESHOLD', '0.2')),
+                        help='Allowed slowdown before compare fails (0.2 = 20%%)')
+    parser.add_argument('--statistic', choices=('min_us', 'median_us'), default='min_us',
+                        help='Statistic compared against baselines')
+    parser.add_argument('--repeats', type=int, default=int(os.getenv('BENCH_REPEATS', '7')))
+    parser.add_argument('--min-time', type=float, default=float(os.getenv('BENCH_MIN_TIME', '0.05')),
+                        help='Minimum seconds per repeat')
+    parser.add_argument('--filter', help='Only run benchmarks whose name contains this')
+    args = parser.parse_args(argv)
+
+    names = [name for name in BENCHMARKS if not args.filter or args.filter in name]
+    if not names:
+        print(f"⚠️  No benchmark matches {args.filter!r}")
+        return 2
+
+    baselines = load_baselines(args.baseline) if args.mode == 'compare' else None
+    if baselines == {}:
+        print(f"⚠️  No baselines in {args.baseline}; record them with 'run --save'")
+        return 2
+
+    print(f"⏱️  Running {len(names)} benchmark(s), {args.repeats} repeats of ≥{args.min_time:g}s")
+    results = run(names, args.repeats, args.min_time)
+    status = 0
+
+    if args.mode == 'compare':
+        print(format_results(results, baselines, args.statistic))
+        regressions = compare(results, baselines, args.threshold, args.statistic)
+        print()
+        for name, baseline, current, change in regressions:
+            print(f"❌ {name} regressed {change:+.1%} ({baseline:.3f}µs -> {current:.3f}µs)")
+        if regressions:
+            status = 1
+        else:
+            print(f"✅ No benchmark slower than baseline by more than {args.threshold:.0%}")
+    else:
+        print(format_results(results))
+
+    if args.save:
+        save_baselines(args.baseline, results)
+        print(f"💾 Baselines saved to {args.baseline}")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,220 @@
+"""
+Multi-timeframe candle aggregator.
+Builds OHLC bars for several timeframes per ticker from a price stream, with
+O(1) work per tick per timeframe, and keeps incremental EMAs of bar closes.
+"""
+
+import math
+import os
+import struct
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+# Timeframe name -> bar length in seconds (bars are aligned to UTC)
+TIMEFRAMES = {'1m': 60, '5m': 300, '15m': 900, '1h': 3600, '4h': 14400, '1d': 86400}
+DEFAULT_TIMEFRAMES = ('1m', '5m', '1h', '4h')
+EMA_PERIODS = (50, 200)
+
+
+class CandleSeries:
+    """
+    The last ``capacity`` bars of one timeframe in preallocated arrays.
+
+    Ticks older than the current bar are ignored; periods without ticks
+    produce no bar.
+    """
+
+    __slots__ = ('seconds', 'capacity', 'starts', 'opens', 'highs', 'lows', 'closes',
+                 'count', 'periods', '_emas', '_alphas')
+
+    def __init__(self, seconds: int, capacity: int = 500, ema_periods: Iterable[int] = EMA_PERIODS):
+        self.seconds = seconds
+        self.capacity = capacity
+        zeros = bytes(8 * capacity)
+        self.starts = array('d', zeros)
+        self.opens = array('d', zeros)
+        self.highs = array('d', zeros)
+        self.lows = array('d', zeros)
+        self.closes = array('d', zeros)
+        self.count = 0  # bars started so far
+        self.periods = tuple(ema_periods)
+        self._emas: List[Optional[float]] = [None] * len(self.periods)  # over closed bars
+        self._alphas = tuple(2 / (p + 1) for p in self.periods)
+
+    def update(self, price: float, ts: float):
+        """Fold one tick into the current bar, starting a new bar if needed."""
+        bar_start = ts - ts % self.seconds
+        if self.count:
+            index = (self.count - 1) % self.capacity
+            current_start = self.starts[index]
+            if bar_start == current_start:
+                if price > self.highs[index]:
+                    self.highs[index] = price
+                elif price < self.lows[index]:
+                    self.lows[index] = price
+                self.closes[index] = price
+                return
+            if bar_start < current_start:
+                return
+            self._close_bar(self.closes[index])
+
+        index = self.count % self.capacity
+        self.starts[index] = bar_start
+        self.opens[index] = self.highs[index] = self.lows[index] = self.closes[index] = price
+        self.count += 1
+
+    def _close_bar(self, close: float):
+        emas = self._emas
+        for i, alpha in enumerate(self._alphas):
+            previous = emas[i]
+            emas[i] = close if previous is None else previous + alpha * (close - previous)
+
+    def ema(self, period: int) -> Optional[float]:
+        """
+        EMA of bar closes including the still-open bar.
+
+        Returns:
+            EMA value, or None until ``period`` bars exist
+        """
+        if self.count < period:
+            return None
+        i = self.periods.index(period)
+        close = self.closes[(self.count - 1) % self.capacity]
+        previous = self._emas[i]
+        return close if previous is None else previous + self._alphas[i] * (close - previous)
+
+    def last(self) -> Optional[Tuple[float, float, float, float, float]]:
+        """The current bar as (start, open, high, low, close)."""
+        if not self.count:
+            return None
+        return self.bar(self.count - 1)
+
+    def bar(self, seq: int) -> Tuple[float, float, float, float, float]:
+        index = seq % self.capacity
+        return self.starts[index], self.opens[index], self.highs[index], self.lows[index], self.closes[index]
+
+    def bars(self, n: int = None) -> List[Tuple[float, float, float, float, float]]:
+        """The last ``n`` retained bars, oldest first."""
+        available = min(self.count, self.capacity)
+        n = available if n is None else min(n, available)
+        return [self.bar(seq) for seq in range(self.count - n, self.count)]
+
+    def dump_state(self) -> bytes:
+        """Serialize bars and EMA state (NaN = no EMA yet)."""
+        emas = [math.nan if ema is None else ema for ema in self._emas]
+        header = struct.pack(f'<q{len(emas)}d', self.count, *emas)
+        return header + b''.join(a.tobytes() for a in (self.starts, self.opens, self.highs, self.lows, self.closes))
+
+    def load_state(self, buffer, offset: int = 0) -> int:
+        """
+        Restore state written by dump_state (same capacity and EMA periods).
+
+        Returns:
+            Offset just past this series' state
+        """
+        header = struct.Struct(f'<q{len(self.periods)}d')
+        count, *emas = header.unpack_from(buffer, offset)
+        offset += header.size
+        self.count = count
+        self._emas = [None if math.isnan(ema) else ema for ema in emas]
+        size = 8 * self.capacity
+        for values in (self.starts, self.opens, self.highs, self.lows, self.closes):
+            values[:] = array('d', bytes(buffer[offset:offset + size]))
+            offset += size
+        return offset
+
+
+class CandleAggregator:
+    """Candle series for every ticker and timeframe."""
+
+    def __init__(self, timeframes: Iterable[str] = None, capacity: int = None,
+                 ema_periods: Iterable[int] = EMA_PERIODS):
+        """
+        Initialize aggregator, falling back to environment configuration.
+
+        Args:
+            timeframes: Timeframe names (keys of TIMEFRAMES)
+            capacity: Bars kept per timeframe
+            ema_periods: EMA lengths maintained on bar closes
+        """
+        if timeframes is None:
+            timeframes = [t.strip() for t in os.getenv('CANDLE_TIMEFRAMES', ','.join(DEFAULT_TIMEFRAMES)).split(',')]
+        unknown = [t for t in timeframes if t not in TIMEFRAMES]
+        if unknown:
+            raise ValueError(f"Unknown timeframe(s): {', '.join(unknown)}")
+        self.timeframes = tuple(timeframes)
+        self.capacity = capacity or int(os.getenv('CANDLE_HISTORY', '500'))
+        self.ema_periods = tuple(ema_periods)
+        self._series: Dict[str, Dict[str, CandleSeries]] = {}
+
+    def update(self, ticker: str, price: float, ts: float):
+        """Feed one price tick to every timeframe of a ticker."""
+        series = self._series.get(ticker)
+        if series is None:
+            series = self._series[ticker] = {
+                tf: CandleSeries(TIMEFRAMES[tf], self.capacity, self.ema_periods) for tf in self.timeframes
+            }
+        for candles in series.values():
+            candles.update(price, ts)
+
+    def series(self, ticker: str, timeframe: str) -> Optional[CandleSeries]:
+        """Candle series of a ticker, or None if no ticks were seen."""
+        return self._series.get(ticker, {}).get(timeframe)
+
+    def trend_inputs(self, ticker: str, timeframe: str,
+                     fast: int = None, slow: int = None) -> Optional[Tuple[float, float, float]]:
+        """
+        (close, fast EMA, slow EMA) for a timeframe, or None until warmed up.
+        """
+        candles = self.series(ticker, timeframe)
+        if candles is None:
+            return None
+        fast = fast or self.ema_periods[0]
+        slow = slow or self.ema_periods[-1]
+        ema_fast = candles.ema(fast)
+        ema_slow = candles.ema(slow)
+        if ema_fast is None or ema_slow is None:
+            return None
+        return candles.last()[4], ema_fast, ema_slow
+
+    def tickers(self) -> List[str]:
+        return list(self._series)
+
+    def _layout(self) -> bytes:
+        return f"{','.join(self.timeframes)};{self.capacity};{','.join(map(str, self.ema_periods))}".encode('utf-8')
+
+    def dump_state(self) -> bytes:
+        """Serialize every series, prefixed with the aggregator layout."""
+        layout = self._layout()
+        parts = [struct.pack('<H', len(layout)), layout]
+        for ticker, series in list(self._series.items()):
+            data = ticker.encode('utf-8')[:255]
+            parts.append(bytes([len(data)]) + data)
+            parts.extend(series[tf].dump_state() for tf in self.timeframes)
+        return b''.join(parts)
+
+    def load_state(self, buffer) -> bool:
+        """
+        Restore state written by dump_state.
+
+        Returns:
+            False (restoring nothing) if timeframes, capacity or EMA periods changed
+        """
+        (length,) = struct.unpack_from('<H', buffer, 0)
+        if bytes(buffer[2:2 + length]) != self._layout():
+            return False
+        offset = 2 + length
+        while offset < len(buffer):
+            ticker_length = buffer[offset]
+            ticker = bytes(buffer[offset + 1:offset + 1 + ticker_length]).decode('utf-8')
+            offset += 1 + ticker_length
+            series = self._series[ticker] = {
+                tf: CandleSeries(TIMEFRAMES[tf], self.capacity, self.ema_periods) for tf in self.timeframes
+            }
+            for tf in self.timeframes:
+                offset = series[tf].load_state(buffer, offset)
+        return True
@@ -0,0 +1,108 @@
+"""
+Webhook traffic capture.
+Records raw webhook requests with arrival timestamps to a compact binary file
+for later replay (see replay_webhook.py).
+
+File format:
+    header:  b'TVCAP1\\n'
+    record:  <float64 arrival unix time><uint8 flags><uint32 body length><body bytes>
+"""
+
+import os
+import struct
+import threading
+import time
+from typing import Iterator, Optional, Tuple
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+MAGIC = b'TVCAP1\n'
+RECORD_HEADER = struct.Struct('<dBI')
+
+# Record flags
+FLAG_JSON = 0   # body was sent as application/json
+FLAG_TEXT = 1   # body was sent as text/plain (or other)
+
+
+class TrafficRecorder:
+    """Append-only recorder for raw webhook requests."""
+
+    def __init__(self, path: str):
+        """
+        Open (or create) a capture file for appending.
+
+        Args:
+            path: Capture file path
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        new_file = not os.path.exists(path) or os.path.getsize(path) == 0
+        self._file = open(path, 'ab')
+        if new_file:
+            self._file.write(MAGIC)
+            self._file.flush()
+        self.records = 0
+
+    def record(self, body: bytes, content_type: str = 'application/json', arrival: float = None):
+        """
+        Append one request to the capture file.
+
+        Args:
+            body: Raw request body
+            content_type: Request Content-Type header
+            arrival: Arrival time (defaults to now)
+        """
+        if arrival is None:
+            arrival = time.time()
+        flags = FLAG_JSON if content_type and 'json' in content_type else FLAG_TEXT
+        header = RECORD_HEADER.pack(arrival, flags, len(body))
+        with self._lock:
+            self._file.write(header)
+            self._file.write(body)
+            self._file.flush()
+            self.records += 1
+
+    def close(self):
+        """Close the capture file."""
+        with self._lock:
+            self._file.close()
+
+
+def iter_capture(path: str) -> Iterator[Tuple[float, str, bytes]]:
+    """
+    Read records from a capture file.
+
+    A truncated final record (e.g. process killed mid-write) is skipped.
+
+    Args:
+        path: Capture file path
+
+    Yields:
+        (arrival unix time, content type, raw body) tuples
+    """
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a webhook capture file")
+        while True:
+            header = f.read(RECORD_HEADER.size)
+            if len(header) < RECORD_HEADER.size:
+                return
+            arrival, flags, length = RECORD_HEADER.unpack(header)
+            body = f.read(length)
+            if len(body) < length:
+                return
+            content_type = 'application/json' if flags == FLAG_JSON else 'text/plain'
+            yield arrival, content_type, body
+
+
+def create_recorder_from_env() -> Optional[TrafficRecorder]:
+    """
+    Build a recorder if WEBHOOK_CAPTURE_FILE is set.
+
+    Returns:
+        TrafficRecorder or None if capture is disabled
+    """
+    path = os.getenv('WEBHOOK_CAPTURE_FILE', '')
+    return TrafficRecorder(path) if path else None
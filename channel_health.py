@@ -0,0 +1,136 @@
+"""
+Per-channel delivery health.
+Keeps a rolling latency and error estimate for each notification channel,
+marks channels that breach their SLO as degraded and orders channels so the
+healthiest one is tried first.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from typing import Dict, Iterable, List, Optional
+from dotenv import load_dotenv
+
+from metrics import NOTIFY_CHANNEL_ERRORS, NOTIFY_CHANNEL_SECONDS
+
+load_dotenv()
+
+
+class ChannelStats:
+    """Recent delivery attempts of one channel within a time window."""
+
+    __slots__ = ('window', '_samples')
+
+    def __init__(self, window: float, max_samples: int = 256):
+        self.window = window
+        self._samples = deque(maxlen=max_samples)  # (monotonic time, latency, ok)
+
+    def record(self, latency: float, ok: bool, now: float):
+        self._samples.append((now, latency, ok))
+
+    def _recent(self, now: float) -> List[tuple]:
+        samples = self._samples
+        while samples and now - samples[0][0] > self.window:
+            samples.popleft()
+        return list(samples)
+
+    def estimate(self, now: float) -> Optional[Dict]:
+        """
+        Rolling estimate over the window.
+
+        Returns:
+            Dict with samples, p90 latency (s), mean latency (s) and error
+            rate, or None without recent samples
+        """
+        recent = self._recent(now)
+        if not recent:
+            return None
+        latencies = sorted(latency for _, latency, _ in recent)
+        errors = sum(1 for _, _, ok in recent if not ok)
+        return {
+            'samples': len(recent),
+            'p90_latency': latencies[min(len(latencies) - 1, int(len(latencies) * 0.9))],
+            'mean_latency': sum(latencies) / len(latencies),
+            'error_rate': errors / len(recent),
+        }
+
+
+class ChannelHealth:
+    """Tracks every channel and decides which ones are degraded."""
+
+    def __init__(self, latency_slo: float = None, error_slo: float = None,
+                 window: float = None, min_samples: int = None):
+        """
+        Initialize tracker, falling back to environment configuration.
+
+        Args:
+            latency_slo: p90 delivery latency (seconds) above which a channel is degraded
+            error_slo: Error rate above which a channel is degraded
+            window: Seconds of history considered
+            min_samples: Attempts needed in the window before judging a channel
+        """
+        self.latency_slo = latency_slo if latency_slo is not None else float(os.getenv('CHANNEL_LATENCY_SLO', '3'))
+        self.error_slo = error_slo if error_slo is not None else float(os.getenv('CHANNEL_ERROR_SLO', '0.2'))
+        self.window = window if window is not None else float(os.getenv('CHANNEL_HEALTH_WINDOW', '60'))
+        self.min_samples = min_samples if min_samples is not None else int(os.getenv('CHANNEL_MIN_SAMPLES', '3'))
+        self._channels: Dict[str, ChannelStats] = {}
+        self._lock = threading.Lock()
+
+    def record(self, channel: str, latency: float, ok: bool):
+        """Record one delivery attempt."""
+        NOTIFY_CHANNEL_SECONDS.observe(latency, channel)
+        if not ok:
+            NOTIFY_CHANNEL_ERRORS.inc(1, channel)
+        with self._lock:
+            stats = self._channels.get(channel)
+            if stats is None:
+                stats = self._channels[channel] = ChannelStats(self.window)
+            stats.record(latency, ok, time.monotonic())
+
+    def estimate(self, channel: str) -> Optional[Dict]:
+        """Rolling estimate of a channel, or None without recent attempts."""
+        with self._lock:
+            stats = self._channels.get(channel)
+            return stats.estimate(time.monotonic()) if stats else None
+
+    def is_degraded(self, channel: str) -> bool:
+        """True if the channel breached its latency or error SLO in the window."""
+        estimate = self.estimate(channel)
+        if estimate is None or estimate['samples'] < self.min_samples:
+            return False
+        return estimate['p90_latency'] > self.latency_slo or estimate['error_rate'] > self.error_slo
+
+    def rank(self, channels: Iterable[str]) -> List[str]:
+        """
+        Order channels for delivery: healthy before degraded, then by latency.
+
+        Channels without history keep their configured order among equals.
+        """
+        def key(item):
+            position, channel = item
+            estimate = self.estimate(channel)
+            latency = estimate['p90_latency'] if estimate else 0.0
+            return self.is_degraded(channel), latency, position
+
+        return [channel for _, channel in sorted(enumerate(channels), key=key)]
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """Estimates and degraded flags of all tracked channels."""
+        with self._lock:
+            channels = list(self._channels)
+        snapshot = {}
+        for channel in channels:
+            estimate = self.estimate(channel)
+            if estimate is not None:
+                estimate['degraded'] = self.is_degraded(channel)
+                snapshot[channel] = estimate
+        return snapshot
+
+    def reset(self):
+        with self._lock:
+            self._channels.clear()
+
+
+# Process-wide tracker shared by every delivery path
+channel_health = ChannelHealth()
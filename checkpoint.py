@@ -0,0 +1,247 @@
+"""
+Checkpointed warm restart of in-memory runtime state.
+Components register named sections (dedup table, weekly levels, candles,
+last prices, ...) that are periodically written to one compact binary file
+and restored from it at startup through a memory map.
+
+File format:
+    header:  b'TVCKPT1\\n' <float64 created at><uint32 section count>
+    section: <16-byte name><uint32 length><uint32 crc32><payload>
+
+Checkpoints are written to a temporary file, fsynced and renamed over the
+previous one, which is kept as ``<path>.prev``. Sections that are missing,
+truncated or fail their CRC are restored from ``.prev`` instead.
+"""
+
+import atexit
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from dotenv import load_dotenv
+from log_setup import get_logger
+
+load_dotenv()
+
+log = get_logger('checkpoint')
+
+
+MAGIC = b'TVCKPT1\n'
+HEADER = struct.Struct('<8sdI')
+SECTION = struct.Struct('<16sII')
+_TIME_ENTRY = struct.Struct('<dB')
+
+
+def pack_times(items: Iterable[Tuple[str, float]]) -> bytes:
+    """Encode (key, time) pairs such as a dedup table."""
+    parts = []
+    for key, value in items:
+        data = key.encode('utf-8')[:255]
+        parts.append(_TIME_ENTRY.pack(value, len(data)) + data)
+    return b''.join(parts)
+
+
+def unpack_times(buffer) -> Iterator[Tuple[str, float]]:
+    """Decode pairs written by pack_times."""
+    offset = 0
+    end = len(buffer)
+    while offset + _TIME_ENTRY.size <= end:
+        value, length = _TIME_ENTRY.unpack_from(buffer, offset)
+        offset += _TIME_ENTRY.size
+        yield bytes(buffer[offset:offset + length]).decode('utf-8'), value
+        offset += length
+
+
+def write_checkpoint(path: str, sections: Dict[str, bytes], created_at: float = None) -> int:
+    """
+    Atomically write a checkpoint file, keeping the previous one as ``.prev``.
+
+    Args:
+        path: Checkpoint file path
+        sections: Section name (max 16 bytes) -> payload
+        created_at: Checkpoint time (defaults to now)
+
+    Returns:
+        Bytes written
+    """
+    created_at = time.time() if created_at is None else created_at
+    parts = [HEADER.pack(MAGIC, created_at, len(sections))]
+    for name, payload in sections.items():
+        parts.append(SECTION.pack(name.encode('utf-8'), len(payload), zlib.crc32(payload)))
+        parts.append(payload)
+    data = b''.join(parts)
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    if os.path.exists(path):
+        os.replace(path, f"{path}.prev")
+    os.replace(tmp_path, path)
+    return len(data)
+
+
+def _read_sections(path: str, load: Callable[[str, memoryview], None], skip: Iterable[str] = ()) -> Tuple[List[str], Optional[float]]:
+    """
+    Memory-map a checkpoint and hand each valid section to ``load``.
+
+    A section whose ``load`` raises is logged and left out of the result,
+    so the caller can fall back to an older checkpoint for it.
+
+    Returns:
+        (names of sections loaded, checkpoint time or None if unreadable)
+    """
+    try:
+        f = open(path, 'rb')
+    except OSError:
+        return [], None
+    loaded = []
+    with f:
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return [], None  # empty file
+        with mm:
+            if len(mm) < HEADER.size:
+                return [], None
+            magic, created_at, count = HEADER.unpack_from(mm, 0)
+            if magic != MAGIC:
+                return [], None
+            offset = HEADER.size
+            with memoryview(mm) as view:
+                for _ in range(count):
+                    if offset + SECTION.size > len(mm):
+                        break  # truncated
+                    raw_name, length, crc = SECTION.unpack_from(mm, offset)
+                    offset += SECTION.size
+                    if offset + length > len(mm):
+                        break
+                    name = raw_name.rstrip(b'\0').decode('utf-8', 'replace')
+                    with view[offset:offset + length] as payload:
+                        if name not in skip and zlib.crc32(payload) == crc:
+                            try:
+                                load(name, payload)
+                                loaded.append(name)
+                            except Exception as e:
+                                log.warning(f"⚠️  Could not restore checkpoint section {name} from {path}: {e}")
+                    offset += length
+    return loaded, created_at
+
+
+class Checkpointer:
+    """Periodically checkpoints registered state sections and restores them."""
+
+    def __init__(self, path: str, interval: float = None):
+        """
+        Args:
+            path: Checkpoint file path
+            interval: Seconds between checkpoints, falls back to CHECKPOINT_INTERVAL
+        """
+        self.path = path
+        self.interval = interval if interval is not None else float(os.getenv('CHECKPOINT_INTERVAL', '30'))
+        self._sections: Dict[str, Tuple[Callable[[], bytes], Callable[[memoryview], None]]] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.saves = 0
+
+    def register(self, name: str, dump: Callable[[], bytes], load: Callable[[memoryview], None]):
+        """
+        Register a state section.
+
+        Args:
+            name: Section name (max 16 bytes)
+            dump: Returns the section payload
+            load: Restores state from a payload (must copy what it keeps;
+                the buffer is only valid during the call)
+        """
+        if len(name.encode('utf-8')) > 16:
+            raise ValueError(f"Section name too long: {name!r}")
+        self._sections[name] = (dump, load)
+
+    def save(self) -> int:
+        """Write a checkpoint of every section now; returns bytes written."""
+        sections = {}
+        for name, (dump, _) in list(self._sections.items()):
+            try:
+                sections[name] = dump()
+            except Exception as e:
+                log.warning(f"⚠️  Checkpoint section {name} failed: {e}")
+        with self._lock:
+            size = write_checkpoint(self.path, sections)
+            self.saves += 1
+        return size
+
+    def _load(self, name: str, payload: memoryview):
+        entry = self._sections.get(name)
+        if entry is not None:
+            entry[1](payload)
+
+    def restore(self) -> List[str]:
+        """
+        Restore registered sections from the last checkpoint.
+
+        Sections that are unreadable in the current file, or whose loader
+        fails on it, come from ``.prev``; a section that fails in both is
+        skipped so startup never aborts on a bad checkpoint.
+
+        Returns:
+            Names of the restored sections
+        """
+        start = time.perf_counter()
+        restored, created_at = _read_sections(self.path, self._load)
+        missing = [name for name in self._sections if name not in restored]
+        if missing:
+            older, prev_created_at = _read_sections(f"{self.path}.prev", self._load, skip=restored)
+            restored += older
+            created_at = created_at or prev_created_at
+        if restored:
+            age = time.time() - created_at
+            log.info(f"♻️  Restored {', '.join(restored)} from {self.path} "
+                     f"({age:.0f}s old) in {(time.perf_counter() - start) * 1000:.1f}ms")
+        return restored
+
+    def start(self):
+        """Checkpoint every ``interval`` seconds in the background and at exit."""
+        if self._thread is not None or self.interval <= 0:
+            return
+
+        def run():
+            while not self._stop.wait(self.interval):
+                try:
+                    self.save()
+                except OSError as e:
+                    log.warning(f"⚠️  Checkpoint to {self.path} failed: {e}")
+
+        self._thread = threading.Thread(target=run, daemon=True, name='checkpoint')
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def stop(self):
+        """Stop the background thread and write a final checkpoint."""
+        self._stop.set()
+        try:
+            self.save()
+        except OSError as e:
+            log.warning(f"⚠️  Final checkpoint to {self.path} failed: {e}")
+
+
+def create_checkpointer_from_env(name: str) -> Optional[Checkpointer]:
+    """
+    Create a checkpointer if CHECKPOINT_DIR is set.
+
+    Args:
+        name: Process role, used as the file name (e.g. 'webhook', 'monitor')
+
+    Returns:
+        Checkpointer for ``<CHECKPOINT_DIR>/<name>.ckpt``, or None if disabled
+    """
+    directory = os.getenv('CHECKPOINT_DIR')
+    if not directory:
+        return None
+    os.makedirs(directory, exist_ok=True)
+    return Checkpointer(os.path.join(directory, f"{name}.ckpt"))
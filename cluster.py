@@ -0,0 +1,406 @@
+"""
+Cluster mode for the webhook tier.
+Partitions tickers across webhook nodes with consistent hashing so dedup and
+strategy state for a ticker live on exactly one node.
+"""
+
+import bisect
+import hashlib
+import hmac
+import json
+import os
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+import requests
+from dotenv import load_dotenv
+from log_setup import get_logger
+from shm_table import SharedDocument
+
+load_dotenv()
+
+log = get_logger('cluster')
+
+
+# Header marking a request already routed by a cluster node (prevents loops)
+FORWARDED_HEADER = 'X-Cluster-Forwarded-By'
+SECRET_HEADER = 'X-Cluster-Secret'
+
+
+def _hash(key: str) -> int:
+    """64-bit stable hash used for ring placement."""
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), 'big')
+
+
+class HashRing:
+    """Consistent hash ring with virtual nodes."""
+
+    def __init__(self, nodes: Iterable[str] = (), vnodes: int = 64):
+        self.vnodes = vnodes
+        self._nodes = set()
+        # (sorted point hashes, owner per point), replaced as one object
+        self._points: Tuple[List[int], List[str]] = ([], [])
+        for node in nodes:
+            self.add(node)
+
+    def _rebuild(self):
+        points = sorted(
+            (_hash(f"{node}#{i}"), node) for node in self._nodes for i in range(self.vnodes)
+        )
+        # Single attribute swap so lock-free readers always see a consistent ring
+        self._points = ([p[0] for p in points], [p[1] for p in points])
+
+    def add(self, node: str):
+        """Add a node to the ring."""
+        if node not in self._nodes:
+            self._nodes.add(node)
+            self._rebuild()
+
+    def remove(self, node: str):
+        """Remove a node from the ring."""
+        if node in self._nodes:
+            self._nodes.discard(node)
+            self._rebuild()
+
+    def owner(self, key: str) -> Optional[str]:
+        """Return the node that owns ``key``."""
+        hashes, owners = self._points
+        if not hashes:
+            return None
+        index = bisect.bisect(hashes, _hash(key))
+        return owners[index % len(owners)]
+
+    @property
+    def nodes(self) -> List[str]:
+        return sorted(self._nodes)
+
+
+def ticker_of(dedup_key: str) -> str:
+    """Strip the signal-type suffix from a dedup key ("BTCUSDT:sl" -> "BTCUSDT")."""
+    return dedup_key.split(':', 1)[0]
+
+
+class ClusterNode:
+    """
+    Membership, routing and state handoff for one webhook node.
+
+    Nodes are identified by their base URL (e.g. ``http://10.0.0.5:5000``).
+    """
+
+    def __init__(
+        self,
+        self_url: str,
+        peers: Iterable[str] = (),
+        secret: str = '',
+        state: Dict[str, int] = None,
+        heartbeat_interval: float = None,
+        failure_threshold: int = None,
+        timeout: float = 2.0,
+        forward_timeout: float = None,
+        membership: SharedDocument = None
+    ):
+        """
+        Initialize cluster node.
+
+        Args:
+            self_url: This node's base URL
+            peers: Other nodes' base URLs
+            secret: Shared secret for internal endpoints
+            state: Dedup table to partition (SupremoStrategy.last_signal_time)
+            heartbeat_interval: Seconds between peer health checks
+            failure_threshold: Failed checks before a peer leaves the ring
+            timeout: Timeout for internal requests (and for connecting when forwarding)
+            forward_timeout: Seconds to wait for the owner's reply to a forwarded signal
+            membership: Shared membership of prefork workers, so every worker
+                of this node routes with the same ring
+        """
+        self.self_url = self_url.rstrip('/')
+        self.secret = secret
+        self.state = state if state is not None else {}
+        if heartbeat_interval is None:
+            heartbeat_interval = float(os.getenv('CLUSTER_HEARTBEAT_INTERVAL', '2'))
+        self.heartbeat_interval = heartbeat_interval
+        self.failure_threshold = failure_threshold or int(os.getenv('CLUSTER_FAILURE_THRESHOLD', '3'))
+        self.timeout = timeout
+        if forward_timeout is None:
+            forward_timeout = float(os.getenv('CLUSTER_FORWARD_TIMEOUT', '10'))
+        self.forward_timeout = forward_timeout
+
+        self.peers = {p.rstrip('/') for p in peers if p and p.rstrip('/') != self.self_url}
+        self.ring = HashRing([self.self_url, *self.peers])
+        self._failures: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._session = requests.Session()
+        self.membership = membership
+        self._version = 0
+        if membership is not None:
+            # The first worker publishes its view; later (and restarted) workers adopt the current one
+            self._version, document = membership.update(lambda current: current or self._document())
+            self._apply(document)
+
+    # -- routing ---------------------------------------------------------
+
+    def owner_of(self, ticker: str) -> str:
+        """Return the base URL of the node owning ``ticker``."""
+        self._sync()
+        return self.ring.owner(ticker) or self.self_url
+
+    def is_local(self, ticker: str) -> bool:
+        """True if this node owns ``ticker``."""
+        return self.owner_of(ticker) == self.self_url
+
+    def _headers(self) -> Dict[str, str]:
+        headers = {FORWARDED_HEADER: self.self_url}
+        if self.secret:
+            headers[SECRET_HEADER] = self.secret
+        return headers
+
+    def forward(self, owner: str, body: bytes, content_type: str) -> Optional[Tuple[bytes, int, str]]:
+        """
+        Forward a raw webhook request to the owning node.
+
+        Only a failed connection means the owner is unreachable. Once the
+        request is sent the owner may already be processing it, so a slow or
+        broken reply is answered with 503 for the sender to retry rather than
+        processed here as well.
+
+        Returns:
+            (response body, status, content type), or None if the owner is unreachable
+        """
+        headers = self._headers()
+        headers['Content-Type'] = content_type or 'application/json'
+        try:
+            response = self._session.post(
+                f"{owner}/webhook", data=body, headers=headers, timeout=(self.timeout, self.forward_timeout)
+            )
+        except requests.exceptions.ConnectionError as e:  # includes ConnectTimeout
+            log.warning(f"⚠️  Cluster: forward to {owner} failed: {e}",
+                        extra={'sample_key': f'forward:{owner}'})
+            self._record_failure(owner)
+            return None
+        except requests.exceptions.RequestException as e:
+            log.warning(f"⚠️  Cluster: no reply from {owner}: {e}", extra={'sample_key': f'forward:{owner}'})
+            body = json.dumps({'error': f'Owner node {owner} did not reply, retry later'}).encode()
+            return body, 503, 'application/json'
+        return response.content, response.status_code, response.headers.get('Content-Type', 'application/json')
+
+    def is_authorized(self, headers) -> bool:
+        """Check the shared secret on an internal request (never authorized without one)."""
+        provided = headers.get(SECRET_HEADER) or ''
+        return bool(self.secret) and hmac.compare_digest(provided.encode(), self.secret.encode())
+
+    # -- membership ------------------------------------------------------
+
+    def _document(self) -> Dict:
+        return {'ring': self.ring.nodes, 'peers': sorted(self.peers), 'failures': self._failures}
+
+    def _apply(self, document: Dict):
+        """Adopt membership published by another prefork worker (lock held)."""
+        self.peers = set(document['peers'])
+        self._failures = dict(document['failures'])
+        if document['ring'] != self.ring.nodes:
+            # Swap in a new ring so lock-free readers never see a half-updated one
+            self.ring = HashRing(document['ring'], self.ring.vnodes)
+
+    def _sync(self):
+        """Reload membership if another prefork worker changed it."""
+        if self.membership is None or self.membership.version == self._version:
+            return
+        version, document = self.membership.read()
+        with self._lock:
+            self._apply(document)
+            self._version = version
+
+    def _mutate(self, change: Callable[[], object]):
+        """
+        Apply a membership change, for every prefork worker when membership is shared.
+
+        Returns:
+            Whatever ``change`` returns
+        """
+        if self.membership is None:
+            with self._lock:
+                return change()
+        result = None
+
+        def shared(document):
+            nonlocal result
+            with self._lock:
+                self._apply(document)
+                result = change()
+                return self._document()
+
+        version, _ = self.membership.update(shared)
+        with self._lock:
+            self._version = max(self._version, version)
+        return result
+
+    def add_member(self, node: str):
+        """Add a node to the ring and hand off state it now owns."""
+        node = node.rstrip('/')
+        if node == self.self_url:
+            return
+
+        def change():
+            self.peers.add(node)
+            self._failures.pop(node, None)
+            if node in self.ring.nodes:
+                return False
+            self.ring.add(node)
+            return True
+
+        if not self._mutate(change):
+            return
+        log.info(f"🧩 Cluster: {node} joined ({len(self.ring.nodes)} nodes)")
+        self.handoff()
+
+    def remove_member(self, node: str, forget: bool = False):
+        """
+        Remove a node from the ring.
+
+        Args:
+            node: Node URL
+            forget: Also stop health-checking it (graceful leave)
+        """
+        node = node.rstrip('/')
+
+        def change():
+            if forget:
+                self.peers.discard(node)
+            if node not in self.ring.nodes:
+                return False
+            self.ring.remove(node)
+            return True
+
+        if not self._mutate(change):
+            return
+        log.info(f"🧩 Cluster: {node} left ({len(self.ring.nodes)} nodes)")
+
+    def handoff(self):
+        """Send dedup entries for tickers owned by other nodes to their owners."""
+        moved: Dict[str, Dict[str, int]] = {}
+        for key, value in list(self.state.items()):
+            owner = self.owner_of(ticker_of(key))
+            if owner != self.self_url:
+                moved.setdefault(owner, {})[key] = value
+
+        for owner, entries in moved.items():
+            try:
+                self._session.post(
+                    f"{owner}/cluster/state", json={'entries': entries},
+                    headers=self._headers(), timeout=self.timeout
+                ).raise_for_status()
+            except requests.exceptions.RequestException as e:
+                log.warning(f"⚠️  Cluster: state handoff to {owner} failed: {e}")
+                continue
+            for key in entries:
+                self.state.pop(key, None)
+
+    def merge_state(self, entries: Dict[str, int]):
+        """Merge dedup entries handed off by another node (latest wins)."""
+        for key, value in entries.items():
+            current = self.state.get(key)
+            if current is None or value > current:
+                self.state[key] = int(value)
+
+    def announce(self):
+        """Tell every peer this node has joined."""
+        for peer in list(self.peers):
+            try:
+                self._session.post(
+                    f"{peer}/cluster/join", json={'node': self.self_url},
+                    headers=self._headers(), timeout=self.timeout
+                )
+            except requests.exceptions.RequestException:
+                pass  # Peer will pick us up through its heartbeat
+
+    def leave(self):
+        """Gracefully leave: hand off all state, then notify peers."""
+        self._stop.set()
+        self.ring.remove(self.self_url)
+        self.handoff()
+        for peer in list(self.peers):
+            try:
+                self._session.post(
+                    f"{peer}/cluster/leave", json={'node': self.self_url},
+                    headers=self._headers(), timeout=self.timeout
+                )
+            except requests.exceptions.RequestException:
+                pass
+
+    # -- failure detection -----------------------------------------------
+
+    def _record_failure(self, node: str):
+        def change():
+            self._failures[node] = self._failures.get(node, 0) + 1
+            return self._failures[node] >= self.failure_threshold
+
+        if self._mutate(change):
+            self.remove_member(node)
+
+    def check_peers(self):
+        """Health-check every known peer once."""
+        for peer in list(self.peers):
+            try:
+                self._session.get(f"{peer}/health", timeout=self.timeout).raise_for_status()
+            except requests.exceptions.RequestException:
+                self._record_failure(peer)
+                continue
+            if peer not in self.ring.nodes:
+                self.add_member(peer)
+            elif peer in self._failures:
+                self._mutate(lambda: self._failures.pop(peer, None))
+
+    def start(self, primary: bool = True):
+        """
+        Announce this node and start the heartbeat thread.
+
+        Args:
+            primary: Announce and health-check peers (once per server, not per
+                prefork worker; the others follow the shared membership)
+        """
+        if not primary:
+            return
+        self.announce()
+        thread = threading.Thread(target=self._heartbeat_loop, daemon=True, name='cluster-heartbeat')
+        thread.start()
+
+    def _heartbeat_loop(self):
+        while not self._stop.wait(self.heartbeat_interval):
+            self.check_peers()
+
+    def members(self) -> Dict:
+        """Describe cluster membership."""
+        self._sync()
+        with self._lock:
+            return {
+                'self': self.self_url,
+                'ring': self.ring.nodes,
+                'peers': sorted(self.peers),
+                'failures': dict(self._failures)
+            }
+
+
+def create_cluster_from_env(state: Dict[str, int], membership: SharedDocument = None) -> Optional[ClusterNode]:
+    """
+    Build a cluster node if CLUSTER_SELF_URL is set.
+
+    Args:
+        state: Dedup table to partition
+        membership: Shared membership of prefork workers (None for a single process)
+
+    Returns:
+        ClusterNode or None if cluster mode is disabled
+
+    Raises:
+        ValueError: If CLUSTER_SECRET is unset; the internal endpoints share
+            the public webhook port and would accept anyone
+    """
+    self_url = os.getenv('CLUSTER_SELF_URL', '')
+    if not self_url:
+        return None
+    secret = os.getenv('CLUSTER_SECRET', '')
+    if not secret:
+        raise ValueError("Cluster mode requires CLUSTER_SECRET")
+    peers = [p.strip() for p in os.getenv('CLUSTER_NODES', '').split(',') if p.strip()]
+    return ClusterNode(self_url, peers, secret=secret, state=state, membership=membership)
@@ -0,0 +1,169 @@
+"""
+Cross-channel digest batching.
+Groups signals that arrive within a short window and sends one digest per
+channel instead of one notification per signal.
+"""
+
+import json
+import os
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+from dotenv import load_dotenv
+from notification import (
+    CONSOLE_CHANNEL,
+    EMAIL_SUBJECT_PREFIX,
+    get_configured_channels,
+    send_to_channel,
+)
+from log_setup import get_logger
+from metrics import DIGEST_DELIVERY_FAILURES
+
+load_dotenv()
+
+log = get_logger('digest')
+
+
+DIGEST_SEPARATOR = '\n\n' + '─' * 20 + '\n\n'
+
+
+def render_digest(
+    items: List[Tuple[object, str]],
+    channels: List[str],
+    embed_renderer: Optional[Callable[[object], Dict]] = None
+) -> List[Tuple[str, str]]:
+    """
+    Render a group of signals as one body per channel.
+
+    Args:
+        items: (signal, formatted message) pairs
+        channels: Target channel names
+        embed_renderer: Builds a Discord embed for a signal (optional)
+
+    Returns:
+        List of (channel, body) pairs ready for send_to_channel
+    """
+    if len(items) == 1:
+        message = items[0][1]
+        return [(channel, message) for channel in channels]
+
+    tickers = ', '.join(dict.fromkeys(signal.ticker for signal, _ in items))
+    header = f"📦 SUPREMO DIGEST - {len(items)} signals ({tickers})"
+    text = header + DIGEST_SEPARATOR + DIGEST_SEPARATOR.join(message for _, message in items)
+
+    bodies = []
+    for channel in channels:
+        if channel == 'discord' and embed_renderer is not None:
+            embeds = [embed_renderer(signal) for signal, _ in items]
+            bodies.append(('discord_embeds', json.dumps(embeds)))
+        elif channel == 'email':
+            subject = f"Supremo Digest: {len(items)} signals ({tickers})"
+            bodies.append(('email', f"{EMAIL_SUBJECT_PREFIX}{subject}\n{text}"))
+        else:
+            # Telegram splits long digests at 4096 chars on delivery
+            bodies.append((channel, text))
+    return bodies
+
+
+class DigestBatcher:
+    """
+    Time-window batcher for outgoing signal notifications.
+
+    The first signal of a burst opens a window of ``window`` seconds; every
+    signal submitted before it closes is delivered in the same digest.
+    Urgent signals bypass the window and are sent immediately.
+
+    Queued signals only live in memory, so callers with a crash-safe
+    outbox should leave batching off.
+    """
+
+    def __init__(
+        self,
+        window: float = None,
+        max_batch: int = None,
+        deliver: Callable[[str, str], bool] = send_to_channel,
+        embed_renderer: Optional[Callable[[object], Dict]] = None,
+        channels: Callable[[], List[str]] = None,
+        on_delivered: Optional[Callable[[object], None]] = None
+    ):
+        """Initialize batcher, falling back to environment configuration."""
+        if window is None:
+            window = float(os.getenv('NOTIFY_BATCH_WINDOW_MS', '0')) / 1000
+        self.window = window
+        self.max_batch = max_batch or int(os.getenv('NOTIFY_BATCH_MAX', '50'))
+        self.deliver = deliver
+        self.embed_renderer = embed_renderer
+        self.channels = channels or (lambda: get_configured_channels() or [CONSOLE_CHANNEL])
+        self.on_delivered = on_delivered
+        self.enabled = self.window > 0
+
+        self._lock = threading.Lock()
+        self._items: List[Tuple[object, str]] = []
+        self._timer: Optional[threading.Timer] = None
+        self.digests_sent = 0
+        self.delivery_failures = 0
+        # Prefork workers hand windowed signals to the primary worker's batcher
+        self.relay = None
+
+    def submit(self, signal, message: str, urgent: bool = False):
+        """
+        Queue a signal for the current digest window.
+
+        Args:
+            signal: Processed Signal
+            message: Formatted text message for the signal
+            urgent: Send immediately, bypassing the window
+        """
+        if urgent or not self.enabled:
+            self._send([(signal, message)])
+            return
+        if self.relay is not None and self.relay.send('digest', signal, message):
+            if self.on_delivered:
+                self.on_delivered(signal)
+            return
+
+        batch = None
+        with self._lock:
+            self._items.append((signal, message))
+            if len(self._items) >= self.max_batch:
+                batch = self._take()
+            elif self._timer is None:
+                self._timer = threading.Timer(self.window, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+        if batch:
+            self._send(batch)
+
+    def _take(self) -> List[Tuple[object, str]]:
+        """Detach the queued items and cancel the window timer (lock held)."""
+        batch = self._items
+        self._items = []
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        return batch
+
+    def flush(self):
+        """Send everything queued in the current window."""
+        with self._lock:
+            batch = self._take()
+        if batch:
+            self._send(batch)
+
+    def _send(self, batch: List[Tuple[object, str]]):
+        for channel, body in render_digest(batch, self.channels(), self.embed_renderer):
+            try:
+                ok = self.deliver(channel, body)
+                error = None if ok else 'delivery returned False'
+            except Exception as e:
+                ok = False
+                error = str(e)
+            if not ok:
+                self.delivery_failures += 1
+                DIGEST_DELIVERY_FAILURES.inc(1, channel)
+                tickers = ', '.join(signal.ticker for signal, _ in batch)
+                log.error(f"❌ Digest delivery failed on {channel} ({tickers}): {error}",
+                          extra={'channel': channel, 'signals': len(batch)})
+        self.digests_sent += 1
+        if self.on_delivered:
+            for signal, _ in batch:
+                self.on_delivered(signal)
@@ -6,83 +6,114 @@ Supports multiple exchanges: Binance, Coinbase, etc.
 import requests
 import os
 from dotenv import load_dotenv
+from symbols import clean_ticker, symbol_registry
+from http_transport import transport
+from log_setup import get_logger
 
 load_dotenv()
 
+log = get_logger('exchange_api')
 
-def get_binance_price(symbol):
+
+def get_binance_price(symbol, deadline=None):
     """
     Fetch current price from Binance API.
     
     Args:
         symbol: Trading pair symbol (e.g., 'BTCUSDT', 'ETHUSDT')
+        deadline: time.monotonic() to finish by (defaults to the HTTP_DEADLINE budget)
         
     Returns:
         Current price as float, or None if error
     """
     try:
-        url = "https://api.binance.com/api/v3/ticker/price"
+        url = f"{os.getenv('BINANCE_API_URL', 'https://api.binance.com')}/api/v3/ticker/price"
         params = {'symbol': symbol}
-        response = requests.get(url, params=params, timeout=10)
+        response = transport.get(url, params=params, deadline=deadline)
         response.raise_for_status()
         data = response.json()
         return float(data['price'])
     except requests.exceptions.RequestException as e:
-        print(f"Binance API error: {e}")
+        log.warning(f"⚠️  Binance API error: {e}", extra={'sample_key': 'binance_api_error'})
+        return None
+    except (KeyError, ValueError) as e:
+        log.warning(f"⚠️  Error parsing Binance response: {e}", extra={'sample_key': 'binance_parse_error'})
+        return None
+
+
+def get_binance_depth(symbol, limit=1000, deadline=None):
+    """
+    Fetch an order book snapshot from Binance API.
+
+    Args:
+        symbol: Trading pair symbol (e.g., 'BTCUSDT')
+        limit: Price levels per side (Binance allows up to 5000)
+        deadline: time.monotonic() to finish by (defaults to the HTTP_DEADLINE budget)
+
+    Returns:
+        Dict with lastUpdateId, bids and asks ([price, qty] strings), or None if failed
+    """
+    try:
+        url = f"{os.getenv('BINANCE_API_URL', 'https://api.binance.com')}/api/v3/depth"
+        params = {'symbol': symbol, 'limit': limit}
+        response = transport.get(url, params=params, deadline=deadline)
+        response.raise_for_status()
+        data = response.json()
+        if 'lastUpdateId' not in data:
+            raise KeyError('lastUpdateId')
+        return data
+    except requests.exceptions.RequestException as e:
+        log.warning(f"⚠️  Binance depth error: {e}", extra={'sample_key': 'binance_depth_error'})
         return None
     except (KeyError, ValueError) as e:
-        print(f"Error parsing Binance response: {e}")
+        log.warning(f"⚠️  Error parsing Binance depth response: {e}", extra={'sample_key': 'binance_depth_parse_error'})
         return None
 
 
-def get_coinbase_price(symbol):
+def get_coinbase_price(symbol, deadline=None):
     """
     Fetch current price from Coinbase API.
     
     Args:
         symbol: Trading pair symbol (e.g., 'BTC-USD', 'ETH-USD')
+        deadline: time.monotonic() to finish by (defaults to the HTTP_DEADLINE budget)
         
     Returns:
         Current price as float, or None if error
     """
     try:
-        url = f"https://api.coinbase.com/v2/exchange-rates"
+        url = f"{os.getenv('COINBASE_API_URL', 'https://api.coinbase.com')}/v2/exchange-rates"
         params = {'currency': symbol.split('-')[0]}
-        response = requests.get(url, params=params, timeout=10)
+        response = transport.get(url, params=params, deadline=deadline)
         response.raise_for_status()
         data = response.json()
         base_currency = symbol.split('-')[1] if '-' in symbol else 'USD'
         return float(data['data']['rates'][base_currency])
     except requests.exceptions.RequestException as e:
-        print(f"Coinbase API error: {e}")
+        log.warning(f"⚠️  Coinbase API error: {e}", extra={'sample_key': 'coinbase_api_error'})
         return None
     except (KeyError, ValueError) as e:
-        print(f"Error parsing Coinbase response: {e}")
+        log.warning(f"⚠️  Error parsing Coinbase response: {e}", extra={'sample_key': 'coinbase_parse_error'})
         return None
 
 
-def get_current_price(symbol):
+def get_current_price(symbol, deadline=None):
     """
     Get current price from the configured exchange.
     
     Args:
         symbol: Trading pair symbol
+        deadline: time.monotonic() to finish by (defaults to the HTTP_DEADLINE budget)
         
     Returns:
         Current price as float, or None if error
     """
     exchange = os.getenv('EXCHANGE', 'binance').lower()
     
-    if exchange == 'binance':
-        return get_binance_price(symbol)
-    elif exchange == 'coinbase':
-        # Convert symbol format if needed (BTCUSDT -> BTC-USD)
-        if '-' not in symbol:
-            base = symbol.replace('USDT', '').replace('USD', '')
-            symbol = f"{base}-USD"
-        return get_coinbase_price(symbol)
-    else:
-        print(f"Unsupported exchange: {exchange}")
-        print("Defaulting to Binance...")
-        return get_binance_price(symbol)
+    if exchange == 'coinbase':
+        # Map to a Coinbase product keeping the quote asset (BTCUSDT -> BTC-USDT)
+        return get_coinbase_price(symbol_registry.coinbase_product(symbol) or symbol, deadline)
+    if exchange != 'binance':
+        log.warning(f"⚠️  Unsupported exchange: {exchange}, defaulting to Binance", extra={'sample_key': 'unsupported_exchange'})
+    return get_binance_price(symbol_registry.normalize(symbol) or clean_ticker(symbol).replace('-', ''), deadline)
 
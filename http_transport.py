@@ -0,0 +1,234 @@
+"""
+Shared HTTP transport for exchange and notification calls.
+One requests session keeps warm keep-alive connections per host, caches
+DNS lookups, uses separate connect and read timeouts and bounds each call
+by a deadline budget, so alerts and price fetches don't pay a TCP and TLS
+handshake every time.
+"""
+
+import os
+import socket
+import threading
+import time
+from typing import Dict, Tuple
+from urllib.parse import urlparse
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from dotenv import load_dotenv
+from metrics import HTTP_CONNECTIONS_OPENED, HTTP_REQUESTS
+
+load_dotenv()
+
+
+class DeadlineExceeded(requests.exceptions.Timeout):
+    """The call's deadline budget ran out before the request could start."""
+
+
+class DNSCache:
+    """Caches resolved addresses per (host, port) for ``ttl`` seconds."""
+
+    def __init__(self, ttl: float):
+        """
+        Args:
+            ttl: Seconds to keep an address (0 disables caching)
+        """
+        self.ttl = ttl
+        self._entries: Dict[Tuple[str, int], Tuple[float, str]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def resolve(self, host: str, port: int) -> str:
+        """
+        Address to connect to for ``host``.
+
+        Returns the host itself when caching is off or resolution fails, so
+        the connection reports the usual name resolution error.
+        """
+        if self.ttl <= 0:
+            return host
+        key = (host, port)
+        now = time.monotonic()
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] > now:
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+        try:
+            infos = socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+        except OSError:
+            return host
+        address = infos[0][4][0]
+        with self._lock:
+            self._entries[key] = (now + self.ttl, address)
+        return address
+
+    def forget(self, host: str, port: int):
+        """Drop a cached address (e.g. after a failed connect)."""
+        with self._lock:
+            self._entries.pop((host, port), None)
+
+    def stats(self) -> Dict:
+        return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses}
+
+
+class _TransportAdapter(HTTPAdapter):
+    """HTTPAdapter whose connections resolve through the transport's DNS cache."""
+
+    def __init__(self, transport: 'HTTPTransport', **kwargs):
+        self._transport = transport
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        transport = self._transport
+
+        class Connection(HTTPConnection):
+            def _new_conn(self):
+                return transport._connect(self, super()._new_conn)
+
+        class SecureConnection(HTTPSConnection):
+            def _new_conn(self):
+                return transport._connect(self, super()._new_conn)
+
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': type('ConnectionPool', (HTTPConnectionPool,), {'ConnectionCls': Connection}),
+            'https': type('SecureConnectionPool', (HTTPSConnectionPool,), {'ConnectionCls': SecureConnection}),
+        }
+
+
+class HTTPTransport:
+    """Pooled HTTP client shared by outbound API calls."""
+
+    def __init__(self, connect_timeout: float = None, read_timeout: float = None, budget: float = None,
+                 pool_hosts: int = None, pool_size: int = None, dns_ttl: float = None):
+        """
+        Initialize transport, falling back to environment configuration.
+
+        Args:
+            connect_timeout: Seconds to establish a connection
+            read_timeout: Seconds to wait for each read of the response
+            budget: Default deadline budget per call in seconds
+            pool_hosts: Number of hosts to keep connection pools for
+            pool_size: Keep-alive connections kept per host
+            dns_ttl: Seconds to cache resolved addresses (0 = no cache)
+        """
+        self.connect_timeout = connect_timeout or float(os.getenv('HTTP_CONNECT_TIMEOUT', '3'))
+        self.read_timeout = read_timeout or float(os.getenv('HTTP_READ_TIMEOUT', '10'))
+        self.budget = budget or float(os.getenv('HTTP_DEADLINE', '15'))
+        pool_hosts = pool_hosts or int(os.getenv('HTTP_POOL_HOSTS', '10'))
+        self.pool_size = pool_size or int(os.getenv('HTTP_POOL_SIZE', '10'))
+        if dns_ttl is None:
+            dns_ttl = float(os.getenv('HTTP_DNS_TTL', '300'))
+        self.resolver = DNSCache(dns_ttl)
+
+        self.adapter = _TransportAdapter(self, pool_connections=pool_hosts, pool_maxsize=self.pool_size)
+        self.session = requests.Session()
+        self.session.mount('http://', self.adapter)
+        self.session.mount('https://', self.adapter)
+        self._lock = threading.Lock()
+        self._opened: Dict[str, int] = {}
+        self._requests: Dict[str, int] = {}
+
+    def _connect(self, connection, connect):
+        """Open a socket for ``connection`` using the cached address."""
+        host = connection._dns_host
+        name = f"{host}:{connection.port}"
+        connection._dns_host = self.resolver.resolve(host, connection.port)
+        try:
+            sock = connect()
+        except Exception:
+            self.resolver.forget(host, connection.port)
+            raise
+        finally:
+            connection._dns_host = host
+        with self._lock:
+            self._opened[name] = self._opened.get(name, 0) + 1
+        HTTP_CONNECTIONS_OPENED.inc(1, name)
+        return sock
+
+    def deadline(self, budget: float = None) -> float:
+        """Monotonic time by which a call (or a group of calls) must finish."""
+        return time.monotonic() + (self.budget if budget is None else budget)
+
+    def request(self, method: str, url: str, deadline: float = None, **kwargs) -> requests.Response:
+        """
+        Send a request over a pooled connection.
+
+        Connect and read timeouts are capped by the time left before the
+        deadline. The read timeout applies per socket read, so a response
+        that keeps trickling in can still overrun the deadline slightly.
+
+        Args:
+            method: HTTP method
+            url: Request URL
+            deadline: time.monotonic() value to finish by (defaults to now + budget)
+            **kwargs: Passed to requests (json, params, headers, ...)
+
+        Returns:
+            Response
+
+        Raises:
+            requests.exceptions.RequestException: On failure, including DeadlineExceeded
+        """
+        if deadline is None:
+            deadline = self.deadline()
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise DeadlineExceeded(f"Deadline exceeded before {method} {url}")
+        timeout = (min(self.connect_timeout, remaining), min(self.read_timeout, remaining))
+        parsed = urlparse(url)
+        name = f"{parsed.hostname}:{parsed.port or (443 if parsed.scheme == 'https' else 80)}"
+        with self._lock:
+            self._requests[name] = self._requests.get(name, 0) + 1
+        HTTP_REQUESTS.inc(1, name)
+        return self.session.request(method, url, timeout=timeout, **kwargs)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request('POST', url, **kwargs)
+
+    def stats(self) -> Dict:
+        """
+        Pool statistics.
+
+        Returns:
+            Dict with per-host requests, connections opened, reused and idle
+            connections, plus DNS cache counters
+        """
+        idle: Dict[str, int] = {}
+        pools = self.adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is not None and pool.pool is not None:
+                name = f"{pool.host}:{pool.port}"
+                idle[name] = idle.get(name, 0) + sum(1 for conn in list(pool.pool.queue) if conn is not None)
+        with self._lock:
+            requests_by_host = dict(self._requests)
+            opened = dict(self._opened)
+        hosts = {}
+        for name in sorted(set(requests_by_host) | set(opened) | set(idle)):
+            count = requests_by_host.get(name, 0)
+            hosts[name] = {
+                'requests': count,
+                'connections_opened': opened.get(name, 0),
+                'reused': max(count - opened.get(name, 0), 0),
+                'idle': idle.get(name, 0),
+            }
+        return {'hosts': hosts, 'pool_size': self.pool_size, 'dns': self.resolver.stats()}
+
+    def close(self):
+        """Close every pooled connection."""
+        self.session.close()
+
+
+# Process-wide transport
+transport = HTTPTransport()
+
+# Forked workers must not share the parent's sockets
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=transport.close)
@@ -0,0 +1,256 @@
+"""
+Non-blocking logging for the bot.
+Request threads only enqueue log records; a background listener formats and
+writes them. Supports JSON output with structured fields and sampling of
+repetitive messages.
+"""
+
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+import time
+from typing import Dict, Optional
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+ROOT_LOGGER = 'trading_bot'
+
+# Record attributes that are part of every LogRecord (everything else is a structured field)
+_STANDARD_ATTRS = frozenset(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+def _exception_text(formatter: logging.Formatter, record: logging.LogRecord) -> Optional[str]:
+    """Traceback of a record, whether still attached or already rendered by the queue handler."""
+    if record.exc_info:
+        return formatter.formatException(record.exc_info)
+    return record.exc_text
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line with any ``extra`` fields included."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': round(record.created, 6),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _STANDARD_ATTRS and not key.startswith('_'):
+                entry[key] = value
+        exc = _exception_text(self, record)
+        if exc:
+            entry['exc'] = exc
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class TextFormatter(logging.Formatter):
+    """Console format matching the bot's existing emoji output."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        message = record.getMessage()
+        suppressed = getattr(record, 'suppressed', 0)
+        if suppressed:
+            message += f" (+{suppressed} similar suppressed)"
+        exc = _exception_text(self, record)
+        if exc:
+            message += '\n' + exc
+        return message
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Rate-limit records that carry a ``sample_key`` extra.
+
+    At most ``burst`` records per key pass per ``interval`` seconds; the
+    number suppressed is attached to the next record that passes.
+    """
+
+    def __init__(self, interval: float, burst: int):
+        super().__init__()
+        self.interval = interval
+        self.burst = burst
+        self._lock = threading.Lock()
+        self._windows: Dict[str, list] = {}  # key -> [window start, passed, suppressed]
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        key = getattr(record, 'sample_key', None)
+        if key is None or self.interval <= 0:
+            return True
+        now = record.created
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= self.interval:
+                suppressed = window[2] if window else 0
+                self._windows[key] = [now, 1, 0]
+                if len(self._windows) > 10000:
+                    self._windows = {key: self._windows[key]}
+            elif window[1] < self.burst:
+                window[1] += 1
+                suppressed = 0
+            else:
+                window[2] += 1
+                return False
+        if suppressed:
+            record.suppressed = suppressed
+        return True
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops records instead of blocking when the queue is full."""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """
+        Merge the message arguments but, unlike QueueHandler.prepare, keep the
+        traceback out of the message: it is rendered into ``exc_text`` (the
+        frames themselves aren't kept alive in the queue) for the formatters.
+        """
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class _StdoutHandler(logging.StreamHandler):
+    """Stream handler bound to the current ``sys.stdout`` (which may be replaced)."""
+
+    def __init__(self):
+        super().__init__(sys.stdout)
+
+    @property
+    def stream(self):
+        return sys.stdout
+
+    @stream.setter
+    def stream(self, value):
+        pass
+
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional[DroppingQueueHandler] = None
+_setup_lock = threading.Lock()
+
+
+def setup_logging(level: str = None, fmt: str = None) -> logging.Logger:
+    """
+    Configure the bot's root logger once (later calls return it unchanged).
+
+    Args:
+        level: Log level name, falls back to LOG_LEVEL (INFO)
+        fmt: 'text' or 'json', falls back to LOG_FORMAT (text)
+
+    Returns:
+        The bot's root logger
+    """
+    global _listener, _queue_handler
+    root = logging.getLogger(ROOT_LOGGER)
+    with _setup_lock:
+        if _listener is not None:
+            return root
+
+        level = (level or os.getenv('LOG_LEVEL', 'INFO')).upper()
+        fmt = (fmt or os.getenv('LOG_FORMAT', 'text')).lower()
+
+        output = _StdoutHandler()
+        output.setFormatter(JsonFormatter() if fmt == 'json' else TextFormatter())
+        if os.getenv('LOG_FILE'):
+            file_output = logging.FileHandler(os.getenv('LOG_FILE'), encoding='utf-8')
+            file_output.setFormatter(JsonFormatter())
+            outputs = (output, file_output)
+        else:
+            outputs = (output,)
+
+        _queue_handler = DroppingQueueHandler(queue.Queue(int(os.getenv('LOG_QUEUE_SIZE', '10000'))))
+        _queue_handler.addFilter(SamplingFilter(
+            interval=float(os.getenv('LOG_SAMPLE_INTERVAL', '60')),
+            burst=int(os.getenv('LOG_SAMPLE_BURST', '5'))
+        ))
+        root.addHandler(_queue_handler)
+        root.setLevel(level)
+        root.propagate = False
+
+        _listener = logging.handlers.QueueListener(_queue_handler.queue, *outputs, respect_handler_level=True)
+        _listener.start()
+        atexit.register(shutdown_logging)
+    return root
+
+
+def shutdown_logging():
+    """Flush queued records and stop the writer thread."""
+    global _listener
+    with _setup_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+            logging.getLogger(ROOT_LOGGER).removeHandler(_queue_handler)
+
+
+def _reinit_after_fork():
+    """The writer thread doesn't survive fork: start a fresh one in the child."""
+    global _listener, _queue_handler, _setup_lock
+    _setup_lock = threading.Lock()
+    if _listener is None:
+        return
+    logging.getLogger(ROOT_LOGGER).removeHandler(_queue_handler)
+    _listener = None
+    _queue_handler = None
+    setup_logging()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reinit_after_fork)
+
+
+def get_logger(name: str) -> logging.Logger:
+    """
+    Return a bot logger (configuring logging on first use).
+
+    Args:
+        name: Component name, e.g. 'webhook' or 'monitor'
+    """
+    setup_logging()
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
+
+
+def dropped_records() -> int:
+    """Records dropped because the log queue was full."""
+    return _queue_handler.dropped if _queue_handler else 0
+
+
+class StageTimer:
+    """Collects per-stage durations (ms) for one request."""
+
+    __slots__ = ('_last', 'stages')
+
+    def __init__(self, start: float = None):
+        self._last = time.monotonic() if start is None else start
+        self.stages: Dict[str, float] = {}
+
+    def mark(self, stage: str):
+        """Record the time since the previous mark under ``stage``."""
+        now = time.monotonic()
+        self.stages[stage] = round((now - self._last) * 1000, 3)
+        self._last = now
@@ -3,12 +3,19 @@ Trading Notification Bot
 Monitors cryptocurrency prices and sends notifications when conditions are met.
 """
 
+import json
 import os
 import sys
 import time
 from dotenv import load_dotenv
 from exchange_api import get_current_price
 from notification import send_notification
+from profiling import profiler
+from price_history import PriceHistory
+from log_setup import get_logger
+from checkpoint import create_checkpointer_from_env
+from alert_rules import create_rule_engine_from_env
+from order_book import create_order_book_monitor_from_env
 
 # Fix Windows console encoding for emojis
 if sys.platform == 'win32':
@@ -24,6 +31,17 @@ if sys.platform == 'win32':
 # Load environment variables
 load_dotenv()
 
+log = get_logger('monitor')
+
+
+def _format_window(seconds):
+    """Human-readable window length (e.g. 300 -> '5m')."""
+    if seconds % 3600 == 0:
+        return f"{seconds // 3600}h"
+    if seconds % 60 == 0:
+        return f"{seconds // 60}m"
+    return f"{seconds}s"
+
 
 class TradingBot:
     """Main trading bot class that monitors prices and sends alerts."""
@@ -36,6 +54,39 @@ class TradingBot:
         self.check_interval = int(os.getenv('CHECK_INTERVAL', '60'))
         self.last_price = None
         self.last_alert_price = None
+        # Callables fed every price tick: listener(symbol, price, ts)
+        self.price_listeners = []
+        # Callables run after every loop iteration: listener(fetched), fetched is False if the price fetch failed
+        self.loop_listeners = []
+        
+        # Rolling-window move alerts (each disabled at 0)
+        self.move_alert_pct = float(os.getenv('MOVE_ALERT_PCT', '0'))
+        self.move_windows = [int(w) for w in os.getenv('MOVE_ALERT_WINDOWS', '300,900').split(',') if w.strip()]
+        self.breakout_window = int(os.getenv('BREAKOUT_WINDOW', '0'))
+        self.volatility_spike_ratio = float(os.getenv('VOLATILITY_SPIKE_RATIO', '0'))
+        self.volatility_short, self.volatility_long = (
+            int(w) for w in os.getenv('VOLATILITY_WINDOWS', '300,3600').split(',')
+        )
+        self.alert_cooldown = int(os.getenv('MOVE_ALERT_COOLDOWN', '900'))
+        windows = set(self.move_windows) | {self.volatility_short, self.volatility_long}
+        if self.breakout_window:
+            windows.add(self.breakout_window)
+        self.history = PriceHistory(
+            capacity=int(os.getenv('PRICE_HISTORY_SIZE', '4096')),
+            windows=windows
+        )
+        self.last_move_alert = {}  # alert key -> tick time
+        
+        # Compiled alert rules from ALERT_RULES / ALERT_RULES_FILE (None if unset)
+        self.rules = create_rule_engine_from_env(default_symbol=self.symbol)
+        
+        # Depth stream spread/imbalance alerts for ORDER_BOOK_SYMBOLS (None if unset)
+        self.order_books = create_order_book_monitor_from_env(notify=send_notification)
+        
+        # Warm restart (optional): last prices and history survive deploys
+        self.checkpointer = create_checkpointer_from_env('monitor')
+        if self.checkpointer:
+            self.register_checkpoint(self.checkpointer)
         
     def check_conditions(self, current_price):
         """
@@ -67,42 +118,206 @@ class TradingBot:
         
         return alerts
     
+    def register_checkpoint(self, checkpointer):
+        """
+        Register last prices, alert cooldowns, price history, alert rule state
+        and order book levels for warm restarts.
+        
+        Args:
+            checkpointer: Checkpointer to register sections with
+        """
+        checkpointer.register('monitor', self._dump_state, self._load_state)
+        checkpointer.register('history', self._dump_history, self._load_history)
+        if self.rules:
+            # Without their histories and last values, level rules re-fire after a deploy
+            checkpointer.register('rules', self.rules.dump_state, self.rules.load_state)
+        if self.order_books and self.order_books.owns_levels:
+            levels = self.order_books.level_engine
+            checkpointer.register('book_levels', levels.dump_state, levels.load_state)
+    
+    def _dump_state(self):
+        return json.dumps({
+            'symbol': self.symbol,
+            'last_price': self.last_price,
+            'last_alert_price': self.last_alert_price,
+            'move_alerts': [[list(key), ts] for key, ts in self.last_move_alert.items()],
+        }).encode('utf-8')
+    
+    def _load_state(self, buffer):
+        state = json.loads(bytes(buffer))
+        if state.get('symbol') != self.symbol:
+            return  # Checkpoint of another symbol: a stale last price would fake crossings
+        self.last_price = state.get('last_price')
+        self.last_alert_price = state.get('last_alert_price')
+        self.last_move_alert = {tuple(key): ts for key, ts in state.get('move_alerts', [])}
+    
+    def _dump_history(self):
+        symbol = self.symbol.encode('utf-8')
+        return bytes([len(symbol)]) + symbol + self.history.dump_state()
+    
+    def _load_history(self, buffer):
+        length = buffer[0]
+        if bytes(buffer[1:1 + length]).decode('utf-8') == self.symbol:
+            self.history.load_state(buffer[1 + length:])
+    
+    def _cooled_down(self, key, now):
+        """Rate-limit a rolling alert to once per cooldown."""
+        last = self.last_move_alert.get(key)
+        if last is not None and now - last < self.alert_cooldown:
+            return False
+        self.last_move_alert[key] = now
+        return True
+    
+    def check_move_alerts(self, current_price, tick_time):
+        """
+        Record a tick in the price history and check rolling-window alerts.
+        
+        Args:
+            current_price: Current price of the symbol
+            tick_time: Tick time as Unix seconds
+            
+        Returns:
+            List of alert messages
+        """
+        alerts = []
+        history = self.history
+        
+        # Breakouts compare against the range before this tick
+        if self.breakout_window and history.is_warm(self.breakout_window, tick_time):
+            label = _format_window(self.breakout_window)
+            high = history.max(self.breakout_window)
+            low = history.min(self.breakout_window)
+            if current_price > high and self._cooled_down(('breakout', 'up'), tick_time):
+                alerts.append(
+                    f"📈 BREAKOUT: {self.symbol} broke above its {label} high ${high:,.2f}\n"
+                    f"Current price: ${current_price:,.2f}"
+                )
+            elif current_price < low and self._cooled_down(('breakout', 'down'), tick_time):
+                alerts.append(
+                    f"📉 BREAKDOWN: {self.symbol} broke below its {label} low ${low:,.2f}\n"
+                    f"Current price: ${current_price:,.2f}"
+                )
+        
+        history.update(current_price, tick_time)
+        
+        if self.move_alert_pct:
+            for window in self.move_windows:
+                change = history.change(window)
+                if change is None or abs(change) * 100 < self.move_alert_pct:
+                    continue
+                if self._cooled_down(('move', window), tick_time):
+                    direction = "rose" if change > 0 else "dropped"
+                    alerts.append(
+                        f"{'🚀' if change > 0 else '🔻'} MOVE: {self.symbol} {direction} "
+                        f"{abs(change) * 100:.2f}% in {_format_window(window)}\n"
+                        f"Current price: ${current_price:,.2f}"
+                    )
+        
+        if self.volatility_spike_ratio and history.is_warm(self.volatility_long, tick_time):
+            short_vol = history.volatility(self.volatility_short)
+            long_vol = history.volatility(self.volatility_long)
+            if short_vol and long_vol and short_vol / long_vol >= self.volatility_spike_ratio:
+                if self._cooled_down(('volatility',), tick_time):
+                    alerts.append(
+                        f"⚡ VOLATILITY: {self.symbol} {_format_window(self.volatility_short)} volatility is "
+                        f"{short_vol / long_vol:.1f}x its {_format_window(self.volatility_long)} average\n"
+                        f"Current price: ${current_price:,.2f}"
+                    )
+        
+        return alerts
+    
+    def check_rules(self, symbol, current_price, tick_time):
+        """
+        Feed a tick to the alert rules.
+        
+        Args:
+            symbol: Symbol of the tick
+            current_price: Current price of the symbol
+            tick_time: Tick time as Unix seconds
+            
+        Returns:
+            List of alert messages for rules that became true
+        """
+        if not self.rules:
+            return []
+        alerts = []
+        for rule in self.rules.update(symbol, current_price, tick_time):
+            label = rule.name if rule.name == rule.expression else f"{rule.name} ({rule.expression})"
+            alerts.append(
+                f"🔔 RULE: {label}\n"
+                f"{symbol} price: ${current_price:,.2f}"
+            )
+        return alerts
+    
+    def _loop_done(self, fetched: bool):
+        for listener in self.loop_listeners:
+            try:
+                listener(fetched)
+            except Exception as e:
+                log.warning(f"⚠️  Loop listener failed: {e}", extra={'sample_key': 'loop_listener_failed'})
+
     def run(self):
         """Main bot loop that continuously monitors prices."""
         print(f"🤖 Trading Bot Started")
         print(f"📊 Monitoring: {self.symbol}")
         print(f"🔔 Alert thresholds: Above ${self.threshold_above:,.2f} | Below ${self.threshold_below:,.2f}")
         print(f"⏱️  Check interval: {self.check_interval} seconds")
+        if self.rules:
+            print(f"📐 Alert rules: {len(self.rules.rules)} on {', '.join(self.rules.symbols())}")
+        if self.checkpointer:
+            self.checkpointer.restore()
+            self.checkpointer.start()
+        if self.order_books:
+            print(f"📚 Order books: {', '.join(self.order_books.syncs)}")
+            self.order_books.start()
         print("-" * 50)
         
         while True:
             try:
-                # Get current price
-                current_price = get_current_price(self.symbol)
-                
-                if current_price:
-                    # Check for alerts
-                    alerts = self.check_conditions(current_price)
-                    
-                    # Send notifications if alerts exist
-                    if alerts:
-                        for alert in alerts:
-                            send_notification(alert)
-                            print(f"✅ Alert sent: {alert}")
-                    
-                    # Display current status
-                    price_change = ""
-                    if self.last_price:
-                        change = current_price - self.last_price
-                        change_pct = (change / self.last_price) * 100
-                        price_change = f" ({change:+.2f}, {change_pct:+.2f}%)"
-                    
-                    print(f"💰 {self.symbol}: ${current_price:,.2f}{price_change}")
+                with profiler.profile('monitor'):
+                    # Get current price
+                    current_price = get_current_price(self.symbol)
                     
-                    self.last_price = current_price
-                else:
-                    print("⚠️  Failed to fetch price. Retrying...")
+                    if current_price:
+                        # Feed price stream consumers (e.g. strategy weekly levels)
+                        tick_time = time.time()
+                        for listener in self.price_listeners:
+                            listener(self.symbol, current_price, tick_time)
+                        
+                        # Check for alerts
+                        alerts = self.check_conditions(current_price)
+                        alerts += self.check_move_alerts(current_price, tick_time)
+                        alerts += self.check_rules(self.symbol, current_price, tick_time)
+                        
+                        # Symbols only referenced by alert rules
+                        for symbol in self.rules.symbols() if self.rules else []:
+                            if symbol != self.symbol:
+                                price = get_current_price(symbol)
+                                if price:
+                                    alerts += self.check_rules(symbol, price, tick_time)
+                        
+                        # Send notifications if alerts exist
+                        if alerts:
+                            for alert in alerts:
+                                send_notification(alert)
+                                log.info(f"✅ Alert sent: {alert}", extra={'symbol': self.symbol})
+                        
+                        # Display current status
+                        price_change = ""
+                        if self.last_price:
+                            change = current_price - self.last_price
+                            change_pct = (change / self.last_price) * 100
+                            price_change = f" ({change:+.2f}, {change_pct:+.2f}%)"
+                        
+                        log.info(f"💰 {self.symbol}: ${current_price:,.2f}{price_change}",
+                                 extra={'symbol': self.symbol, 'price': current_price, 'sample_key': 'price_tick'})
+                        
+                        self.last_price = current_price
+                    else:
+                        log.warning("⚠️  Failed to fetch price. Retrying...",
+                                    extra={'symbol': self.symbol, 'sample_key': 'price_fetch_failed'})
                 
+                self._loop_done(bool(current_price))
                 # Wait before next check
                 time.sleep(self.check_interval)
                 
@@ -110,8 +325,8 @@ class TradingBot:
                 print("\n🛑 Bot stopped by user")
                 break
             except Exception as e:
-                print(f"❌ Error: {e}")
-                print("⏳ Retrying in 60 seconds...")
+                log.exception(f"❌ Error: {e}. Retrying in 60 seconds...", extra={'symbol': self.symbol})
+                self._loop_done(False)
                 time.sleep(60)
 
 
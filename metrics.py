@@ -0,0 +1,182 @@
+"""
+In-process metrics with Prometheus text exposition.
+Provides counters and fixed-bucket histograms cheap enough for the request
+path, exported by the webhook server on /metrics.
+"""
+
+import bisect
+import threading
+from typing import Dict, List, Sequence, Tuple
+
+
+# Signal age buckets in seconds: sub-second webhook latency up to multi-minute backlogs
+AGE_BUCKETS = (0.1, 0.25, 0.5, 1, 2, 5, 10, 30, 60, 120, 300, 600)
+
+
+def _format_labels(names: Sequence[str], values: Tuple[str, ...], extra: str = '') -> str:
+    parts = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+class Counter:
+    """Monotonic counter, optionally split by label values."""
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, *label_values: str):
+        """Increase the counter for the given label values."""
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def value(self, *label_values: str) -> float:
+        return self._values.get(label_values, 0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for label_values, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labels, label_values)} {value:g}")
+        return lines
+
+
+class Histogram:
+    """Fixed-bucket histogram, optionally split by label values."""
+
+    def __init__(self, name: str, help_text: str, buckets: Sequence[float] = AGE_BUCKETS,
+                 labels: Sequence[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(sorted(buckets))
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+        # label values -> [per-bucket counts (+Inf last), sum, count]
+        self._series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, *label_values: str):
+        """Record one observation."""
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def count(self, *label_values: str) -> int:
+        series = self._series.get(label_values)
+        return series[2] if series else 0
+
+    def quantile(self, q: float, *label_values: str) -> float:
+        """Approximate quantile: upper bound of the bucket containing it."""
+        with self._lock:
+            series = self._series.get(label_values)
+            if not series or not series[2]:
+                return 0.0
+            target = q * series[2]
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), series[0]):
+                cumulative += bucket_count
+                if cumulative >= target:
+                    return bound
+        return float('inf')
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for label_values, (counts, total, count) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, counts):
+                    cumulative += bucket_count
+                    labels = _format_labels(self.labels, label_values, f'le="{bound:g}"')
+                    lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                labels = _format_labels(self.labels, label_values, 'le="+Inf"')
+                lines.append(f"{self.name}_bucket{labels} {count}")
+                plain = _format_labels(self.labels, label_values)
+                lines.append(f"{self.name}_sum{plain} {total:g}")
+                lines.append(f"{self.name}_count{plain} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Collection of named metrics rendered together."""
+
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, help_text: str, labels: Sequence[str] = ()) -> Counter:
+        """Get or create a counter."""
+        return self._register(Counter(name, help_text, labels))
+
+    def histogram(self, name: str, help_text: str, buckets: Sequence[float] = AGE_BUCKETS,
+                  labels: Sequence[str] = ()) -> Histogram:
+        """Get or create a histogram."""
+        return self._register(Histogram(name, help_text, buckets, labels))
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+# Process-wide registry
+registry = MetricsRegistry()
+
+# Signal age (seconds since the payload timestamp)
+SIGNAL_INGRESS_AGE = registry.histogram(
+    'signal_ingress_age_seconds', 'Signal age when the webhook received it', labels=('signal_type',)
+)
+SIGNAL_DELIVERY_AGE = registry.histogram(
+    'signal_delivery_age_seconds', 'Signal age when its notification was handed off', labels=('signal_type',)
+)
+SIGNAL_PIPELINE_SECONDS = registry.histogram(
+    'signal_pipeline_seconds', 'Time from ingress to notification hand-off',
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+)
+SIGNALS_DROPPED_STALE = registry.counter(
+    'signals_dropped_stale_total', 'Entry signals dropped for exceeding MAX_SIGNAL_AGE'
+)
+OUTBOX_DELIVERY_LAG = registry.histogram(
+    'outbox_delivery_lag_seconds', 'Time from outbox enqueue to successful delivery', labels=('channel',)
+)
+
+# Notification channels
+NOTIFY_CHANNEL_SECONDS = registry.histogram(
+    'notification_channel_seconds', 'Time taken by one delivery attempt', labels=('channel',),
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2, 3, 5, 8, 10, 15)
+)
+NOTIFY_CHANNEL_ERRORS = registry.counter(
+    'notification_channel_errors_total', 'Failed delivery attempts', labels=('channel',)
+)
+DIGEST_DELIVERY_FAILURES = registry.counter(
+    'digest_delivery_failures_total', 'Batched notifications that failed on a channel', labels=('channel',)
+)
+NOTIFY_HEDGED = registry.counter(
+    'notification_hedged_total', 'Hedged copies sent because the primary channel missed its deadline',
+    labels=('primary', 'backup')
+)
+
+# Outbound HTTP (exchange and notification APIs)
+HTTP_REQUESTS = registry.counter(
+    'http_client_requests_total', 'Outbound HTTP requests', labels=('host',)
+)
+HTTP_CONNECTIONS_OPENED = registry.counter(
+    'http_client_connections_opened_total', 'New outbound connections (requests minus these were reused)',
+    labels=('host',)
+)
@@ -3,53 +3,110 @@ Notification module for sending alerts via various channels.
 Supports: Telegram, Email, Discord, etc.
 """
 
+import json
 import os
 import smtplib
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 import requests
 from dotenv import load_dotenv
+from channel_health import channel_health
+from metrics import NOTIFY_HEDGED
+from http_transport import transport
+from log_setup import get_logger
 
 load_dotenv()
 
+log = get_logger('notification')
 
-def send_telegram_notification(message):
+# Provider limits
+TELEGRAM_MAX_MESSAGE_LENGTH = 4096
+DISCORD_MAX_EMBEDS = 10
+
+
+def split_telegram_message(message, limit=TELEGRAM_MAX_MESSAGE_LENGTH):
+    """
+    Split text into chunks that fit in one Telegram message.
+    
+    Splits on blank lines, then on newlines, and only cuts inside a line
+    when a single line is longer than the limit.
+    
+    Args:
+        message: Message text
+        limit: Max characters per chunk
+        
+    Returns:
+        List of message chunks
+    """
+    if len(message) <= limit:
+        return [message]
+    
+    chunks = []
+    current = ''
+    for line in message.split('\n'):
+        while len(line) > limit:
+            if current:
+                chunks.append(current)
+                current = ''
+            chunks.append(line[:limit])
+            line = line[limit:]
+        candidate = f"{current}\n{line}" if current else line
+        if len(candidate) > limit:
+            chunks.append(current)
+            current = line
+        else:
+            current = candidate
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def send_telegram_notification(message, deadline=None, chat_id=None):
     """
     Send notification via Telegram bot.
     
     Args:
         message: Message text to send
+        deadline: time.monotonic() to finish all chunks by (defaults to the HTTP_DEADLINE budget)
+        chat_id: Destination chat (defaults to TELEGRAM_CHAT_ID)
         
     Returns:
         True if successful, False otherwise
     """
     telegram_token = os.getenv('TELEGRAM_BOT_TOKEN')
-    chat_id = os.getenv('TELEGRAM_CHAT_ID')
+    chat_id = chat_id or os.getenv('TELEGRAM_CHAT_ID')
     
     if not telegram_token or not chat_id:
         return False
     
     try:
-        url = f"https://api.telegram.org/bot{telegram_token}/sendMessage"
-        payload = {
-            'chat_id': chat_id,
-            'text': message,
-            'parse_mode': 'HTML'
-        }
-        response = requests.post(url, json=payload, timeout=10)
-        response.raise_for_status()
+        api_url = os.getenv('TELEGRAM_API_URL', 'https://api.telegram.org')
+        url = f"{api_url}/bot{telegram_token}/sendMessage"
+        deadline = deadline or transport.deadline()
+        for chunk in split_telegram_message(message):
+            payload = {
+                'chat_id': chat_id,
+                'text': chunk,
+                'parse_mode': 'HTML'
+            }
+            response = transport.post(url, json=payload, deadline=deadline)
+            response.raise_for_status()
         return True
     except requests.exceptions.RequestException as e:
-        print(f"Telegram notification error: {e}")
+        log.error(f"Telegram notification error: {e}", extra={'sample_key': 'notify_error:telegram'})
         return False
 
 
-def send_email_notification(message):
+def send_email_notification(message, subject="Trading Bot Alert", email_to=None):
     """
     Send notification via Email.
     
     Args:
         message: Message text to send
+        subject: Email subject line
+        email_to: Recipient address (defaults to EMAIL_TO, then EMAIL_USER)
         
     Returns:
         True if successful, False otherwise
@@ -58,7 +115,7 @@ def send_email_notification(message):
     smtp_port = int(os.getenv('EMAIL_PORT', '587'))
     email_user = os.getenv('EMAIL_USER')
     email_password = os.getenv('EMAIL_PASSWORD')
-    email_to = os.getenv('EMAIL_TO', email_user)
+    email_to = email_to or os.getenv('EMAIL_TO', email_user)
     
     if not all([smtp_server, email_user, email_password]):
         return False
@@ -67,67 +124,238 @@ def send_email_notification(message):
         msg = MIMEMultipart()
         msg['From'] = email_user
         msg['To'] = email_to
-        msg['Subject'] = "Trading Bot Alert"
+        msg['Subject'] = subject
         msg.attach(MIMEText(message, 'plain'))
         
-        server = smtplib.SMTP(smtp_server, smtp_port)
-        server.starttls()
+        server = smtplib.SMTP(smtp_server, smtp_port, timeout=10)
+        if os.getenv('EMAIL_USE_TLS', 'true').lower() == 'true':
+            server.starttls()
         server.login(email_user, email_password)
         server.send_message(msg)
         server.quit()
         return True
     except Exception as e:
-        print(f"Email notification error: {e}")
+        log.error(f"Email notification error: {e}", extra={'sample_key': 'notify_error:email'})
         return False
 
 
-def send_discord_notification(message):
+def send_discord_notification(message, deadline=None, webhook_url=None):
     """
     Send notification via Discord webhook.
     
     Args:
         message: Message text to send
+        deadline: time.monotonic() to finish by (defaults to the HTTP_DEADLINE budget)
+        webhook_url: Destination webhook (defaults to DISCORD_WEBHOOK_URL)
         
     Returns:
         True if successful, False otherwise
     """
-    webhook_url = os.getenv('DISCORD_WEBHOOK_URL')
+    webhook_url = webhook_url or os.getenv('DISCORD_WEBHOOK_URL')
     
     if not webhook_url:
         return False
     
     try:
         payload = {'content': message}
-        response = requests.post(webhook_url, json=payload, timeout=10)
+        response = transport.post(webhook_url, json=payload, deadline=deadline)
         response.raise_for_status()
         return True
     except requests.exceptions.RequestException as e:
-        print(f"Discord notification error: {e}")
+        log.error(f"Discord notification error: {e}", extra={'sample_key': 'notify_error:discord'})
         return False
 
 
-def send_notification(message):
+def send_discord_embeds(embeds, deadline=None, webhook_url=None):
     """
-    Send notification via all configured channels.
+    Send rich embeds via Discord webhook, up to 10 embeds per post.
+    
+    Args:
+        embeds: List of Discord embed dicts
+        deadline: time.monotonic() to finish all posts by (defaults to the HTTP_DEADLINE budget)
+        webhook_url: Destination webhook (defaults to DISCORD_WEBHOOK_URL)
+        
+    Returns:
+        True if every post succeeded, False otherwise
+    """
+    webhook_url = webhook_url or os.getenv('DISCORD_WEBHOOK_URL')
+    
+    if not webhook_url or not embeds:
+        return False
+    
+    try:
+        deadline = deadline or transport.deadline()
+        for i in range(0, len(embeds), DISCORD_MAX_EMBEDS):
+            payload = {'embeds': embeds[i:i + DISCORD_MAX_EMBEDS]}
+            response = transport.post(webhook_url, json=payload, deadline=deadline)
+            response.raise_for_status()
+        return True
+    except requests.exceptions.RequestException as e:
+        log.error(f"Discord notification error: {e}", extra={'sample_key': 'notify_error:discord'})
+        return False
+
+
+# Channel name -> sender function
+CHANNEL_SENDERS = {
+    'telegram': send_telegram_notification,
+    'email': send_email_notification,
+    'discord': send_discord_notification,
+}
+
+# Channel name -> sender keyword selecting the destination
+DESTINATION_ARGS = {
+    'telegram': 'chat_id',
+    'email': 'email_to',
+    'discord': 'webhook_url',
+}
+
+# Prefix marking an email body whose first line is the subject
+EMAIL_SUBJECT_PREFIX = 'Subject: '
+
+# Pseudo-channel used when no notification method is configured
+CONSOLE_CHANNEL = 'console'
+
+
+def send_to_channel(channel, body, destination=None):
+    """
+    Send a pre-rendered body through one channel.
+    
+    Channel bodies are plain strings so they can be stored in the outbox:
+    ``discord_embeds`` bodies are JSON lists of embeds, and ``email``
+    bodies may start with a ``Subject: ...`` line. Every attempt feeds the
+    channel's rolling latency and error estimate.
+    
+    Args:
+        channel: Channel name
+        body: Rendered message body
+        destination: Telegram chat id, Discord webhook URL or email address
+            (defaults to the configured one)
+        
+    Returns:
+        True if delivered, False otherwise
+    """
+    if channel == CONSOLE_CHANNEL:
+        log.warning(f"⚠️  No notification method configured. Message: {body}")
+        return True
+    started = time.monotonic()
+    ok = False
+    try:
+        ok = _send_to_channel(channel, body, destination)
+        return ok
+    finally:
+        channel_health.record(channel, time.monotonic() - started, ok)
+
+
+def _send_to_channel(channel, body, destination=None):
+    if channel == 'discord_embeds':
+        return send_discord_embeds(json.loads(body), webhook_url=destination)
+    kwargs = {DESTINATION_ARGS[channel]: destination} if destination and channel in DESTINATION_ARGS else {}
+    if channel == 'email' and body.startswith(EMAIL_SUBJECT_PREFIX):
+        subject, _, text = body.partition('\n')
+        return send_email_notification(text, subject=subject[len(EMAIL_SUBJECT_PREFIX):], **kwargs)
+    sender = CHANNEL_SENDERS.get(channel)
+    if sender is None:
+        log.error(f"⚠️  Unknown notification channel: {channel}", extra={'sample_key': f'unknown_channel:{channel}'})
+        return False
+    return sender(body, **kwargs)
+
+
+def get_configured_channels():
+    """
+    List notification channels that have credentials configured.
+    
+    Returns:
+        List of channel names (keys of CHANNEL_SENDERS)
+    """
+    channels = []
+    if os.getenv('TELEGRAM_BOT_TOKEN') and os.getenv('TELEGRAM_CHAT_ID'):
+        channels.append('telegram')
+    if os.getenv('EMAIL_SMTP_SERVER') and os.getenv('EMAIL_USER') and os.getenv('EMAIL_PASSWORD'):
+        channels.append('email')
+    if os.getenv('DISCORD_WEBHOOK_URL'):
+        channels.append('discord')
+    return channels
+
+
+# Background senders for hedged delivery (the primary may outlive its deadline)
+_hedge_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix='notify-hedge')
+
+
+def send_hedged(message, channels=None, deadline=None):
+    """
+    Send through the healthiest channel, hedging to the next one if it is slow.
+    
+    The primary attempt runs in the background; if it hasn't confirmed
+    within ``deadline`` seconds (or fails), a copy goes through the backup
+    channels in health order until one delivers. A late primary may still
+    deliver, so the trader can receive the alert twice.
     
     Args:
         message: Message text to send
+        channels: Candidate channels (defaults to the configured ones)
+        deadline: Seconds to wait for the primary, falls back to NOTIFY_HEDGE_DEADLINE
+        
+    Returns:
+        Number of channels confirmed to have delivered the message
     """
-    success_count = 0
+    channels = channel_health.rank(channels if channels is not None else get_configured_channels())
+    if not channels:
+        log.warning(f"⚠️  No notification method configured. Message: {message}")
+        return 0
+    if deadline is None:
+        deadline = float(os.getenv('NOTIFY_HEDGE_DEADLINE', '2'))
     
-    # Try Telegram
-    if send_telegram_notification(message):
-        success_count += 1
+    primary = channels[0]
+    future = _hedge_pool.submit(send_to_channel, primary, message)
+    try:
+        if future.result(timeout=deadline):
+            return 1
+        reason = 'failed'
+    except FutureTimeout:
+        reason = f"missed its {deadline:g}s deadline"
+    except Exception as e:
+        reason = f"failed: {e}"
     
-    # Try Email
-    if send_email_notification(message):
-        success_count += 1
+    for backup in channels[1:]:
+        NOTIFY_HEDGED.inc(1, primary, backup)
+        log.warning(f"⚠️  {primary} {reason}, hedging via {backup}",
+                    extra={'channel': primary, 'backup': backup, 'sample_key': f'hedge:{primary}'})
+        if send_to_channel(backup, message):
+            return 2 if future.done() and _delivered(future) else 1
+    # No backup delivered: fall back to waiting for the primary
+    return 1 if _delivered(future) else 0
+
+
+def _delivered(future):
+    """Wait for a background send and return whether it delivered."""
+    try:
+        return bool(future.result())
+    except Exception:
+        return False
+
+
+def send_notification(message):
+    """
+    Send notification via the configured channels.
     
-    # Try Discord
-    if send_discord_notification(message):
-        success_count += 1
+    With NOTIFY_ROUTING=all (default) every channel gets the message; with
+    NOTIFY_ROUTING=hedged only the healthiest does, backed by a hedged copy
+    (see send_hedged).
     
-    # If no notification method is configured, just print
+    Args:
+        message: Message text to send
+        
+    Returns:
+        Number of channels that delivered the message
+    """
+    channels = get_configured_channels()
+    if channels and os.getenv('NOTIFY_ROUTING', 'all').lower() == 'hedged':
+        success_count = send_hedged(message, channels)
+    else:
+        success_count = sum(1 for channel in channels if send_to_channel(channel, message))
+    
+    # If no notification method is configured, just log
     if success_count == 0:
-        print(f"⚠️  No notification method configured. Message: {message}")
-
+        log.warning(f"⚠️  No notification method configured. Message: {message}")
+    
+    return success_count
@@ -0,0 +1,546 @@
+"""
+Incrementally maintained local order books with spread and imbalance alerts.
+Follows Binance's diff depth stream: buffer ``depthUpdate`` events, load a
+REST snapshot, drop events it already covers and apply the rest in
+sequence, resyncing from a fresh snapshot whenever an update id is skipped.
+
+Each side keeps its price levels in one sorted list with the best level
+last, so best bid/ask is O(1), top-k depth is O(k) and the updates that
+dominate a live feed (near the top of the book) move few elements.
+"""
+
+import base64
+import hashlib
+import json
+import os
+import socket
+import ssl
+import struct
+import threading
+import time
+from bisect import bisect_left, insort
+from collections import deque
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlparse
+from dotenv import load_dotenv
+
+from exchange_api import get_binance_depth
+from log_setup import get_logger
+from metrics import registry as metrics_registry
+from weekly_levels import WeeklyLevelEngine
+
+load_dotenv()
+
+log = get_logger('order_book')
+
+ORDER_BOOK_UPDATES = metrics_registry.counter(
+    'order_book_updates_total', 'Depth updates applied to local order books', labels=('symbol',)
+)
+ORDER_BOOK_RESYNCS = metrics_registry.counter(
+    'order_book_resyncs_total', 'Order book snapshots loaded (initial sync, sequence gaps, reconnects)',
+    labels=('symbol',)
+)
+
+_WS_GUID = '258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+
+
+class SequenceGap(ValueError):
+    """Raised when a depth update does not continue from the book's last update id."""
+
+
+class _Side:
+    """Price levels of one side, keyed by ``sign * price`` ascending (best level last)."""
+
+    __slots__ = ('sign', 'keys', 'qty')
+
+    def __init__(self, sign: int):
+        self.sign = sign
+        self.keys: List[float] = []
+        self.qty: Dict[float, float] = {}
+
+    def set(self, price: float, qty: float):
+        key = self.sign * price
+        if qty:
+            if key not in self.qty:
+                insort(self.keys, key)
+            self.qty[key] = qty
+        elif self.qty.pop(key, None) is not None:
+            del self.keys[bisect_left(self.keys, key)]
+
+    def best(self) -> Optional[Tuple[float, float]]:
+        if not self.keys:
+            return None
+        key = self.keys[-1]
+        return self.sign * key, self.qty[key]
+
+    def top(self, k: int) -> List[Tuple[float, float]]:
+        qty = self.qty
+        return [(self.sign * key, qty[key]) for key in reversed(self.keys[-k:])]
+
+    def clear(self):
+        self.keys.clear()
+        self.qty.clear()
+
+
+class OrderBook:
+    """Local order book for one symbol."""
+
+    def __init__(self, symbol: str):
+        self.symbol = symbol
+        self.bids = _Side(1)
+        self.asks = _Side(-1)
+        # None until a snapshot is loaded
+        self.last_update_id: Optional[int] = None
+        self._bridged = False
+
+    @property
+    def synced(self) -> bool:
+        return self.last_update_id is not None
+
+    def reset(self):
+        """Forget all levels; the book needs a new snapshot."""
+        self.bids.clear()
+        self.asks.clear()
+        self.last_update_id = None
+        self._bridged = False
+
+    def load_snapshot(self, snapshot: Dict):
+        """
+        Replace the book with a REST depth snapshot.
+
+        Args:
+            snapshot: Dict with lastUpdateId, bids and asks as [price, qty] pairs
+        """
+        self.reset()
+        for price, qty in snapshot['bids']:
+            self.bids.set(float(price), float(qty))
+        for price, qty in snapshot['asks']:
+            self.asks.set(float(price), float(qty))
+        self.last_update_id = int(snapshot['lastUpdateId'])
+
+    def apply_update(self, event: Dict) -> bool:
+        """
+        Apply one ``depthUpdate`` event (U/u update ids, b/a level changes).
+
+        A quantity of 0 removes the level. The first event after a snapshot
+        must straddle ``lastUpdateId + 1``; every later one must start right
+        after the previous one.
+
+        Returns:
+            True if applied, False if the snapshot already covered it
+
+        Raises:
+            SequenceGap: If updates were missed and the book must resync
+        """
+        if self.last_update_id is None:
+            raise SequenceGap(f"{self.symbol}: no snapshot loaded")
+        first, last = event['U'], event['u']
+        if last <= self.last_update_id:
+            return False
+        expected = self.last_update_id + 1
+        if first > expected or (self._bridged and first != expected):
+            raise SequenceGap(f"{self.symbol}: expected update {expected}, got {first}-{last}")
+        for price, qty in event['b']:
+            self.bids.set(float(price), float(qty))
+        for price, qty in event['a']:
+            self.asks.set(float(price), float(qty))
+        self.last_update_id = last
+        self._bridged = True
+        return True
+
+    def best_bid(self) -> Optional[Tuple[float, float]]:
+        """Highest bid as (price, qty), or None if the side is empty."""
+        return self.bids.best()
+
+    def best_ask(self) -> Optional[Tuple[float, float]]:
+        """Lowest ask as (price, qty), or None if the side is empty."""
+        return self.asks.best()
+
+    def depth(self, k: int = 10) -> Dict[str, List[Tuple[float, float]]]:
+        """Top ``k`` levels per side, best first."""
+        return {'bids': self.bids.top(k), 'asks': self.asks.top(k)}
+
+    def mid(self) -> Optional[float]:
+        bid, ask = self.bids.best(), self.asks.best()
+        if bid is None or ask is None:
+            return None
+        return (bid[0] + ask[0]) / 2
+
+    def spread_bps(self) -> Optional[float]:
+        """Bid/ask spread in basis points of the mid price."""
+        bid, ask = self.bids.best(), self.asks.best()
+        if bid is None or ask is None:
+            return None
+        return (ask[0] - bid[0]) / ((ask[0] + bid[0]) / 2) * 10000
+
+    def imbalance(self, k: int = 10) -> Optional[float]:
+        """
+        Quantity imbalance over the top ``k`` levels.
+
+        Returns:
+            (bid qty - ask qty) / (bid qty + ask qty) in [-1, 1], None if empty
+        """
+        bid_qty = sum(qty for _, qty in self.bids.top(k))
+        ask_qty = sum(qty for _, qty in self.asks.top(k))
+        total = bid_qty + ask_qty
+        if not total:
+            return None
+        return (bid_qty - ask_qty) / total
+
+    def __len__(self) -> int:
+        return len(self.bids.keys) + len(self.asks.keys)
+
+
+class BookSync:
+    """Keeps an OrderBook in step with a depth stream, resyncing on gaps."""
+
+    def __init__(self, symbol: str, fetch_snapshot: Callable[[str], Optional[Dict]] = None,
+                 resync_interval: float = 1.0, buffer_size: int = 1000):
+        """
+        Args:
+            symbol: Trading symbol
+            fetch_snapshot: Returns a depth snapshot for a symbol, or None on
+                failure (defaults to the Binance REST endpoint)
+            resync_interval: Minimum seconds between snapshot requests
+            buffer_size: Events kept while waiting for a snapshot
+        """
+        self.book = OrderBook(symbol)
+        self.fetch_snapshot = fetch_snapshot or get_binance_depth
+        self.resync_interval = resync_interval
+        self._buffer: deque = deque(maxlen=buffer_size)
+        self._next_snapshot = 0.0
+        self.gaps = 0
+        self.resyncs = 0
+
+    def reset(self):
+        """Drop the book and buffered events (e.g. after a reconnect)."""
+        self.book.reset()
+        self._buffer.clear()
+
+    def on_event(self, event: Dict) -> bool:
+        """
+        Feed one depth event.
+
+        Returns:
+            True if the book is synced afterwards
+        """
+        book = self.book
+        if book.synced:
+            try:
+                if book.apply_update(event):
+                    ORDER_BOOK_UPDATES.inc(1, book.symbol)
+                return True
+            except SequenceGap as e:
+                self.gaps += 1
+                log.warning(f"⚠️  {e}; resyncing", extra={'symbol': book.symbol})
+                book.reset()
+        self._buffer.append(event)
+        return self._resync()
+
+    def _resync(self) -> bool:
+        now = time.monotonic()
+        if now < self._next_snapshot:
+            return False
+        self._next_snapshot = now + self.resync_interval
+        snapshot = self.fetch_snapshot(self.book.symbol)
+        if snapshot is None:
+            return False
+        if self._buffer and int(snapshot['lastUpdateId']) + 1 < self._buffer[0]['U']:
+            return False  # older than the first buffered event: wait for a newer one
+        self.book.load_snapshot(snapshot)
+        self.resyncs += 1
+        ORDER_BOOK_RESYNCS.inc(1, self.book.symbol)
+        buffered, self._buffer = list(self._buffer), deque(maxlen=self._buffer.maxlen)
+        for n, event in enumerate(buffered):
+            try:
+                self.book.apply_update(event)
+            except SequenceGap:
+                self.gaps += 1
+                self.book.reset()
+                self._buffer.extend(buffered[n:])
+                return False
+        return True
+
+
+class _WebSocket:
+    """Minimal RFC 6455 client, enough to read a market data stream."""
+
+    def __init__(self, url: str, timeout: float):
+        parsed = urlparse(url)
+        secure = parsed.scheme == 'wss'
+        sock = socket.create_connection((parsed.hostname, parsed.port or (443 if secure else 80)), timeout=timeout)
+        if secure:
+            sock = ssl.create_default_context().wrap_socket(sock, server_hostname=parsed.hostname)
+        self.sock = sock
+        key = base64.b64encode(os.urandom(16)).decode('ascii')
+        path = (parsed.path or '/') + (f"?{parsed.query}" if parsed.query else '')
+        sock.sendall((
+            f"GET {path} HTTP/1.1\r\nHost: {parsed.netloc}\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+            f"Sec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n"
+        ).encode('ascii'))
+        self._file = sock.makefile('rb')
+        status = self._file.readline()
+        headers = {}
+        while True:
+            line = self._file.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        accept = base64.b64encode(hashlib.sha1((key + _WS_GUID).encode('ascii')).digest()).decode('ascii')
+        if status.split()[1:2] != [b'101'] or headers.get('sec-websocket-accept') != accept:
+            self.close()
+            raise ConnectionError(f"WebSocket handshake failed: {status.decode('latin-1').strip()}")
+
+    def _read(self, n: int) -> bytes:
+        data = self._file.read(n)
+        if len(data) < n:
+            raise ConnectionError('WebSocket closed')
+        return data
+
+    def _send(self, opcode: int, payload: bytes = b''):
+        # Client frames are always masked; only small control frames are sent
+        mask = os.urandom(4)
+        masked = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+        self.sock.sendall(bytes([0x80 | opcode, 0x80 | len(payload)]) + mask + masked)
+
+    def recv(self) -> str:
+        """Next text message, answering pings on the way."""
+        message = b''
+        while True:
+            head, length = self._read(2)
+            opcode = head & 0x0F
+            size = length & 0x7F
+            if size == 126:
+                size = struct.unpack('>H', self._read(2))[0]
+            elif size == 127:
+                size = struct.unpack('>Q', self._read(8))[0]
+            if length & 0x80:
+                mask = self._read(4)
+                payload = bytes(b ^ mask[i % 4] for i, b in enumerate(self._read(size)))
+            else:
+                payload = self._read(size)
+            if opcode == 0x9:
+                self._send(0xA, payload)
+            elif opcode == 0x8:
+                raise ConnectionError('WebSocket closed by server')
+            elif opcode in (0x0, 0x1, 0x2):
+                message += payload
+                if head & 0x80:
+                    return message.decode('utf-8')
+
+    def close(self):
+        try:
+            self._send(0x8, struct.pack('>H', 1000))
+        except OSError:
+            pass
+        self.sock.close()
+
+
+class OrderBookMonitor:
+    """Streams depth for several symbols and alerts on spreads and imbalances."""
+
+    def __init__(self, symbols: Iterable[str], notify: Callable[[str], object] = None, level_engine=None,
+                 stream_url: str = None, fetch_snapshot: Callable[[str], Optional[Dict]] = None,
+                 spread_bps: float = None, imbalance: float = None, depth: int = None,
+                 cooldown: float = None, resync_interval: float = 1.0, timeout: float = 30.0):
+        """
+        Initialize monitor.
+
+        Args:
+            symbols: Symbols to maintain books for
+            notify: Called with each alert message
+            level_engine: WeeklyLevelEngine whose Supremo levels gate
+                imbalance alerts; by default the monitor keeps its own, fed
+                with book mid prices
+            stream_url: Combined stream base URL, falls back to BINANCE_STREAM_URL
+            fetch_snapshot: Snapshot source (defaults to the Binance REST endpoint)
+            spread_bps: Spread alert threshold in bps (0 disables), falls back to SPREAD_ALERT_BPS
+            imbalance: Top-of-book imbalance alert threshold in [0, 1] (0 disables),
+                falls back to IMBALANCE_ALERT_RATIO
+            depth: Levels per side for the imbalance, falls back to ORDER_BOOK_DEPTH
+            cooldown: Minimum seconds between repeats of one alert, falls back
+                to ORDER_BOOK_ALERT_COOLDOWN
+            resync_interval: Minimum seconds between snapshot requests per symbol
+            timeout: Seconds without stream data before reconnecting
+        """
+        if stream_url is None:
+            stream_url = os.getenv('BINANCE_STREAM_URL', 'wss://stream.binance.com:9443')
+        if spread_bps is None:
+            spread_bps = float(os.getenv('SPREAD_ALERT_BPS', '0'))
+        if imbalance is None:
+            imbalance = float(os.getenv('IMBALANCE_ALERT_RATIO', '0.6'))
+        if depth is None:
+            depth = int(os.getenv('ORDER_BOOK_DEPTH', '10'))
+        if cooldown is None:
+            cooldown = float(os.getenv('ORDER_BOOK_ALERT_COOLDOWN', '300'))
+        self.syncs: Dict[str, BookSync] = {
+            symbol: BookSync(symbol, fetch_snapshot, resync_interval) for symbol in symbols
+        }
+        self.notify = notify
+        self.owns_levels = level_engine is None
+        self.level_engine = WeeklyLevelEngine() if level_engine is None else level_engine
+        self.stream_url = stream_url.rstrip('/')
+        self.spread_bps = spread_bps
+        self.imbalance = imbalance
+        self.depth = depth
+        self.cooldown = cooldown
+        self.timeout = timeout
+        self._active: Dict[Tuple, bool] = {}
+        self._last_alert: Dict[Tuple, float] = {}
+        self._stop = threading.Event()
+        self._socket: Optional[_WebSocket] = None
+        self._thread = None
+
+    def book(self, symbol: str) -> OrderBook:
+        return self.syncs[symbol].book
+
+    @property
+    def url(self) -> str:
+        streams = '/'.join(f"{symbol.lower()}@depth@100ms" for symbol in self.syncs)
+        return f"{self.stream_url}/stream?streams={streams}"
+
+    def _edge(self, key: Tuple, active: bool, now: float) -> bool:
+        """True when a condition just became active and its cooldown has passed."""
+        was_active = self._active.get(key, False)
+        self._active[key] = active
+        if not active or was_active:
+            return False
+        last = self._last_alert.get(key)
+        if last is not None and now - last < self.cooldown:
+            return False
+        self._last_alert[key] = now
+        return True
+
+    def check(self, book: OrderBook, now: float = None) -> List[str]:
+        """
+        Check a synced book for spread blowouts and imbalances at Supremo levels.
+
+        Each alert fires when its condition becomes true, at most once per cooldown.
+
+        Returns:
+            Alert messages
+        """
+        if now is None:
+            now = time.time()
+        bid, ask = book.best_bid(), book.best_ask()
+        if bid is None or ask is None:
+            return []
+        alerts = []
+        quote = f"Bid ${bid[0]:,.2f} / Ask ${ask[0]:,.2f}"
+
+        if self.spread_bps > 0:
+            spread = book.spread_bps()
+            if self._edge((book.symbol, 'spread'), spread >= self.spread_bps, now):
+                alerts.append(f"📏 SPREAD: {book.symbol} spread {spread:.1f} bps\n{quote}")
+
+        if self.imbalance > 0:
+            mid = (bid[0] + ask[0]) / 2
+            levels = self.level_engine.match_zones(book.symbol, mid)
+            ratio = book.imbalance(self.depth) if levels else None
+            for side, heavy in (('bids', ratio is not None and ratio >= self.imbalance),
+                                ('asks', ratio is not None and ratio <= -self.imbalance)):
+                if self._edge((book.symbol, 'imbalance', side), heavy, now):
+                    share = (1 + abs(ratio)) / 2
+                    at = ', '.join(levels)
+                    alerts.append(
+                        f"⚖️ IMBALANCE: {book.symbol} {side} {share:.0%} of top-{self.depth} depth at {at}\n{quote}"
+                    )
+        return alerts
+
+    def on_message(self, message: Dict) -> List[str]:
+        """
+        Handle one stream message (combined or raw) and notify alerts.
+
+        Returns:
+            Alert messages
+        """
+        event = message.get('data', message)
+        if event.get('e') != 'depthUpdate':
+            return []
+        sync = self.syncs.get(event.get('s'))
+        if sync is None or not sync.on_event(event):
+            return []
+        now = event.get('E', time.time() * 1000) / 1000
+        mid = sync.book.mid()
+        if self.owns_levels and mid is not None:  # one side of the book may be empty
+            self.level_engine.update(sync.book.symbol, mid, now)
+        alerts = self.check(sync.book, now)
+        for alert in alerts:
+            log.info(f"✅ Order book alert: {alert}", extra={'symbol': sync.book.symbol})
+            if self.notify:
+                self.notify(alert)
+        return alerts
+
+    def run(self):
+        """Read the stream until stopped, reconnecting with backoff."""
+        backoff = 1
+        while not self._stop.is_set():
+            try:
+                self._socket = _WebSocket(self.url, self.timeout)
+                backoff = 1
+                log.info(f"📚 Depth stream connected: {', '.join(self.syncs)}")
+                while not self._stop.is_set():
+                    message = json.loads(self._socket.recv())
+                    try:
+                        self.on_message(message)
+                    except Exception as e:
+                        # A bad event must not kill the stream thread
+                        log.exception(f"❌ Depth event failed: {e}", extra={'sample_key': 'depth_event'})
+            except (OSError, ValueError) as e:
+                if not self._stop.is_set():
+                    log.warning(f"⚠️  Depth stream error: {e}")
+            finally:
+                if self._socket is not None:
+                    self._socket.close()
+                    self._socket = None
+            # Events were missed while disconnected: rebuild from fresh snapshots
+            for sync in self.syncs.values():
+                sync.reset()
+            self._stop.wait(backoff)
+            backoff = min(backoff * 2, 60)
+
+    def start(self):
+        self._thread = threading.Thread(target=self.run, daemon=True, name='order-book')
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        ws = self._socket
+        if ws is not None:
+            try:
+                ws.sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def stats(self) -> Dict:
+        """Per-symbol sync state and top of book."""
+        stats = {}
+        for symbol, sync in self.syncs.items():
+            book = sync.book
+            stats[symbol] = {
+                'synced': book.synced,
+                'last_update_id': book.last_update_id,
+                'levels': len(book),
+                'spread_bps': book.spread_bps(),
+                'gaps': sync.gaps,
+                'resyncs': sync.resyncs,
+            }
+        return stats
+
+
+def create_order_book_monitor_from_env(notify: Callable[[str], object] = None,
+                                       level_engine=None) -> Optional[OrderBookMonitor]:
+    """
+    Create an order book monitor for ORDER_BOOK_SYMBOLS (comma-separated).
+
+    Returns:
+        OrderBookMonitor, or None if no symbols are configured
+    """
+    symbols = [s.strip().upper() for s in os.getenv('ORDER_BOOK_SYMBOLS', '').split(',') if s.strip()]
+    if not symbols:
+        return None
+    return OrderBookMonitor(symbols, notify=notify, level_engine=level_engine)
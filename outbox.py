@@ -0,0 +1,477 @@
+"""
+Crash-safe notification outbox.
+Persists formatted notifications to SQLite (WAL mode) before delivery so
+alerts survive process restarts and channel retries.
+"""
+
+import os
+import socket
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from typing import Callable, Dict, List, Optional, Tuple
+from dotenv import load_dotenv
+from notification import CONSOLE_CHANNEL, get_configured_channels, send_to_channel
+from metrics import OUTBOX_DELIVERY_LAG
+from log_setup import get_logger
+
+load_dotenv()
+
+log = get_logger('outbox')
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    channel TEXT NOT NULL,
+    body TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL,
+    claimed_by TEXT,
+    lease_until REAL,
+    created_at REAL NOT NULL,
+    delivered_at REAL,
+    last_error TEXT
+);
+CREATE INDEX IF NOT EXISTS outbox_ready ON outbox (status, next_attempt_at);
+"""
+
+# Row states
+PENDING = 'pending'
+CLAIMED = 'claimed'
+DELIVERED = 'delivered'
+DEAD = 'dead'
+
+# Distinguishes this process from an earlier one that had the same PID (e.g. containers)
+_PROCESS_TOKEN = uuid.uuid4().hex[:8]
+
+
+def worker_prefix() -> str:
+    """Claimant prefix for this process: "host:pid:token"."""
+    return f"{socket.gethostname()}:{os.getpid()}:{_PROCESS_TOKEN}"
+
+
+def _connect(path: str, synchronous: str) -> sqlite3.Connection:
+    """Open a connection configured for WAL and concurrent access."""
+    conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute(f'PRAGMA synchronous={synchronous}')
+    conn.execute('PRAGMA busy_timeout=30000')
+    return conn
+
+
+def _is_dead_local_worker(claimed_by: Optional[str], host: str) -> bool:
+    """Return True if ``claimed_by`` ("host:pid:token:n") names a dead process on this host."""
+    if not claimed_by:
+        return True
+    parts = claimed_by.split(':')
+    if len(parts) < 3 or parts[0] != host or not parts[1].isdigit():
+        return False
+    pid = int(parts[1])
+    if pid == os.getpid():
+        return parts[2] != _PROCESS_TOKEN
+    if sys.platform == 'win32':
+        return False  # No signal-0 probe on Windows; rely on lease expiry
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return True
+    except OSError:
+        return False
+    return False
+
+
+class NotificationOutbox:
+    """
+    Transactional outbox backed by SQLite in WAL mode.
+
+    Producers call ``enqueue``; a background writer thread group-commits
+    pending rows so many concurrent producers share one transaction.
+    ``enqueue`` only returns once its rows are durable.
+    """
+
+    def __init__(
+        self,
+        path: str = None,
+        batch_size: int = None,
+        flush_interval: float = None,
+        lease_seconds: float = None,
+        max_attempts: int = None
+    ):
+        """Initialize outbox, falling back to environment configuration."""
+        self.path = path or os.getenv('OUTBOX_PATH', 'outbox.db')
+        self.batch_size = batch_size or int(os.getenv('OUTBOX_BATCH_SIZE', '256'))
+        if flush_interval is None:
+            flush_interval = float(os.getenv('OUTBOX_FLUSH_INTERVAL', '0'))
+        self.flush_interval = flush_interval
+        self.lease_seconds = lease_seconds or float(os.getenv('OUTBOX_LEASE_SECONDS', '60'))
+        self.max_attempts = max_attempts or int(os.getenv('OUTBOX_MAX_ATTEMPTS', '8'))
+        self.synchronous = os.getenv('OUTBOX_SYNCHRONOUS', 'NORMAL').upper()
+
+        self._conn = _connect(self.path, self.synchronous)
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+        self._pending: List[Tuple[str, str, threading.Event]] = []
+        self._pending_cond = threading.Condition()
+        self._closed = False
+        self._writer = threading.Thread(target=self._writer_loop, daemon=True, name='outbox-writer')
+        self._writer.start()
+
+    # -- producer side --------------------------------------------------
+
+    def enqueue(self, body: str, channels: List[str] = None, timeout: float = 10.0) -> bool:
+        """
+        Durably store a notification, one row per channel.
+
+        Args:
+            body: Formatted message text
+            channels: Channel names (defaults to all configured channels)
+            timeout: Seconds to wait for the group commit
+
+        Returns:
+            True once the rows are committed (or handed to the writer, which
+            retries until they are), False if none were persisted in time;
+            the rows are then withdrawn, so the caller can safely retry
+        """
+        if channels is None:
+            channels = get_configured_channels() or [CONSOLE_CHANNEL]
+
+        events = []
+        with self._pending_cond:
+            if self._closed:
+                raise RuntimeError("Outbox is closed")
+            for channel in channels:
+                event = threading.Event()
+                self._pending.append((channel, body, event))
+                events.append(event)
+            self._pending_cond.notify()
+
+        deadline = time.monotonic() + timeout
+        if all(event.wait(max(deadline - time.monotonic(), 0)) for event in events):
+            return True
+        # Withdraw the rows unless the writer already holds some of them
+        with self._pending_cond:
+            queued = [entry for entry in self._pending if entry[2] in events]
+            if len(queued) < len(events):
+                return True
+            self._pending = [entry for entry in self._pending if entry[2] not in events]
+        return False
+
+    def _writer_loop(self):
+        """Group-commit queued rows in batches."""
+        while True:
+            with self._pending_cond:
+                while not self._pending and not self._closed:
+                    self._pending_cond.wait()
+                if not self._pending and self._closed:
+                    return
+            # Let concurrent producers join this batch
+            if self.flush_interval:
+                time.sleep(self.flush_interval)
+            with self._pending_cond:
+                batch = self._pending[:self.batch_size]
+                del self._pending[:self.batch_size]
+
+            now = time.time()
+            rows = [(channel, body, now, now) for channel, body, _ in batch]
+            try:
+                with self._lock:
+                    self._conn.execute('BEGIN IMMEDIATE')
+                    self._conn.executemany(
+                        'INSERT INTO outbox (channel, body, next_attempt_at, created_at) VALUES (?, ?, ?, ?)',
+                        rows
+                    )
+                    self._conn.execute('COMMIT')
+            except sqlite3.Error as e:
+                log.error(f"❌ Outbox write error: {e}")
+                with self._lock:
+                    if self._conn.in_transaction:
+                        self._conn.execute('ROLLBACK')
+                # Requeue so the rows are retried rather than acknowledged
+                with self._pending_cond:
+                    self._pending[:0] = batch
+                time.sleep(0.1)
+                continue
+
+            for _, _, event in batch:
+                event.set()
+
+    # -- consumer side --------------------------------------------------
+
+    def recover(self) -> int:
+        """
+        Release rows claimed by dead worker processes on this host.
+
+        Rows claimed by live processes (e.g. sibling prefork workers) are
+        left alone; rows claimed on other hosts are reclaimed when their
+        lease expires.
+
+        Returns:
+            Number of rows returned to pending
+        """
+        host = socket.gethostname()
+        with self._lock:
+            claimants = [row[0] for row in self._conn.execute(
+                'SELECT DISTINCT claimed_by FROM outbox WHERE status = ?', (CLAIMED,)
+            )]
+            dead = [c for c in claimants if _is_dead_local_worker(c, host)]
+            recovered = 0
+            for claimant in dead:
+                cursor = self._conn.execute(
+                    'UPDATE outbox SET status = ?, claimed_by = NULL, lease_until = NULL '
+                    'WHERE status = ? AND claimed_by IS ?',
+                    (PENDING, CLAIMED, claimant)
+                )
+                recovered += cursor.rowcount
+            return recovered
+
+    def claim(self, worker_id: str, limit: int = 32) -> List[Tuple[int, str, str, int, float]]:
+        """
+        Claim ready rows for delivery.
+
+        Rows whose lease expired (worker died mid-delivery) are reclaimed.
+
+        Returns:
+            List of (id, channel, body, attempts, created_at) tuples
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                rows = self._conn.execute(
+                    'SELECT id, channel, body, attempts, created_at FROM outbox '
+                    'WHERE (status = ? AND next_attempt_at <= ?) OR (status = ? AND lease_until < ?) '
+                    'ORDER BY id LIMIT ?',
+                    (PENDING, now, CLAIMED, now, limit)
+                ).fetchall()
+                if rows:
+                    self._conn.executemany(
+                        'UPDATE outbox SET status = ?, claimed_by = ?, lease_until = ? WHERE id = ?',
+                        [(CLAIMED, worker_id, now + self.lease_seconds, row[0]) for row in rows]
+                    )
+                self._conn.execute('COMMIT')
+            except sqlite3.Error:
+                self._conn.execute('ROLLBACK')
+                raise
+        return rows
+
+    def renew(self, worker_id: str, row_ids: List[int]) -> List[int]:
+        """
+        Extend the lease on rows this worker still holds.
+
+        Called before each send so a batch of slow sends doesn't outlive
+        its lease and get re-sent by another worker.
+
+        Returns:
+            IDs of the rows still claimed by ``worker_id``
+        """
+        if not row_ids:
+            return []
+        placeholders = ','.join('?' * len(row_ids))
+        with self._lock:
+            self._conn.execute(
+                f'UPDATE outbox SET lease_until = ? WHERE id IN ({placeholders}) AND status = ? AND claimed_by = ?',
+                (time.time() + self.lease_seconds, *row_ids, CLAIMED, worker_id)
+            )
+            return [row[0] for row in self._conn.execute(
+                f'SELECT id FROM outbox WHERE id IN ({placeholders}) AND status = ? AND claimed_by = ?',
+                (*row_ids, CLAIMED, worker_id)
+            )]
+
+    def complete(self, worker_id: str, delivered: List[Tuple[int, float]], failed: List[Tuple[int, int, str]]):
+        """
+        Record delivery results in one transaction.
+
+        Rows another worker has since reclaimed are left to that worker.
+
+        Args:
+            worker_id: Claimant the rows were claimed by
+            delivered: (id, delivered_at) for rows whose send succeeded
+            failed: (id, attempts_so_far, error) for rows that failed
+        """
+        now = time.time()
+        retry_rows = []
+        dead_rows = []
+        for row_id, attempts, error in failed:
+            attempts += 1
+            if attempts >= self.max_attempts:
+                dead_rows.append((DEAD, attempts, error, row_id, worker_id))
+            else:
+                # Exponential backoff capped at 5 minutes
+                delay = min(2 ** attempts, 300)
+                retry_rows.append((PENDING, attempts, now + delay, error, row_id, worker_id))
+
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                if delivered:
+                    self._conn.executemany(
+                        'UPDATE outbox SET status = ?, delivered_at = ?, claimed_by = NULL WHERE id = ? AND claimed_by = ?',
+                        [(DELIVERED, delivered_at, row_id, worker_id) for row_id, delivered_at in delivered]
+                    )
+                if retry_rows:
+                    self._conn.executemany(
+                        'UPDATE outbox SET status = ?, attempts = ?, next_attempt_at = ?, '
+                        'last_error = ?, claimed_by = NULL, lease_until = NULL WHERE id = ? AND claimed_by = ?',
+                        retry_rows
+                    )
+                if dead_rows:
+                    self._conn.executemany(
+                        'UPDATE outbox SET status = ?, attempts = ?, last_error = ?, '
+                        'claimed_by = NULL, lease_until = NULL WHERE id = ? AND claimed_by = ?',
+                        dead_rows
+                    )
+                self._conn.execute('COMMIT')
+            except sqlite3.Error:
+                self._conn.execute('ROLLBACK')
+                raise
+
+    def purge_delivered(self, older_than: float = 86400) -> int:
+        """Delete delivered rows older than ``older_than`` seconds."""
+        with self._lock:
+            cursor = self._conn.execute(
+                'DELETE FROM outbox WHERE status = ? AND delivered_at < ?',
+                (DELIVERED, time.time() - older_than)
+            )
+            return cursor.rowcount
+
+    def stats(self) -> Dict:
+        """Return row counts by status."""
+        with self._lock:
+            counts = dict(self._conn.execute('SELECT status, COUNT(*) FROM outbox GROUP BY status').fetchall())
+        with self._pending_cond:
+            counts['uncommitted'] = len(self._pending)
+        return counts
+
+    def close(self):
+        """Flush pending rows and close the database."""
+        with self._pending_cond:
+            self._closed = True
+            self._pending_cond.notify()
+        self._writer.join(timeout=10)
+        with self._lock:
+            self._conn.close()
+
+
+class OutboxDispatcher:
+    """Worker threads that claim outbox rows and deliver them."""
+
+    def __init__(
+        self,
+        outbox: NotificationOutbox,
+        deliver: Callable[[str, str], bool] = send_to_channel,
+        workers: int = None,
+        poll_interval: float = None,
+        retention: float = None
+    ):
+        """Initialize dispatcher, falling back to environment configuration."""
+        self.outbox = outbox
+        self.deliver = deliver
+        self.workers = workers or int(os.getenv('OUTBOX_WORKERS', '4'))
+        if poll_interval is None:
+            poll_interval = float(os.getenv('OUTBOX_POLL_INTERVAL', '0.2'))
+        self.poll_interval = poll_interval
+        # Delivered rows are kept this long (seconds, 0 = forever), purged every interval
+        if retention is None:
+            retention = float(os.getenv('OUTBOX_RETENTION', '86400'))
+        self.retention = retention
+        self.purge_interval = float(os.getenv('OUTBOX_PURGE_INTERVAL', '3600'))
+        self._next_purge = 0.0
+        self._purge_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._worker_prefix = worker_prefix()
+
+    def start(self):
+        """Recover rows from a previous run and start the workers."""
+        recovered = self.outbox.recover()
+        if recovered:
+            log.info(f"📬 Outbox: redelivering {recovered} undelivered notification(s)")
+        for i in range(self.workers):
+            thread = threading.Thread(
+                target=self._run, args=(f"{self._worker_prefix}:{i}",), daemon=True, name=f'outbox-worker-{i}'
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: float = 5.0):
+        """Stop the workers after their current batch."""
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def run_once(self, worker_id: str = 'inline', limit: int = 32) -> int:
+        """
+        Claim and deliver one batch of rows.
+
+        Returns:
+            Number of rows processed
+        """
+        rows = self.outbox.claim(worker_id, limit)
+        delivered = []
+        failed = []
+        held = [row[0] for row in rows]
+        for row_id, channel, body, attempts, created_at in rows:
+            # Sent rows stay leased too until complete() records them
+            held = self.outbox.renew(worker_id, held)
+            if row_id not in held:
+                continue  # lease expired and another worker reclaimed it
+            try:
+                ok = self.deliver(channel, body)
+                error = None if ok else 'delivery returned False'
+            except Exception as e:
+                ok = False
+                error = str(e)
+            if ok:
+                delivered_at = time.time()
+                delivered.append((row_id, delivered_at))
+                OUTBOX_DELIVERY_LAG.observe(max(delivered_at - created_at, 0.0), channel)
+            else:
+                failed.append((row_id, attempts, error))
+        if rows:
+            self.outbox.complete(worker_id, delivered, failed)
+        return len(rows)
+
+    def purge(self, now: float = None) -> int:
+        """
+        Delete delivered rows past the retention period (at most once per purge interval).
+
+        Returns:
+            Number of rows deleted
+        """
+        if not self.retention:
+            return 0
+        if now is None:
+            now = time.monotonic()
+        with self._purge_lock:
+            if now < self._next_purge:
+                return 0
+            self._next_purge = now + self.purge_interval
+        return self.outbox.purge_delivered(self.retention)
+
+    def _run(self, worker_id: str):
+        while not self._stop.is_set():
+            try:
+                self.purge()
+                if self.run_once(worker_id) == 0:
+                    self._stop.wait(self.poll_interval)
+            except Exception as e:
+                log.exception(f"❌ Outbox worker error: {e}", extra={'sample_key': 'outbox_worker_error'})
+                self._stop.wait(1)
+
+
+def create_outbox_from_env() -> Optional[Tuple[NotificationOutbox, OutboxDispatcher]]:
+    """
+    Build the outbox and dispatcher if OUTBOX_ENABLED is set.
+
+    Returns:
+        (outbox, dispatcher) or None if disabled
+    """
+    if os.getenv('OUTBOX_ENABLED', 'false').lower() != 'true':
+        return None
+    outbox = NotificationOutbox()
+    return outbox, OutboxDispatcher(outbox)
@@ -0,0 +1,166 @@
+"""
+Prefork launcher for the webhook server.
+Runs N worker processes on the same port (SO_REUSEPORT) that share dedup,
+rate-limit and cluster membership tables in shared memory, and restarts
+workers that crash.
+
+Usage:
+    WEBHOOK_WORKERS=4 python prefork_server.py
+"""
+
+import os
+import signal
+import socket
+import sys
+import time
+from typing import Dict, Optional
+from dotenv import load_dotenv
+
+# Fix Windows console encoding
+if sys.platform == 'win32':
+    try:
+        sys.stdout.reconfigure(encoding='utf-8')
+        sys.stderr.reconfigure(encoding='utf-8')
+    except (AttributeError, ValueError):
+        import io
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+        sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+
+from shm_table import (
+    SharedDedupTable,
+    SharedDocument,
+    create_rate_limiter_from_env,
+    install_shared_tables,
+)
+from worker_relay import SignalRelay, install_signal_relay
+
+load_dotenv()
+
+
+def _listen_socket(host: str, port: int, reuse_port: bool) -> socket.socket:
+    """Create a bound, listening TCP socket."""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if reuse_port:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind((host, port))
+    sock.listen(1024)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _run_worker(host: str, port: int, shared_sock: Optional[socket.socket], primary: bool):
+    """
+    Worker process body: import the app (after fork) and serve forever.
+
+    The primary worker (slot 0) also runs the once-per-server services.
+    """
+    from werkzeug.serving import make_server
+
+    # Restore default signal handling inherited from the supervisor
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+
+    sock = shared_sock or _listen_socket(host, port, reuse_port=True)
+    from webhook_server import app, start_background_services
+    start_background_services(primary=primary)
+    server = make_server(host, port, app, threaded=True, fd=sock.fileno())
+    print(f"👷 Worker {os.getpid()} serving on {host}:{port}{' (primary)' if primary else ''}")
+    server.serve_forever()
+
+
+class PreforkSupervisor:
+    """Forks webhook workers and restarts them with backoff when they die."""
+
+    def __init__(self, host: str, port: int, workers: int):
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.reuse_port = hasattr(socket, 'SO_REUSEPORT')
+        # Without SO_REUSEPORT, bind once and let every worker accept on the inherited socket
+        self.shared_sock = None if self.reuse_port else _listen_socket(host, port, reuse_port=False)
+        self.children: Dict[int, int] = {}  # pid -> worker slot
+        self.restarts = [0] * workers
+        self.started_at = [0.0] * workers
+        self.stopping = False
+
+    def spawn(self, slot: int):
+        """Fork one worker into ``slot``."""
+        pid = os.fork()
+        if pid == 0:
+            try:
+                _run_worker(self.host, self.port, self.shared_sock, primary=slot == 0)
+            except Exception as e:
+                print(f"❌ Worker {os.getpid()} failed: {e}")
+            finally:
+                os._exit(1)
+        self.children[pid] = slot
+        self.started_at[slot] = time.monotonic()
+
+    def stop(self, *_):
+        """Terminate all workers."""
+        self.stopping = True
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def run(self):
+        """Start workers and supervise them until stopped."""
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        for slot in range(self.workers):
+            self.spawn(slot)
+
+        while self.children:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            except InterruptedError:
+                continue
+            slot = self.children.pop(pid, None)
+            if slot is None or self.stopping:
+                continue
+
+            # Exponential backoff for crash loops; a worker that ran for a minute was healthy
+            if time.monotonic() - self.started_at[slot] > 60:
+                self.restarts[slot] = 0
+            self.restarts[slot] += 1
+            delay = min(2 ** (self.restarts[slot] - 1), 30) if self.restarts[slot] > 1 else 0
+            print(f"⚠️  Worker {pid} exited (status {status}), restarting in {delay}s")
+            if delay:
+                time.sleep(delay)
+            if not self.stopping:
+                self.spawn(slot)
+
+        print("🛑 All workers stopped")
+
+
+def main():
+    """Launch the prefork webhook server."""
+    if not hasattr(os, 'fork'):
+        print("❌ Prefork mode requires a POSIX system; use webhook_server.py instead")
+        sys.exit(1)
+
+    host = os.getenv('WEBHOOK_HOST', '0.0.0.0')
+    port = int(os.getenv('WEBHOOK_PORT', '5000'))
+    workers = int(os.getenv('WEBHOOK_WORKERS', str(os.cpu_count() or 2)))
+
+    # Shared tables must exist before forking so workers inherit the same memory
+    dedup = SharedDedupTable(capacity=int(os.getenv('DEDUP_TABLE_SIZE', '65536')))
+    # Cluster membership too, so every worker routes tickers with the same ring
+    install_shared_tables(dedup, create_rate_limiter_from_env(), membership=SharedDocument())
+    install_signal_relay(SignalRelay())
+
+    print("🚀 Starting Supremo Trading Bot Webhook Server (prefork)")
+    print(f"📡 Listening on {host}:{port} with {workers} workers")
+    print("-" * 50)
+
+    PreforkSupervisor(host, port, workers).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""
+Fixed-size price history with rolling-window statistics.
+Keeps the last N ticks of a symbol in array('d') ring buffers and maintains
+min, max, change and volatility over several time windows in O(1) per tick.
+"""
+
+import math
+from array import array
+from collections import deque
+from typing import Dict, Iterable, Optional
+
+
+class RollingWindow:
+    """
+    Statistics over the ticks of the last ``seconds`` seconds.
+
+    Min/max use monotonic deques of tick sequence numbers; volatility uses
+    running sums of log returns. Every tick is added and evicted once, so
+    updates are amortized O(1).
+    """
+
+    __slots__ = ('seconds', 'start', 'max_queue', 'min_queue', 'ret_sum', 'ret_sq', 'ret_count')
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.start = 0  # sequence number of the oldest tick in the window
+        self.max_queue = deque()
+        self.min_queue = deque()
+        self.ret_sum = 0.0
+        self.ret_sq = 0.0
+        self.ret_count = 0
+
+
+class PriceHistory:
+    """Ring-buffered price history for one symbol."""
+
+    def __init__(self, capacity: int = 4096, windows: Iterable[float] = (300,)):
+        """
+        Initialize history.
+
+        Args:
+            capacity: Ticks retained; windows longer than ``capacity`` ticks
+                are truncated to the retained history
+            windows: Window lengths in seconds to maintain statistics for
+        """
+        self.capacity = capacity
+        self._prices = array('d', bytes(8 * capacity))
+        self._times = array('d', bytes(8 * capacity))
+        self._returns = array('d', bytes(8 * capacity))
+        self.count = 0  # ticks seen (sequence number of the next tick)
+        self.first_time = None
+        self._windows: Dict[float, RollingWindow] = {w: RollingWindow(w) for w in windows}
+
+    @property
+    def last_price(self) -> Optional[float]:
+        return self._prices[(self.count - 1) % self.capacity] if self.count else None
+
+    def update(self, price: float, ts: float):
+        """
+        Append one tick and advance every window.
+
+        Args:
+            price: Last traded price
+            ts: Tick time as Unix seconds (non-decreasing)
+        """
+        capacity = self.capacity
+        seq = self.count
+        slot = seq % capacity
+        ret = math.log(price / self.last_price) if seq and self.last_price > 0 and price > 0 else 0.0
+        self._prices[slot] = price
+        self._times[slot] = ts
+        self._returns[slot] = ret
+        self.count = seq + 1
+        if self.first_time is None:
+            self.first_time = ts
+
+        prices = self._prices
+        times = self._times
+        returns = self._returns
+        oldest_retained = seq - capacity + 1
+        for window in self._windows.values():
+            if seq > window.start:
+                window.ret_sum += ret
+                window.ret_sq += ret * ret
+                window.ret_count += 1
+
+            # Evict ticks that left the window (or were overwritten in the ring)
+            cutoff = ts - window.seconds
+            while window.start < seq and (
+                    window.start < oldest_retained or times[window.start % capacity] < cutoff):
+                window.start += 1
+                # The new oldest tick's return points outside the window
+                dropped = returns[window.start % capacity]
+                window.ret_sum -= dropped
+                window.ret_sq -= dropped * dropped
+                window.ret_count -= 1
+
+            max_queue = window.max_queue
+            while max_queue and prices[max_queue[-1] % capacity] <= price:
+                max_queue.pop()
+            max_queue.append(seq)
+            while max_queue[0] < window.start:
+                max_queue.popleft()
+
+            min_queue = window.min_queue
+            while min_queue and prices[min_queue[-1] % capacity] >= price:
+                min_queue.pop()
+            min_queue.append(seq)
+            while min_queue[0] < window.start:
+                min_queue.popleft()
+
+    def dump_state(self) -> bytes:
+        """Serialize the retained ticks, oldest first."""
+        retained = range(max(0, self.count - self.capacity), self.count)
+        times = array('d', (self._times[seq % self.capacity] for seq in retained))
+        prices = array('d', (self._prices[seq % self.capacity] for seq in retained))
+        return len(times).to_bytes(4, 'little') + times.tobytes() + prices.tobytes()
+
+    def load_state(self, buffer):
+        """Replay ticks written by dump_state into this (empty) history."""
+        n = int.from_bytes(bytes(buffer[:4]), 'little')
+        times = array('d', bytes(buffer[4:4 + 8 * n]))
+        prices = array('d', bytes(buffer[4 + 8 * n:4 + 16 * n]))
+        for price, ts in zip(prices, times):
+            self.update(price, ts)
+
+    def _window(self, seconds: float) -> Optional[RollingWindow]:
+        window = self._windows.get(seconds)
+        if window is None:
+            raise KeyError(f"Window {seconds}s is not tracked")
+        return window if self.count else None
+
+    def is_warm(self, seconds: float, now: float) -> bool:
+        """True once the history reaches back at least ``seconds`` before ``now``."""
+        self._window(seconds)
+        return self.first_time is not None and now - self.first_time >= seconds
+
+    def max(self, seconds: float) -> Optional[float]:
+        """Highest price in the window."""
+        window = self._window(seconds)
+        return self._prices[window.max_queue[0] % self.capacity] if window else None
+
+    def min(self, seconds: float) -> Optional[float]:
+        """Lowest price in the window."""
+        window = self._window(seconds)
+        return self._prices[window.min_queue[0] % self.capacity] if window else None
+
+    def change(self, seconds: float) -> Optional[float]:
+        """Return from the oldest tick in the window to the last tick (0.03 = +3%)."""
+        window = self._window(seconds)
+        if not window:
+            return None
+        first = self._prices[window.start % self.capacity]
+        return self.last_price / first - 1 if first else None
+
+    def volatility(self, seconds: float) -> Optional[float]:
+        """Standard deviation of per-tick log returns in the window."""
+        window = self._window(seconds)
+        if not window or window.ret_count < 2:
+            return None
+        n = window.ret_count
+        variance = (window.ret_sq - window.ret_sum * window.ret_sum / n) / (n - 1)
+        return math.sqrt(max(variance, 0.0))
+
+    def samples(self, seconds: float) -> int:
+        """Number of ticks in the window."""
+        window = self._window(seconds)
+        return self.count - window.start if window else 0
@@ -0,0 +1,191 @@
+"""
+Opt-in sampling profiler for the webhook and price monitor.
+Profiles a configurable fraction of requests/iterations with cProfile and
+tracemalloc and aggregates the results per section.
+"""
+
+import cProfile
+import json
+import os
+import pstats
+import random
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, Iterator, List
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+class SamplingProfiler:
+    """
+    Aggregating cProfile + tracemalloc sampler.
+
+    At most one sample runs at a time (tracemalloc is process-wide), so
+    concurrent requests simply skip sampling while another is profiled.
+    With ``sample_rate`` 0 the only cost per call is one attribute check.
+    """
+
+    def __init__(self, sample_rate: float = None, output_dir: str = None, top_n: int = None):
+        """Initialize profiler, falling back to environment configuration."""
+        if sample_rate is None:
+            sample_rate = float(os.getenv('PROFILE_SAMPLE_RATE', '0'))
+        self.sample_rate = sample_rate
+        self.output_dir = output_dir or os.getenv('PROFILE_DIR', 'profiles')
+        self.top_n = top_n or int(os.getenv('PROFILE_TOP_N', '25'))
+        self.dump_every = int(os.getenv('PROFILE_DUMP_EVERY', '100'))
+        self.trace_frames = int(os.getenv('PROFILE_TRACE_FRAMES', '1'))
+
+        self._sample_lock = threading.Lock()
+        self._data_lock = threading.Lock()
+        self._stats: Dict[str, pstats.Stats] = {}
+        self._allocations: Dict[str, Counter] = {}
+        self._samples: Counter = Counter()
+        self._sample_time: Counter = Counter()
+
+    @property
+    def enabled(self) -> bool:
+        return self.sample_rate > 0
+
+    def set_sample_rate(self, sample_rate: float):
+        """Change the sampling rate at runtime (0 disables)."""
+        self.sample_rate = max(0.0, min(1.0, sample_rate))
+
+    @contextmanager
+    def profile(self, section: str) -> Iterator[None]:
+        """
+        Profile the enclosed block if this call is sampled.
+
+        Args:
+            section: Aggregation bucket (e.g. 'webhook', 'monitor')
+        """
+        if not self.sample_rate or random.random() >= self.sample_rate:
+            yield
+            return
+        if not self._sample_lock.acquire(blocking=False):
+            yield
+            return
+
+        started_tracing = not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start(self.trace_frames)
+        profile = cProfile.Profile()
+        start = time.perf_counter()
+        try:
+            profile.enable()
+            try:
+                yield
+            finally:
+                profile.disable()
+            snapshot = tracemalloc.take_snapshot() if tracemalloc.is_tracing() else None
+        finally:
+            if started_tracing:
+                tracemalloc.stop()
+            self._sample_lock.release()
+        self._record(section, profile, snapshot, time.perf_counter() - start)
+
+    def _record(self, section: str, profile: cProfile.Profile, snapshot, elapsed: float):
+        allocations = Counter()
+        if snapshot is not None:
+            snapshot = snapshot.filter_traces((
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, __file__),
+            ))
+            for stat in snapshot.statistics('lineno'):
+                frame = stat.traceback[0]
+                allocations[f"{frame.filename}:{frame.lineno}"] += stat.size
+
+        with self._data_lock:
+            if section in self._stats:
+                self._stats[section].add(profile)
+            else:
+                self._stats[section] = pstats.Stats(profile)
+            self._allocations.setdefault(section, Counter()).update(allocations)
+            self._samples[section] += 1
+            self._sample_time[section] += elapsed
+            should_dump = self.dump_every and self._samples[section] % self.dump_every == 0
+        if should_dump:
+            self.dump(section)
+
+    def top_functions(self, section: str, n: int = None) -> List[Dict]:
+        """Return the hottest functions of a section by own time."""
+        n = n or self.top_n
+        with self._data_lock:
+            stats = self._stats.get(section)
+            if stats is None:
+                return []
+            rows = sorted(stats.stats.items(), key=lambda item: item[1][2], reverse=True)[:n]
+        return [
+            {
+                'function': f"{os.path.basename(filename)}:{line}({func})",
+                'calls': nc,
+                'tottime_ms': tt * 1000,
+                'cumtime_ms': ct * 1000
+            }
+            for (filename, line, func), (cc, nc, tt, ct, callers) in rows
+        ]
+
+    def top_allocations(self, section: str, n: int = None) -> List[Dict]:
+        """Return the allocation sites retaining the most memory per section."""
+        n = n or self.top_n
+        with self._data_lock:
+            allocations = self._allocations.get(section, Counter()).most_common(n)
+        return [{'site': site, 'bytes': size} for site, size in allocations]
+
+    def summary(self, n: int = None) -> Dict:
+        """Aggregated top-N summary for every section."""
+        with self._data_lock:
+            sections = {s: (self._samples[s], self._sample_time[s]) for s in self._stats}
+        return {
+            'sample_rate': self.sample_rate,
+            'sections': {
+                section: {
+                    'samples': samples,
+                    'mean_sample_ms': total / samples * 1000 if samples else 0.0,
+                    'top_functions': self.top_functions(section, n),
+                    'top_allocations': self.top_allocations(section, n)
+                }
+                for section, (samples, total) in sections.items()
+            }
+        }
+
+    def dump(self, section: str = None) -> List[str]:
+        """
+        Write aggregated profiles to ``output_dir``.
+
+        Each section produces ``<section>.prof`` (pstats, loadable with
+        ``python -m pstats``) and ``<section>.alloc.json``.
+
+        Returns:
+            Paths written
+        """
+        os.makedirs(self.output_dir, exist_ok=True)
+        written = []
+        with self._data_lock:
+            sections = [section] if section else list(self._stats)
+            for name in sections:
+                stats = self._stats.get(name)
+                if stats is None:
+                    continue
+                prof_path = os.path.join(self.output_dir, f"{name}.prof")
+                stats.dump_stats(prof_path)
+                alloc_path = os.path.join(self.output_dir, f"{name}.alloc.json")
+                with open(alloc_path, 'w') as f:
+                    json.dump(dict(self._allocations.get(name, Counter()).most_common()), f, indent=1)
+                written += [prof_path, alloc_path]
+        return written
+
+    def reset(self):
+        """Discard all aggregated samples."""
+        with self._data_lock:
+            self._stats.clear()
+            self._allocations.clear()
+            self._samples.clear()
+            self._sample_time.clear()
+
+
+# Process-wide profiler shared by the webhook server and the price monitor
+profiler = SamplingProfiler()
@@ -0,0 +1,146 @@
+"""
+Replay captured webhook traffic against a server.
+Preserves the original inter-arrival pattern, optionally time-scaled.
+
+Usage:
+    python replay_webhook.py capture.bin --url http://127.0.0.1:5000/webhook --speed 10
+    python replay_webhook.py capture.bin --speed max
+"""
+
+import argparse
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+import requests
+
+# Fix Windows console encoding
+if sys.platform == 'win32':
+    try:
+        sys.stdout.reconfigure(encoding='utf-8')
+        sys.stderr.reconfigure(encoding='utf-8')
+    except (AttributeError, ValueError):
+        import io
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+        sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+
+from capture import iter_capture
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def replay(
+    path: str,
+    url: str,
+    speed: Optional[float] = 1.0,
+    workers: int = 32,
+    timeout: float = 10.0
+) -> Dict:
+    """
+    Replay a capture file.
+
+    Args:
+        path: Capture file path
+        url: Target webhook URL
+        speed: Time scale factor (10 = ten times faster), or None for as fast as possible
+        workers: Max in-flight requests
+        timeout: Per-request timeout in seconds
+
+    Returns:
+        Summary dict with status counts, latency percentiles and schedule lag
+    """
+    records = list(iter_capture(path))
+    if not records:
+        return {'requests': 0}
+
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=workers)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+
+    statuses = Counter()
+    latencies = []
+    lags = []
+    lock = threading.Lock()
+
+    def send(content_type: str, body: bytes):
+        start = time.perf_counter()
+        try:
+            response = session.post(url, data=body, headers={'Content-Type': content_type}, timeout=timeout)
+            status = response.status_code
+        except requests.exceptions.RequestException as e:
+            status = type(e).__name__
+        elapsed = time.perf_counter() - start
+        with lock:
+            statuses[status] += 1
+            latencies.append(elapsed)
+
+    first_arrival = records[0][0]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for arrival, content_type, body in records:
+            if speed:
+                due = start + (arrival - first_arrival) / speed
+                delay = due - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                lags.append(max(time.perf_counter() - due, 0))
+            executor.submit(send, content_type, body)
+    wall_time = time.perf_counter() - start
+
+    latencies.sort()
+    lags.sort()
+    return {
+        'requests': len(records),
+        'captured_span_s': records[-1][0] - first_arrival,
+        'wall_time_s': wall_time,
+        'throughput_rps': len(records) / wall_time if wall_time else 0.0,
+        'statuses': dict(statuses),
+        'latency_ms': {
+            'p50': percentile(latencies, 50) * 1000,
+            'p95': percentile(latencies, 95) * 1000,
+            'p99': percentile(latencies, 99) * 1000,
+            'max': latencies[-1] * 1000
+        },
+        'schedule_lag_ms_p99': percentile(lags, 99) * 1000 if lags else 0.0
+    }
+
+
+def main():
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Replay captured webhook traffic")
+    parser.add_argument('capture', help="Capture file written with WEBHOOK_CAPTURE_FILE")
+    parser.add_argument('--url', default='http://127.0.0.1:5000/webhook', help="Target webhook URL")
+    parser.add_argument('--speed', default='1', help="Time scale (1, 10, ...) or 'max'")
+    parser.add_argument('--workers', type=int, default=32, help="Max in-flight requests")
+    parser.add_argument('--timeout', type=float, default=10.0, help="Per-request timeout (seconds)")
+    args = parser.parse_args()
+
+    speed = None if args.speed == 'max' else float(args.speed)
+    label = 'as fast as possible' if speed is None else f'{speed:g}x'
+    print(f"🔁 Replaying {args.capture} -> {args.url} ({label})")
+
+    summary = replay(args.capture, args.url, speed=speed, workers=args.workers, timeout=args.timeout)
+    if not summary['requests']:
+        print("⚠️  Capture file is empty")
+        return
+
+    print(f"✅ Sent {summary['requests']} requests in {summary['wall_time_s']:.2f}s "
+          f"(captured span {summary['captured_span_s']:.2f}s, {summary['throughput_rps']:.1f} req/s)")
+    print(f"   Status codes: {summary['statuses']}")
+    latency = summary['latency_ms']
+    print(f"   Latency ms: p50={latency['p50']:.1f} p95={latency['p95']:.1f} "
+          f"p99={latency['p99']:.1f} max={latency['max']:.1f}")
+    print(f"   Schedule lag p99: {summary['schedule_lag_ms_p99']:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
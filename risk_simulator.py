@@ -0,0 +1,281 @@
+"""
+Monte Carlo risk simulator for position sizing.
+Resamples trade outcomes (R-multiples) into equity paths and reports the
+drawdown distribution and risk of ruin implied by each RISK_PER_TRADE
+setting. Paths are simulated in vectorized NumPy chunks spread over a
+process pool.
+
+Usage:
+    python risk_simulator.py --paths 1000000 --trades 200 --risk 0.5,1,2
+    python risk_simulator.py --history trades.csv --risk 1,2,3
+"""
+
+import argparse
+import csv
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence
+import numpy as np
+from dotenv import load_dotenv
+
+# Fix Windows console encoding
+if sys.platform == 'win32':
+    try:
+        sys.stdout.reconfigure(encoding='utf-8')
+        sys.stderr.reconfigure(encoding='utf-8')
+    except (AttributeError, ValueError):
+        import io
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+        sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+
+load_dotenv()
+
+
+# Paths simulated per task: large enough to amortize process and NumPy call
+# overhead, small enough that the (trades x chunk) working arrays stay cache friendly
+CHUNK_PATHS = 10000
+
+DRAWDOWN_PERCENTILES = (50, 90, 95, 99)
+
+
+def binary_outcomes(win_rate: float, win_r: float, loss_r: float = -1.0) -> tuple:
+    """
+    Outcome distribution of a strategy that either hits TP or SL.
+
+    Args:
+        win_rate: Probability of a winning trade (0..1)
+        win_r: R-multiple of a win (e.g. 2.0 for a 2R target)
+        loss_r: R-multiple of a loss (-1.0 = full stop)
+
+    Returns:
+        (outcomes, probabilities) arrays for simulate()
+    """
+    return np.array([win_r, loss_r]), np.array([win_rate, 1.0 - win_rate])
+
+
+def parse_risks(text: str) -> List[float]:
+    """
+    Parse comma-separated RISK_PER_TRADE percentages.
+
+    Raises:
+        ValueError: If a value isn't a number or isn't positive
+    """
+    risks = []
+    for part in text.split(','):
+        try:
+            risk = float(part)
+        except ValueError:
+            raise ValueError(f"Invalid risk per trade {part.strip()!r}: expected a percentage like 1.5") from None
+        if not risk > 0:
+            raise ValueError(f"Risk per trade must be greater than 0, got {part.strip()}")
+        risks.append(risk)
+    return risks
+
+
+def load_r_multiples(path: str) -> np.ndarray:
+    """
+    Load historical trade outcomes in R.
+
+    Accepts a CSV with an ``r`` or ``r_multiple`` column, or one number per line.
+
+    Args:
+        path: CSV/text file
+
+    Returns:
+        Array of R-multiples
+    """
+    values = []
+    with open(path, newline='', encoding='utf-8') as f:
+        rows = list(csv.reader(f))
+    if not rows:
+        raise ValueError(f"No trades in {path}")
+    column = 0
+    header = [cell.strip().lower() for cell in rows[0]]
+    if 'r' in header or 'r_multiple' in header:
+        column = header.index('r') if 'r' in header else header.index('r_multiple')
+        rows = rows[1:]
+    for row in rows:
+        if row and row[column].strip():
+            values.append(float(row[column]))
+    if not values:
+        raise ValueError(f"No trades in {path}")
+    return np.array(values)
+
+
+def _simulate_chunk(seed, paths: int, trades: int, outcomes: np.ndarray, probabilities: Optional[np.ndarray],
+                    risks: Sequence[float], ruin_drawdown: float, compounding: bool) -> Dict[float, tuple]:
+    """
+    Simulate one chunk of paths for every risk setting (same draws for all).
+
+    Arrays are laid out (trades, paths) so running sums and peaks are
+    vectorized across paths.
+
+    Returns:
+        risk -> (max drawdown per path, final equity multiple per path, ruined per path)
+    """
+    rng = np.random.default_rng(seed)
+    if probabilities is None:
+        index = rng.integers(0, len(outcomes), size=(trades, paths))
+    else:
+        cdf = np.cumsum(probabilities / probabilities.sum())
+        draws = rng.random((trades, paths), dtype=np.float32)
+        index = np.minimum(np.searchsorted(cdf.astype(np.float32), draws, side='right'), len(outcomes) - 1)
+    r = outcomes.astype(np.float32)[index]
+
+    results = {}
+    if not compounding:
+        # Risk amount fixed at a fraction of starting equity (TOTAL_EQUITY is static):
+        # equity = 1 + f * cumulative R, so the peak and the gap below it are shared by all risks
+        cumulative = np.cumsum(r, axis=0)
+        peak = np.maximum.accumulate(np.maximum(cumulative, 0.0), axis=0)
+        gap = peak - cumulative
+        buffer = np.empty_like(gap)
+        for risk in risks:
+            # drawdown = f * gap / (1 + f * peak) = gap / (1/f + peak), computed in place
+            np.add(peak, np.float32(100 / risk), out=buffer)
+            np.divide(gap, buffer, out=buffer)
+            max_drawdown = np.minimum(buffer.max(axis=0), 1.0)
+            results[risk] = (max_drawdown, 1.0 + np.float32(risk / 100) * cumulative[-1],
+                             max_drawdown >= ruin_drawdown)
+        return results
+
+    equity = np.empty_like(r)
+    buffer = np.empty_like(r)
+    for risk in risks:
+        # Position risk scales with current equity; a loss can't go below zero
+        np.multiply(r, np.float32(risk / 100), out=equity)
+        equity += 1.0
+        np.maximum(equity, 0.0, out=equity)
+        np.cumprod(equity, axis=0, out=equity)
+        np.maximum.accumulate(equity, axis=0, out=buffer)
+        np.maximum(buffer, 1.0, out=buffer)
+        np.divide(equity, buffer, out=buffer)
+        max_drawdown = 1.0 - buffer.min(axis=0)
+        results[risk] = (max_drawdown, equity[-1].copy(), max_drawdown >= ruin_drawdown)
+    return results
+
+
+def simulate(outcomes: Sequence[float], risks: Sequence[float], paths: int = 100000, trades: int = 100,
+             probabilities: Sequence[float] = None, ruin_drawdown: float = 0.5, compounding: bool = False,
+             workers: int = None, seed: int = 0) -> List[Dict]:
+    """
+    Run the Monte Carlo simulation.
+
+    Args:
+        outcomes: Possible trade R-multiples (e.g. historical trades, resampled uniformly)
+        risks: RISK_PER_TRADE settings to evaluate, in percent of equity
+        paths: Number of equity paths
+        trades: Trades per path
+        probabilities: Probability of each outcome (uniform if None)
+        ruin_drawdown: Drawdown (0..1) counted as ruin
+        compounding: Risk a fraction of current equity instead of starting equity
+        workers: Worker processes (defaults to CPU count; 1 runs in-process)
+        seed: Random seed; results don't depend on the worker count
+
+    Returns:
+        One report dict per risk setting
+
+    Raises:
+        ValueError: If a risk setting isn't positive
+    """
+    outcomes = np.asarray(outcomes, dtype=np.float64)
+    probabilities = None if probabilities is None else np.asarray(probabilities, dtype=np.float64)
+    risks = tuple(risks)
+    if not all(risk > 0 for risk in risks):
+        raise ValueError(f"Risk per trade must be greater than 0, got {', '.join(f'{r:g}' for r in risks)}")
+    chunks = [CHUNK_PATHS] * (paths // CHUNK_PATHS)
+    if paths % CHUNK_PATHS:
+        chunks.append(paths % CHUNK_PATHS)
+    seeds = np.random.SeedSequence(seed).spawn(len(chunks))
+    args = [
+        (chunk_seed, chunk, trades, outcomes, probabilities, risks, ruin_drawdown, compounding)
+        for chunk_seed, chunk in zip(seeds, chunks)
+    ]
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(chunks) == 1:
+        parts = [_simulate_chunk(*a) for a in args]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(chunks))) as pool:
+            parts = list(pool.map(_simulate_chunk, *zip(*args)))
+
+    reports = []
+    for risk in risks:
+        max_drawdown = np.concatenate([part[risk][0] for part in parts])
+        final = np.concatenate([part[risk][1] for part in parts])
+        ruined = np.concatenate([part[risk][2] for part in parts])
+        percentiles = np.percentile(max_drawdown, DRAWDOWN_PERCENTILES)
+        reports.append({
+            'risk': risk,
+            'paths': paths,
+            'trades': trades,
+            'drawdown_percentiles': {p: float(v) for p, v in zip(DRAWDOWN_PERCENTILES, percentiles)},
+            'risk_of_ruin': float(ruined.mean()),
+            'median_return': float(np.median(final) - 1.0),
+            'p5_return': float(np.percentile(final, 5) - 1.0),
+        })
+    return reports
+
+
+def format_report(reports: List[Dict], ruin_drawdown: float) -> str:
+    """Render simulation reports as a table."""
+    header = (
+        f"{'Risk':>6} | " + ' | '.join(f"{f'DD p{p}':>8}" for p in DRAWDOWN_PERCENTILES)
+        + f" | {'Ruin':>7} | {'Median':>8} | {'p5':>8}"
+    )
+    lines = [header, '-' * len(header)]
+    for report in reports:
+        drawdowns = ' | '.join(f"{report['drawdown_percentiles'][p]:>8.1%}" for p in DRAWDOWN_PERCENTILES)
+        lines.append(
+            f"{report['risk']:>5g}% | {drawdowns} | {report['risk_of_ruin']:>7.2%} | "
+            f"{report['median_return']:>+8.1%} | {report['p5_return']:>+8.1%}"
+        )
+    lines.append(f"Ruin = drawdown of {ruin_drawdown:.0%} or more; returns are after all trades")
+    return '\n'.join(lines)
+
+
+def main():
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description='Monte Carlo drawdown and risk-of-ruin simulator')
+    parser.add_argument('--history', help='CSV of historical R-multiples to resample')
+    parser.add_argument('--win-rate', type=float, default=float(os.getenv('RISK_SIM_WIN_RATE', '0.45')),
+                        help='Win probability when no history is given')
+    parser.add_argument('--win-r', type=float, default=float(os.getenv('RISK_SIM_WIN_R', '2.0')),
+                        help='R-multiple of a win when no history is given')
+    parser.add_argument('--risk', default=os.getenv('RISK_PER_TRADE', '1.0'),
+                        help='Comma-separated RISK_PER_TRADE values (percent)')
+    parser.add_argument('--paths', type=int, default=int(os.getenv('RISK_SIM_PATHS', '100000')))
+    parser.add_argument('--trades', type=int, default=int(os.getenv('RISK_SIM_TRADES', '100')))
+    parser.add_argument('--ruin', type=float, default=float(os.getenv('RISK_SIM_RUIN_DRAWDOWN', '0.5')),
+                        help='Drawdown fraction counted as ruin')
+    parser.add_argument('--compounding', action='store_true', help='Risk a fraction of current equity')
+    parser.add_argument('--workers', type=int, help='Worker processes (default: CPU count)')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    if args.history:
+        outcomes, probabilities = load_r_multiples(args.history), None
+        source = f"{len(outcomes)} historical trades from {args.history}"
+    else:
+        outcomes, probabilities = binary_outcomes(args.win_rate, args.win_r)
+        source = f"{args.win_rate:.0%} win rate at {args.win_r:g}R"
+    try:
+        risks = parse_risks(args.risk)
+    except ValueError as e:
+        parser.error(str(e))
+
+    print(f"🎲 Simulating {args.paths:,} paths of {args.trades} trades ({source})")
+    start = time.perf_counter()
+    reports = simulate(
+        outcomes, risks, args.paths, args.trades, probabilities,
+        ruin_drawdown=args.ruin, compounding=args.compounding, workers=args.workers, seed=args.seed
+    )
+    print(f"⏱️  Finished in {time.perf_counter() - start:.2f}s")
+    print()
+    print(format_report(reports, args.ruin))
+
+
+if __name__ == "__main__":
+    main()
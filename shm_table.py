@@ -0,0 +1,420 @@
+"""
+Fixed-size shared-memory tables for multi-process webhook workers.
+Provides a dedup table, a fixed-window rate limiter, a latest-price table and
+a versioned document (cluster membership) that stay correct across forked
+processes without an external store.
+"""
+
+import hashlib
+import json
+import mmap
+import multiprocessing
+import os
+import struct
+import time
+from typing import Callable, Dict, Iterator, Optional, Tuple
+from dotenv import load_dotenv
+from log_setup import get_logger
+
+load_dotenv()
+
+log = get_logger('shm_table')
+
+
+# Slot layout: key hash, value a, value b, key length, key bytes
+SLOT = struct.Struct('<QqqB39s')
+MAX_KEY_BYTES = 39
+# Slots probed (linear probing) before the oldest entry in the run is evicted
+MAX_PROBE = 16
+# Prices are stored in the int64 value slot by reinterpreting the double bits
+PRICE_BITS = struct.Struct('<q')
+
+
+def _key_hash(key: bytes) -> int:
+    """Non-zero 64-bit hash (0 marks an empty slot)."""
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), 'little') or 1
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class SharedLock:
+    """
+    Process-shared lock that survives its holder being killed.
+
+    The holder's pid is kept in shared memory. A waiter that times out
+    checks it: if the holder process is gone (or died between acquiring
+    and recording itself), the waiter takes the lock over instead of
+    blocking every worker forever.
+    """
+
+    def __init__(self, timeout: float = None):
+        """
+        Args:
+            timeout: Seconds to wait before checking on the holder, falls back to SHM_LOCK_TIMEOUT
+        """
+        if timeout is None:
+            timeout = float(os.getenv('SHM_LOCK_TIMEOUT', '2'))
+        self.timeout = timeout
+        self._lock = multiprocessing.Lock()
+        self._owner = multiprocessing.RawValue('i', 0)
+
+    def acquire(self):
+        while not self._lock.acquire(timeout=self.timeout):
+            owner = self._owner.value
+            if owner and _alive(owner):
+                continue
+            log.error(f"❌ Shared lock holder {owner or 'unknown'} died holding it; taking it over")
+            break
+        self._owner.value = os.getpid()
+
+    def release(self):
+        self._owner.value = 0
+        self._lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+class SharedTable:
+    """
+    Open-addressing hash table in an anonymous shared mapping.
+
+    Each slot holds two int64 values. The mapping and its lock must be
+    created before forking so every worker inherits the same memory.
+    When a probe run is full, the entry with the smallest ``a`` value is
+    evicted, so the table never grows.
+    """
+
+    def __init__(self, capacity: int = 65536):
+        self.capacity = capacity
+        self._mem = mmap.mmap(-1, capacity * SLOT.size)
+        # One lock: probe runs of different keys overlap, so slots can't be striped safely
+        self._lock = SharedLock()
+
+    @staticmethod
+    def _encode(key: str) -> bytes:
+        data = key.encode('utf-8')
+        if len(data) > MAX_KEY_BYTES:
+            raise ValueError(f"Key too long for shared table: {key!r}")
+        return data
+
+    def _find(self, key: bytes, key_hash: int) -> Tuple[int, bool]:
+        """
+        Locate the slot for a key (lock held).
+
+        Returns:
+            (slot index, True if the key is already stored there)
+        """
+        start = key_hash % self.capacity
+        victim = None
+        victim_a = None
+        for i in range(MAX_PROBE):
+            index = (start + i) % self.capacity
+            slot_hash, a, _, length, slot_key = SLOT.unpack_from(self._mem, index * SLOT.size)
+            if slot_hash == 0:
+                return index, False
+            if slot_hash == key_hash and slot_key[:length] == key:
+                return index, True
+            if victim is None or a < victim_a:
+                victim, victim_a = index, a
+        return victim, False
+
+    def _write(self, index: int, key: bytes, key_hash: int, a: int, b: int):
+        SLOT.pack_into(self._mem, index * SLOT.size, key_hash, a, b, len(key), key)
+
+    def get(self, key: str, default=None) -> Optional[Tuple[int, int]]:
+        """Return (a, b) for a key, or default."""
+        data = self._encode(key)
+        key_hash = _key_hash(data)
+        with self._lock:
+            index, found = self._find(data, key_hash)
+            if not found:
+                return default
+            _, a, b, _, _ = SLOT.unpack_from(self._mem, index * SLOT.size)
+            return a, b
+
+    def put(self, key: str, a: int, b: int = 0):
+        """Store (a, b) for a key."""
+        data = self._encode(key)
+        key_hash = _key_hash(data)
+        with self._lock:
+            index, _ = self._find(data, key_hash)
+            self._write(index, data, key_hash, a, b)
+
+    def entries(self) -> Iterator[Tuple[str, int, int]]:
+        """Iterate over (key, a, b) for every stored entry (not a snapshot)."""
+        for index in range(self.capacity):
+            slot_hash, a, b, length, slot_key = SLOT.unpack_from(self._mem, index * SLOT.size)
+            if slot_hash and length:
+                yield slot_key[:length].decode('utf-8'), a, b
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self.entries())
+
+
+class SharedDedupTable(SharedTable):
+    """
+    Dedup table (ticker -> last signal time) shared across worker processes.
+
+    Supports the dict operations SupremoStrategy uses on ``last_signal_time``
+    plus an atomic ``check_and_set``.
+    """
+
+    def check_and_set(self, key: str, signal_time: int, window: int) -> bool:
+        """
+        Atomically test for a duplicate and record the signal.
+
+        Args:
+            key: Dedup key (ticker)
+            signal_time: Signal time in Unix seconds
+            window: Deduplication window in seconds
+
+        Returns:
+            True if the signal is a duplicate (and was not recorded)
+        """
+        data = self._encode(key)
+        key_hash = _key_hash(data)
+        with self._lock:
+            index, found = self._find(data, key_hash)
+            if found:
+                _, last_time, _, _, _ = SLOT.unpack_from(self._mem, index * SLOT.size)
+                if signal_time - last_time < window:
+                    return True
+            self._write(index, data, key_hash, signal_time, 0)
+            return False
+
+    def get(self, key: str, default=None):
+        value = super().get(key)
+        return default if value is None else value[0]
+
+    def __getitem__(self, key: str) -> int:
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: str, value: int):
+        self.put(key, int(value))
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key) is not None
+
+    def pop(self, key: str, default=None):
+        """Remove a key (used by cluster state handoff)."""
+        data = self._encode(key)
+        key_hash = _key_hash(data)
+        with self._lock:
+            index, found = self._find(data, key_hash)
+            if not found:
+                return default
+            _, last_time, _, _, _ = SLOT.unpack_from(self._mem, index * SLOT.size)
+            # Mark as oldest possible so lookups miss and the slot is reused first
+            self._write(index, b'', 1, -(2 ** 63), 0)
+            return last_time
+
+    def items(self):
+        return [(key, a) for key, a, _ in self.entries()]
+
+    def clear(self):
+        """Remove every entry."""
+        with self._lock:
+            self._mem[:] = bytes(len(self._mem))
+
+
+class SharedRateLimiter(SharedTable):
+    """Fixed-window request counter shared across worker processes."""
+
+    def __init__(self, limit: int, window: int = 60, capacity: int = 16384):
+        """
+        Args:
+            limit: Max requests per key per window
+            window: Window length in seconds
+            capacity: Table slots
+        """
+        super().__init__(capacity)
+        self.limit = limit
+        self.window = window
+
+    def allow(self, key: str, now: float = None) -> bool:
+        """
+        Count a request and decide whether it is within the limit.
+
+        Returns:
+            True if allowed, False if the key exceeded its limit this window
+        """
+        if now is None:
+            now = time.time()
+        window_start = int(now) - int(now) % self.window
+        data = self._encode(key[:MAX_KEY_BYTES])
+        key_hash = _key_hash(data)
+        with self._lock:
+            index, found = self._find(data, key_hash)
+            count = 0
+            if found:
+                _, slot_window, count, _, _ = SLOT.unpack_from(self._mem, index * SLOT.size)
+                if slot_window != window_start:
+                    count = 0
+            if count >= self.limit:
+                return False
+            self._write(index, data, key_hash, window_start, count + 1)
+            return True
+
+
+class SharedPriceTable(SharedTable):
+    """
+    Latest price per symbol shared between supervised service processes.
+
+    Entries store the tick time in milliseconds and the price as raw double
+    bits. Keys starting with ``@`` are service heartbeats.
+    """
+
+    def __init__(self, capacity: int = 1024):
+        super().__init__(capacity)
+
+    def publish(self, symbol: str, price: float, ts: float = None):
+        """Record the latest price of a symbol."""
+        if ts is None:
+            ts = time.time()
+        self.put(symbol, int(ts * 1000), PRICE_BITS.unpack(struct.pack('<d', price))[0])
+
+    def latest(self, symbol: str) -> Optional[Tuple[float, float]]:
+        """Return (price, ts) for a symbol, or None."""
+        value = self.get(symbol)
+        if value is None:
+            return None
+        return struct.unpack('<d', PRICE_BITS.pack(value[1]))[0], value[0] / 1000
+
+    def prices(self) -> Iterator[Tuple[str, float, float]]:
+        """Iterate over (symbol, price, ts) for every published symbol."""
+        for key, ts_ms, bits in self.entries():
+            if not key.startswith('@'):
+                yield key, struct.unpack('<d', PRICE_BITS.pack(bits))[0], ts_ms / 1000
+
+    def heartbeat(self, service: str, ts: float = None):
+        """Record that a service is making progress."""
+        self.put('@' + service, int((time.time() if ts is None else ts) * 1000))
+
+    def last_heartbeat(self, service: str) -> Optional[float]:
+        """Return the last heartbeat time of a service, or None."""
+        value = self.get('@' + service)
+        return None if value is None else value[0] / 1000
+
+
+class SharedDocument:
+    """
+    Versioned JSON document in an anonymous shared mapping.
+
+    Readers compare ``version`` with the last one they loaded and reload
+    only when it changed; writers replace the whole document under the lock.
+    """
+
+    HEADER = struct.Struct('<QI')  # version, payload length
+
+    def __init__(self, size: int = 65536):
+        self.size = size
+        self._mem = mmap.mmap(-1, size)
+        self.lock = SharedLock()
+
+    @property
+    def version(self) -> int:
+        """Current version (0 until the first write)."""
+        return self.HEADER.unpack_from(self._mem, 0)[0]
+
+    def read(self) -> Tuple[int, Optional[Dict]]:
+        """Return (version, document), None before the first write."""
+        with self.lock:
+            return self._read()
+
+    def _read(self) -> Tuple[int, Optional[Dict]]:
+        version, length = self.HEADER.unpack_from(self._mem, 0)
+        if not version:
+            return 0, None
+        start = self.HEADER.size
+        return version, json.loads(bytes(self._mem[start:start + length]))
+
+    def _write(self, document: Dict) -> int:
+        data = json.dumps(document).encode('utf-8')
+        if self.HEADER.size + len(data) > self.size:
+            raise ValueError(f"Document too large for shared memory: {len(data)} bytes")
+        version = self.HEADER.unpack_from(self._mem, 0)[0] + 1
+        self._mem[self.HEADER.size:self.HEADER.size + len(data)] = data
+        self.HEADER.pack_into(self._mem, 0, version, len(data))
+        return version
+
+    def update(self, change: Callable[[Optional[Dict]], Dict]) -> Tuple[int, Dict]:
+        """
+        Atomically replace the document with ``change(current document)``.
+
+        Returns:
+            (new version, new document)
+        """
+        with self.lock:
+            document = change(self._read()[1])
+            return self._write(document), document
+
+
+# Tables created by the prefork launcher before forking, picked up by workers
+_shared_dedup: Optional[SharedDedupTable] = None
+_shared_rate_limiter: Optional[SharedRateLimiter] = None
+_shared_prices: Optional[SharedPriceTable] = None
+_shared_membership: Optional[SharedDocument] = None
+
+
+def install_shared_tables(dedup: SharedDedupTable, rate_limiter: Optional[SharedRateLimiter] = None,
+                          membership: Optional[SharedDocument] = None):
+    """Register pre-fork shared tables for worker processes."""
+    global _shared_dedup, _shared_rate_limiter, _shared_membership
+    _shared_dedup = dedup
+    _shared_rate_limiter = rate_limiter
+    _shared_membership = membership
+
+
+def get_shared_dedup() -> Optional[SharedDedupTable]:
+    """Return the installed shared dedup table, if any."""
+    return _shared_dedup
+
+
+def get_shared_rate_limiter() -> Optional[SharedRateLimiter]:
+    """Return the installed shared rate limiter, if any."""
+    return _shared_rate_limiter
+
+
+def get_shared_membership() -> Optional[SharedDocument]:
+    """Return the installed shared cluster membership document, if any."""
+    return _shared_membership
+
+
+def install_price_table(prices: SharedPriceTable):
+    """Register the pre-fork shared price table for service processes."""
+    global _shared_prices
+    _shared_prices = prices
+
+
+def get_shared_prices() -> Optional[SharedPriceTable]:
+    """Return the installed shared price table, if any."""
+    return _shared_prices
+
+
+def create_rate_limiter_from_env() -> Optional[SharedRateLimiter]:
+    """
+    Build a rate limiter if WEBHOOK_RATE_LIMIT is set.
+
+    Returns:
+        SharedRateLimiter or None if rate limiting is disabled
+    """
+    limit = int(os.getenv('WEBHOOK_RATE_LIMIT', '0'))
+    if limit <= 0:
+        return None
+    return SharedRateLimiter(limit, window=int(os.getenv('WEBHOOK_RATE_WINDOW', '60')))
@@ -0,0 +1,332 @@
+"""
+Signal model for Supremo strategy.
+Compact slotted types for TradingView payloads and processed signals.
+"""
+
+import json
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+
+# Accepted values for enumerated payload fields
+ACTIONS = frozenset(('buy', 'sell'))
+TREND_BIASES = frozenset(('', 'bullish', 'bearish'))
+SIGNAL_TYPES = frozenset(('entry', 'exit', 'sl', 'tp'))
+
+# Signal types that close or protect a position and must never wait behind entries
+URGENT_SIGNAL_TYPES = frozenset(('exit', 'sl', 'tp'))
+
+
+def is_urgent(payload: Dict) -> bool:
+    """
+    Cheap pre-parse check for exit/SL-type payloads.
+
+    Args:
+        payload: Raw decoded payload
+
+    Returns:
+        True if the payload is an exit, stop-loss or take-profit signal
+    """
+    signal_type = payload.get('signal_type')
+    return isinstance(signal_type, str) and signal_type.lower() in URGENT_SIGNAL_TYPES
+
+
+class SignalParseError(ValueError):
+    """Raised when a TradingView payload field is missing or malformed."""
+
+    def __init__(self, field: str, message: str):
+        self.field = field
+        super().__init__(f"{field}: {message}")
+
+
+_INF = float('inf')
+
+
+def _parse_float(value: Any, field: str) -> Optional[float]:
+    """
+    Parse an optional numeric payload field.
+
+    Empty strings and None are treated as "not provided".
+    """
+    if value is None or value == '':
+        return None
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        raise SignalParseError(field, f"expected a number, got {value!r}") from None
+    if number != number or number == _INF or number == -_INF:
+        raise SignalParseError(field, f"expected a finite number, got {value!r}")
+    return number
+
+
+def parse_timestamp(timestamp: Any) -> Optional[int]:
+    """
+    Convert a payload timestamp to Unix seconds.
+
+    Args:
+        timestamp: Unix seconds/milliseconds (int or digit string) or ISO 8601 string
+
+    Returns:
+        Unix timestamp in seconds, or None if it cannot be parsed
+    """
+    try:
+        if isinstance(timestamp, str):
+            if timestamp.isdigit():
+                signal_time = int(timestamp)
+            else:
+                dt = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
+                return int(dt.timestamp())
+        else:
+            signal_time = int(timestamp)
+    except (TypeError, ValueError, OverflowError):
+        return None
+    # TradingView {{timenow}} may arrive in milliseconds
+    if signal_time > 10_000_000_000:
+        signal_time //= 1000
+    return signal_time
+
+
+class SignalPayload:
+    """Validated TradingView webhook payload."""
+
+    __slots__ = (
+        'ticker', 'action', 'price', 'sl', 'tp', 'atr',
+        'trend_bias', 'entry_level', 'timestamp', 'signal_time', 'signal_type',
+        'ingress_at', 'age_at_ingress'
+    )
+
+    def __init__(
+        self,
+        ticker: str,
+        action: str,
+        price: float,
+        sl: Optional[float] = None,
+        tp: Optional[float] = None,
+        atr: Optional[float] = None,
+        trend_bias: str = '',
+        entry_level: str = '',
+        timestamp: str = '',
+        signal_time: Optional[int] = None,
+        signal_type: str = 'entry',
+        ingress_at: Optional[float] = None
+    ):
+        self.ticker = ticker
+        self.action = action
+        self.price = price
+        self.sl = sl
+        self.tp = tp
+        self.atr = atr
+        self.trend_bias = trend_bias
+        self.entry_level = entry_level
+        self.timestamp = timestamp
+        self.signal_time = signal_time
+        self.signal_type = signal_type
+        # Monotonic ingress time, and the wall-clock age of the alert at that moment
+        now = time.monotonic()
+        self.ingress_at = now if ingress_at is None else ingress_at
+        self.age_at_ingress = None
+        if signal_time is not None:
+            self.age_at_ingress = time.time() - signal_time - (now - self.ingress_at)
+
+    def age(self, now: Optional[float] = None) -> Optional[float]:
+        """
+        Seconds since the payload timestamp.
+
+        Args:
+            now: time.monotonic() reading (defaults to the current time)
+
+        Returns:
+            Age in seconds, or None if the payload has no usable timestamp
+        """
+        if self.age_at_ingress is None:
+            return None
+        return self.age_at_ingress + (time.monotonic() if now is None else now) - self.ingress_at
+
+    @classmethod
+    def parse(cls, payload: Dict, ingress_at: Optional[float] = None) -> 'SignalPayload':
+        """
+        Validate and convert a raw payload in a single pass.
+
+        Args:
+            payload: Decoded JSON payload from TradingView
+            ingress_at: time.monotonic() when the request arrived (defaults to now)
+
+        Returns:
+            SignalPayload instance
+
+        Raises:
+            SignalParseError: If a field is missing or malformed
+        """
+        if not isinstance(payload, dict):
+            raise SignalParseError('payload', "expected a JSON object")
+
+        get = payload.get
+        ticker = get('ticker')
+        if not ticker or not isinstance(ticker, str):
+            raise SignalParseError('ticker', "missing required field")
+
+        action = get('action')
+        if not action or not isinstance(action, str):
+            raise SignalParseError('action', "missing required field")
+        action = action.lower()
+        if action not in ACTIONS:
+            raise SignalParseError('action', f"invalid action {action!r}")
+
+        price = _parse_float(get('price'), 'price')
+        if price is None:
+            raise SignalParseError('price', "missing required field")
+        if price <= 0:
+            raise SignalParseError('price', f"must be positive, got {price}")
+
+        trend_bias = get('trend_bias') or ''
+        if not isinstance(trend_bias, str):
+            raise SignalParseError('trend_bias', f"expected a string, got {trend_bias!r}")
+        trend_bias = trend_bias.lower()
+        if trend_bias not in TREND_BIASES:
+            # Older alert templates send e.g. "neutral": treat as no bias
+            trend_bias = ''
+
+        entry_level = get('entry_level') or ''
+        if not isinstance(entry_level, str):
+            raise SignalParseError('entry_level', f"expected a string, got {entry_level!r}")
+
+        signal_type = get('signal_type') or 'entry'
+        if not isinstance(signal_type, str) or signal_type.lower() not in SIGNAL_TYPES:
+            raise SignalParseError('signal_type', f"invalid signal type {signal_type!r}")
+
+        timestamp = get('timestamp')
+        if timestamp is None or timestamp == '':
+            timestamp = datetime.now().isoformat()
+        elif not isinstance(timestamp, str):
+            timestamp = str(timestamp)
+
+        return cls(
+            ticker, action, price,
+            _parse_float(get('sl'), 'sl'),
+            _parse_float(get('tp'), 'tp'),
+            _parse_float(get('atr'), 'atr'),
+            trend_bias, entry_level.upper(), timestamp,
+            parse_timestamp(timestamp), signal_type.lower(), ingress_at
+        )
+
+
+class Signal:
+    """
+    Processed Supremo signal.
+
+    Supports item access (``signal['ticker']``) so existing callers that
+    treated signals as dicts keep working.
+    """
+
+    # Serialized fields; the monotonic timing fields only make sense in-process
+    FIELDS = (
+        'ticker', 'action', 'entry_price', 'stop_loss', 'tp1', 'tp2',
+        'trend_bias', 'entry_level', 'position_size', 'risk_amount',
+        'timestamp', 'processed_at', 'signal_type'
+    )
+    __slots__ = FIELDS + ('ingress_at', 'age_at_ingress', 'delivered_at')
+
+    def __init__(
+        self,
+        ticker: str,
+        action: str,
+        entry_price: float,
+        stop_loss: float,
+        tp1: float,
+        tp2: float,
+        trend_bias: str,
+        entry_level: str,
+        position_size: float,
+        risk_amount: float,
+        timestamp: str,
+        processed_at: str,
+        signal_type: str = 'entry'
+    ):
+        self.ticker = ticker
+        self.action = action
+        self.entry_price = entry_price
+        self.stop_loss = stop_loss
+        self.tp1 = tp1
+        self.tp2 = tp2
+        self.trend_bias = trend_bias
+        self.entry_level = entry_level
+        self.position_size = position_size
+        self.risk_amount = risk_amount
+        self.timestamp = timestamp
+        self.processed_at = processed_at
+        self.signal_type = signal_type
+        self.ingress_at = None
+        self.age_at_ingress = None
+        self.delivered_at = None
+
+    def __getitem__(self, key: str) -> Any:
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Dict-style access with a default."""
+        return getattr(self, key, default)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Signal):
+            return NotImplemented
+        return all(getattr(self, f) == getattr(other, f) for f in self.FIELDS)
+
+    # Mutable value object: equality without hashing
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return (f"Signal({self.ticker} {self.action} @ {self.entry_price}, "
+                f"sl={self.stop_loss}, tp1={self.tp1}, tp2={self.tp2})")
+
+    @property
+    def urgent(self) -> bool:
+        """True for exit, stop-loss and take-profit signals."""
+        return self.signal_type in URGENT_SIGNAL_TYPES
+
+    def age(self, now: Optional[float] = None) -> Optional[float]:
+        """
+        Seconds since the payload timestamp.
+
+        Args:
+            now: time.monotonic() reading (defaults to delivery time if
+                delivered, else the current time)
+        """
+        if self.age_at_ingress is None or self.ingress_at is None:
+            return None
+        if now is None:
+            now = self.delivered_at if self.delivered_at is not None else time.monotonic()
+        return self.age_at_ingress + now - self.ingress_at
+
+    def mark_delivered(self) -> Optional[float]:
+        """
+        Stamp the notification hand-off time.
+
+        Returns:
+            Signal age at delivery, or None if unknown
+        """
+        self.delivered_at = time.monotonic()
+        return self.age()
+
+    def to_dict(self) -> Dict:
+        """Return the signal as a plain dict (for JSON responses)."""
+        return {f: getattr(self, f) for f in self.FIELDS}
+
+    def to_json(self) -> str:
+        """Serialize the signal to a compact JSON string."""
+        return json.dumps(self.to_dict(), separators=(',', ':'))
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'Signal':
+        """Build a signal from a dict produced by ``to_dict``."""
+        values = {f: data.get(f) for f in cls.FIELDS}
+        values['signal_type'] = values['signal_type'] or 'entry'
+        return cls(**values)
+
+    @classmethod
+    def from_json(cls, text: str) -> 'Signal':
+        """Deserialize a signal produced by ``to_json``."""
+        return cls.from_dict(json.loads(text))
@@ -0,0 +1,694 @@
+"""
+Local stand-ins for the exchange and notification services.
+Mimics the Binance and Coinbase price endpoints, the Binance depth snapshot
+and diff depth stream, and the Telegram, Discord and SMTP sinks with
+configurable latency, jitter, errors and 429 responses, so the bot can be
+benchmarked and stress-tested offline.
+
+Usage:
+    python simulators.py --latency 50 --jitter 20 --error-rate 0.01 --seed 42
+"""
+
+import argparse
+import base64
+import hashlib
+import json
+import math
+import os
+import queue
+import random
+import socketserver
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterator, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+# Fix Windows console encoding
+if sys.platform == 'win32':
+    try:
+        sys.stdout.reconfigure(encoding='utf-8')
+        sys.stderr.reconfigure(encoding='utf-8')
+    except (AttributeError, ValueError):
+        import io
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+        sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+
+
+# Starting prices for the simulated random walk (others start at 100)
+BASE_PRICES = {'BTC': 45000.0, 'ETH': 2500.0, 'SOL': 100.0, 'BNB': 300.0}
+# Perpetual contracts listed only on USDⓈ-M futures
+FUTURES_ONLY = {'1000PEPE': 0.012}
+QUOTE_CURRENCIES = ('USDT', 'USDC', 'BUSD', 'USD', 'EUR', 'BTC')
+
+_WS_GUID = '258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+
+
+def _base_asset(symbol: str) -> Optional[str]:
+    return next((symbol[:-len(q)] for q in QUOTE_CURRENCIES if symbol.endswith(q) and len(symbol) > len(q)), None)
+
+
+def _ws_frame(text: str) -> bytes:
+    """Unmasked (server-to-client) WebSocket text frame."""
+    payload = text.encode('utf-8')
+    size = len(payload)
+    if size < 126:
+        header = bytes([0x81, size])
+    elif size < 65536:
+        header = bytes([0x81, 126]) + size.to_bytes(2, 'big')
+    else:
+        header = bytes([0x81, 127]) + size.to_bytes(8, 'big')
+    return header + payload
+
+
+class FaultProfile:
+    """
+    Latency and failure behaviour of a simulated service.
+
+    All random decisions come from one seeded generator, so a run with the
+    same seed and request order behaves identically.
+    """
+
+    def __init__(self, latency_ms: float = 0, jitter_ms: float = 0, error_rate: float = 0,
+                 rate_limit_rate: float = 0, retry_after: int = 1, seed: Optional[int] = None):
+        """
+        Args:
+            latency_ms: Base response delay in milliseconds
+            jitter_ms: Extra uniformly distributed delay (0..jitter_ms)
+            error_rate: Fraction of requests answered with HTTP 500
+            rate_limit_rate: Fraction of requests answered with HTTP 429
+            retry_after: Retry-After seconds sent with 429 responses
+            seed: Random seed for reproducible runs
+        """
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.seed = seed
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def decide(self) -> Tuple[float, Optional[int]]:
+        """
+        Draw the outcome of one request.
+
+        Returns:
+            (delay in seconds, forced status code or None for success)
+        """
+        with self._lock:
+            delay = (self.latency_ms + self._rng.random() * self.jitter_ms) / 1000
+            roll = self._rng.random()
+        if roll < self.rate_limit_rate:
+            return delay, 429
+        if roll < self.rate_limit_rate + self.error_rate:
+            return delay, 500
+        return delay, None
+
+
+class SimulatorStats:
+    """Thread-safe request counters and captured messages."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.status_counts: Dict[int, int] = {}
+        self.messages: List[Dict] = []
+
+    def record(self, status: int, message: Optional[Dict] = None):
+        with self._lock:
+            self.requests += 1
+            self.status_counts[status] = self.status_counts.get(status, 0) + 1
+            if message is not None:
+                self.messages.append(message)
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'status_counts': dict(self.status_counts),
+                'messages': len(self.messages)
+            }
+
+
+class _SimulatorHandler(BaseHTTPRequestHandler):
+    """Routes requests to the owning simulator's ``handle`` method."""
+
+    protocol_version = 'HTTP/1.1'
+    # Headers and body are written separately; without TCP_NODELAY keep-alive
+    # clients would wait out a delayed ACK on every response
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _serve(self, method: str):
+        simulator = self.server.simulator
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else b''
+
+        delay, forced = simulator.profile.decide()
+        if delay:
+            time.sleep(delay)
+        if forced == 429:
+            status, payload = 429, simulator.rate_limited_body()
+        elif forced == 500:
+            status, payload = 500, {'error': 'simulated server error'}
+        else:
+            status, payload, message = simulator.handle(method, urlparse(self.path), body)
+            simulator.stats.record(status, message)
+        if forced:
+            simulator.stats.record(status)
+
+        data = b'' if payload is None else json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        if status == 429:
+            self.send_header('Retry-After', str(simulator.profile.retry_after))
+        if data:
+            self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.headers.get('Upgrade', '').lower() == 'websocket':
+            self.server.simulator.stream(self)
+            return
+        self._serve('GET')
+
+    def do_POST(self):
+        self._serve('POST')
+
+
+class HTTPSimulator:
+    """Base class: a threaded HTTP server on a local port."""
+
+    def __init__(self, profile: FaultProfile = None, host: str = '127.0.0.1', port: int = 0):
+        self.profile = profile or FaultProfile()
+        self.stats = SimulatorStats()
+        self.server = ThreadingHTTPServer((host, port), _SimulatorHandler)
+        self.server.daemon_threads = True
+        self.server.simulator = self
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True,
+                                        name=type(self).__name__)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def rate_limited_body(self) -> Dict:
+        return {'error': 'Too many requests'}
+
+    def handle(self, method: str, url, body: bytes):
+        """Return (status, JSON payload or None, captured message or None)."""
+        raise NotImplementedError
+
+    def stream(self, handler: BaseHTTPRequestHandler):
+        """Serve a WebSocket upgrade request (none by default)."""
+        handler.send_error(404)
+
+
+class ExchangeSimulator(HTTPSimulator):
+    """
+    Binance ``/api/v3/ticker/price``, ``/api/v3/exchangeInfo`` and ``/api/v3/depth``,
+    Binance futures ``/fapi/v1/exchangeInfo``, Coinbase ``/v2/exchange-rates``,
+    and the Binance diff depth WebSocket stream (``/ws/<symbol>@depth`` or
+    ``/stream?streams=...``).
+    """
+
+    def __init__(self, profile: FaultProfile = None, volatility: float = 0.001, depth_interval: float = 0,
+                 **kwargs):
+        """
+        Args:
+            profile: Fault profile
+            volatility: Per-request standard deviation of the price random walk
+            depth_interval: Seconds between random depth updates on streamed
+                symbols (0 = only on step_depth/update_depth calls)
+        """
+        super().__init__(profile, **kwargs)
+        self.volatility = volatility
+        self.depth_interval = depth_interval
+        self._prices: Dict[str, float] = {}
+        self._price_lock = threading.Lock()
+        self._walk = random.Random(self.profile.seed)
+        # Authoritative books: symbol -> {'tick', 'update_id', 'bids', 'asks'}
+        self._books: Dict[str, Dict] = {}
+        self._book_lock = threading.RLock()
+        self._depth_walk = random.Random(self.profile.seed)
+        self._subscribers: List[Tuple[set, queue.Queue]] = []
+        self._feeding = threading.Event()
+
+    def start(self):
+        super().start()
+        if self.depth_interval > 0:
+            self._feeding.set()
+            threading.Thread(target=self._feed_depth, daemon=True, name='depth-feed').start()
+        return self
+
+    def stop(self):
+        self._feeding.clear()
+        self.disconnect_streams()
+        super().stop()
+
+    def price(self, base: str) -> float:
+        """Advance and return the simulated price of a base asset (in USD)."""
+        with self._price_lock:
+            price = self._prices.get(base, BASE_PRICES.get(base, 100.0))
+            price *= math.exp(self._walk.gauss(0, self.volatility))
+            self._prices[base] = price
+            return price
+
+    def set_price(self, base: str, price: float):
+        """Pin the current price of a base asset (e.g. to trigger alerts)."""
+        with self._price_lock:
+            self._prices[base] = price
+
+    def rate_limited_body(self) -> Dict:
+        return {'code': -1003, 'msg': 'Too many requests; simulated rate limit.'}
+
+    def _book(self, symbol: str) -> Dict:
+        book = self._books.get(symbol)
+        if book is None:
+            base = _base_asset(symbol)
+            mid = self._prices.get(base, BASE_PRICES.get(base, 100.0))
+            tick = max(round(mid * 0.0001, 2), 0.01)
+            rng = self._depth_walk
+            book = self._books[symbol] = {
+                'tick': tick,
+                'update_id': 1000,
+                'bids': {round(mid - tick * i, 8): round(rng.uniform(0.1, 5), 3) for i in range(1, 51)},
+                'asks': {round(mid + tick * i, 8): round(rng.uniform(0.1, 5), 3) for i in range(1, 51)},
+            }
+        return book
+
+    def depth_snapshot(self, symbol: str, limit: int = 100) -> Dict:
+        """Current book in the ``/api/v3/depth`` format, best levels first."""
+        with self._book_lock:
+            book = self._book(symbol)
+            bids = sorted(book['bids'].items(), reverse=True)[:limit]
+            asks = sorted(book['asks'].items())[:limit]
+            return {
+                'lastUpdateId': book['update_id'],
+                'bids': [[f"{p:.8f}", f"{q:.8f}"] for p, q in bids],
+                'asks': [[f"{p:.8f}", f"{q:.8f}"] for p, q in asks],
+            }
+
+    def update_depth(self, symbol: str, bids: List[Tuple[float, float]] = (),
+                     asks: List[Tuple[float, float]] = (), publish: bool = True) -> Dict:
+        """
+        Change price levels (quantity 0 removes one) as one depth update.
+
+        Args:
+            symbol: Trading pair symbol
+            bids: (price, qty) changes on the bid side
+            asks: (price, qty) changes on the ask side
+            publish: Stream the update; False applies it silently, leaving a
+                sequence gap for stream clients
+
+        Returns:
+            The ``depthUpdate`` event
+        """
+        with self._book_lock:
+            book = self._book(symbol)
+            first = book['update_id'] + 1
+            # Binance update ids advance per changed level, so events span a range
+            book['update_id'] += max(1, len(bids) + len(asks))
+            for side, changes in (('bids', bids), ('asks', asks)):
+                for price, qty in changes:
+                    if qty:
+                        book[side][round(price, 8)] = qty
+                    else:
+                        book[side].pop(round(price, 8), None)
+            event = {
+                'e': 'depthUpdate', 'E': int(time.time() * 1000), 's': symbol,
+                'U': first, 'u': book['update_id'],
+                'b': [[f"{p:.8f}", f"{q:.8f}"] for p, q in bids],
+                'a': [[f"{p:.8f}", f"{q:.8f}"] for p, q in asks],
+            }
+            if publish:
+                for symbols, subscriber in self._subscribers:
+                    if symbol in symbols:
+                        subscriber.put(event)
+            return event
+
+    def step_depth(self, symbol: str, publish: bool = True) -> Dict:
+        """Apply a random update near the top of the book (see update_depth)."""
+        with self._book_lock:
+            book = self._book(symbol)
+            rng, tick = self._depth_walk, book['tick']
+            best_bid, best_ask = max(book['bids']), min(book['asks'])
+            changes = {'bids': {}, 'asks': {}}
+            for _ in range(rng.randint(1, 3)):
+                side = rng.choice(('bids', 'asks'))
+                if side == 'bids':
+                    price = round(best_bid - tick * rng.randint(-1, 10), 8)
+                    if price >= best_ask:
+                        price = best_bid
+                else:
+                    price = round(best_ask + tick * rng.randint(-1, 10), 8)
+                    if price <= best_bid:
+                        price = best_ask
+                remove = price in book[side] and len(book[side]) > 1 and rng.random() < 0.3
+                changes[side][price] = 0.0 if remove else round(rng.uniform(0.1, 5), 3)
+            return self.update_depth(symbol, list(changes['bids'].items()), list(changes['asks'].items()), publish)
+
+    def _feed_depth(self):
+        while self._feeding.is_set():
+            with self._book_lock:
+                symbols = set().union(*(symbols for symbols, _ in self._subscribers))
+            for symbol in symbols:
+                self.step_depth(symbol)
+            time.sleep(self.depth_interval)
+
+    def disconnect_streams(self):
+        """Close every open depth stream (clients should reconnect and resync)."""
+        with self._book_lock:
+            for _, subscriber in self._subscribers:
+                subscriber.put(None)
+
+    def stream(self, handler):
+        url = urlparse(handler.path)
+        if url.path == '/stream':
+            names = parse_qs(url.query).get('streams', [''])[0].split('/')
+        elif url.path.startswith('/ws/'):
+            names = url.path[len('/ws/'):].split('/')
+        else:
+            handler.send_error(404)
+            return
+        symbols = {name.split('@')[0].upper() for name in names if name.split('@')[1:2] == ['depth']}
+        key = handler.headers.get('Sec-WebSocket-Key', '')
+        accept = base64.b64encode(hashlib.sha1((key + _WS_GUID).encode('ascii')).digest()).decode('ascii')
+        handler.send_response(101)
+        handler.send_header('Upgrade', 'websocket')
+        handler.send_header('Connection', 'Upgrade')
+        handler.send_header('Sec-WebSocket-Accept', accept)
+        handler.end_headers()
+        handler.wfile.flush()
+        handler.close_connection = True
+
+        subscriber = (symbols, queue.Queue())
+        with self._book_lock:
+            self._subscribers.append(subscriber)
+        try:
+            while True:
+                event = subscriber[1].get()
+                if event is None:
+                    break
+                if url.path == '/stream':
+                    event = {'stream': f"{event['s'].lower()}@depth@100ms", 'data': event}
+                handler.wfile.write(_ws_frame(json.dumps(event)))
+                handler.wfile.flush()
+        except OSError:
+            pass
+        finally:
+            with self._book_lock:
+                self._subscribers.remove(subscriber)
+
+    def handle(self, method, url, body):
+        query = parse_qs(url.query)
+        if url.path == '/api/v3/ticker/price':
+            symbol = query.get('symbol', [''])[0].upper()
+            base = _base_asset(symbol)
+            if not base:
+                return 400, {'code': -1121, 'msg': 'Invalid symbol.'}, None
+            return 200, {'symbol': symbol, 'price': f"{self.price(base):.8f}"}, None
+        if url.path == '/api/v3/depth':
+            symbol = query.get('symbol', [''])[0].upper()
+            if not _base_asset(symbol):
+                return 400, {'code': -1121, 'msg': 'Invalid symbol.'}, None
+            limit = int(query.get('limit', ['100'])[0])
+            return 200, self.depth_snapshot(symbol, limit), None
+        if url.path == '/api/v3/exchangeInfo':
+            return 200, {'symbols': [
+                {
+                    'symbol': f"{base}USDT", 'baseAsset': base, 'quoteAsset': 'USDT', 'status': 'TRADING',
+                    'filters': [
+                        {'filterType': 'PRICE_FILTER', 'tickSize': '0.01000000'},
+                        {'filterType': 'LOT_SIZE', 'stepSize': '0.00001000' if price > 1000 else '0.00100000'},
+                    ]
+                }
+                for base, price in BASE_PRICES.items()
+            ]}, None
+        if url.path == '/fapi/v1/exchangeInfo':
+            return 200, {'symbols': [
+                {
+                    'symbol': f"{base}USDT", 'baseAsset': base, 'quoteAsset': 'USDT', 'status': 'TRADING',
+                    'contractType': 'PERPETUAL',
+                    'filters': [
+                        {'filterType': 'PRICE_FILTER', 'tickSize': '0.10' if price > 1000 else '0.0000001'},
+                        {'filterType': 'LOT_SIZE', 'stepSize': '0.001' if price > 1000 else '1'},
+                    ]
+                }
+                for base, price in {**BASE_PRICES, **FUTURES_ONLY}.items()
+            ] + [
+                {'symbol': 'BTCUSDT_250328', 'baseAsset': 'BTC', 'quoteAsset': 'USDT', 'status': 'TRADING',
+                 'contractType': 'CURRENT_QUARTER', 'filters': []}
+            ]}, None
+        if url.path == '/v2/exchange-rates':
+            base = query.get('currency', ['USD'])[0].upper()
+            usd = self.price(base)
+            rates = {'USD': f"{usd:.2f}", 'USDT': f"{usd:.2f}", 'EUR': f"{usd * 0.92:.2f}"}
+            return 200, {'data': {'currency': base, 'rates': rates}}, None
+        return 404, {'error': 'not found'}, None
+
+
+class TelegramSimulator(HTTPSimulator):
+    """Telegram Bot API ``/bot<token>/sendMessage``."""
+
+    def rate_limited_body(self) -> Dict:
+        return {
+            'ok': False,
+            'error_code': 429,
+            'description': f'Too Many Requests: retry after {self.profile.retry_after}',
+            'parameters': {'retry_after': self.profile.retry_after}
+        }
+
+    def handle(self, method, url, body):
+        if method != 'POST' or not url.path.endswith('/sendMessage'):
+            return 404, {'ok': False, 'error_code': 404, 'description': 'Not Found'}, None
+        message = json.loads(body or b'{}')
+        if len(message.get('text', '')) > 4096:
+            return 400, {'ok': False, 'error_code': 400, 'description': 'Bad Request: message is too long'}, None
+        result = {'message_id': self.stats.requests + 1, 'chat': {'id': message.get('chat_id')},
+                  'text': message.get('text')}
+        return 200, {'ok': True, 'result': result}, message
+
+
+class DiscordSimulator(HTTPSimulator):
+    """Discord webhook endpoint (any ``/api/webhooks/...`` path)."""
+
+    def rate_limited_body(self) -> Dict:
+        return {'message': 'You are being rate limited.', 'retry_after': self.profile.retry_after, 'global': False}
+
+    def handle(self, method, url, body):
+        if method != 'POST' or not url.path.startswith('/api/webhooks/'):
+            return 404, {'message': '404: Not Found', 'code': 0}, None
+        message = json.loads(body or b'{}')
+        if len(message.get('embeds', [])) > 10:
+            return 400, {'message': 'Invalid Form Body', 'code': 50035}, None
+        return 204, None, message
+
+    @property
+    def webhook_url(self) -> str:
+        return f"{self.url}/api/webhooks/1/simulated"
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    """Minimal SMTP dialogue: EHLO, AUTH, MAIL, RCPT, DATA, RSET, NOOP, QUIT."""
+
+    def _reply(self, line: str):
+        self.wfile.write(f"{line}\r\n".encode('utf-8'))
+
+    def handle(self):
+        sink = self.server.sink
+        self._reply('220 simulator ESMTP ready')
+        envelope = {'from': None, 'to': []}
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode('utf-8', 'replace').strip()
+            verb = command.split(' ', 1)[0].upper()
+
+            delay, forced = sink.profile.decide() if verb == 'DATA' else (0, None)
+            if delay:
+                time.sleep(delay)
+
+            if verb in ('EHLO', 'HELO'):
+                self._reply('250-simulator')
+                self._reply('250-AUTH PLAIN LOGIN')
+                self._reply('250 8BITMIME')
+            elif verb == 'AUTH':
+                parts = command.split()
+                if len(parts) == 2 and parts[1].upper() == 'LOGIN':
+                    self._reply('334 VXNlcm5hbWU6')
+                    self.rfile.readline()
+                    self._reply('334 UGFzc3dvcmQ6')
+                    self.rfile.readline()
+                elif len(parts) == 2:
+                    self._reply('334 ')
+                    self.rfile.readline()
+                self._reply('235 Authentication successful')
+            elif verb == 'MAIL':
+                envelope = {'from': command[10:].strip('<> '), 'to': []}
+                self._reply('250 OK')
+            elif verb == 'RCPT':
+                envelope['to'].append(command[8:].strip('<> '))
+                self._reply('250 OK')
+            elif verb == 'DATA':
+                if forced == 429:
+                    sink.stats.record(421)
+                    self._reply('421 Too many messages, try again later')
+                    continue
+                if forced == 500:
+                    sink.stats.record(451)
+                    self._reply('451 Simulated local error')
+                    continue
+                self._reply('354 End data with <CR><LF>.<CR><LF>')
+                data = []
+                while True:
+                    data_line = self.rfile.readline()
+                    if not data_line or data_line in (b'.\r\n', b'.\n'):
+                        break
+                    data.append(data_line)
+                sink.stats.record(250, dict(envelope, data=b''.join(data).decode('utf-8', 'replace')))
+                self._reply('250 OK: queued')
+            elif verb == 'RSET':
+                envelope = {'from': None, 'to': []}
+                self._reply('250 OK')
+            elif verb == 'NOOP':
+                self._reply('250 OK')
+            elif verb == 'QUIT':
+                self._reply('221 Bye')
+                return
+            else:
+                self._reply('502 Command not implemented')
+
+
+class SMTPSimulator:
+    """SMTP sink that accepts any credentials (no STARTTLS: set EMAIL_USE_TLS=false)."""
+
+    def __init__(self, profile: FaultProfile = None, host: str = '127.0.0.1', port: int = 0):
+        self.profile = profile or FaultProfile()
+        self.stats = SimulatorStats()
+        self.server = socketserver.ThreadingTCPServer((host, port), _SMTPHandler)
+        self.server.daemon_threads = True
+        self.server.sink = self
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        return self.server.server_address[:2]
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True, name='SMTPSimulator').start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class SimulatorSuite:
+    """All simulators plus the environment variables that point the bot at them."""
+
+    def __init__(self, profile: FaultProfile = None, host: str = '127.0.0.1', depth_interval: float = 0):
+        profile = profile or FaultProfile()
+        self.exchange = ExchangeSimulator(profile, depth_interval=depth_interval, host=host)
+        self.telegram = TelegramSimulator(profile, host=host)
+        self.discord = DiscordSimulator(profile, host=host)
+        self.smtp = SMTPSimulator(profile, host=host)
+
+    def start(self):
+        for simulator in (self.exchange, self.telegram, self.discord, self.smtp):
+            simulator.start()
+        return self
+
+    def stop(self):
+        for simulator in (self.exchange, self.telegram, self.discord, self.smtp):
+            simulator.stop()
+
+    def env(self) -> Dict[str, str]:
+        """Environment overrides routing exchange_api and notification here."""
+        smtp_host, smtp_port = self.smtp.address
+        return {
+            'BINANCE_API_URL': self.exchange.url,
+            'BINANCE_FUTURES_API_URL': self.exchange.url,
+            'BINANCE_STREAM_URL': self.exchange.url.replace('http://', 'ws://'),
+            'COINBASE_API_URL': self.exchange.url,
+            'TELEGRAM_API_URL': self.telegram.url,
+            'TELEGRAM_BOT_TOKEN': 'simulated-token',
+            'TELEGRAM_CHAT_ID': '1',
+            'DISCORD_WEBHOOK_URL': self.discord.webhook_url,
+            'EMAIL_SMTP_SERVER': smtp_host,
+            'EMAIL_PORT': str(smtp_port),
+            'EMAIL_USER': 'bot@simulator.local',
+            'EMAIL_PASSWORD': 'simulated',
+            'EMAIL_TO': 'alerts@simulator.local',
+            'EMAIL_USE_TLS': 'false',
+        }
+
+
+@contextmanager
+def running_simulators(profile: FaultProfile = None) -> Iterator[SimulatorSuite]:
+    """
+    Start all simulators and point the current process at them.
+
+    The previous environment is restored on exit.
+    """
+    suite = SimulatorSuite(profile).start()
+    env = suite.env()
+    saved = {key: os.environ.get(key) for key in env}
+    os.environ.update(env)
+    try:
+        yield suite
+    finally:
+        for key, value in saved.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+        suite.stop()
+
+
+def main():
+    """Run the simulators until interrupted and print the env to use them."""
+    parser = argparse.ArgumentParser(description='Run local exchange and notification simulators')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--latency', type=float, default=0, help='Base latency in ms')
+    parser.add_argument('--jitter', type=float, default=0, help='Extra random latency in ms')
+    parser.add_argument('--error-rate', type=float, default=0, help='Fraction of HTTP 500 responses')
+    parser.add_argument('--rate-limit', type=float, default=0, help='Fraction of HTTP 429 responses')
+    parser.add_argument('--seed', type=int, default=None, help='Random seed for reproducible runs')
+    parser.add_argument('--depth-interval', type=float, default=0.1,
+                        help='Seconds between depth stream updates (0 disables)')
+    args = parser.parse_args()
+
+    profile = FaultProfile(args.latency, args.jitter, args.error_rate, args.rate_limit, seed=args.seed)
+    suite = SimulatorSuite(profile, host=args.host, depth_interval=args.depth_interval).start()
+    print("🧪 Simulators running. Point the bot at them with:")
+    for key, value in suite.env().items():
+        print(f"export {key}={value}")
+    try:
+        while True:
+            time.sleep(10)
+            print(f"📊 exchange={suite.exchange.stats.snapshot()} telegram={suite.telegram.stats.snapshot()} "
+                  f"discord={suite.discord.stats.snapshot()} smtp={suite.smtp.stats.snapshot()}")
+    except KeyboardInterrupt:
+        print("\n🛑 Simulators stopped")
+        suite.stop()
+
+
+if __name__ == "__main__":
+    main()
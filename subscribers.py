@@ -0,0 +1,402 @@
+"""
+Subscriber registry with ticker-indexed fan-out.
+Traders subscribe to a subset of tickers and actions and name their own
+Telegram chat, Discord webhook and/or email address. An inverted index from
+(ticker, action) to subscribers makes routing a signal cost O(matching
+subscribers); messages are queued per destination and delivered in
+per-channel batches that respect per-destination rate limits, rendering
+each distinct batch once per channel.
+
+Subscribers file (SUBSCRIBERS_FILE), a JSON list:
+    [{"id": "alice", "tickers": ["BTCUSDT", "ETHUSDT"], "actions": ["buy"],
+      "telegram": "123456789", "email": "alice@example.com"},
+     {"id": "desk", "discord": "https://discord.com/api/webhooks/..."}]
+
+Omitted (or "*") tickers and actions match everything.
+"""
+
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from dotenv import load_dotenv
+
+from digest import render_digest
+from log_setup import get_logger
+from metrics import registry as metrics_registry
+from notification import DESTINATION_ARGS, send_to_channel
+from symbols import clean_ticker
+
+load_dotenv()
+
+log = get_logger('subscribers')
+
+WILDCARD = '*'
+
+# Channel -> (messages, seconds) allowed per destination, after the providers'
+# limits: Telegram ~1 message/s per chat, Discord 5 per 2s per webhook
+DEFAULT_RATE_LIMITS = {
+    'telegram': (1, 1.0),
+    'discord': (5, 2.0),
+    'email': (10, 60.0),
+}
+
+SUBSCRIBER_NOTIFICATIONS = metrics_registry.counter(
+    'subscriber_notifications_total', 'Subscriber notification posts by channel and result',
+    labels=('channel', 'result')
+)
+
+
+class Subscriber:
+    """One trader's subscription and destinations."""
+
+    __slots__ = ('id', 'tickers', 'actions', 'destinations')
+
+    def __init__(self, id: str, tickers: Iterable[str] = None, actions: Iterable[str] = None,
+                 destinations: Dict[str, str] = None):
+        """
+        Args:
+            id: Unique subscriber id
+            tickers: Tickers to receive (None or '*' = all)
+            actions: Actions to receive, e.g. 'buy' (None or '*' = all)
+            destinations: Channel -> Telegram chat id, Discord webhook URL or email address
+        """
+        tickers = [clean_ticker(t) if t != WILDCARD else t for t in tickers or ()]
+        actions = [a.strip().lower() for a in actions or ()]
+        self.id = id
+        self.tickers = (WILDCARD,) if not tickers or WILDCARD in tickers else tuple(dict.fromkeys(tickers))
+        self.actions = (WILDCARD,) if not actions or WILDCARD in actions else tuple(dict.fromkeys(actions))
+        self.destinations = {channel: str(dest) for channel, dest in (destinations or {}).items() if dest}
+        unknown = set(self.destinations) - set(DESTINATION_ARGS)
+        if unknown:
+            raise ValueError(f"Subscriber {id}: unknown channel(s) {', '.join(sorted(unknown))}")
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'Subscriber':
+        """Build from a subscribers file entry."""
+        if not data.get('id'):
+            raise ValueError(f"Subscriber without an id: {data}")
+        return cls(
+            data['id'], data.get('tickers'), data.get('actions'),
+            {channel: data[channel] for channel in DESTINATION_ARGS if data.get(channel)}
+        )
+
+    def keys(self) -> List[Tuple[str, str]]:
+        """Index keys: every (ticker, action) pair, wildcards included."""
+        return [(ticker, action) for ticker in self.tickers for action in self.actions]
+
+    def __repr__(self):
+        return f"Subscriber({self.id} {'/'.join(self.tickers)} {'/'.join(self.actions)} -> {sorted(self.destinations)})"
+
+
+class SubscriberRegistry:
+    """Subscribers indexed by (ticker, action)."""
+
+    def __init__(self, subscribers: Iterable[Subscriber] = ()):
+        self._subscribers: Dict[str, Subscriber] = {}
+        # (ticker or '*', action or '*') -> subscriber id -> subscriber
+        self._index: Dict[Tuple[str, str], Dict[str, Subscriber]] = {}
+        self._lock = threading.Lock()
+        for subscriber in subscribers:
+            self.add(subscriber)
+
+    def add(self, subscriber: Subscriber):
+        """Add a subscriber, replacing any with the same id."""
+        with self._lock:
+            self._remove(subscriber.id)
+            self._subscribers[subscriber.id] = subscriber
+            for key in subscriber.keys():
+                self._index.setdefault(key, {})[subscriber.id] = subscriber
+
+    def remove(self, subscriber_id: str) -> bool:
+        """Remove a subscriber; returns False if it wasn't registered."""
+        with self._lock:
+            return self._remove(subscriber_id)
+
+    def _remove(self, subscriber_id: str) -> bool:
+        subscriber = self._subscribers.pop(subscriber_id, None)
+        if subscriber is None:
+            return False
+        for key in subscriber.keys():
+            bucket = self._index[key]
+            del bucket[subscriber_id]
+            if not bucket:
+                del self._index[key]
+        return True
+
+    def match(self, ticker: str, action: str) -> List[Subscriber]:
+        """
+        Subscribers to a ticker and action.
+
+        A subscriber's keys are all specific or all wildcards per field, so
+        it is in exactly one of the four buckets looked up here.
+        """
+        ticker, action = clean_ticker(ticker), action.lower()
+        matches = []
+        with self._lock:
+            for key in ((ticker, action), (ticker, WILDCARD), (WILDCARD, action), (WILDCARD, WILDCARD)):
+                bucket = self._index.get(key)
+                if bucket:
+                    matches.extend(bucket.values())
+        return matches
+
+    def get(self, subscriber_id: str) -> Optional[Subscriber]:
+        return self._subscribers.get(subscriber_id)
+
+    def __len__(self) -> int:
+        return len(self._subscribers)
+
+    @classmethod
+    def load(cls, path: str) -> 'SubscriberRegistry':
+        """Read a subscribers JSON file."""
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        return cls(Subscriber.from_dict(entry) for entry in data)
+
+
+class _TokenBucket:
+    """``count`` sends per ``per`` seconds, allowing bursts of ``count``."""
+
+    __slots__ = ('capacity', 'rate', 'tokens', 'updated')
+
+    def __init__(self, count: int, per: float, now: float):
+        self.capacity = count
+        self.rate = count / per
+        self.tokens = float(count)
+        self.updated = now
+
+    def take(self, now: float) -> float:
+        """Take a token; returns 0 on success, else seconds until one is available."""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+def parse_rate_limits(spec: str) -> Dict[str, Tuple[int, float]]:
+    """
+    Parse per-destination rate limits like 'telegram=1/1,discord=5/2,email=10/60'.
+
+    Returns:
+        Channel -> (messages, seconds)
+    """
+    limits = {}
+    for part in spec.split(','):
+        if not part.strip():
+            continue
+        channel, _, rate = part.partition('=')
+        count, _, per = rate.partition('/')
+        limits[channel.strip()] = (int(count), float(per or 1))
+    return limits
+
+
+class SubscriberFanout:
+    """
+    Routes signals to subscribers and delivers them per destination.
+
+    Each destination has a queue and a token bucket. A dispatcher thread
+    sends everything queued for a destination (up to ``max_batch`` signals,
+    as one digest) whenever its bucket has a token, so a rate-limited
+    destination receives batches instead of falling behind. Bodies are
+    rendered once per channel for each distinct batch and shared by every
+    destination receiving it. Failed sends are retried with exponential
+    backoff before they are counted as failed.
+    """
+
+    def __init__(self, registry: SubscriberRegistry,
+                 deliver: Callable[[str, str, str], bool] = send_to_channel,
+                 embed_renderer: Optional[Callable[[object], Dict]] = None,
+                 rate_limits: Dict[str, Tuple[int, float]] = None,
+                 max_batch: int = None, workers: int = None, retries: int = None,
+                 retry_backoff: float = None):
+        """
+        Args:
+            registry: Subscriber registry
+            deliver: Sends (channel, body, destination), returns success
+            embed_renderer: Builds a Discord embed for a signal (optional)
+            rate_limits: Channel -> (messages, seconds) per destination, falls back
+                to SUBSCRIBER_RATE_LIMITS over DEFAULT_RATE_LIMITS
+            max_batch: Max signals per delivery, falls back to SUBSCRIBER_BATCH_MAX
+            workers: Concurrent deliveries, falls back to SUBSCRIBER_SEND_WORKERS
+            retries: Retries of a failed send, falls back to SUBSCRIBER_RETRIES
+            retry_backoff: Seconds before the first retry, doubling after each,
+                falls back to SUBSCRIBER_RETRY_BACKOFF
+        """
+        if rate_limits is None:
+            rate_limits = {**DEFAULT_RATE_LIMITS, **parse_rate_limits(os.getenv('SUBSCRIBER_RATE_LIMITS', ''))}
+        if max_batch is None:
+            max_batch = int(os.getenv('SUBSCRIBER_BATCH_MAX', '20'))
+        if workers is None:
+            workers = int(os.getenv('SUBSCRIBER_SEND_WORKERS', '8'))
+        if retries is None:
+            retries = int(os.getenv('SUBSCRIBER_RETRIES', '2'))
+        if retry_backoff is None:
+            retry_backoff = float(os.getenv('SUBSCRIBER_RETRY_BACKOFF', '1'))
+        self.registry = registry
+        self.deliver = deliver
+        self.embed_renderer = embed_renderer
+        self.rate_limits = rate_limits
+        self.max_batch = max_batch
+        self.retries = retries
+        self.retry_backoff = retry_backoff
+        # Prefork workers hand signals to the primary worker's fan-out, so
+        # rate limits hold per server rather than per worker
+        self.relay = None
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='subscriber-send')
+        self._cond = threading.Condition()
+        # (channel, destination) -> queued (signal, message) items
+        self._pending: Dict[Tuple[str, str], List[Tuple[object, str]]] = {}
+        self._buckets: Dict[Tuple[str, str], _TokenBucket] = {}
+        self._inflight = set()
+        self._thread = None
+        self.routed = 0
+        self.sent = 0
+        self.failed = 0
+        self.retried = 0
+        self.renders = 0
+
+    def publish(self, signal, message: str) -> int:
+        """
+        Queue a signal for every matching subscriber destination.
+
+        Args:
+            signal: Processed Signal
+            message: Formatted text message for the signal
+
+        Returns:
+            Number of destinations queued (here or on the primary worker)
+        """
+        item = (signal, message)
+        queued = 0
+        subscribers = self.registry.match(signal.ticker, signal.action)
+        if not subscribers:
+            return 0
+        if self.relay is not None and self.relay.send('subscribers', signal, message):
+            return sum(len(subscriber.destinations) for subscriber in subscribers)
+        with self._cond:
+            for subscriber in subscribers:
+                for key in subscriber.destinations.items():
+                    self._pending.setdefault(key, []).append(item)
+                    queued += 1
+            self.routed += queued
+            self._cond.notify_all()
+        return queued
+
+    def _take_ready(self) -> Tuple[List[Tuple[Tuple[str, str], List]], Optional[float]]:
+        """Detach batches for destinations with a token (lock held); also returns the next wake-up."""
+        now = time.monotonic()
+        ready, wait = [], None
+        for key in list(self._pending):
+            if key in self._inflight:
+                continue
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                count, per = self.rate_limits.get(key[0], (1, 1.0))
+                bucket = self._buckets[key] = _TokenBucket(count, per, now)
+            delay = bucket.take(now)
+            if delay:
+                wait = delay if wait is None else min(wait, delay)
+                continue
+            items = self._pending.pop(key)
+            if len(items) > self.max_batch:
+                self._pending[key] = items[self.max_batch:]
+                items = items[:self.max_batch]
+            self._inflight.add(key)
+            ready.append((key, items))
+        return ready, wait
+
+    def _run(self):
+        while True:
+            with self._cond:
+                ready, wait = self._take_ready()
+                while not ready:
+                    self._cond.wait(wait)
+                    ready, wait = self._take_ready()
+            rendered = {}
+            for (channel, destination), items in ready:
+                batch_key = (channel, tuple(id(signal) for signal, _ in items))
+                bodies = rendered.get(batch_key)
+                if bodies is None:
+                    bodies = rendered[batch_key] = render_digest(items, [channel], self.embed_renderer)
+                    self.renders += 1
+                self._pool.submit(self._send, (channel, destination), bodies)
+
+    def _send(self, key: Tuple[str, str], bodies: List[Tuple[str, str]]):
+        channel, destination = key
+        sent = failed = retried = 0
+        try:
+            for body_channel, body in bodies:
+                for attempt in range(self.retries + 1):
+                    if attempt:
+                        # The destination stays in flight, so later batches wait behind the retry
+                        time.sleep(self.retry_backoff * 2 ** (attempt - 1))
+                        retried += 1
+                        SUBSCRIBER_NOTIFICATIONS.inc(1, channel, 'retry')
+                    try:
+                        ok = self.deliver(body_channel, body, destination)
+                    except Exception as e:
+                        log.warning(f"⚠️  Subscriber delivery error on {channel}: {e}",
+                                    extra={'sample_key': f'subscriber_error:{channel}'})
+                        ok = False
+                    if ok:
+                        break
+                SUBSCRIBER_NOTIFICATIONS.inc(1, channel, 'ok' if ok else 'failed')
+                if ok:
+                    sent += 1
+                else:
+                    failed += 1
+                    log.error(f"❌ Subscriber delivery on {channel} failed after {self.retries + 1} attempts",
+                              extra={'sample_key': f'subscriber_failed:{channel}'})
+        finally:
+            with self._cond:
+                self.sent += sent
+                self.failed += failed
+                self.retried += retried
+                self._inflight.discard(key)
+                self._cond.notify_all()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True, name='subscriber-fanout')
+        self._thread.start()
+        return self
+
+    def flush(self, timeout: float = None) -> bool:
+        """Wait until every queued notification has been attempted; False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._pending or self._inflight:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def stats(self) -> Dict:
+        with self._cond:
+            pending = sum(len(items) for items in self._pending.values())
+        return {
+            'subscribers': len(self.registry),
+            'routed': self.routed,
+            'pending': pending,
+            'sent': self.sent,
+            'failed': self.failed,
+            'retried': self.retried,
+            'renders': self.renders,
+        }
+
+
+def create_fanout_from_env(embed_renderer: Optional[Callable[[object], Dict]] = None) -> Optional[SubscriberFanout]:
+    """
+    Create a subscriber fan-out from SUBSCRIBERS_FILE.
+
+    Returns:
+        SubscriberFanout, or None if no subscribers file is configured
+    """
+    path = os.getenv('SUBSCRIBERS_FILE', '')
+    if not path:
+        return None
+    return SubscriberFanout(SubscriberRegistry.load(path), embed_renderer=embed_renderer)
@@ -0,0 +1,153 @@
+"""
+Process supervisor for the integrated bot.
+Runs each service (webhook server, price monitor) in its own process, checks
+their health and restarts failed services with backoff.
+"""
+
+import multiprocessing
+import os
+import signal
+import time
+from typing import Callable, Dict, List, Optional
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+class Service:
+    """A supervised service: a process target plus a health check."""
+
+    def __init__(self, name: str, target: Callable[[], None],
+                 health_check: Optional[Callable[[], bool]] = None,
+                 startup_grace: float = None):
+        """
+        Args:
+            name: Service name used in logs
+            target: Function run in the child process (should not return)
+            health_check: Called in the supervisor; False counts as a failure
+            startup_grace: Seconds after start before health checks count
+        """
+        self.name = name
+        self.target = target
+        self.health_check = health_check
+        if startup_grace is None:
+            startup_grace = float(os.getenv('SUPERVISOR_STARTUP_GRACE', '15'))
+        self.startup_grace = startup_grace
+
+        self.process: Optional[multiprocessing.Process] = None
+        self.started_at = 0.0
+        self.restarts = 0
+        self.failures = 0
+        self.restart_at: Optional[float] = None
+
+
+def _service_main(service: Service):
+    """Child process body."""
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # Ctrl+C is handled by the supervisor
+    service.target()
+
+
+class ServiceSupervisor:
+    """Starts services in forked processes and keeps them running."""
+
+    def __init__(self, services: List[Service], check_interval: float = None,
+                 failure_threshold: int = None, max_backoff: float = 30):
+        """
+        Args:
+            services: Services to supervise
+            check_interval: Seconds between health checks
+            failure_threshold: Consecutive failed checks before a restart
+            max_backoff: Upper bound on the restart delay in seconds
+        """
+        self.services: Dict[str, Service] = {s.name: s for s in services}
+        self.check_interval = check_interval or float(os.getenv('SUPERVISOR_CHECK_INTERVAL', '5'))
+        self.failure_threshold = failure_threshold or int(os.getenv('SUPERVISOR_FAILURE_THRESHOLD', '3'))
+        self.max_backoff = max_backoff
+        self.context = multiprocessing.get_context('fork')
+        self.stopping = False
+
+    def start_service(self, service: Service):
+        """Start (or restart) one service process."""
+        service.process = self.context.Process(
+            target=_service_main, args=(service,), name=service.name, daemon=False
+        )
+        service.process.start()
+        service.started_at = time.monotonic()
+        service.failures = 0
+        service.restart_at = None
+        print(f"✅ {service.name} started (pid {service.process.pid})")
+
+    def stop_service(self, service: Service, timeout: float = 5):
+        """Terminate a service process, killing it if it doesn't exit."""
+        process = service.process
+        if process is None or not process.is_alive():
+            return
+        process.terminate()
+        process.join(timeout)
+        if process.is_alive():
+            process.kill()
+            process.join()
+
+    def _schedule_restart(self, service: Service, reason: str):
+        # Exponential backoff for crash loops; a service that ran for a minute was healthy
+        if time.monotonic() - service.started_at > 60:
+            service.restarts = 0
+        service.restarts += 1
+        delay = min(2 ** (service.restarts - 1), self.max_backoff) if service.restarts > 1 else 0
+        print(f"⚠️  {service.name} {reason}, restarting in {delay}s")
+        service.restart_at = time.monotonic() + delay
+
+    def check(self, service: Service):
+        """Check one service and restart it if it died or is unhealthy."""
+        now = time.monotonic()
+        if service.restart_at is not None:
+            if now >= service.restart_at:
+                self.start_service(service)
+            return
+
+        process = service.process
+        if not process.is_alive():
+            self._schedule_restart(service, f"exited (code {process.exitcode})")
+            return
+
+        if service.health_check is None or now - service.started_at < service.startup_grace:
+            return
+        try:
+            healthy = service.health_check()
+        except Exception:
+            healthy = False
+        service.failures = 0 if healthy else service.failures + 1
+        if service.failures >= self.failure_threshold:
+            self.stop_service(service)
+            self._schedule_restart(service, f"failed {service.failures} health checks")
+
+    def stop(self, *_):
+        """Stop supervising and terminate all services."""
+        self.stopping = True
+
+    def run(self, install_signals: bool = True):
+        """Start all services and supervise them until stopped."""
+        if install_signals:
+            signal.signal(signal.SIGTERM, self.stop)
+            signal.signal(signal.SIGINT, self.stop)
+
+        for service in self.services.values():
+            self.start_service(service)
+
+        tick = min(self.check_interval, 1.0)
+        last_check = 0.0
+        while not self.stopping:
+            time.sleep(tick)
+            now = time.monotonic()
+            # Dead processes and due restarts are handled every tick, health checks less often
+            run_health = now - last_check >= self.check_interval
+            if run_health:
+                last_check = now
+            for service in self.services.values():
+                if run_health or service.restart_at is not None or not service.process.is_alive():
+                    self.check(service)
+
+        print("\n🛑 Shutting down services...")
+        for service in self.services.values():
+            self.stop_service(service)
@@ -1,6 +1,7 @@
 """
 Integrated Supremo Trading Bot
-Combines webhook server with optional price monitoring.
+Combines webhook server with optional price monitoring, either as threads in
+one process or (SUPERVISOR_MODE) as supervised processes.
 """
 
 import os
@@ -8,6 +9,7 @@ import sys
 import threading
 import time
 from dotenv import load_dotenv
+from shm_table import SharedPriceTable, get_shared_prices, install_price_table
 
 # Fix Windows console encoding
 if sys.platform == 'win32':
@@ -24,11 +26,12 @@ load_dotenv()
 
 def run_webhook_server():
     """Run the webhook server in a separate thread."""
-    from webhook_server import app
+    from webhook_server import app, start_background_services
     port = int(os.getenv('WEBHOOK_PORT', '5000'))
     host = os.getenv('WEBHOOK_HOST', '0.0.0.0')
     
     print("🚀 Starting Webhook Server...")
+    start_background_services()
     app.run(host=host, port=port, debug=False, use_reloader=False)
 
 
@@ -38,9 +41,91 @@ def run_price_monitor():
     
     print("📊 Starting Price Monitor...")
     bot = TradingBot()
+    
+    # Share the price stream with the webhook strategy (weekly entry-zone levels)
+    prices = get_shared_prices()
+    if prices is not None:
+        # Supervisor mode: the webhook process reads prices from shared memory
+        bot.price_listeners.append(prices.publish)
+        # The loop heartbeat says the monitor is alive, the price one that fetches succeed
+        bot.price_listeners.append(lambda symbol, price, ts: prices.heartbeat('monitor_price', ts))
+        bot.loop_listeners.append(lambda fetched: prices.heartbeat('monitor'))
+    elif os.getenv('ENABLE_WEBHOOK', 'true').lower() == 'true':
+        from webhook_server import strategy
+        bot.price_listeners.append(strategy.on_price)
+    
     bot.run()
 
 
+def _webhook_healthy():
+    """HTTP health check against the local webhook server."""
+    import requests
+    host = os.getenv('WEBHOOK_HOST', '0.0.0.0')
+    if host in ('0.0.0.0', '::', ''):
+        host = '127.0.0.1'
+    port = int(os.getenv('WEBHOOK_PORT', '5000'))
+    try:
+        return requests.get(f"http://{host}:{port}/health", timeout=2).status_code == 200
+    except requests.exceptions.RequestException:
+        return False
+
+
+def monitor_health_check(prices: SharedPriceTable, stale_after: float):
+    """
+    Build the supervisor health check for the price monitor.
+
+    The monitor is unhealthy (and restarted) only when its loop stops
+    advancing. An exchange outage leaves the loop running, so it is reported
+    with a warning instead of restarting a process that can't fix it.
+    """
+    state = {'fetch_stale': False}
+
+    def monitor_healthy():
+        now = time.time()
+        last = prices.last_heartbeat('monitor')
+        if last is None or now - last >= stale_after:
+            return False
+        fetched = prices.last_heartbeat('monitor_price')
+        fetch_stale = fetched is None or now - fetched >= stale_after
+        if fetch_stale and not state['fetch_stale']:
+            print(f"⚠️  monitor is running but has not fetched a price for {stale_after:.0f}s")
+        elif state['fetch_stale'] and not fetch_stale:
+            print("✅ monitor is fetching prices again")
+        state['fetch_stale'] = fetch_stale
+        return True
+
+    return monitor_healthy
+
+
+def run_supervised(run_webhook, run_monitor):
+    """
+    Run each service in its own process under a supervisor.
+    
+    The monitor publishes prices to a shared-memory table that the webhook
+    process follows, so only one process calls the exchange.
+    """
+    from supervisor import Service, ServiceSupervisor
+    
+    prices = SharedPriceTable()
+    install_price_table(prices)  # inherited by the forked services
+    
+    services = []
+    if run_webhook:
+        services.append(Service('webhook', run_webhook_server, health_check=_webhook_healthy))
+    if run_monitor:
+        check_interval = int(os.getenv('CHECK_INTERVAL', '60'))
+        stale_after = float(os.getenv('MONITOR_STALE_AFTER', str(check_interval * 5 + 30)))
+        services.append(Service(
+            'monitor', run_price_monitor, health_check=monitor_health_check(prices, stale_after),
+            startup_grace=stale_after
+        ))
+    
+    print("-" * 50)
+    print("🟢 Supervisor running. Press Ctrl+C to stop.")
+    print("-" * 50)
+    ServiceSupervisor(services).run()
+
+
 def main():
     """Main function to run integrated bot."""
     print("=" * 50)
@@ -51,6 +136,12 @@ def main():
     run_webhook = os.getenv('ENABLE_WEBHOOK', 'true').lower() == 'true'
     run_monitor = os.getenv('ENABLE_MONITOR', 'false').lower() == 'true'
     
+    if os.getenv('SUPERVISOR_MODE', 'false').lower() == 'true' and (run_webhook or run_monitor):
+        if hasattr(os, 'fork'):
+            run_supervised(run_webhook, run_monitor)
+            return
+        print("⚠️  SUPERVISOR_MODE requires a POSIX system, falling back to threads")
+    
     threads = []
     
     # Start webhook server
@@ -4,12 +4,22 @@ Implements trend filters, entry zones, TP/SL logic, and risk management.
 """
 
 import os
-from datetime import datetime, timedelta
-from typing import Dict, Optional, Tuple
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Optional, Tuple, Union
 from dotenv import load_dotenv
+from signal_model import Signal, SignalPayload, SignalParseError, parse_timestamp
+from weekly_levels import WeeklyLevelEngine
+from candles import DEFAULT_TIMEFRAMES, CandleAggregator
+from log_setup import get_logger
+from symbols import symbol_registry
+from checkpoint import Checkpointer, pack_times, unpack_times
 
 load_dotenv()
 
+log = get_logger('strategy')
+
 
 class SupremoStrategy:
     """
@@ -31,8 +41,89 @@ class SupremoStrategy:
         self.fixed_sl_percent = float(os.getenv('FIXED_SL_PERCENT', '0'))  # 0 = use ATR
         
         # Signal deduplication
+        # (a dict, or a SharedDedupTable when running prefork workers)
         self.last_signal_time = {}
         self.deduplication_window = 15 * 60  # 15 minutes in seconds
+        self._dedup_lock = threading.Lock()
+        
+        # Entry zones from server-side weekly levels
+        self.entry_zone_tolerance = float(os.getenv('ENTRY_ZONE_TOLERANCE', '0.001'))  # 0.1% default
+        self.enforce_entry_zones = os.getenv('ENFORCE_ENTRY_ZONES', 'false').lower() == 'true'
+        self.level_engine = WeeklyLevelEngine(tolerance=self.entry_zone_tolerance)
+        
+        # Multi-timeframe trend filter from server-side candles
+        self.trend_timeframes = [
+            t.strip() for t in os.getenv('TREND_TIMEFRAMES', '1h,4h').split(',') if t.strip()
+        ]
+        candle_timeframes = [
+            t.strip() for t in os.getenv('CANDLE_TIMEFRAMES', ','.join(DEFAULT_TIMEFRAMES)).split(',') if t.strip()
+        ]
+        self.candles = CandleAggregator(
+            timeframes=list(dict.fromkeys(candle_timeframes + self.trend_timeframes))
+        )
+        self.enforce_trend_filter = os.getenv('ENFORCE_TREND_FILTER', 'false').lower() == 'true'
+        
+        # Entries older than this (seconds since the alert fired) are dropped, 0 = never
+        self.max_signal_age = float(os.getenv('MAX_SIGNAL_AGE', '0'))
+        
+        # Exchange symbol metadata (tick/step sizes), empty until loaded
+        self.symbols = symbol_registry
+    
+    def is_stale(self, payload: SignalPayload) -> bool:
+        """
+        Check whether an entry signal is too old to notify.
+        
+        Exits, stop-losses and take-profits are never considered stale.
+        
+        Args:
+            payload: Validated signal payload
+            
+        Returns:
+            True if the signal should be dropped
+        """
+        if not self.max_signal_age or payload.signal_type != 'entry':
+            return False
+        age = payload.age()
+        return age is not None and age > self.max_signal_age
+    
+    def register_checkpoint(self, checkpointer: Checkpointer):
+        """
+        Register dedup, weekly level and candle state for warm restarts.
+        
+        Args:
+            checkpointer: Checkpointer to register sections with
+        """
+        checkpointer.register('dedup', self._dump_dedup, self._load_dedup)
+        checkpointer.register('levels', self.level_engine.dump_state, self.level_engine.load_state)
+        checkpointer.register('candles', self.candles.dump_state, self.candles.load_state)
+    
+    def _dump_dedup(self) -> bytes:
+        """Pack a snapshot of the dedup table (taken under the lock request threads use)."""
+        with self._dedup_lock:
+            entries = list(self.last_signal_time.items())
+        return pack_times(entries)
+    
+    def _load_dedup(self, buffer):
+        """Merge checkpointed dedup times, keeping the newest time per key."""
+        with self._dedup_lock:
+            for key, signal_time in unpack_times(buffer):
+                current = self.last_signal_time.get(key)
+                if current is None or signal_time > current:
+                    self.last_signal_time[key] = int(signal_time)
+    
+    def on_price(self, ticker: str, price: float, ts: float = None):
+        """
+        Feed a price tick into server-side strategy state.
+        
+        Args:
+            ticker: Trading symbol
+            price: Last price
+            ts: Tick time as Unix seconds (defaults to now)
+        """
+        if ts is None:
+            ts = time.time()
+        self.level_engine.update(ticker, price, ts)
+        self.candles.update(ticker, price, ts)
     
     def check_trend_filter(self, price: float, ema50: float, ema200: float) -> str:
         """
@@ -54,6 +145,28 @@ class SupremoStrategy:
             # Neutral/choppy - return based on price vs EMA50
             return 'bullish' if price > ema50 else 'bearish'
     
+    def multi_timeframe_trend(self, ticker: str, timeframes=None) -> Optional[str]:
+        """
+        Combine the trend filter across timeframes of server-side candles.
+        
+        Args:
+            ticker: Trading symbol
+            timeframes: Timeframes that must agree (defaults to TREND_TIMEFRAMES)
+            
+        Returns:
+            'bullish' or 'bearish' if every timeframe agrees, 'mixed' if they
+            disagree, or None until every timeframe has enough bars
+        """
+        trends = set()
+        for timeframe in timeframes or self.trend_timeframes:
+            inputs = self.candles.trend_inputs(ticker, timeframe)
+            if inputs is None:
+                return None
+            trends.add(self.check_trend_filter(*inputs))
+        if not trends:
+            return None
+        return trends.pop() if len(trends) == 1 else 'mixed'
+    
     def validate_entry_zone(
         self, 
         action: str, 
@@ -63,7 +176,8 @@ class SupremoStrategy:
         ml: float = None,
         mh: float = None,
         wo: float = None,
-        pwh: float = None
+        pwh: float = None,
+        tolerance: float = None
     ) -> bool:
         """
         Validate if entry conditions are met.
@@ -77,38 +191,33 @@ class SupremoStrategy:
             mh: Monday High
             wo: Weekly Open
             pwh: Previous Week High
+            tolerance: Max distance from the level as a fraction of it
+                (defaults to ENTRY_ZONE_TOLERANCE)
             
         Returns:
             True if entry is valid, False otherwise
         """
+        if tolerance is None:
+            tolerance = self.entry_zone_tolerance
+        
         if action == 'buy':
             # Long entries require bullish trend
             if trend_bias != 'bullish':
                 return False
-            
-            # Check if price is at entry level
-            if entry_level == 'ML' and ml:
-                # Price should be touching/sweeping ML (within 0.1% tolerance)
-                return abs(price - ml) / ml <= 0.001
-            elif entry_level == 'WO' and wo:
-                return abs(price - wo) / wo <= 0.001
-            else:
-                return False
-                
+            zones = {'ML': ml, 'WO': wo}
         elif action == 'sell':
             # Short entries require bearish trend
             if trend_bias != 'bearish':
                 return False
-            
-            # Check if price is at entry level
-            if entry_level == 'MH' and mh:
-                return abs(price - mh) / mh <= 0.001
-            elif entry_level == 'PWH' and pwh:
-                return abs(price - pwh) / pwh <= 0.001
-            else:
-                return False
+            zones = {'MH': mh, 'PWH': pwh}
+        else:
+            return False
         
-        return False
+        # Price should be touching/sweeping the entry level
+        level = zones.get(entry_level)
+        if not level:
+            return False
+        return abs(price - level) / level <= tolerance
     
     def calculate_take_profit(
         self,
@@ -241,154 +350,242 @@ class SupremoStrategy:
         
         return round(position_size, 8)  # Round to 8 decimals for crypto
     
-    def check_deduplication(self, ticker: str, timestamp: str) -> bool:
+    def check_deduplication(self, ticker: str, timestamp) -> bool:
         """
         Check if signal should be ignored due to deduplication.
         
         Args:
             ticker: Trading symbol
-            timestamp: Signal timestamp
+            timestamp: Signal timestamp (Unix seconds or ISO string)
             
         Returns:
             True if signal should be ignored, False if it's new
         """
-        try:
-            # Parse timestamp (assuming ISO format or Unix timestamp)
-            if isinstance(timestamp, str):
-                if timestamp.isdigit():
-                    signal_time = int(timestamp)
-                else:
-                    # Try parsing ISO format
-                    dt = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
-                    signal_time = int(dt.timestamp())
-            else:
-                signal_time = int(timestamp)
-            
+        if isinstance(timestamp, int):
+            signal_time = timestamp
+        else:
+            signal_time = parse_timestamp(timestamp)
+            if signal_time is None:
+                log.warning(f"Error in deduplication check: unparseable timestamp {timestamp!r}")
+                return False  # Allow signal if parsing fails
+        
+        # Shared tables check and record atomically across processes
+        check_and_set = getattr(self.last_signal_time, 'check_and_set', None)
+        if check_and_set is not None:
+            return check_and_set(ticker, signal_time, self.deduplication_window)
+        
+        with self._dedup_lock:
             # Check if we've seen a signal for this ticker recently
-            if ticker in self.last_signal_time:
-                time_diff = signal_time - self.last_signal_time[ticker]
-                if time_diff < self.deduplication_window:
-                    return True  # Ignore duplicate
+            last_time = self.last_signal_time.get(ticker)
+            if last_time is not None and signal_time - last_time < self.deduplication_window:
+                return True  # Ignore duplicate
             
             # Update last signal time
             self.last_signal_time[ticker] = signal_time
             return False  # New signal
-            
-        except Exception as e:
-            print(f"Error in deduplication check: {e}")
-            return False  # Allow signal if parsing fails
     
-    def process_signal(self, payload: Dict) -> Optional[Dict]:
+    def release_signal(self, signal: Signal):
+        """
+        Forget a processed signal's dedup record so a retry is accepted.
+        
+        Used when its notification could not be persisted and the sender
+        is asked to retry.
+        
+        Args:
+            signal: Signal returned by process_signal
+        """
+        key = self._dedup_key(signal.ticker, signal.signal_type)
+        signal_time = parse_timestamp(signal.timestamp)
+        with self._dedup_lock:
+            if signal_time is not None and self.last_signal_time.get(key) == signal_time:
+                self.last_signal_time.pop(key, None)
+    
+    @staticmethod
+    def _dedup_key(ticker: str, signal_type: str) -> str:
+        """Dedup key: exits/SL are tracked separately from entries."""
+        return ticker if signal_type == 'entry' else f"{ticker}:{signal_type}"
+    
+    def process_signal(self, payload: Union[Dict, SignalPayload]) -> Optional[Signal]:
         """
         Process a TradingView webhook signal.
         
         Args:
-            payload: Webhook payload from TradingView
+            payload: Raw webhook payload from TradingView, or an already
+                validated SignalPayload
             
         Returns:
-            Processed signal dict with all calculated values, or None if invalid
+            Processed Signal with all calculated values, or None if invalid
         """
-        try:
-            ticker = payload.get('ticker')
-            action = payload.get('action', '').lower()
-            price = float(payload.get('price', 0))
-            sl = payload.get('sl')
-            tp = payload.get('tp')
-            trend_bias = payload.get('trend_bias', '').lower()
-            timestamp = payload.get('timestamp', datetime.now().isoformat())
-            
-            # Validate required fields
-            if not all([ticker, action, price]):
-                print("❌ Missing required fields in signal")
+        if not isinstance(payload, SignalPayload):
+            try:
+                payload = SignalPayload.parse(payload)
+            except SignalParseError as e:
+                log.warning(f"❌ Invalid signal: {e}")
                 return None
-            
-            if action not in ['buy', 'sell']:
-                print(f"❌ Invalid action: {action}")
+        
+        ticker = payload.ticker
+        action = payload.action
+        price = payload.price
+        
+        levels = self.level_engine.levels(ticker)
+        entry_level = payload.entry_level
+        
+        # Reject entries outside a valid zone, using server-side levels
+        if self.enforce_entry_zones and payload.signal_type == 'entry':
+            entry_level = self._resolve_entry_zone(payload, levels)
+            if entry_level is None:
+                log.info(f"⚠️  {ticker} {action} @ {price} is not at a valid entry zone",
+                         extra={'ticker': ticker, 'sample_key': f'zone:{ticker}'})
                 return None
-            
-            # Check deduplication
-            if self.check_deduplication(ticker, timestamp):
-                print(f"⚠️  Duplicate signal ignored for {ticker}")
+        
+        # Reject entries against the higher-timeframe trend (fails open until candles warm up)
+        if self.enforce_trend_filter and payload.signal_type == 'entry':
+            trend = self.multi_timeframe_trend(ticker)
+            required = 'bullish' if action == 'buy' else 'bearish'
+            if trend is not None and trend != required:
+                log.info(f"⚠️  {ticker} {action} rejected: {'/'.join(self.trend_timeframes)} trend is {trend}",
+                         extra={'ticker': ticker, 'sample_key': f'trend:{ticker}'})
                 return None
-            
-            # Extract entry level from payload (if provided)
-            entry_level = payload.get('entry_level', '')
-            
-            # Calculate stop loss if not provided
-            if sl:
-                try:
-                    stop_loss = float(sl)
-                except:
-                    stop_loss = self.calculate_stop_loss(price, action=action)
-            else:
-                atr = payload.get('atr')
-                atr = float(atr) if atr else None
-                stop_loss = self.calculate_stop_loss(price, atr=atr, action=action)
-            
-            # Calculate take profit if not provided
-            if tp:
-                try:
-                    tp1 = float(tp)
-                    tp2 = tp1 * 1.01  # Default TP2
-                except:
-                    tp1, tp2 = self.calculate_take_profit(entry_level, price)
-            else:
-                tp1, tp2 = self.calculate_take_profit(entry_level, price)
-            
-            # Calculate position size
-            position_size = self.calculate_position_size(price, stop_loss, action)
-            
-            # Build signal dict
-            signal = {
-                'ticker': ticker,
-                'action': action,
-                'entry_price': price,
-                'stop_loss': stop_loss,
-                'tp1': tp1,
-                'tp2': tp2,
-                'trend_bias': trend_bias,
-                'entry_level': entry_level,
-                'position_size': position_size,
-                'risk_amount': self.total_equity * (self.risk_per_trade / 100),
-                'timestamp': timestamp,
-                'processed_at': datetime.now().isoformat()
-            }
-            
-            return signal
-            
-        except Exception as e:
-            print(f"❌ Error processing signal: {e}")
+        
+        # Check deduplication (exits/SL are tracked separately from entries); only
+        # signals that passed the filters take the ticker's slot
+        dedup_ticker = self._dedup_key(ticker, payload.signal_type)
+        dedup_time = payload.signal_time if payload.signal_time is not None else payload.timestamp
+        if self.check_deduplication(dedup_ticker, dedup_time):
+            log.info(f"⚠️  Duplicate signal ignored for {ticker}",
+                     extra={'ticker': ticker, 'sample_key': f'duplicate:{ticker}'})
             return None
+        
+        # Calculate stop loss if not provided
+        if payload.sl is not None:
+            stop_loss = payload.sl
+        else:
+            stop_loss = self.calculate_stop_loss(price, atr=payload.atr, action=action)
+        
+        # Calculate take profit if not provided
+        if payload.tp is not None:
+            tp1 = payload.tp
+            tp2 = tp1 * 1.01  # Default TP2
+        else:
+            tp1, tp2 = self.calculate_take_profit(
+                entry_level, price,
+                ml=levels['ML'], mm=levels['MM'], mh=levels['MH'], wo=levels['WO'], pwh=levels['PWH']
+            )
+        
+        # Calculate position size
+        position_size = self.calculate_position_size(price, stop_loss, action)
+        
+        # Round to the exchange's tick and step sizes when symbol metadata is loaded
+        info = self.symbols.lookup(ticker)
+        if info is not None:
+            stop_loss, tp1, tp2 = info.round_price(stop_loss), info.round_price(tp1), info.round_price(tp2)
+            position_size = info.round_quantity(position_size)
+        
+        signal = Signal(
+            ticker, action, price, stop_loss, tp1, tp2,
+            payload.trend_bias, entry_level, position_size,
+            self.total_equity * (self.risk_per_trade / 100),
+            payload.timestamp, datetime.now().isoformat(), payload.signal_type
+        )
+        signal.ingress_at = payload.ingress_at
+        signal.age_at_ingress = payload.age_at_ingress
+        return signal
     
-    def format_signal_message(self, signal: Dict) -> str:
+    def _resolve_entry_zone(self, payload: SignalPayload, levels: Dict) -> Optional[str]:
+        """
+        Find the entry zone a signal is valid at.
+        
+        Args:
+            payload: Validated signal payload
+            levels: Current weekly levels for the ticker
+            
+        Returns:
+            Entry level identifier ('' if none was given), or None if the entry
+            is not at a valid zone. Each level fails open while it isn't known
+            yet (e.g. WO and Monday levels after a mid-week start).
+        """
+        zones = ('ML', 'WO') if payload.action == 'buy' else ('MH', 'PWH')
+        trend_bias = payload.trend_bias or ('bullish' if payload.action == 'buy' else 'bearish')
+        if payload.entry_level:
+            candidates = [payload.entry_level]
+            unknown = payload.entry_level in zones and levels.get(payload.entry_level) is None
+        else:
+            candidates = self.level_engine.match_zones(payload.ticker, payload.price)
+            unknown = all(levels[name] is None for name in zones)
+        if unknown:
+            log.info(f"⚠️  {payload.ticker} {payload.entry_level or '/'.join(zones)} not known yet, "
+                     f"skipping zone check", extra={'sample_key': f'no_levels:{payload.ticker}'})
+            return payload.entry_level or ''
+        
+        for entry_level in candidates:
+            if self.validate_entry_zone(
+                payload.action, trend_bias, entry_level, payload.price,
+                ml=levels['ML'], mh=levels['MH'], wo=levels['WO'], pwh=levels['PWH']
+            ):
+                return entry_level
+        return None
+    
+    def format_signal_message(self, signal: Union[Signal, Dict]) -> str:
         """
         Format signal as a readable message for notifications.
         
         Args:
-            signal: Processed signal dictionary
+            signal: Processed Signal (or equivalent dict)
             
         Returns:
             Formatted message string
         """
-        action_emoji = "🟢" if signal['action'] == 'buy' else "🔴"
-        trend_emoji = "📈" if signal['trend_bias'] == 'bullish' else "📉"
+        if not isinstance(signal, Signal):
+            signal = Signal.from_dict(signal)
         
-        message = f"""
-{action_emoji} SUPREMO SIGNAL - {signal['ticker']}
-
-Action: {signal['action'].upper()}
-Entry Price: ${signal['entry_price']:,.2f}
-Entry Level: {signal.get('entry_level', 'N/A')}
-Trend: {trend_emoji} {signal['trend_bias'].upper()}
-
-Stop Loss: ${signal['stop_loss']:,.2f}
-Take Profit 1: ${signal['tp1']:,.2f}
-Take Profit 2: ${signal['tp2']:,.2f}
-
-Position Size: {signal['position_size']:.8f}
-Risk Amount: ${signal['risk_amount']:,.2f} ({self.risk_per_trade}% of equity)
-
-Time: {signal['timestamp']}
-"""
-        return message.strip()
-
+        action_emoji = "🟢" if signal.action == 'buy' else "🔴"
+        trend_emoji = "📈" if signal.trend_bias == 'bullish' else "📉"
+        label = "SIGNAL" if signal.signal_type == 'entry' else signal.signal_type.upper()
+        
+        return (
+            f"{action_emoji} SUPREMO {label} - {signal.ticker}\n"
+            f"\n"
+            f"Action: {signal.action.upper()}\n"
+            f"Entry Price: ${signal.entry_price:,.2f}\n"
+            f"Entry Level: {signal.entry_level or 'N/A'}\n"
+            f"Trend: {trend_emoji} {signal.trend_bias.upper()}\n"
+            f"\n"
+            f"Stop Loss: ${signal.stop_loss:,.2f}\n"
+            f"Take Profit 1: ${signal.tp1:,.2f}\n"
+            f"Take Profit 2: ${signal.tp2:,.2f}\n"
+            f"\n"
+            f"Position Size: {signal.position_size:.8f}\n"
+            f"Risk Amount: ${signal.risk_amount:,.2f} ({self.risk_per_trade}% of equity)\n"
+            f"\n"
+            f"Time: {signal.timestamp}"
+        )
+    
+    def format_signal_embed(self, signal: Union[Signal, Dict]) -> Dict:
+        """
+        Format signal as a Discord embed.
+        
+        Args:
+            signal: Processed Signal (or equivalent dict)
+            
+        Returns:
+            Discord embed dict
+        """
+        if not isinstance(signal, Signal):
+            signal = Signal.from_dict(signal)
+        
+        action_emoji = "🟢" if signal.action == 'buy' else "🔴"
+        label = "" if signal.signal_type == 'entry' else f" {signal.signal_type.upper()}"
+        
+        return {
+            'title': f"{action_emoji} {signal.action.upper()}{label} {signal.ticker}",
+            'color': 0x2ECC71 if signal.action == 'buy' else 0xE74C3C,
+            'fields': [
+                {'name': 'Entry', 'value': f"${signal.entry_price:,.2f} ({signal.entry_level or 'N/A'})", 'inline': True},
+                {'name': 'Stop Loss', 'value': f"${signal.stop_loss:,.2f}", 'inline': True},
+                {'name': 'Trend', 'value': signal.trend_bias.upper() or 'N/A', 'inline': True},
+                {'name': 'TP1 / TP2', 'value': f"${signal.tp1:,.2f} / ${signal.tp2:,.2f}", 'inline': True},
+                {'name': 'Size', 'value': f"{signal.position_size:.8f}", 'inline': True},
+                {'name': 'Risk', 'value': f"${signal.risk_amount:,.2f}", 'inline': True},
+            ],
+            'footer': {'text': str(signal.timestamp)}
+        }
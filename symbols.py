@@ -0,0 +1,377 @@
+"""
+Exchange symbol registry.
+Built from Binance spot and USDⓈ-M futures exchangeInfo and cached on disk,
+it validates and normalizes tickers (``BINANCE:BTCUSDT.P`` -> ``BTCUSDT``), maps them to
+Coinbase products and rounds prices/quantities to the exchange's tick and
+step sizes, all with dict lookups.
+"""
+
+import json
+import math
+import os
+import threading
+import time
+from typing import Dict, Iterable, Optional
+import requests
+from dotenv import load_dotenv
+from http_transport import transport
+from log_setup import get_logger
+
+load_dotenv()
+
+log = get_logger('symbols')
+
+
+# Quote assets tried, longest first, when splitting a symbol without exchange metadata
+QUOTE_ASSETS = ('FDUSD', 'USDT', 'USDC', 'BUSD', 'TUSD', 'USD', 'EUR', 'GBP', 'BTC', 'ETH', 'BNB')
+
+# TradingView perpetual / continuous contract suffixes
+_SUFFIXES = ('.PERP', '.P')
+
+# Upper bound on memoized raw ticker spellings (unknown tickers are cached too)
+_MAX_RESOLVED = 10000
+
+
+def _decimals(increment: float) -> int:
+    """Number of decimals needed to represent multiples of ``increment``."""
+    if increment <= 0:
+        return 8
+    return max(0, -math.floor(math.log10(increment) + 1e-9))
+
+
+def clean_ticker(ticker: str) -> str:
+    """
+    Strip the exchange prefix and contract suffix from a TradingView ticker.
+
+    Args:
+        ticker: e.g. 'BINANCE:BTCUSDT.P', 'btcusdt', 'BTC-USDT'
+
+    Returns:
+        Upper-case ticker without prefix/suffix, e.g. 'BTCUSDT'
+    """
+    ticker = ticker.strip().upper()
+    if ':' in ticker:
+        ticker = ticker.rsplit(':', 1)[1]
+    for suffix in _SUFFIXES:
+        if ticker.endswith(suffix):
+            ticker = ticker[:-len(suffix)]
+            break
+    return ticker
+
+
+def ticker_exchange(ticker: str) -> str:
+    """
+    Exchange a TradingView ticker refers to.
+
+    Args:
+        ticker: e.g. 'BINANCE:BTCUSDT.P', 'COINBASE:BTCUSD', 'BTCUSDT'
+
+    Returns:
+        Lower-case exchange from the prefix, else the EXCHANGE setting
+    """
+    if ':' in ticker:
+        return ticker.rsplit(':', 1)[0].strip().lower()
+    return os.getenv('EXCHANGE', 'binance').strip().lower()
+
+
+def split_symbol(symbol: str) -> Optional[tuple]:
+    """
+    Split a symbol into (base, quote) without exchange metadata.
+
+    Args:
+        symbol: e.g. 'BTCUSDT' or 'BTC-USD'
+
+    Returns:
+        (base, quote) tuple, or None if no known quote asset matches
+    """
+    symbol = clean_ticker(symbol)
+    for separator in ('-', '/'):
+        if separator in symbol:
+            base, quote = symbol.split(separator, 1)
+            return (base, quote) if base and quote else None
+    for quote in QUOTE_ASSETS:
+        if symbol.endswith(quote) and len(symbol) > len(quote):
+            return symbol[:-len(quote)], quote
+    return None
+
+
+class SymbolInfo:
+    """Trading rules of one exchange symbol."""
+
+    __slots__ = ('symbol', 'base', 'quote', 'status', 'tick_size', 'step_size', 'perpetual',
+                 'price_decimals', 'qty_decimals')
+
+    def __init__(self, symbol: str, base: str, quote: str, status: str = 'TRADING',
+                 tick_size: float = 0.0, step_size: float = 0.0, perpetual: bool = False):
+        self.symbol = symbol
+        self.base = base
+        self.quote = quote
+        self.status = status
+        self.tick_size = tick_size
+        self.step_size = step_size
+        self.perpetual = perpetual
+        self.price_decimals = _decimals(tick_size)
+        self.qty_decimals = _decimals(step_size)
+
+    @property
+    def coinbase(self) -> str:
+        """Coinbase product id, e.g. 'BTC-USDT' (the quote asset is kept as is)."""
+        return f"{self.base}-{self.quote}"
+
+    @property
+    def trading(self) -> bool:
+        return self.status == 'TRADING'
+
+    def round_price(self, price: float) -> float:
+        """Round a price to the nearest tick."""
+        if self.tick_size <= 0:
+            return price
+        return round(round(price / self.tick_size) * self.tick_size, self.price_decimals)
+
+    def round_quantity(self, quantity: float) -> float:
+        """Round a quantity down to a whole number of steps."""
+        if self.step_size <= 0:
+            return quantity
+        steps = math.floor(quantity / self.step_size + 1e-9)
+        return round(steps * self.step_size, self.qty_decimals)
+
+    def to_dict(self) -> Dict:
+        return {
+            'symbol': self.symbol, 'base': self.base, 'quote': self.quote, 'status': self.status,
+            'tick_size': self.tick_size, 'step_size': self.step_size, 'perpetual': self.perpetual
+        }
+
+
+def parse_exchange_info(data: Dict, perpetual: bool = False) -> Iterable[SymbolInfo]:
+    """
+    Convert a Binance exchangeInfo response into SymbolInfo objects.
+
+    Args:
+        data: Decoded /api/v3/exchangeInfo (spot) or /fapi/v1/exchangeInfo JSON
+        perpetual: The response is from USDⓈ-M futures (only perpetual
+            contracts are kept; quarterly contracts have no TradingView .P form)
+
+    Yields:
+        SymbolInfo for every listed symbol
+    """
+    for entry in data.get('symbols', []):
+        if perpetual and entry.get('contractType', 'PERPETUAL') != 'PERPETUAL':
+            continue
+        filters = {f.get('filterType'): f for f in entry.get('filters', [])}
+        yield SymbolInfo(
+            entry['symbol'], entry['baseAsset'], entry['quoteAsset'], entry.get('status', 'TRADING'),
+            float(filters.get('PRICE_FILTER', {}).get('tickSize', 0)),
+            float(filters.get('LOT_SIZE', {}).get('stepSize', 0)),
+            perpetual
+        )
+
+
+def is_perpetual_ticker(ticker: str) -> bool:
+    """True for TradingView perpetual tickers ('BINANCE:1000PEPEUSDT.P')."""
+    return ticker.strip().upper().endswith(_SUFFIXES)
+
+
+class SymbolRegistry:
+    """
+    Symbol metadata indexed for O(1) validation and normalization.
+
+    Spot and perpetual futures symbols are indexed separately: ``.P``/``.PERP``
+    tickers resolve to the perpetual contract first, everything else to the
+    spot symbol first, so futures-only contracts are accepted either way.
+
+    Until the first successful load the registry is empty and ``loaded`` is
+    False; callers then skip validation rather than reject every ticker.
+    """
+
+    def __init__(self, cache_path: str = None, ttl: float = None, api_url: str = None,
+                 futures_api_url: str = None):
+        """
+        Initialize registry, falling back to environment configuration.
+
+        Args:
+            cache_path: JSON file caching exchange metadata
+            ttl: Seconds before the cache is refreshed from the exchange
+            api_url: Binance API base URL (BINANCE_API_URL at fetch time if None)
+            futures_api_url: Binance USDⓈ-M futures API base URL
+                (BINANCE_FUTURES_API_URL at fetch time if None)
+        """
+        self.cache_path = cache_path or os.getenv('SYMBOL_CACHE_FILE', 'symbols.json')
+        self.ttl = ttl if ttl is not None else float(os.getenv('SYMBOL_CACHE_TTL', '86400'))
+        self.api_url = api_url
+        self.futures_api_url = futures_api_url
+        self.fetched_at = 0.0
+        self._symbols: Dict[str, SymbolInfo] = {}
+        self._perps: Dict[str, SymbolInfo] = {}
+        self._aliases: Dict[str, SymbolInfo] = {}  # cleaned spelling -> symbol
+        self._perp_aliases: Dict[str, SymbolInfo] = {}  # cleaned spelling -> perpetual contract
+        self._resolved: Dict[str, Optional[SymbolInfo]] = {}  # raw ticker -> symbol (memoized)
+        self._lock = threading.Lock()
+        self._refresher: Optional[threading.Thread] = None
+
+    @property
+    def loaded(self) -> bool:
+        return bool(self._symbols or self._perps)
+
+    def __len__(self) -> int:
+        return len(self._symbols) + len(self._perps)
+
+    def install(self, infos: Iterable[SymbolInfo], fetched_at: float = None):
+        """Replace the index with new symbol metadata."""
+        symbols, aliases = {}, {}
+        perps, perp_aliases = {}, {}
+        for info in infos:
+            by_symbol, by_alias = (perps, perp_aliases) if info.perpetual else (symbols, aliases)
+            by_symbol[info.symbol] = info
+            for alias in (info.symbol, f"{info.base}-{info.quote}", f"{info.base}/{info.quote}"):
+                by_alias.setdefault(alias, info)
+        # Swap whole dicts so lookups never see a half-built index
+        self._symbols = symbols
+        self._perps = perps
+        self._aliases = aliases
+        self._perp_aliases = perp_aliases
+        self._resolved = {}
+        self.fetched_at = time.time() if fetched_at is None else fetched_at
+
+    def lookup(self, ticker: str) -> Optional[SymbolInfo]:
+        """
+        Resolve any ticker spelling to its symbol.
+
+        Args:
+            ticker: e.g. 'BINANCE:BTCUSDT.P', 'BTC-USDT', 'btcusdt'
+
+        Returns:
+            SymbolInfo, or None if the ticker is not listed
+        """
+        resolved = self._resolved
+        try:
+            return resolved[ticker]
+        except KeyError:
+            pass
+        cleaned = clean_ticker(ticker)
+        first, second = self._aliases, self._perp_aliases
+        if is_perpetual_ticker(ticker):
+            first, second = second, first
+        info = first.get(cleaned) or second.get(cleaned)
+        if len(resolved) >= _MAX_RESOLVED:
+            resolved = self._resolved = {}
+        resolved[ticker] = info
+        return info
+
+    def normalize(self, ticker: str) -> Optional[str]:
+        """Exchange symbol for a ticker, or None if it is not listed."""
+        info = self.lookup(ticker)
+        return info.symbol if info else None
+
+    def is_valid(self, ticker: str) -> bool:
+        """True if the ticker is a listed, trading symbol."""
+        info = self.lookup(ticker)
+        return info is not None and info.trading
+
+    def coinbase_product(self, ticker: str) -> Optional[str]:
+        """
+        Coinbase product id for a ticker, e.g. 'BTCUSDT' -> 'BTC-USDT'.
+
+        Falls back to splitting on known quote assets for unlisted tickers.
+        """
+        info = self.lookup(ticker)
+        if info is not None:
+            return info.coinbase
+        parts = split_symbol(ticker)
+        return f"{parts[0]}-{parts[1]}" if parts else None
+
+    def _read_cache(self) -> Optional[Dict]:
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_cache(self):
+        tmp_path = f"{self.cache_path}.tmp"
+        infos = [*self._symbols.values(), *self._perps.values()]
+        data = {'fetched_at': self.fetched_at, 'symbols': [info.to_dict() for info in infos]}
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.cache_path)
+        except OSError as e:
+            log.warning(f"⚠️  Could not write symbol cache {self.cache_path}: {e}")
+
+    def _fetch_exchange_info(self, url: str, perpetual: bool = False) -> Optional[list]:
+        """Download and parse one exchangeInfo endpoint, or None if that failed."""
+        try:
+            response = transport.get(url)
+            response.raise_for_status()
+            return list(parse_exchange_info(response.json(), perpetual))
+        except requests.exceptions.RequestException as e:
+            log.warning(f"⚠️  Could not fetch exchange info from {url}: {e}")
+        except (KeyError, TypeError, ValueError) as e:
+            log.warning(f"⚠️  Error parsing exchange info from {url}: {e}")
+        return None
+
+    def fetch(self) -> bool:
+        """
+        Download spot and perpetual futures metadata and refresh the disk cache.
+
+        Futures are optional: if only they fail, the previously loaded
+        perpetual contracts are kept alongside the fresh spot symbols.
+        """
+        api_url = self.api_url or os.getenv('BINANCE_API_URL', 'https://api.binance.com')
+        infos = self._fetch_exchange_info(f"{api_url}/api/v3/exchangeInfo")
+        if not infos:
+            return False
+        futures_url = self.futures_api_url or os.getenv('BINANCE_FUTURES_API_URL', 'https://fapi.binance.com')
+        perps = self._fetch_exchange_info(f"{futures_url}/fapi/v1/exchangeInfo", perpetual=True)
+        infos += list(self._perps.values()) if perps is None else perps
+        with self._lock:
+            self.install(infos)
+            self._write_cache()
+        return True
+
+    def load(self, force: bool = False) -> bool:
+        """
+        Load symbols from the disk cache, refreshing it when older than the TTL.
+
+        A stale cache is still used if the exchange can't be reached.
+
+        Args:
+            force: Always fetch from the exchange
+
+        Returns:
+            True if the registry holds symbols afterwards
+        """
+        cached = None if force else self._read_cache()
+        if cached and time.time() - cached.get('fetched_at', 0) < self.ttl:
+            try:
+                self.install((SymbolInfo(**entry) for entry in cached['symbols']), cached['fetched_at'])
+                return True
+            except (KeyError, TypeError):
+                cached = None
+        if self.fetch():
+            return True
+        if cached and not self.loaded:
+            try:
+                self.install((SymbolInfo(**entry) for entry in cached['symbols']), cached.get('fetched_at', 0))
+                log.warning(f"⚠️  Using stale symbol cache {self.cache_path}")
+            except (KeyError, TypeError):
+                pass
+        return self.loaded
+
+    def start(self):
+        """Load symbols and refresh them every TTL in a background thread."""
+        if self._refresher is not None:
+            return
+
+        def refresh():
+            if self.load():
+                log.info(f"🔤 Validating tickers against {len(self)} exchange symbols")
+            while True:
+                time.sleep(max(self.ttl - (time.time() - self.fetched_at), 60))
+                self.fetch()
+
+        self._refresher = threading.Thread(target=refresh, daemon=True, name='symbol-refresh')
+        self._refresher.start()
+
+
+# Process-wide registry (empty until loaded)
+symbol_registry = SymbolRegistry()
@@ -0,0 +1,403 @@
+"""
+Binary TCP ingestion for internal signal producers.
+Persistent connections carry length-prefixed compact binary signals that
+skip HTTP/JSON overhead and feed the same pipeline as /webhook. Producers
+may pipeline messages; every message gets a fixed-size ack, in order.
+
+Wire format (little-endian):
+    handshake: b'TVSIG1' <uint8 secret length><secret bytes>
+    frame:     <uint32 body length><body>
+    body:      <uint32 seq><uint8 action><uint8 signal type><uint8 trend bias><uint8 flags>
+               <float64 price><float64 sl><float64 tp><float64 atr><int64 unix time>
+               <uint8 ticker length><uint8 entry level length><ticker><entry level>
+    ack:       <uint32 seq><uint8 status>
+"""
+
+import hmac
+import os
+import socket
+import socketserver
+import struct
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional
+from dotenv import load_dotenv
+
+from log_setup import get_logger
+from metrics import registry as metrics_registry
+from signal_model import SignalParseError, SignalPayload
+
+load_dotenv()
+
+log = get_logger('tcp_ingest')
+
+
+MAGIC = b'TVSIG1'
+FRAME_HEADER = struct.Struct('<I')
+BODY_HEADER = struct.Struct('<IBBBBddddqBB')
+ACK = struct.Struct('<IB')
+MAX_FRAME = 1024
+# The handshake carries the secret length in one byte
+MAX_SECRET_BYTES = 255
+
+_INF = float('inf')
+
+# Enumerated fields are sent as indexes into these tuples
+ACTION_CODES = ('buy', 'sell')
+SIGNAL_TYPE_CODES = ('entry', 'exit', 'sl', 'tp')
+TREND_BIAS_CODES = ('', 'bullish', 'bearish')
+
+# Flags marking which optional fields are present
+FLAG_SL = 0x01
+FLAG_TP = 0x02
+FLAG_ATR = 0x04
+FLAG_TIME = 0x08
+
+# Ack status codes
+ACK_OK = 0
+ACK_REJECTED = 1    # duplicate, unknown ticker or filtered out by the strategy
+ACK_INVALID = 2     # malformed message
+ACK_STALE = 3       # entry older than MAX_SIGNAL_AGE
+ACK_OVERLOADED = 4  # shed by admission control, retry later
+ACK_ERROR = 5       # unexpected server error
+
+ACK_NAMES = {
+    ACK_OK: 'ok', ACK_REJECTED: 'rejected', ACK_INVALID: 'invalid',
+    ACK_STALE: 'stale', ACK_OVERLOADED: 'overloaded', ACK_ERROR: 'error',
+}
+
+TCP_INGEST_MESSAGES = metrics_registry.counter(
+    'tcp_ingest_messages_total', 'Signals received over TCP ingestion by ack status', labels=('status',)
+)
+
+
+class ProtocolError(ValueError):
+    """Raised when a connection violates the framing protocol."""
+
+
+def _code(values: tuple, value: str, field: str) -> int:
+    try:
+        return values.index((value or '').lower())
+    except ValueError:
+        raise SignalParseError(field, f"invalid value {value!r}") from None
+
+
+def encode_signal(seq: int, signal: Dict) -> bytes:
+    """
+    Encode one signal as a frame.
+
+    Args:
+        seq: Message sequence number echoed in the ack
+        signal: Payload dict with the same fields as a TradingView webhook
+            (ticker, action, price, sl, tp, atr, trend_bias, entry_level,
+            signal_type, timestamp as Unix seconds)
+
+    Returns:
+        Frame bytes (length prefix included)
+    """
+    ticker = signal['ticker'].encode('utf-8')
+    entry_level = (signal.get('entry_level') or '').encode('utf-8')
+    flags = 0
+    values = []
+    for field, flag in (('sl', FLAG_SL), ('tp', FLAG_TP), ('atr', FLAG_ATR)):
+        value = signal.get(field)
+        if value is not None and value != '':
+            flags |= flag
+            values.append(float(value))
+        else:
+            values.append(0.0)
+    timestamp = signal.get('timestamp')
+    if timestamp is not None and timestamp != '':
+        flags |= FLAG_TIME
+    body = BODY_HEADER.pack(
+        seq,
+        _code(ACTION_CODES, signal['action'], 'action'),
+        _code(SIGNAL_TYPE_CODES, signal.get('signal_type') or 'entry', 'signal_type'),
+        _code(TREND_BIAS_CODES, signal.get('trend_bias') or '', 'trend_bias'),
+        flags, float(signal['price']), *values,
+        int(timestamp) if flags & FLAG_TIME else 0,
+        len(ticker), len(entry_level)
+    ) + ticker + entry_level
+    return FRAME_HEADER.pack(len(body)) + body
+
+
+def decode_signal(buffer, offset: int, length: int, ingress_at: float = None) -> SignalPayload:
+    """
+    Decode one frame body into a validated SignalPayload.
+
+    Args:
+        buffer: Bytes-like object holding the body
+        offset: Start of the body in ``buffer``
+        length: Body length
+        ingress_at: time.monotonic() when the frame arrived
+
+    Raises:
+        SignalParseError: If a field is malformed
+    """
+    if length < BODY_HEADER.size:
+        raise SignalParseError('frame', f"body too short ({length} bytes)")
+    (_, action, signal_type, trend_bias, flags, price, sl, tp, atr, signal_time,
+     ticker_length, level_length) = BODY_HEADER.unpack_from(buffer, offset)
+    if BODY_HEADER.size + ticker_length + level_length != length:
+        raise SignalParseError('frame', "length mismatch")
+    if not ticker_length:
+        raise SignalParseError('ticker', "missing required field")
+    if action >= len(ACTION_CODES):
+        raise SignalParseError('action', f"invalid action code {action}")
+    if signal_type >= len(SIGNAL_TYPE_CODES):
+        raise SignalParseError('signal_type', f"invalid signal type code {signal_type}")
+    if trend_bias >= len(TREND_BIAS_CODES):
+        raise SignalParseError('trend_bias', f"invalid trend bias code {trend_bias}")
+    if not 0 < price < _INF:
+        raise SignalParseError('price', f"must be positive, got {price}")
+    for field, flag, value in (('sl', FLAG_SL, sl), ('tp', FLAG_TP, tp), ('atr', FLAG_ATR, atr)):
+        if flags & flag and not -_INF < value < _INF:
+            raise SignalParseError(field, f"expected a finite number, got {value}")
+    start = offset + BODY_HEADER.size
+    try:
+        ticker = bytes(buffer[start:start + ticker_length]).decode('utf-8')
+    except UnicodeDecodeError:
+        raise SignalParseError('ticker', "not valid UTF-8") from None
+    try:
+        entry_level = bytes(buffer[start + ticker_length:start + ticker_length + level_length]).decode('utf-8')
+    except UnicodeDecodeError:
+        raise SignalParseError('entry_level', "not valid UTF-8") from None
+
+    if flags & FLAG_TIME:
+        timestamp = str(signal_time)
+    else:
+        timestamp, signal_time = datetime.now().isoformat(), None
+    return SignalPayload(
+        ticker, ACTION_CODES[action], price,
+        sl if flags & FLAG_SL else None,
+        tp if flags & FLAG_TP else None,
+        atr if flags & FLAG_ATR else None,
+        TREND_BIAS_CODES[trend_bias], entry_level.upper(), timestamp,
+        signal_time, SIGNAL_TYPE_CODES[signal_type], ingress_at
+    )
+
+
+class _ConnectionHandler(socketserver.BaseRequestHandler):
+    """Reads frames off one connection and writes one ack per frame."""
+
+    def handle(self):
+        server: 'SignalIngestServer' = self.server
+        sock: socket.socket = self.request
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        server.stats['connections'] += 1
+        buffer = bytearray()
+        try:
+            if not self._handshake(sock, buffer):
+                return
+            ingress_at = time.monotonic()
+            while True:
+                acks = bytearray()
+                offset = 0
+                available = len(buffer)
+                # Handle every complete frame received so far, then ack them in one write
+                while available - offset >= FRAME_HEADER.size:
+                    (length,) = FRAME_HEADER.unpack_from(buffer, offset)
+                    if length > MAX_FRAME:
+                        raise ProtocolError(f"frame of {length} bytes exceeds {MAX_FRAME}")
+                    end = offset + FRAME_HEADER.size + length
+                    if end > available:
+                        break
+                    acks += server.handle_frame(buffer, offset + FRAME_HEADER.size, length, ingress_at)
+                    offset = end
+                del buffer[:offset]
+                if acks:
+                    sock.sendall(acks)
+                data = sock.recv(65536)
+                if not data:
+                    return
+                ingress_at = time.monotonic()
+                buffer += data
+        except ProtocolError as e:
+            log.warning(f"⚠️  TCP ingest protocol error from {self.client_address[0]}: {e}",
+                        extra={'sample_key': f'tcp_protocol:{self.client_address[0]}'})
+        except OSError:
+            pass
+
+    def _handshake(self, sock: socket.socket, buffer: bytearray) -> bool:
+        server: 'SignalIngestServer' = self.server
+        while len(buffer) < len(MAGIC) + 1 or len(buffer) < len(MAGIC) + 1 + buffer[len(MAGIC)]:
+            data = sock.recv(4096)
+            if not data:
+                return False
+            buffer += data
+            if not buffer.startswith(MAGIC[:len(buffer)]):
+                raise ProtocolError("bad handshake")
+        secret_end = len(MAGIC) + 1 + buffer[len(MAGIC)]
+        secret = bytes(buffer[len(MAGIC) + 1:secret_end])
+        if server.secret and not hmac.compare_digest(secret, server.secret):
+            log.warning(f"⚠️  TCP ingest: invalid secret from {self.client_address[0]}",
+                        extra={'sample_key': f'tcp_secret:{self.client_address[0]}'})
+            return False
+        del buffer[:secret_end]
+        return True
+
+
+class SignalIngestServer(socketserver.ThreadingTCPServer):
+    """Persistent-connection TCP listener feeding signals to a handler."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, handler: Callable[[SignalPayload], int], host: str = '0.0.0.0',
+                 port: int = 9000, secret: str = None):
+        """
+        Args:
+            handler: Called with each decoded SignalPayload, returns an ACK_* status
+            host: Bind address
+            port: Bind port (0 picks a free port)
+            secret: Shared secret producers must send in the handshake (optional)
+        """
+        self.handler = handler
+        self.secret = _encode_secret(secret or '')
+        self.stats: Dict[str, int] = {'connections': 0, 'messages': 0}
+        self._thread: Optional[threading.Thread] = None
+        super().__init__((host, port), _ConnectionHandler)
+
+    def server_bind(self):
+        # Prefork workers share the port like the HTTP listener
+        if hasattr(socket, 'SO_REUSEPORT'):
+            self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        super().server_bind()
+
+    @property
+    def address(self):
+        return self.server_address[:2]
+
+    def handle_frame(self, buffer, offset: int, length: int, ingress_at: float) -> bytes:
+        """Decode and process one frame body, returning its ack."""
+        seq = struct.unpack_from('<I', buffer, offset)[0] if length >= 4 else 0
+        try:
+            status = self.handler(decode_signal(buffer, offset, length, ingress_at))
+        except SignalParseError:
+            status = ACK_INVALID
+        except Exception as e:
+            log.exception(f"❌ TCP ingest error: {e}", extra={'sample_key': 'tcp_error'})
+            status = ACK_ERROR
+        self.stats['messages'] += 1
+        TCP_INGEST_MESSAGES.inc(1, ACK_NAMES[status])
+        return ACK.pack(seq, status)
+
+    def start(self) -> 'SignalIngestServer':
+        """Serve connections in a background thread."""
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True, name='tcp-ingest')
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+def create_ingest_server_from_env(handler: Callable[[SignalPayload], int]) -> Optional[SignalIngestServer]:
+    """
+    Create the TCP ingest server if TCP_INGEST_PORT is set.
+
+    Args:
+        handler: Signal handler (see SignalIngestServer)
+
+    Returns:
+        Unstarted server, or None if disabled
+
+    Raises:
+        ValueError: If neither TCP_INGEST_SECRET nor WEBHOOK_SECRET is set;
+            an open listener would bypass the webhook's secret check
+    """
+    port = os.getenv('TCP_INGEST_PORT')
+    if not port:
+        return None
+    secret = os.getenv('TCP_INGEST_SECRET') or os.getenv('WEBHOOK_SECRET', '')
+    if not secret:
+        raise ValueError("TCP ingestion requires TCP_INGEST_SECRET (or WEBHOOK_SECRET)")
+    return SignalIngestServer(
+        handler,
+        host=os.getenv('TCP_INGEST_HOST', '0.0.0.0'),
+        port=int(port),
+        secret=secret
+    )
+
+
+def _encode_secret(secret: str) -> bytes:
+    """Encode a handshake secret, whose length must fit the handshake's one byte."""
+    data = secret.encode('utf-8')
+    if len(data) > MAX_SECRET_BYTES:
+        raise ValueError(f"TCP ingest secret is {len(data)} bytes, at most {MAX_SECRET_BYTES} allowed")
+    return data
+
+
+class SignalClient:
+    """Producer-side connection with pipelined sends."""
+
+    def __init__(self, host: str, port: int, secret: str = None, timeout: float = 10):
+        """
+        Connect and perform the handshake.
+
+        Args:
+            host: Ingest server host
+            port: Ingest server port
+            secret: Shared secret, falls back to TCP_INGEST_SECRET, then WEBHOOK_SECRET
+            timeout: Socket timeout in seconds
+
+        Raises:
+            ValueError: If the secret is longer than 255 bytes
+        """
+        if secret is None:
+            secret = os.getenv('TCP_INGEST_SECRET') or os.getenv('WEBHOOK_SECRET', '')
+        secret = _encode_secret(secret)
+        self.sock = socket.create_connection((host, port), timeout=timeout)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.sock.sendall(MAGIC + bytes([len(secret)]) + secret)
+        self._seq = 0
+        self._buffer = bytearray()
+
+    def _read_acks(self, count: int) -> List[tuple]:
+        needed = count * ACK.size
+        while len(self._buffer) < needed:
+            data = self.sock.recv(max(65536, needed - len(self._buffer)))
+            if not data:
+                raise ConnectionError("ingest server closed the connection")
+            self._buffer += data
+        acks = [ACK.unpack_from(self._buffer, i * ACK.size) for i in range(count)]
+        del self._buffer[:needed]
+        return acks
+
+    def send(self, signal: Dict) -> int:
+        """Send one signal and wait for its ack status."""
+        return self.send_many([signal])[0]
+
+    def send_many(self, signals: Iterable[Dict], window: int = 1000) -> List[int]:
+        """
+        Send signals pipelined, with up to ``window`` unacknowledged at a time.
+
+        Returns:
+            Ack status per signal, in order
+        """
+        statuses = []
+        batch = []
+        for signal in signals:
+            self._seq = (self._seq + 1) & 0xFFFFFFFF
+            batch.append(encode_signal(self._seq, signal))
+            if len(batch) == window:
+                statuses.extend(self._flush(batch))
+                batch = []
+        if batch:
+            statuses.extend(self._flush(batch))
+        return statuses
+
+    def _flush(self, frames: List[bytes]) -> List[int]:
+        self.sock.sendall(b''.join(frames))
+        return [status for _, status in self._read_acks(len(frames))]
+
+    def close(self):
+        self.sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
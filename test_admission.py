@@ -0,0 +1,95 @@
+"""
+Test script for webhook admission control.
+Tests concurrency limits, queue shedding and urgent-signal priority.
+"""
+
+import sys
+import threading
+import time
+
+# Fix Windows console encoding
+if sys.platform == 'win32':
+    try:
+        sys.stdout.reconfigure(encoding='utf-8')
+        sys.stderr.reconfigure(encoding='utf-8')
+    except (AttributeError, ValueError):
+        import io
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+        sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+
+from admission import AdmissionController, PRIORITY_URGENT, PRIORITY_ENTRY
+
+
+def test_admission_control():
+    """Test admission controller behavior under contention."""
+    print("🧪 Testing Admission Control")
+    print("=" * 50)
+
+    # Test 1: Concurrency limit and queue shedding
+    print("\n📊 Test 1: Concurrency Limit and Queue Depth")
+    print("-" * 50)
+
+    controller = AdmissionController(
+        max_concurrent=2, max_queue=1, queue_timeout=0.2, urgent_reserve=1, retry_after=3
+    )
+    assert controller.acquire(PRIORITY_ENTRY)
+    # Second slot is reserved for urgent signals
+    assert controller.acquire(PRIORITY_URGENT)
+
+    results = []
+    waiter = threading.Thread(target=lambda: results.append(controller.acquire(PRIORITY_ENTRY)))
+    waiter.start()
+    time.sleep(0.05)
+    # Queue is full now, the next entry is shed immediately
+    assert not controller.acquire(PRIORITY_ENTRY)
+    waiter.join()
+    assert results == [False], results  # queued entry timed out
+    print(f"✅ Excess entries shed: {controller.stats()}")
+
+    controller.release()
+    controller.release()
+
+    # Test 2: Urgent signals go ahead of queued entries
+    print("\n📊 Test 2: Urgent Priority")
+    print("-" * 50)
+
+    controller = AdmissionController(
+        max_concurrent=1, max_queue=10, queue_timeout=2, urgent_reserve=0, retry_after=3
+    )
+    assert controller.acquire(PRIORITY_ENTRY)
+    order = []
+
+    def worker(priority, name):
+        if controller.acquire(priority):
+            order.append(name)
+            time.sleep(0.01)
+            controller.release()
+
+    threads = [threading.Thread(target=worker, args=(PRIORITY_ENTRY, f"entry{i}")) for i in range(3)]
+    for t in threads:
+        t.start()
+    time.sleep(0.05)
+    urgent = threading.Thread(target=worker, args=(PRIORITY_URGENT, "exit"))
+    urgent.start()
+    time.sleep(0.05)
+    controller.release()
+    for t in threads + [urgent]:
+        t.join()
+
+    assert order[0] == "exit", order
+    print(f"✅ Service order: {order}")
+
+    # Test 3: Disabled controller admits everything
+    print("\n📊 Test 3: Disabled Controller")
+    print("-" * 50)
+
+    controller = AdmissionController(max_concurrent=0)
+    assert all(controller.acquire(PRIORITY_ENTRY) for _ in range(100))
+    print("✅ max_concurrent=0 disables admission control")
+
+    print("\n" + "=" * 50)
+    print("✅ All admission tests completed!")
+
+
+if __name__ == "__main__":
+    test_admission_control()
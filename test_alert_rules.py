@@ -0,0 +1,182 @@
+"""
+Test script for compiled alert rules.
+Tests parsing, shared subexpressions, rule semantics against brute force
+and evaluation cost with thousands of rules.
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+# Fix Windows console encoding
+if sys.platform == 'win32':
+    try:
+        sys.stdout.reconfigure(encoding='utf-8')
+        sys.stderr.reconfigure(encoding='utf-8')
+    except (AttributeError, ValueError):
+        import io
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+        sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+
+from alert_rules import RuleEngine, RuleSyntaxError, load_rules, parse_rule
+from checkpoint import Checkpointer
+
+
+def test_alert_rules():
+    """Test the alert rule language."""
+    print("🧪 Testing Alert Rules")
+    print("=" * 50)
+
+    # Test 1: Parsing
+    print("\n📊 Test 1: Parsing")
+    print("-" * 50)
+
+    assert parse_rule('BTCUSDT crosses_above 50000 and change_5m > 2%') == (
+        'and',
+        ('crosses_above', ('metric', 'BTCUSDT', 'price', None), ('const', 50000.0)),
+        ('>', ('metric', 'BTCUSDT', 'change', 300.0), ('const', 0.02)),
+    )
+    assert parse_rule('not (ETHUSDT volatility_1h >= 0.5% or low_30s < 10)', 'BTCUSDT')[1][2] == \
+        ('<', ('metric', 'ETHUSDT', 'low', 30.0), ('const', 10.0))
+    assert parse_rule('price > 1', 'BINANCE:SOLUSDT')[1] == ('metric', 'SOLUSDT', 'price', None)
+    for bad in ('', 'price >', '1 > 2', '(price > 1', 'price > 1 and', 'price ~ 1'):
+        try:
+            parse_rule(bad, 'BTCUSDT')
+            assert False, bad
+        except RuleSyntaxError:
+            pass
+    assert load_rules("# comment\nbig move: change_1h > 5%; price < 100\n") == \
+        [('big move', 'change_1h > 5%'), (None, 'price < 100')]
+    print("✅ Rules parse to ASTs; malformed rules raise RuleSyntaxError")
+
+    # Test 2: Semantics
+    print("\n📊 Test 2: Rule Semantics")
+    print("-" * 50)
+
+    engine = RuleEngine('BTCUSDT')
+    breakout = engine.add_rule('BTCUSDT crosses_above 50000 and change_5m > 2%', 'breakout')
+    same = engine.add_rule('change_5m > 2% and price crosses_above 50000')
+    new_high = engine.add_rule('price > high_1h')
+    assert breakout.node is same.node
+    start = 1_700_000_000
+    fired = [
+        [rule.name for rule in engine.update('BTCUSDT', price, start + i * 60)]
+        for i, price in enumerate([49000, 49900, 50500, 50600, 49800, 49900, 50100])
+    ]
+    assert fired[2] == ['breakout', same.name]  # crossed with a +3% move
+    assert fired[6] == []  # crossed again, but only +0.4% over 5m
+    assert not any(new_high in fired_at for fired_at in fired)  # 1h window not warm yet
+    assert [rule.name for rule in engine.update('BTCUSDT', 52000, start + 3600)] == ['price > high_1h']
+    assert engine.update('BTCUSDT', 52100, start + 3660) == []  # still true: fires once
+
+    # Restored from a checkpoint, the breakout is still true and stays quiet
+    restored = RuleEngine('BTCUSDT')
+    for rule in engine.rules:
+        restored.add_rule(rule.expression, rule.name)
+    restored.load_state(engine.dump_state())
+    assert restored.rules[2].node.value is True
+    assert restored.update('BTCUSDT', 52200, start + 3720) == []
+    print("✅ Crossings, % changes and breakouts fire on the transition to true")
+
+    # Brute force: random thresholds on a random walk
+    rng = random.Random(3)
+    engine = RuleEngine('BTCUSDT')
+    rules = []
+    for _ in range(2000):
+        op = rng.choice(['>', '<=', 'crosses_above', 'crosses_below'])
+        threshold = round(rng.uniform(9000, 11000), 1)
+        rules.append((engine.add_rule(f"price {op} {threshold}"), op, threshold))
+    price, previous = 10000.0, None
+    state = [None] * len(rules)
+    for i in range(500):
+        price = round(price + rng.gauss(0, 60), 1)
+        expected = []
+        for n, (rule, op, threshold) in enumerate(rules):
+            if op == '>':
+                value = price > threshold
+            elif op == '<=':
+                value = price <= threshold
+            elif op == 'crosses_above':
+                value = previous is not None and previous < threshold <= price
+            else:
+                value = previous is not None and previous > threshold >= price
+            if value and not state[n]:
+                expected.append(rule.name)
+            state[n] = value
+        got = [rule.name for rule in engine.update('BTCUSDT', price, start + i)]
+        assert sorted(got) == sorted(expected), (i, set(got) ^ set(expected))
+        previous = price
+    print("✅ 2,000 threshold rules match brute force over 500 ticks")
+
+    # Test 3: Scale
+    print("\n📊 Test 3: Thousands of Rules")
+    print("-" * 50)
+
+    engine = RuleEngine('BTCUSDT')
+    for i in range(5000):
+        symbol = ('BTCUSDT', 'ETHUSDT')[i % 2]
+        threshold = 45000 + i * 2 if symbol == 'BTCUSDT' else 2000 + i * 0.2
+        engine.add_rule(f"{symbol} crosses_above {threshold} and change_5m > {i % 5}% and volatility_1h < 3%")
+    stats = engine.stats()
+    # Per rule: its threshold, crossing and 'and'; metrics and the other comparisons are shared
+    assert stats['rules'] == 5000 and stats['nodes'] < 5000 * 3 + 50, stats['nodes']
+    walk = [45000 + 3000 * (i % 200) / 200 for i in range(2000)]
+    begin = time.perf_counter()
+    for i, price in enumerate(walk):
+        engine.update('BTCUSDT', price, start + i)
+    elapsed = time.perf_counter() - begin
+    per_tick = elapsed / len(walk) * 1e6
+    assert per_tick < 2000, per_tick
+    print(f"✅ 5,000 rules compiled to {stats['nodes']:,} nodes; {per_tick:.0f}µs per tick")
+
+    # Test 4: Price monitor integration
+    print("\n📊 Test 4: Trading Bot")
+    print("-" * 50)
+
+    def make_bot():
+        previous_symbol = os.environ.get('SYMBOL')
+        os.environ.update({'ALERT_RULES': 'breakout: price crosses_above 50000; ETHUSDT price < 2000',
+                           'SYMBOL': 'BTCUSDT'})
+        try:
+            from main import TradingBot
+            return TradingBot()
+        finally:
+            os.environ.pop('ALERT_RULES')
+            if previous_symbol is None:
+                os.environ.pop('SYMBOL')
+            else:
+                os.environ['SYMBOL'] = previous_symbol
+
+    bot = make_bot()
+    assert sorted(bot.rules.symbols()) == ['BTCUSDT', 'ETHUSDT']
+    assert bot.check_rules('BTCUSDT', 49000, start) == []
+    alerts = bot.check_rules('BTCUSDT', 50100, start + 60)
+    assert alerts == ["🔔 RULE: breakout (price crosses_above 50000)\nBTCUSDT price: $50,100.00"]
+    assert bot.check_rules('ETHUSDT', 1990, start + 60) == [
+        "🔔 RULE: ETHUSDT price < 2000\nETHUSDT price: $1,990.00"
+    ]
+    print("✅ Rule alerts formatted for the monitor")
+
+    # Warm restart: rules that are already true stay quiet
+    path = os.path.join(tempfile.mkdtemp(), 'monitor.ckpt')
+    checkpointer = Checkpointer(path, interval=0)
+    bot.register_checkpoint(checkpointer)
+    checkpointer.save()
+    restarted = make_bot()
+    checkpointer = Checkpointer(path, interval=0)
+    restarted.register_checkpoint(checkpointer)
+    assert 'rules' in checkpointer.restore()
+    assert restarted.check_rules('BTCUSDT', 50200, start + 120) == []
+    assert restarted.check_rules('ETHUSDT', 1980, start + 120) == []
+    assert restarted.check_rules('BTCUSDT', 49900, start + 180) == []
+    assert len(restarted.check_rules('BTCUSDT', 50050, start + 240)) == 1
+    print("✅ Rule histories and values survive a checkpoint restore")
+
+    print("\n" + "=" * 50)
+    print("✅ All alert rule tests completed!")
+
+
+if __name__ == "__main__":
+    test_alert_rules()
@@ -0,0 +1,90 @@
+"""
+Test script for the microbenchmark suite.
+Tests the measurement statistics, baseline files and the regression gate
+(without depending on how fast this machine is).
+"""
+
+import json
+import os
+import sys
+import tempfile
+
+# Fix Windows console encoding
+if sys.platform == 'win32':
+    try:
+        sys.stdout.reconfigure(encoding='utf-8')
+        sys.stderr.reconfigure(encoding='utf-8')
+    except (AttributeError, ValueError):
+        import io
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+        sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+
+from benchmarks import BENCHMARKS, compare, load_baselines, main, measure, run
+
+
+def test_benchmarks():
+    """Test the benchmark suite."""
+    print("🧪 Testing Benchmarks")
+    print("=" * 50)
+
+    # Test 1: Every benchmark runs and exercises the real code path
+    print("\n📊 Test 1: Benchmarks")
+    print("-" * 50)
+
+    assert set(BENCHMARKS) == {'process_signal', 'check_deduplication_100k', 'format_signal_message',
+                               'check_conditions', 'payload_json_round_trip'}
+    op = BENCHMARKS['process_signal']()
+    assert op() is not None and op() is not None  # each call is a new, accepted signal
+    assert 'SUPREMO SIGNAL - BTCUSDT' in BENCHMARKS['format_signal_message']()()
+    results = run(repeats=3, min_time=0.005)
+    for name, stats in results.items():
+        assert stats['repeats'] == 3 and stats['loops'] >= 1
+        assert 0 < stats['min_us'] <= stats['median_us'] <= stats['max_us'], (name, stats)
+    print(f"✅ {len(results)} benchmarks measured")
+
+    calls = []
+    stats = measure(lambda: calls.append(1), repeats=5, min_time=0.001)
+    assert len(calls) >= stats['loops'] * 6  # calibration plus 5 repeats
+    print(f"✅ Calibrated to {stats['loops']} loops per repeat")
+
+    # Test 2: Regression detection
+    print("\n📊 Test 2: Regression Gate")
+    print("-" * 50)
+
+    baselines = {'a': {'min_us': 10.0}, 'b': {'min_us': 10.0}}
+    current = {'a': {'min_us': 11.5}, 'b': {'min_us': 12.5}, 'new': {'min_us': 1.0}}
+    regressions = compare(current, baselines, threshold=0.2)
+    assert [(name, round(change, 2)) for name, _, _, change in regressions] == [('b', 0.25)]
+    assert [r[0] for r in compare(current, baselines, threshold=0.1)] == ['a', 'b']
+    print("✅ Only benchmarks beyond the threshold fail; new benchmarks are skipped")
+
+    # Test 3: Baseline file and exit status
+    print("\n📊 Test 3: Baselines and Exit Status")
+    print("-" * 50)
+
+    path = os.path.join(tempfile.mkdtemp(), 'baselines.json')
+    fast = ['--baseline', path, '--repeats', '3', '--min-time', '0.005', '--filter', 'check_conditions']
+    assert main(['compare'] + fast) == 2  # no baselines yet
+    assert main(['run', '--save'] + fast) == 0
+    assert list(load_baselines(path)) == ['check_conditions']
+
+    def scale_baselines(factor):
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        for stats in data['benchmarks'].values():
+            stats['min_us'] *= factor
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+
+    scale_baselines(100)
+    assert main(['compare'] + fast) == 0
+    scale_baselines(1e-4)
+    assert main(['compare'] + fast) == 1
+    print("✅ compare exits 0 within the threshold, 1 on a regression, 2 without baselines")
+
+    print("\n" + "=" * 50)
+    print("✅ All benchmark tests completed!")
+
+
+if __name__ == "__main__":
+    test_benchmarks()
@@ -0,0 +1,113 @@
+"""
+Test script for the multi-timeframe candle aggregator.
+Tests bars and EMAs against brute force and the multi-timeframe trend filter.
+"""
+
+import random
+import sys
+
+# Fix Windows console encoding
+if sys.platform == 'win32':
+    try:
+        sys.stdout.reconfigure(encoding='utf-8')
+        sys.stderr.reconfigure(encoding='utf-8')
+    except (AttributeError, ValueError):
+        import io
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+        sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+
+from candles import CandleAggregator
+from supremo_strategy import SupremoStrategy
+
+
+def _reference_bars(ticks, seconds):
+    bars = {}
+    for ts, price in ticks:
+        start = ts - ts % seconds
+        if start in bars:
+            o, h, l, _ = bars[start]
+            bars[start] = (o, max(h, price), min(l, price), price)
+        else:
+            bars[start] = (price, price, price, price)
+    return [(start,) + bar for start, bar in sorted(bars.items())]
+
+
+def _reference_ema(closes, period):
+    alpha = 2 / (period + 1)
+    ema = closes[0]
+    for close in closes[1:]:
+        ema += alpha * (close - ema)
+    return ema
+
+
+def test_candles():
+    """Test candle aggregation and trend filtering."""
+    print("🧪 Testing Candle Aggregator")
+    print("=" * 50)
+
+    # Test 1: OHLC bars and EMAs match brute force
+    print("\n📊 Test 1: Bars and EMAs")
+    print("-" * 50)
+
+    rng = random.Random(3)
+    aggregator = CandleAggregator(timeframes=('1m', '5m', '1h'), capacity=100, ema_periods=(5, 20))
+    ticks = []
+    ts, price = 1_700_000_000, 45000.0
+    for _ in range(20000):
+        ts += rng.randint(1, 20)
+        price += rng.gauss(0, 20)
+        aggregator.update('BTCUSDT', price, ts)
+        ticks.append((ts, price))
+
+    for timeframe, seconds in (('1m', 60), ('5m', 300), ('1h', 3600)):
+        series = aggregator.series('BTCUSDT', timeframe)
+        expected = _reference_bars(ticks, seconds)
+        assert series.count == len(expected)
+        assert series.bars() == expected[-100:]
+        closes = [bar[4] for bar in expected]
+        for period in (5, 20):
+            assert abs(series.ema(period) - _reference_ema(closes, period)) < 1e-6
+        print(f"✅ {timeframe}: {series.count} bars built, last {len(series.bars())} retained")
+
+    # Out-of-order ticks don't rewrite closed bars
+    closed = aggregator.series('BTCUSDT', '1m').bars()[-2]
+    aggregator.update('BTCUSDT', 1.0, closed[0])
+    assert aggregator.series('BTCUSDT', '1m').bars()[-2] == closed
+    print("✅ Late ticks are ignored")
+
+    # Test 2: Multi-timeframe trend filter
+    print("\n📊 Test 2: Multi-Timeframe Trend Filter")
+    print("-" * 50)
+
+    strategy = SupremoStrategy()
+    strategy.enforce_trend_filter = True
+    strategy.trend_timeframes = ['1h', '4h']
+    assert strategy.multi_timeframe_trend('ETHUSDT') is None
+    long_entry = {"ticker": "ETHUSDT", "action": "buy", "price": "3000", "timestamp": "1700000000"}
+    assert strategy.process_signal(long_entry) is not None
+    print("✅ Filter fails open before candles warm up")
+
+    # 60 days of hourly ticks in a steady uptrend
+    start = 1_700_000_000 - 1_700_000_000 % 14400
+    for hour in range(60 * 24):
+        strategy.on_price('ETHUSDT', 2000 + hour, start + hour * 3600)
+    assert strategy.multi_timeframe_trend('ETHUSDT') == 'bullish'
+    short_entry = dict(long_entry, action="sell", timestamp=str(start + 90 * 86400))
+    assert strategy.process_signal(short_entry) is None
+    # The rejected short must not take the ticker's dedup slot
+    assert strategy.process_signal(dict(long_entry, timestamp=str(start + 90 * 86400 + 60))) is not None
+    print("✅ 1h and 4h agree on bullish: shorts rejected, a long a minute later accepted")
+
+    # A pullback turns 1h bearish before 4h
+    for hour in range(60 * 24, 60 * 24 + 6):
+        strategy.on_price('ETHUSDT', 3428 - (hour - 60 * 24) * 12, start + hour * 3600)
+    trend = strategy.multi_timeframe_trend('ETHUSDT')
+    assert trend == 'mixed', trend
+    print(f"✅ After a pullback the timeframes disagree: {trend}")
+
+    print("\n" + "=" * 50)
+    print("✅ All candle tests completed!")
+
+
+if __name__ == "__main__":
+    test_candles()
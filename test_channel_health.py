@@ -0,0 +1,124 @@
+"""
+Test script for channel health tracking and hedged delivery.
+Tests rolling latency/error estimates, degraded detection and hedging to a
+backup channel against the local simulators.
+"""
+
+import logging
+import sys
+import time
+
+# Fix Windows console encoding
+if sys.platform == 'win32':
+    try:
+        sys.stdout.reconfigure(encoding='utf-8')
+        sys.stderr.reconfigure(encoding='utf-8')
+    except (AttributeError, ValueError):
+        import io
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+        sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+
+from channel_health import ChannelHealth, channel_health
+from metrics import NOTIFY_HEDGED
+from simulators import FaultProfile, running_simulators
+
+
+def test_channel_health():
+    """Test channel health and hedged delivery."""
+    print("🧪 Testing Channel Health")
+    print("=" * 50)
+
+    # Test 1: Rolling estimates and degraded detection
+    print("\n📊 Test 1: Degraded Detection")
+    print("-" * 50)
+
+    health = ChannelHealth(latency_slo=3, error_slo=0.2, window=60, min_samples=3)
+    for _ in range(10):
+        health.record('telegram', 8.0, True)
+        health.record('discord', 0.2, True)
+        health.record('email', 0.5, True)
+    health.record('email', 0.5, False)
+    health.record('email', 0.5, False)
+    health.record('email', 0.5, False)
+    assert health.is_degraded('telegram')
+    assert health.is_degraded('email') and health.estimate('email')['error_rate'] > 0.2
+    assert not health.is_degraded('discord')
+    assert health.rank(['telegram', 'email', 'discord']) == ['discord', 'email', 'telegram']
+    assert health.rank(['sms', 'telegram']) == ['sms', 'telegram']
+    print(f"✅ telegram p90 {health.estimate('telegram')['p90_latency']}s and email "
+          f"{health.estimate('email')['error_rate']:.0%} errors are degraded, discord ranks first")
+
+    expiring = ChannelHealth(latency_slo=3, window=0.1, min_samples=1)
+    expiring.record('telegram', 8.0, True)
+    time.sleep(0.15)
+    assert not expiring.is_degraded('telegram') and expiring.estimate('telegram') is None
+    print("✅ Old samples age out of the window")
+
+    from notification import send_hedged
+
+    with running_simulators() as suite:
+        channel_health.reset()
+        slo = channel_health.latency_slo
+        channel_health.latency_slo = 0.5
+        suite.telegram.profile = FaultProfile(latency_ms=1000)
+        try:
+            # Test 2: Slow primary gets a hedged copy
+            print("\n📊 Test 2: Hedged Delivery")
+            print("-" * 50)
+
+            hedged_before = NOTIFY_HEDGED.value('telegram', 'discord')
+            start = time.perf_counter()
+            delivered = send_hedged("🧪 hedged alert", ['telegram', 'discord'], deadline=0.2)
+            elapsed = time.perf_counter() - start
+            assert delivered >= 1 and elapsed < 0.9, elapsed
+            assert suite.discord.stats.messages[-1]['content'] == "🧪 hedged alert"
+            assert NOTIFY_HEDGED.value('telegram', 'discord') == hedged_before + 1
+            print(f"✅ Backup delivered in {elapsed * 1000:.0f}ms while the primary took 1s")
+
+            deadline = time.time() + 5
+            while not suite.telegram.stats.messages and time.time() < deadline:
+                time.sleep(0.05)
+            assert suite.telegram.stats.messages[-1]['text'] == "🧪 hedged alert"
+            print("✅ Late primary still delivered")
+
+            # Test 3: Degraded primary is demoted
+            print("\n📊 Test 3: Latency-Aware Routing")
+            print("-" * 50)
+
+            for _ in range(2):
+                send_hedged("🧪 warm up", ['telegram'], deadline=5)
+            assert channel_health.is_degraded('telegram')
+            telegram_count = len(suite.telegram.stats.messages)
+            start = time.perf_counter()
+            assert send_hedged("🧪 routed alert", ['telegram', 'discord'], deadline=0.2) == 1
+            assert time.perf_counter() - start < 0.5
+            assert suite.discord.stats.messages[-1]['content'] == "🧪 routed alert"
+            time.sleep(0.2)
+            assert len(suite.telegram.stats.messages) == telegram_count
+            print(f"✅ Degraded telegram skipped: {channel_health.snapshot()['telegram']}")
+
+            # A primary that fails fast is reported as failed, not as slow
+            channel_health.reset()
+            suite.telegram.profile = FaultProfile(error_rate=1.0)
+            records = []
+            handler = logging.Handler()
+            handler.emit = records.append
+            logger = logging.getLogger('trading_bot.notification')
+            logger.addHandler(handler)
+            try:
+                assert send_hedged("🧪 failover alert", ['telegram', 'discord'], deadline=5) == 1
+            finally:
+                logger.removeHandler(handler)
+            hedges = [r.getMessage() for r in records if 'hedging via' in r.getMessage()]
+            assert hedges == ["⚠️  telegram failed, hedging via discord"], hedges
+            print(f"✅ Logged: {hedges[0]}")
+        finally:
+            channel_health.latency_slo = slo
+            channel_health.reset()
+
+    print("\n" + "=" * 50)
+    print("✅ All channel health tests completed!")
+
+
+if __name__ == "__main__":
+    test_channel_health()
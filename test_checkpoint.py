@@ -0,0 +1,184 @@
+"""
+Test script for checkpointed warm restarts.
+Tests that strategy and monitor state survive a restart, that a damaged
+checkpoint or a failing section loader falls back to the previous one, and
+restore time.
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+
+# Fix Windows console encoding
+if sys.platform == 'win32':
+    try:
+        sys.stdout.reconfigure(encoding='utf-8')
+        sys.stderr.reconfigure(encoding='utf-8')
+    except (AttributeError, ValueError):
+        import io
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+        sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+
+from checkpoint import Checkpointer
+from main import TradingBot
+from supremo_strategy import SupremoStrategy
+
+
+def test_checkpoint():
+    """Test checkpointing and warm restarts."""
+    print("🧪 Testing Checkpointed Warm Restarts")
+    print("=" * 50)
+
+    directory = tempfile.mkdtemp()
+
+    # Test 1: Strategy state round trip
+    print("\n📊 Test 1: Strategy State")
+    print("-" * 50)
+
+    path = os.path.join(directory, 'webhook.ckpt')
+    strategy = SupremoStrategy()
+    start = 1_700_000_000
+    for i in range(3000):
+        strategy.on_price('BTCUSDT', 45000 + (i % 300) * 5, start + i * 60)
+        strategy.on_price('ETHUSDT', 2500 + (i % 50), start + i * 60)
+    strategy.last_signal_time['BTCUSDT_buy'] = start
+    checkpointer = Checkpointer(path, interval=0)
+    strategy.register_checkpoint(checkpointer)
+    size = checkpointer.save()
+
+    restarted = SupremoStrategy()
+    restarted.last_signal_time['BTCUSDT_buy'] = start + 60  # newer than the checkpoint
+    restored_checkpointer = Checkpointer(path, interval=0)
+    restarted.register_checkpoint(restored_checkpointer)
+    restored = restored_checkpointer.restore()
+    assert sorted(restored) == ['candles', 'dedup', 'levels']
+    assert restarted.last_signal_time['BTCUSDT_buy'] == start + 60
+    for ticker in ('BTCUSDT', 'ETHUSDT'):
+        assert restarted.level_engine.levels(ticker) == strategy.level_engine.levels(ticker)
+        for timeframe in strategy.candles.timeframes:
+            original = strategy.candles.series(ticker, timeframe)
+            copy = restarted.candles.series(ticker, timeframe)
+            assert copy.bars() == original.bars() and copy._emas == original._emas
+    print(f"✅ Dedup, weekly levels and candles restored from {size:,} bytes")
+
+    # Checkpoints taken while request threads add dedup entries
+    def accept_signals(worker):
+        for i in range(5000):
+            strategy.check_deduplication(f"W{worker}T{i}USDT", start)
+
+    writers = [threading.Thread(target=accept_signals, args=(w,)) for w in range(4)]
+    for writer in writers:
+        writer.start()
+    saves = 0
+    while any(writer.is_alive() for writer in writers) or not saves:
+        checkpointer.save()
+        saves += 1
+    for writer in writers:
+        writer.join()
+    print(f"✅ {saves} checkpoints taken while 20,000 dedup entries were added")
+
+    # Test 2: Monitor state suppresses a bogus crossing alert
+    print("\n📊 Test 2: Monitor State")
+    print("-" * 50)
+
+    path = os.path.join(directory, 'monitor.ckpt')
+    bot = TradingBot()
+    bot.last_price = bot.threshold_above + 100
+    for i in range(100):
+        bot.history.update(bot.threshold_above + i, start + i)
+    checkpointer = Checkpointer(path, interval=0)
+    bot.register_checkpoint(checkpointer)
+    checkpointer.save()
+
+    cold = TradingBot()
+    assert cold.check_conditions(bot.threshold_above + 50)
+    warm = TradingBot()
+    checkpointer = Checkpointer(path, interval=0)
+    warm.register_checkpoint(checkpointer)
+    assert sorted(checkpointer.restore()) == ['history', 'monitor']
+    assert warm.last_price == bot.last_price and warm.history.count == 100
+    assert warm.check_conditions(bot.threshold_above + 50) == []
+    print("✅ Restored last price suppresses the crossing alert a cold start would send")
+
+    # Test 3: Damaged checkpoints fall back to .prev
+    print("\n📊 Test 3: Corruption Fallback")
+    print("-" * 50)
+
+    warm.last_price = bot.threshold_above + 200
+    checkpointer.save()  # previous checkpoint becomes monitor.ckpt.prev
+    with open(path, 'r+b') as f:
+        f.seek(-10, os.SEEK_END)
+        f.write(b'\xff' * 10)  # corrupt the last section (history)
+    fallback = TradingBot()
+    checkpointer = Checkpointer(path, interval=0)
+    fallback.register_checkpoint(checkpointer)
+    assert sorted(checkpointer.restore()) == ['history', 'monitor']
+    assert fallback.last_price == bot.threshold_above + 200 and fallback.history.count == 100
+    print("✅ Corrupt section restored from the previous checkpoint")
+
+    with open(path, 'r+b') as f:
+        f.truncate(20)
+    fallback = TradingBot()
+    checkpointer = Checkpointer(path, interval=0)
+    fallback.register_checkpoint(checkpointer)
+    assert sorted(checkpointer.restore()) == ['history', 'monitor']
+    assert fallback.last_price == bot.last_price
+    print("✅ Truncated checkpoint falls back entirely")
+
+    path = os.path.join(directory, 'loader.ckpt')
+    payloads = iter([b'old', b'new'])
+    checkpointer = Checkpointer(path, interval=0)
+    checkpointer.register('good', lambda: b'ok', lambda payload: None)
+    checkpointer.register('picky', lambda: next(payloads), lambda payload: None)
+    checkpointer.save()
+    checkpointer.save()
+    seen = []
+
+    def picky_load(payload):
+        if bytes(payload) == b'new':
+            raise ValueError("unsupported payload")
+        seen.append(bytes(payload))
+
+    checkpointer = Checkpointer(path, interval=0)
+    checkpointer.register('good', lambda: b'ok', lambda payload: None)
+    checkpointer.register('picky', lambda: b'', picky_load)
+    assert sorted(checkpointer.restore()) == ['good', 'picky'] and seen == [b'old']
+    print("✅ Section whose loader fails is restored from the previous checkpoint")
+
+    def broken_load(payload):
+        raise ValueError("broken loader")
+
+    checkpointer = Checkpointer(path, interval=0)
+    checkpointer.register('good', lambda: b'ok', lambda payload: None)
+    checkpointer.register('picky', lambda: b'', broken_load)
+    assert checkpointer.restore() == ['good']
+    print("✅ Section failing in both checkpoints is skipped without aborting restore")
+
+    # Test 4: Restore time
+    print("\n📊 Test 4: Restore Time")
+    print("-" * 50)
+
+    path = os.path.join(directory, 'large.ckpt')
+    large = SupremoStrategy()
+    for i in range(200):
+        large.on_price(f"T{i}USDT", 100 + i, start)
+        large.last_signal_time[f"T{i}USDT_buy"] = start
+    checkpointer = Checkpointer(path, interval=0)
+    large.register_checkpoint(checkpointer)
+    size = checkpointer.save()
+    checkpointer = Checkpointer(path, interval=0)
+    SupremoStrategy().register_checkpoint(checkpointer)
+    begin = time.perf_counter()
+    checkpointer.restore()
+    elapsed = (time.perf_counter() - begin) * 1000
+    assert elapsed < 1000, elapsed
+    print(f"✅ {size / 1e6:.1f}MB checkpoint for 200 tickers restored in {elapsed:.0f}ms")
+
+    print("\n" + "=" * 50)
+    print("✅ All checkpoint tests completed!")
+
+
+if __name__ == "__main__":
+    test_checkpoint()
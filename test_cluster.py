@@ -0,0 +1,193 @@
+"""
+Test script for webhook cluster mode.
+Tests consistent hashing and ticker routing across several local processes.
+"""
+
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import requests
+
+# Fix Windows console encoding
+if sys.platform == 'win32':
+    try:
+        sys.stdout.reconfigure(encoding='utf-8')
+        sys.stderr.reconfigure(encoding='utf-8')
+    except (AttributeError, ValueError):
+        import io
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+        sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+
+from cluster import FORWARDED_HEADER, SECRET_HEADER, ClusterNode, HashRing, create_cluster_from_env
+
+CLUSTER_SECRET = 'test-cluster-secret'
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _start_node(port, nodes):
+    env = dict(
+        os.environ,
+        WEBHOOK_HOST='127.0.0.1',
+        WEBHOOK_PORT=str(port),
+        CLUSTER_SELF_URL=f'http://127.0.0.1:{port}',
+        CLUSTER_NODES=','.join(nodes),
+        CLUSTER_HEARTBEAT_INTERVAL='0.2',
+        CLUSTER_FAILURE_THRESHOLD='2',
+        CLUSTER_SECRET=CLUSTER_SECRET,
+        WEBHOOK_SECRET='',
+        NOTIFY_BATCH_WINDOW_MS='0',
+        OUTBOX_ENABLED='false',
+    )
+    return subprocess.Popen(
+        [sys.executable, 'webhook_server.py'],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+
+
+def _wait_healthy(url, timeout=15):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if requests.get(f'{url}/health', timeout=1).status_code == 200:
+                return True
+        except requests.exceptions.RequestException:
+            time.sleep(0.1)
+    return False
+
+
+def test_cluster():
+    """Test ring balance and multi-process routing."""
+    print("🧪 Testing Cluster Mode")
+    print("=" * 50)
+
+    # Test 1: Ring balance and minimal movement
+    print("\n📊 Test 1: Consistent Hash Ring")
+    print("-" * 50)
+
+    nodes = [f'http://10.0.0.{i}:5000' for i in range(4)]
+    ring = HashRing(nodes)
+    tickers = [f'COIN{i}USDT' for i in range(4000)]
+    before = {t: ring.owner(t) for t in tickers}
+    counts = {n: list(before.values()).count(n) for n in nodes}
+    assert min(counts.values()) > 600, counts
+    print(f"✅ Distribution over 4 nodes: {sorted(counts.values())}")
+
+    ring.add('http://10.0.0.9:5000')
+    moved = sum(1 for t in tickers if ring.owner(t) != before[t])
+    assert moved < len(tickers) * 0.35, moved
+    assert all(ring.owner(t) == 'http://10.0.0.9:5000' for t in tickers if ring.owner(t) != before[t])
+    print(f"✅ Adding a 5th node moved {moved / len(tickers):.0%} of tickers, all to the new node")
+
+    # Test 2: Three local processes
+    print("\n📊 Test 2: Routing Across Local Processes")
+    print("-" * 50)
+
+    ports = [_free_port() for _ in range(3)]
+    urls = [f'http://127.0.0.1:{p}' for p in ports]
+    procs = [_start_node(port, urls) for port in ports]
+    try:
+        assert all(_wait_healthy(url) for url in urls), "nodes did not start"
+        ring = HashRing(urls)
+        owner = ring.owner('BTCUSDT')
+        others = [u for u in urls if u != owner]
+
+        payload = {"ticker": "BTCUSDT", "action": "buy", "price": "45000", "timestamp": "1700000000"}
+        first = requests.post(f'{others[0]}/webhook', json=payload, timeout=10)
+        assert first.status_code == 200, first.text
+        # Same alert delivered to a different node is still deduplicated by the owner
+        second = requests.post(f'{others[1]}/webhook', json=payload, timeout=10)
+        assert second.status_code == 400, second.text
+        print(f"✅ BTCUSDT owned by {owner}; duplicate via another node rejected")
+
+        rogue = requests.post(f'{others[0]}/cluster/join', json={'node': 'http://evil:1'}, timeout=5)
+        assert rogue.status_code == 404, rogue.text
+        empty = requests.post(f'{others[0]}/cluster/state', json={}, timeout=5,
+                              headers={SECRET_HEADER: CLUSTER_SECRET})
+        assert empty.status_code == 400, empty.text
+        print("✅ Internal endpoints need the secret and reject malformed bodies")
+
+        # Kill the owner: survivors drop it from the ring and take over
+        procs[urls.index(owner)].kill()
+        deadline = time.time() + 10
+        while time.time() < deadline:
+            members = requests.get(f'{others[0]}/cluster/members', timeout=5).json()
+            if owner not in members['ring']:
+                break
+            time.sleep(0.2)
+        assert owner not in members['ring'], members
+        payload['timestamp'] = '1700003600'
+        third = requests.post(f'{others[1]}/webhook', json=payload, timeout=10)
+        assert third.status_code == 200, third.text
+        print(f"✅ Ring rebalanced to {members['ring']}")
+    finally:
+        for proc in procs:
+            proc.kill()
+            proc.wait()
+
+    # Test 3: Forwarding failures
+    print("\n📊 Test 3: Unreachable vs Slow Owners")
+    print("-" * 50)
+
+    class SlowOwner(BaseHTTPRequestHandler):
+        def do_POST(self):
+            self.rfile.read(int(self.headers['Content-Length']))
+            time.sleep(0.5)
+            self.send_response(200)
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), SlowOwner)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    slow = f'http://127.0.0.1:{server.server_address[1]}'
+    dead = f'http://127.0.0.1:{_free_port()}'
+    node = ClusterNode('http://127.0.0.1:1', [slow, dead], secret='s3cret', failure_threshold=1,
+                       timeout=1.0, forward_timeout=0.1)
+    try:
+        body, status, _ = node.forward(slow, b'{}', 'application/json')
+        assert status == 503 and b'retry later' in body, (status, body)
+        assert slow in node.ring.nodes
+        print("✅ Slow owner: 503 for the sender to retry, owner stays in the ring")
+
+        assert node.forward(dead, b'{}', 'application/json') is None
+        assert dead not in node.ring.nodes
+        print("✅ Refused connection: owner unreachable, processed locally")
+    finally:
+        server.shutdown()
+
+    assert node.is_authorized({FORWARDED_HEADER: slow, SECRET_HEADER: 's3cret'})
+    assert not node.is_authorized({FORWARDED_HEADER: slow})
+    assert not node.is_authorized({FORWARDED_HEADER: slow, SECRET_HEADER: 's3cre'})
+    assert not ClusterNode('http://127.0.0.1:1').is_authorized({FORWARDED_HEADER: slow, SECRET_HEADER: ''})
+    previous = {name: os.environ.pop(name, None) for name in ('CLUSTER_SELF_URL', 'CLUSTER_SECRET')}
+    os.environ['CLUSTER_SELF_URL'] = 'http://127.0.0.1:1'
+    try:
+        create_cluster_from_env({})
+        assert False, "expected ValueError"
+    except ValueError:
+        pass
+    finally:
+        for name, value in previous.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+    print("✅ Forwarded header requires the cluster secret; cluster mode refuses to run without one")
+
+    print("\n" + "=" * 50)
+    print("✅ All cluster tests completed!")
+
+
+if __name__ == "__main__":
+    test_cluster()
@@ -0,0 +1,112 @@
+"""
+Test script for cross-channel digest batching.
+Tests burst grouping, per-channel rendering and urgent bypass.
+"""
+
+import json
+import sys
+import time
+
+# Fix Windows console encoding
+if sys.platform == 'win32':
+    try:
+        sys.stdout.reconfigure(encoding='utf-8')
+        sys.stderr.reconfigure(encoding='utf-8')
+    except (AttributeError, ValueError):
+        import io
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+        sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+
+from digest import DigestBatcher
+from metrics import DIGEST_DELIVERY_FAILURES
+from notification import split_telegram_message, TELEGRAM_MAX_MESSAGE_LENGTH
+from supremo_strategy import SupremoStrategy
+
+
+def test_digest_batching():
+    """Test digest batching with a simulated bar-close burst."""
+    print("🧪 Testing Digest Batching")
+    print("=" * 50)
+
+    strategy = SupremoStrategy()
+    sent = []
+    batcher = DigestBatcher(
+        window=0.1,
+        max_batch=50,
+        deliver=lambda channel, body: sent.append((channel, body)) or True,
+        embed_renderer=strategy.format_signal_embed,
+        channels=lambda: ['telegram', 'discord', 'email']
+    )
+
+    def make_signal(ticker, signal_type='entry'):
+        signal = strategy.process_signal({
+            "ticker": ticker, "action": "buy", "price": "100.00",
+            "trend_bias": "bullish", "timestamp": "1700000000",
+            "entry_level": "ML", "signal_type": signal_type
+        })
+        return signal, strategy.format_signal_message(signal)
+
+    # Test 1: Burst of 20 tickers becomes one digest per channel
+    print("\n📊 Test 1: Bar-Close Burst")
+    print("-" * 50)
+
+    for i in range(20):
+        batcher.submit(*make_signal(f"COIN{i}USDT"))
+    assert sent == []
+    time.sleep(0.3)
+
+    channels = [channel for channel, _ in sent]
+    assert sorted(channels) == ['discord_embeds', 'email', 'telegram'], channels
+    bodies = dict(sent)
+    assert len(json.loads(bodies['discord_embeds'])) == 20
+    assert bodies['email'].startswith('Subject: Supremo Digest: 20 signals')
+    assert 'COIN19USDT' in bodies['telegram']
+    print(f"✅ 20 signals -> {len(sent)} notifications ({', '.join(channels)})")
+
+    # Test 2: Telegram splitting
+    print("\n📊 Test 2: Telegram 4096-Char Split")
+    print("-" * 50)
+
+    chunks = split_telegram_message(bodies['telegram'])
+    assert all(len(chunk) <= TELEGRAM_MAX_MESSAGE_LENGTH for chunk in chunks)
+    assert '\n'.join(chunks) == bodies['telegram']
+    print(f"✅ {len(bodies['telegram'])} chars -> {len(chunks)} Telegram messages")
+
+    # Test 3: Urgent signals bypass the window
+    print("\n📊 Test 3: Urgent Bypass")
+    print("-" * 50)
+
+    sent.clear()
+    batcher.submit(*make_signal("ENTRYUSDT"))
+    signal, message = make_signal("BTCUSDT", signal_type='sl')
+    batcher.submit(signal, message, urgent=signal.urgent)
+    assert len(sent) == 3 and 'SUPREMO SL - BTCUSDT' in sent[0][1], sent
+    time.sleep(0.3)
+    assert len(sent) == 6
+    print("✅ Stop-loss delivered immediately, entry delivered after window")
+
+    # Test 4: Failed deliveries are recorded
+    print("\n📊 Test 4: Delivery Failures")
+    print("-" * 50)
+
+    def flaky(channel, body):
+        if channel == 'email':
+            raise ConnectionError("SMTP down")
+        return channel != 'discord_embeds'
+
+    failing = DigestBatcher(window=0.05, deliver=flaky, embed_renderer=strategy.format_signal_embed,
+                            channels=lambda: ['telegram', 'discord', 'email'])
+    before = DIGEST_DELIVERY_FAILURES.value('email')
+    failing.submit(*make_signal("AUSDT"))
+    failing.submit(*make_signal("BUSDT"))
+    failing.flush()
+    assert failing.delivery_failures == 2 and failing.digests_sent == 1
+    assert DIGEST_DELIVERY_FAILURES.value('email') == before + 1
+    print("✅ Raised and rejected deliveries are counted per channel")
+
+    print("\n" + "=" * 50)
+    print("✅ All digest tests completed!")
+
+
+if __name__ == "__main__":
+    test_digest_batching()
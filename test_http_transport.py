@@ -0,0 +1,124 @@
+"""
+Test script for the shared HTTP transport.
+Tests connection reuse against the simulators, DNS caching, deadline
+budgets and pool statistics.
+"""
+
+import os
+import sys
+import time
+
+# Fix Windows console encoding
+if sys.platform == 'win32':
+    try:
+        sys.stdout.reconfigure(encoding='utf-8')
+        sys.stderr.reconfigure(encoding='utf-8')
+    except (AttributeError, ValueError):
+        import io
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+        sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+
+import requests
+
+from http_transport import DeadlineExceeded, HTTPTransport, transport
+from simulators import ExchangeSimulator, FaultProfile, TelegramSimulator
+
+
+def test_http_transport():
+    """Test the pooled HTTP transport."""
+    print("🧪 Testing HTTP Transport")
+    print("=" * 50)
+
+    from exchange_api import get_binance_price
+
+    # Test 1: Keep-alive reuse
+    print("\n📊 Test 1: Connection Reuse")
+    print("-" * 50)
+
+    exchange = ExchangeSimulator().start()
+    os.environ['BINANCE_API_URL'] = exchange.url
+    name = exchange.url.split('//')[1]
+    try:
+        before = transport.stats()['hosts'].get(name, {'requests': 0, 'connections_opened': 0})
+        start = time.perf_counter()
+        prices = [get_binance_price('BTCUSDT') for _ in range(200)]
+        pooled = time.perf_counter() - start
+        assert all(prices)
+        stats = transport.stats()['hosts'][name]
+        assert stats['requests'] - before['requests'] == 200
+        assert stats['connections_opened'] - before['connections_opened'] == 1
+        assert stats['idle'] == 1
+
+        start = time.perf_counter()
+        for _ in range(200):
+            requests.get(f"{exchange.url}/api/v3/ticker/price", params={'symbol': 'BTCUSDT'}, timeout=10)
+        fresh = time.perf_counter() - start
+        print(f"✅ 200 price fetches over 1 connection: {pooled * 5:.2f}ms/call vs {fresh * 5:.2f}ms with new connections")
+    finally:
+        os.environ.pop('BINANCE_API_URL')
+
+    # Test 2: DNS cache
+    print("\n📊 Test 2: DNS Cache")
+    print("-" * 50)
+
+    port = exchange.server.server_address[1]
+    client = HTTPTransport(pool_size=1, dns_ttl=60)
+    responses = [
+        client.get(f"http://localhost:{port}/api/v3/ticker/price", params={'symbol': 'ETHUSDT'},
+                   headers={'Connection': 'close'})
+        for _ in range(5)
+    ]
+    assert all(r.status_code == 200 for r in responses)
+    dns = client.stats()['dns']
+    assert dns['misses'] == 1 and dns['hits'] == 4, dns
+    assert client.stats()['hosts'][f"localhost:{port}"]['connections_opened'] == 5
+    print(f"✅ 5 connections to localhost, 1 lookup: {dns}")
+
+    uncached = HTTPTransport(dns_ttl=0)
+    assert uncached.get(f"http://localhost:{port}/api/v3/ticker/price", params={'symbol': 'ETHUSDT'}).ok
+    assert uncached.stats()['dns']['misses'] == 0
+    print("✅ HTTP_DNS_TTL=0 leaves resolution to the socket layer")
+    exchange.stop()
+
+    # Test 3: Timeouts and deadline budgets
+    print("\n📊 Test 3: Deadlines")
+    print("-" * 50)
+
+    slow = TelegramSimulator(FaultProfile(latency_ms=300)).start()
+    client = HTTPTransport(read_timeout=5)
+    try:
+        start = time.perf_counter()
+        try:
+            client.post(f"{slow.url}/botTOKEN/sendMessage", json={'text': 'x'}, deadline=client.deadline(0.1))
+            assert False, "expected a timeout"
+        except requests.exceptions.Timeout:
+            pass
+        elapsed = time.perf_counter() - start
+        assert elapsed < 0.25, elapsed
+        print(f"✅ 0.1s budget cut a 300ms call short after {elapsed * 1000:.0f}ms")
+
+        try:
+            client.get(slow.url, deadline=time.monotonic() - 1)
+            assert False, "expected DeadlineExceeded"
+        except DeadlineExceeded as e:
+            assert isinstance(e, requests.exceptions.RequestException)
+        print("✅ Expired budget fails before sending (as a RequestException)")
+
+        from notification import send_telegram_notification
+        os.environ.update({'TELEGRAM_BOT_TOKEN': 'TOKEN', 'TELEGRAM_CHAT_ID': '1', 'TELEGRAM_API_URL': slow.url})
+        start = time.perf_counter()
+        assert not send_telegram_notification('line\n' * 3000, deadline=transport.deadline(0.5))
+        elapsed = time.perf_counter() - start
+        assert elapsed < 0.8 and slow.stats.requests < 3, (elapsed, slow.stats.requests)
+        print(f"✅ Multi-chunk Telegram message shares one budget ({elapsed:.2f}s, {slow.stats.requests} chunk(s) sent)")
+    finally:
+        for key in ('TELEGRAM_BOT_TOKEN', 'TELEGRAM_CHAT_ID', 'TELEGRAM_API_URL'):
+            os.environ.pop(key, None)
+        slow.stop()
+
+    print("\n" + "=" * 50)
+    print("✅ All HTTP transport tests completed!")
+
+
+if __name__ == "__main__":
+    test_http_transport()
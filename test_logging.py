@@ -0,0 +1,130 @@
+"""
+Test script for the non-blocking structured logging setup.
+Tests JSON output, sampling of repeated messages and that logging never blocks.
+"""
+
+import json
+import logging
+import queue
+import sys
+import time
+
+# Fix Windows console encoding
+if sys.platform == 'win32':
+    try:
+        sys.stdout.reconfigure(encoding='utf-8')
+        sys.stderr.reconfigure(encoding='utf-8')
+    except (AttributeError, ValueError):
+        import io
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+        sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+
+from log_setup import (DroppingQueueHandler, JsonFormatter, SamplingFilter, StageTimer,
+                       TextFormatter, get_logger)
+
+
+def _record(msg, **extra):
+    record = logging.LogRecord('trading_bot.test', logging.INFO, __file__, 1, msg, (), None)
+    record.__dict__.update(extra)
+    return record
+
+
+def test_logging():
+    """Test structured logging."""
+    print("🧪 Testing Structured Logging")
+    print("=" * 50)
+
+    # Test 1: JSON formatter includes structured fields
+    print("\n📊 Test 1: JSON Records")
+    print("-" * 50)
+
+    timer = StageTimer()
+    timer.mark('parse')
+    timer.mark('notify')
+    line = JsonFormatter().format(_record("✅ Signal processed", signal_id='abc123', ticker='BTCUSDT',
+                                          stages_ms=timer.stages))
+    entry = json.loads(line)
+    assert entry['msg'] == "✅ Signal processed"
+    assert entry['level'] == 'INFO' and entry['logger'] == 'trading_bot.test'
+    assert entry['signal_id'] == 'abc123' and entry['ticker'] == 'BTCUSDT'
+    assert set(entry['stages_ms']) == {'parse', 'notify'}
+    assert 'pathname' not in entry and 'lineno' not in entry
+    print(f"✅ {line}")
+
+    # Test 2: Sampling suppresses repeats and reports the count
+    print("\n📊 Test 2: Sampling")
+    print("-" * 50)
+
+    sampler = SamplingFilter(interval=60, burst=3)
+    start = time.time()
+    passed = []
+    for i in range(10):
+        record = _record("⚠️  Duplicate signal ignored", sample_key='duplicate:BTCUSDT')
+        record.created = start + i
+        if sampler.filter(record):
+            passed.append(record)
+    assert len(passed) == 3
+    assert sampler.filter(_record("other", sample_key='duplicate:ETHUSDT'))
+    assert sampler.filter(_record("unsampled"))
+
+    later = _record("⚠️  Duplicate signal ignored", sample_key='duplicate:BTCUSDT')
+    later.created = start + 61
+    assert sampler.filter(later) and later.suppressed == 7
+    assert TextFormatter().format(later).endswith("(+7 similar suppressed)")
+    print("✅ 3 of 10 repeats passed, next window reports 7 suppressed")
+
+    # Test 3: A full queue drops records instead of blocking
+    print("\n📊 Test 3: Non-Blocking Enqueue")
+    print("-" * 50)
+
+    handler = DroppingQueueHandler(queue.Queue(maxsize=10))
+    start = time.perf_counter()
+    for i in range(1000):
+        handler.handle(_record(f"tick {i}"))
+    elapsed = time.perf_counter() - start
+    assert handler.queue.qsize() == 10 and handler.dropped == 990
+    print(f"✅ 1000 records in {elapsed * 1000:.1f}ms, {handler.dropped} dropped")
+
+    # Test 4: The background listener writes bot records
+    print("\n📊 Test 4: Background Writer")
+    print("-" * 50)
+
+    log = get_logger('test')
+    captured = []
+
+    class Capture(logging.Handler):
+        def emit(self, record):
+            captured.append(record)
+
+    import log_setup
+    capture = Capture()
+    log_setup._listener.handlers = log_setup._listener.handlers + (capture,)
+    try:
+        log.info("💰 BTCUSDT: $45,000.00", extra={'symbol': 'BTCUSDT'})
+        deadline = time.time() + 5
+        while not captured and time.time() < deadline:
+            time.sleep(0.01)
+    finally:
+        log_setup._listener.handlers = tuple(h for h in log_setup._listener.handlers if h is not capture)
+    assert captured and captured[0].symbol == 'BTCUSDT'
+    print("✅ Record written by the listener thread")
+
+    # Tracebacks stay a separate field after crossing the queue
+    handler = DroppingQueueHandler(queue.Queue())
+    try:
+        raise KeyError('lastUpdateId')
+    except KeyError:
+        record = logging.LogRecord('trading_bot.test', logging.ERROR, __file__, 1, "❌ Depth %s failed",
+                                   ('BTCUSDT',), sys.exc_info())
+    handler.handle(record)
+    entry = json.loads(JsonFormatter().format(handler.queue.get_nowait()))
+    assert entry['msg'] == "❌ Depth BTCUSDT failed", entry['msg']
+    assert entry['exc'].startswith('Traceback') and "KeyError: 'lastUpdateId'" in entry['exc']
+    print("✅ Queued exceptions keep their traceback in the 'exc' field")
+
+    print("\n" + "=" * 50)
+    print("✅ All logging tests completed!")
+
+
+if __name__ == "__main__":
+    test_logging()
@@ -0,0 +1,212 @@
+"""
+Test script for local order books.
+Tests sorted price levels against brute force, snapshot + diff sync with
+sequence-gap resyncs, the WebSocket depth stream from the simulator and
+spread/imbalance alerts.
+"""
+
+import os
+import random
+import sys
+import time
+
+# Fix Windows console encoding
+if sys.platform == 'win32':
+    try:
+        sys.stdout.reconfigure(encoding='utf-8')
+        sys.stderr.reconfigure(encoding='utf-8')
+    except (AttributeError, ValueError):
+        import io
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+        sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+
+from order_book import BookSync, OrderBook, OrderBookMonitor, SequenceGap
+from simulators import ExchangeSimulator
+from weekly_levels import WeeklyLevelEngine
+
+
+def _levels(snapshot):
+    return {
+        'bids': [(float(p), float(q)) for p, q in snapshot['bids']],
+        'asks': [(float(p), float(q)) for p, q in snapshot['asks']],
+    }
+
+
+def _wait(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def test_order_book():
+    """Test order book maintenance and alerts."""
+    print("🧪 Testing Order Book")
+    print("=" * 50)
+
+    # Test 1: Price levels
+    print("\n📊 Test 1: Price Levels")
+    print("-" * 50)
+
+    book = OrderBook('BTCUSDT')
+    book.load_snapshot({'lastUpdateId': 10, 'bids': [['100.0', '1'], ['99.5', '2']], 'asks': [['100.5', '3']]})
+    assert book.best_bid() == (100.0, 1.0) and book.best_ask() == (100.5, 3.0)
+    assert round(book.spread_bps(), 2) == 49.88 and book.imbalance() == 0.0
+    assert book.apply_update({'U': 5, 'u': 10, 'b': [['1', '1']], 'a': []}) is False  # in the snapshot
+    assert book.apply_update({'U': 9, 'u': 12, 'b': [['100.0', '0'], ['99.8', '4']], 'a': [['100.2', '1']]})
+    assert book.depth(5) == {'bids': [(99.8, 4.0), (99.5, 2.0)], 'asks': [(100.2, 1.0), (100.5, 3.0)]}
+    try:
+        book.apply_update({'U': 14, 'u': 15, 'b': [], 'a': []})
+        assert False, "expected a gap"
+    except SequenceGap:
+        pass
+    print("✅ Snapshot, level removal, top-k depth and gap detection")
+
+    rng = random.Random(7)
+    book = OrderBook('BTCUSDT')
+    book.load_snapshot({'lastUpdateId': 0, 'bids': [], 'asks': []})
+    bids, asks = {}, {}
+    for update_id in range(1, 5001):
+        side, levels = rng.choice([('b', bids), ('a', asks)])
+        price = round(rng.uniform(90, 110) if side == 'b' else rng.uniform(110, 130), 1)
+        qty = 0.0 if rng.random() < 0.4 else round(rng.uniform(0.1, 5), 2)
+        if qty:
+            levels[price] = qty
+        else:
+            levels.pop(price, None)
+        book.apply_update({'U': update_id, 'u': update_id, 'b': [[price, qty]] if side == 'b' else [],
+                           'a': [[price, qty]] if side == 'a' else []})
+        if update_id % 50 == 0:
+            depth = book.depth(10)
+            assert depth['bids'] == sorted(bids.items(), reverse=True)[:10]
+            assert depth['asks'] == sorted(asks.items())[:10]
+    assert len(book) == len(bids) + len(asks)
+    print(f"✅ 5,000 random updates match brute force ({len(book)} levels)")
+
+    # Test 2: Snapshot sync against the simulator
+    print("\n📊 Test 2: Snapshot and Diff Sync")
+    print("-" * 50)
+
+    exchange = ExchangeSimulator().start()
+    os.environ['BINANCE_API_URL'] = exchange.url
+    try:
+        sync = BookSync('BTCUSDT', resync_interval=0)
+        pending = [exchange.step_depth('BTCUSDT') for _ in range(3)]
+        for event in pending:
+            assert sync.on_event(event)  # first event fetches the snapshot; buffered ones are covered
+        for _ in range(200):
+            assert sync.on_event(exchange.step_depth('BTCUSDT'))
+        assert sync.resyncs == 1 and sync.gaps == 0
+        assert sync.book.depth(1000) == _levels(exchange.depth_snapshot('BTCUSDT', 1000))
+        print("✅ Book matches the exchange after 200 diffs")
+
+        exchange.step_depth('BTCUSDT', publish=False)  # lost on the wire
+        assert sync.on_event(exchange.step_depth('BTCUSDT'))
+        assert sync.gaps == 1 and sync.resyncs == 2
+        assert sync.book.last_update_id == exchange.depth_snapshot('BTCUSDT')['lastUpdateId']
+        assert sync.book.depth(1000) == _levels(exchange.depth_snapshot('BTCUSDT', 1000))
+        print("✅ Skipped update id triggers a resync from a fresh snapshot")
+
+        # Snapshot older than the buffered events: wait for a newer one
+        stale = exchange.depth_snapshot('BTCUSDT')
+        sync = BookSync('BTCUSDT', fetch_snapshot=lambda symbol: stale, resync_interval=0)
+        exchange.step_depth('BTCUSDT', publish=False)
+        assert not sync.on_event(exchange.step_depth('BTCUSDT')) and not sync.book.synced
+        print("✅ Snapshots older than the stream are discarded")
+
+        # Test 3: WebSocket stream
+        print("\n📊 Test 3: Depth Stream")
+        print("-" * 50)
+
+        os.environ['BINANCE_STREAM_URL'] = exchange.url.replace('http://', 'ws://')
+        monitor = OrderBookMonitor(['BTCUSDT', 'ETHUSDT'], spread_bps=0, resync_interval=0).start()
+        assert _wait(lambda: len(exchange._subscribers) == 1)
+
+        def in_step():
+            return all(
+                monitor.book(symbol).last_update_id == exchange.depth_snapshot(symbol)['lastUpdateId']
+                for symbol in ('BTCUSDT', 'ETHUSDT')
+            )
+
+        for _ in range(300):
+            exchange.step_depth('BTCUSDT')
+            exchange.step_depth('ETHUSDT')
+        assert _wait(in_step)
+        assert monitor.book('ETHUSDT').depth(1000) == _levels(exchange.depth_snapshot('ETHUSDT', 1000))
+        print(f"✅ Streamed books in step: {monitor.stats()['BTCUSDT']}")
+
+        exchange.disconnect_streams()
+        assert _wait(lambda: not exchange._subscribers)
+        for _ in range(20):
+            exchange.step_depth('BTCUSDT')  # missed while disconnected
+        assert _wait(lambda: len(exchange._subscribers) == 1)
+        exchange.step_depth('BTCUSDT')
+        exchange.step_depth('ETHUSDT')
+        assert _wait(in_step)
+        assert monitor.book('BTCUSDT').depth(1000) == _levels(exchange.depth_snapshot('BTCUSDT', 1000))
+        monitor.stop()
+        print("✅ Reconnect rebuilds the books from fresh snapshots")
+    finally:
+        os.environ.pop('BINANCE_API_URL')
+        os.environ.pop('BINANCE_STREAM_URL', None)
+        exchange.stop()
+
+    # Test 4: Alerts
+    print("\n📊 Test 4: Spread and Imbalance Alerts")
+    print("-" * 50)
+
+    levels = WeeklyLevelEngine(tolerance=0.001)
+    monday = 1_700_438_400  # Monday 00:00 UTC
+    for price in (99.0, 101.0):
+        levels.update('BTCUSDT', price, monday + 60)
+    sent = []
+    monitor = OrderBookMonitor(['BTCUSDT'], notify=sent.append, level_engine=levels, spread_bps=20,
+                               imbalance=0.6, depth=5, cooldown=60,
+                               fetch_snapshot=lambda symbol: {'lastUpdateId': 1, 'bids': [['99.99', '1']],
+                                                              'asks': [['100.01', '1']]})
+    now = monday + 3600
+
+    def send(update_id, bids=(), asks=(), at=0):
+        return monitor.on_message({'stream': 'btcusdt@depth@100ms', 'data': {
+            'e': 'depthUpdate', 'E': (now + at) * 1000, 's': 'BTCUSDT', 'U': update_id, 'u': update_id,
+            'b': [list(level) for level in bids], 'a': [list(level) for level in asks]}})
+
+    assert send(2, bids=[('99.98', '2')]) == []
+    alerts = send(3, bids=[('99.99', '0'), ('99.98', '0'), ('99.50', '1')])
+    assert alerts == ["📏 SPREAD: BTCUSDT spread 51.1 bps\nBid $99.50 / Ask $100.01"], alerts
+    assert send(4, bids=[('99.40', '1')]) == []  # still wide: fires once
+    assert send(5, bids=[('100.00', '1')]) == []  # back to normal
+    assert send(6, bids=[('100.00', '0')], at=10) == []  # wide again within the cooldown
+    assert send(7, bids=[('100.00', '1')], at=20) == []
+    assert len(send(8, bids=[('100.00', '0')], at=70)) == 1
+    print("✅ Spread alert fires on blowouts, once per cooldown")
+
+    # MM (Monday mid) is at 100: heavy bids at the level
+    assert send(9, bids=[('100.00', '1')], at=80) == []
+    alerts = send(10, bids=[('99.99', '20')], at=90)
+    assert alerts == ["⚖️ IMBALANCE: BTCUSDT bids 96% of top-5 depth at MM\nBid $100.00 / Ask $100.01"], alerts
+    assert send(11, asks=[('100.01', '100')], at=200) == [
+        "⚖️ IMBALANCE: BTCUSDT asks 81% of top-5 depth at MM\nBid $100.00 / Ask $100.01"
+    ]
+    book = monitor.book('BTCUSDT')
+    book.load_snapshot({'lastUpdateId': 20, 'bids': [['110.0', '50']], 'asks': [['110.01', '1']]})
+    assert monitor.check(book, now + 300) == []  # heavy bids, but away from every level
+    print("✅ Imbalance alerts only near Supremo levels")
+
+    # Own level engine: a book with one empty side has no mid to feed it
+    monitor = OrderBookMonitor(['BTCUSDT'], spread_bps=20, fetch_snapshot=lambda symbol: {
+        'lastUpdateId': 1, 'bids': [['99.99', '1']], 'asks': [['100.01', '1']]})
+    assert monitor.owns_levels
+    assert send(2, asks=[('100.01', '0')]) == []
+    assert send(3, asks=[('100.02', '1')]) == []
+    assert monitor.book('BTCUSDT').mid() == 100.005
+    print("✅ Updates that empty one side of the book are skipped by the level engine")
+
+    print("\n" + "=" * 50)
+    print("✅ All order book tests completed!")
+
+
+if __name__ == "__main__":
+    test_order_book()
@@ -0,0 +1,164 @@
+"""
+Test script for the crash-safe notification outbox.
+Tests group commits, delivery, retries and recovery after a restart.
+"""
+
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+# Fix Windows console encoding
+if sys.platform == 'win32':
+    try:
+        sys.stdout.reconfigure(encoding='utf-8')
+        sys.stderr.reconfigure(encoding='utf-8')
+    except (AttributeError, ValueError):
+        import io
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+        sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+
+from outbox import NotificationOutbox, OutboxDispatcher
+
+
+def test_outbox():
+    """Test outbox persistence and delivery."""
+    print("🧪 Testing Notification Outbox")
+    print("=" * 50)
+
+    tmpdir = tempfile.mkdtemp()
+    path = os.path.join(tmpdir, 'outbox.db')
+
+    # Test 1: Burst of concurrent producers
+    print("\n📊 Test 1: Group-Committed Burst")
+    print("-" * 50)
+
+    outbox = NotificationOutbox(path=path, max_attempts=2)
+    producers = 8
+    per_producer = 250
+
+    def produce(n):
+        for i in range(per_producer):
+            assert outbox.enqueue(f"signal {n}-{i}", channels=['telegram'])
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=produce, args=(n,)) for n in range(producers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    total = producers * per_producer
+    assert outbox.stats()['pending'] == total
+    print(f"✅ {total} durable writes in {elapsed:.2f}s ({total / elapsed:,.0f}/s)")
+
+    # Test 2: Crash mid-delivery, then recovery on restart
+    print("\n📊 Test 2: Recovery After Restart")
+    print("-" * 50)
+
+    crashed = subprocess.Popen([sys.executable, '-c', 'pass'])
+    crashed.wait()
+    claimed = outbox.claim(f"{socket.gethostname()}:{crashed.pid}:0123abcd:0", limit=10)
+    # Rows claimed by a live sibling process are not stolen
+    outbox.claim(f"{socket.gethostname()}:{os.getppid()}:0123abcd:0", limit=5)
+    assert len(claimed) == 10
+    outbox.close()  # simulated crash: claimed rows never acknowledged
+
+    outbox = NotificationOutbox(path=path, max_attempts=2)
+    delivered = []
+    dispatcher = OutboxDispatcher(outbox, deliver=lambda channel, body: delivered.append(body) or True)
+    assert outbox.recover() == 10
+    while dispatcher.run_once(limit=500):
+        pass
+    assert len(delivered) == total - 5, len(delivered)
+    outbox._conn.execute("UPDATE outbox SET lease_until = 0 WHERE status = 'claimed'")
+    while dispatcher.run_once(limit=500):
+        pass
+    assert len(delivered) == total, len(delivered)
+    assert outbox.stats().get('delivered') == total
+    print(f"✅ All {total} notifications delivered after restart")
+
+    # Slow sends keep their lease; a stale worker can't overwrite a reclaimed row
+    leased = NotificationOutbox(path=os.path.join(tmpdir, 'leased.db'), lease_seconds=0.5)
+    for i in range(3):
+        assert leased.enqueue(f"slow {i}", ['telegram'])
+    stolen = []
+
+    def slow_send(channel, body):
+        time.sleep(0.3)
+        stolen.extend(leased.claim('other', limit=10))
+        return True
+
+    assert OutboxDispatcher(leased, deliver=slow_send).run_once('slow') == 3
+    assert stolen == [] and leased.stats().get('delivered') == 3, stolen
+    assert leased.enqueue("contested", ['telegram'])
+    row_id = leased.claim('stale')[0][0]
+    leased._conn.execute("UPDATE outbox SET lease_until = 0 WHERE status = 'claimed'")
+    assert leased.claim('fresh')[0][0] == row_id
+    leased.complete('stale', [], [(row_id, 0, 'timed out')])
+    assert leased._conn.execute('SELECT claimed_by FROM outbox WHERE id = ?', (row_id,)).fetchone() == ('fresh',)
+    leased.close()
+    print("✅ Leases are renewed during slow sends and stale results are ignored")
+
+    # Test 3: Failed deliveries are retried, then dead-lettered
+    print("\n📊 Test 3: Retry and Dead Letter")
+    print("-" * 50)
+
+    assert outbox.enqueue("flaky", channels=['discord'])
+    failing = OutboxDispatcher(outbox, deliver=lambda channel, body: False)
+    assert failing.run_once() == 1
+    assert outbox.stats().get('pending') == 1
+    # Make the retry due immediately
+    outbox._conn.execute("UPDATE outbox SET next_attempt_at = 0 WHERE status = 'pending'")
+    assert failing.run_once() == 1
+    assert outbox.stats().get('dead') == 1
+    print(f"✅ Final state: {outbox.stats()}")
+
+    # Each row is stamped when its own send succeeds, not when the batch is recorded
+    assert outbox.enqueue("fast", ['telegram']) and outbox.enqueue("slow", ['telegram'])
+
+    def slow_send(channel, body):
+        time.sleep(0.3 if body == 'slow' else 0)
+        return True
+
+    assert OutboxDispatcher(outbox, deliver=slow_send).run_once() == 2
+    stamps = dict(outbox._conn.execute("SELECT body, delivered_at FROM outbox WHERE body IN ('fast', 'slow')"))
+    assert stamps['slow'] - stamps['fast'] >= 0.25, stamps
+    print("✅ delivered_at records when each send succeeded")
+
+    # Test 4: Enqueue timeouts and retention
+    print("\n📊 Test 4: Enqueue Timeout and Purge")
+    print("-" * 50)
+
+    with outbox._lock:  # stall the writer mid-commit
+        results = {}
+        first = threading.Thread(target=lambda: results.update(first=outbox.enqueue("in flight", ['telegram'], 0.2)))
+        first.start()
+        first.join()
+        results['second'] = outbox.enqueue("withdrawn", ['telegram'], 0.2)
+    assert results == {'first': True, 'second': False}, results
+    while outbox.stats().get('uncommitted'):
+        time.sleep(0.01)
+    bodies = [row[0] for row in outbox._conn.execute('SELECT body FROM outbox')]
+    assert 'in flight' in bodies and 'withdrawn' not in bodies
+    print("✅ Rows held by the writer are kept, queued ones withdrawn on timeout")
+
+    outbox._conn.execute("UPDATE outbox SET delivered_at = 0 WHERE status = 'delivered'")
+    purger = OutboxDispatcher(outbox, deliver=lambda channel, body: True, retention=3600)
+    expected = outbox.stats()['delivered']
+    purged = purger.purge(now=100.0)
+    assert purged == expected and 'delivered' not in outbox.stats()
+    assert outbox.enqueue("fresh", ['telegram']) and purger.run_once() == 2  # "in flight" and "fresh"
+    assert purger.purge(now=100.0 + purger.purge_interval / 2) == 0  # once per interval
+    print(f"✅ Purged {purged} delivered rows past retention")
+
+    outbox.close()
+    print("\n" + "=" * 50)
+    print("✅ All outbox tests completed!")
+
+
+if __name__ == "__main__":
+    test_outbox()
@@ -0,0 +1,185 @@
+"""
+Test script for the prefork webhook server.
+Tests the shared-memory dedup table across processes, recovery of a lock
+held by a killed process, shared cluster membership and worker restarts.
+"""
+
+import os
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import requests
+
+# Fix Windows console encoding
+if sys.platform == 'win32':
+    try:
+        sys.stdout.reconfigure(encoding='utf-8')
+        sys.stderr.reconfigure(encoding='utf-8')
+    except (AttributeError, ValueError):
+        import io
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+        sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+
+from cluster import ClusterNode
+from shm_table import SharedDedupTable, SharedDocument, SharedRateLimiter
+from signal_model import Signal
+from worker_relay import SignalRelay
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def test_prefork():
+    """Test shared tables and the prefork supervisor."""
+    print("🧪 Testing Prefork Server")
+    print("=" * 50)
+
+    if not hasattr(os, 'fork'):
+        print("⚠️  Prefork requires POSIX, skipping")
+        return
+
+    # Test 1: Dedup table shared across forked processes
+    print("\n📊 Test 1: Shared Dedup Table")
+    print("-" * 50)
+
+    table = SharedDedupTable(capacity=1024)
+    limiter = SharedRateLimiter(limit=10, window=60)
+    pids = []
+    for _ in range(4):
+        pid = os.fork()
+        if pid == 0:
+            new = 0
+            for i in range(50):
+                if not table.check_and_set(f"T{i}", 1700000000, 900):
+                    new += 1
+                limiter.allow('1.2.3.4', now=1700000000)
+            os._exit(new)
+        pids.append(pid)
+    accepted = sum(os.waitstatus_to_exitcode(os.waitpid(pid, 0)[1]) for pid in pids)
+    assert accepted == 50, accepted  # each ticker accepted exactly once across 4 processes
+    assert not limiter.allow('1.2.3.4', now=1700000000)
+    assert len(table) == 50
+    print(f"✅ 4 processes x 50 tickers -> {accepted} accepted; rate limit enforced")
+
+    # Signals relayed from forked workers to the primary
+    relay = SignalRelay()
+    received = []
+    done = threading.Event()
+
+    def on_digest(signal, message):
+        received.append((signal.ticker, message))
+        if len(received) == 40:
+            done.set()
+
+    relay.serve({'digest': on_digest})
+    pids = []
+    for worker in range(4):
+        pid = os.fork()
+        if pid == 0:
+            ok = all(
+                relay.send('digest', Signal(f"W{worker}C{i}USDT", 'buy', 1.0, 0.9, 1.1, 1.2, '', 'ML', 1.0, 1.0,
+                                            '1700000000', '', 'entry'), f"msg {worker}/{i}")
+                for i in range(10)
+            )
+            os._exit(0 if ok else 1)
+        pids.append(pid)
+    assert all(os.waitstatus_to_exitcode(os.waitpid(pid, 0)[1]) == 0 for pid in pids)
+    assert done.wait(5), len(received)
+    assert sorted(received) == sorted((f"W{w}C{i}USDT", f"msg {w}/{i}") for w in range(4) for i in range(10))
+    print("✅ 4 processes x 10 signals relayed intact to the primary")
+
+    # Eviction keeps the table fixed-size
+    small = SharedDedupTable(capacity=32)
+    for i in range(200):
+        small[f"K{i}"] = i
+    assert len(small) <= 32 and small.get("K199") == 199
+    print("✅ Fixed-size table evicts oldest entries")
+
+    # A process killed while holding the table lock doesn't block the others
+    table._lock.timeout = 0.2
+    pid = os.fork()
+    if pid == 0:
+        table._lock.acquire()
+        os._exit(0)  # dies holding the lock
+    os.waitpid(pid, 0)
+    started = time.monotonic()
+    table['after-kill'] = 1
+    assert table['after-kill'] == 1 and time.monotonic() - started < 5
+    print(f"✅ Lock of a dead holder taken over in {time.monotonic() - started:.2f}s")
+
+    # Membership changes applied by one worker reach every worker's ring
+    membership = SharedDocument()
+    node = ClusterNode('http://127.0.0.1:1', ['http://127.0.0.1:2'], secret='s', membership=membership)
+    pid = os.fork()
+    if pid == 0:
+        worker = ClusterNode('http://127.0.0.1:1', [], secret='s', membership=membership)
+        ok = worker.members()['ring'] == ['http://127.0.0.1:1', 'http://127.0.0.1:2']
+        worker.add_member('http://127.0.0.1:3')
+        worker.remove_member('http://127.0.0.1:2', forget=True)
+        os._exit(0 if ok else 1)
+    assert os.waitstatus_to_exitcode(os.waitpid(pid, 0)[1]) == 0
+    assert node.members()['ring'] == ['http://127.0.0.1:1', 'http://127.0.0.1:3']
+    assert node.members()['peers'] == ['http://127.0.0.1:3']
+    assert {node.owner_of(f"T{i}USDT") for i in range(100)} == {'http://127.0.0.1:1', 'http://127.0.0.1:3'}
+    print("✅ Cluster membership changed in one worker is seen by the others")
+
+    # Test 2: Prefork server with crash restart
+    print("\n📊 Test 2: Prefork Workers")
+    print("-" * 50)
+
+    port = _free_port()
+    url = f'http://127.0.0.1:{port}'
+    env = dict(os.environ, WEBHOOK_HOST='127.0.0.1', WEBHOOK_PORT=str(port), WEBHOOK_WORKERS='3',
+               NOTIFY_BATCH_WINDOW_MS='0', OUTBOX_ENABLED='false', CLUSTER_SELF_URL='')
+    proc = subprocess.Popen(
+        [sys.executable, 'prefork_server.py'], cwd=os.path.dirname(os.path.abspath(__file__)),
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        deadline = time.time() + 15
+        worker_pids = set()
+        while time.time() < deadline and len(worker_pids) < 3:
+            try:
+                worker_pids.add(requests.get(f'{url}/health', timeout=1).json()['pid'])
+            except requests.exceptions.RequestException:
+                time.sleep(0.1)
+        assert len(worker_pids) >= 2, worker_pids
+        print(f"✅ Requests spread over worker PIDs {sorted(worker_pids)}")
+
+        payload = {"ticker": "BTCUSDT", "action": "buy", "price": "45000", "timestamp": "1700000000"}
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            statuses = list(pool.map(
+                lambda _: requests.post(f'{url}/webhook', json=payload, timeout=10).status_code, range(32)
+            ))
+        assert statuses.count(200) == 1, statuses
+        print("✅ 32 concurrent duplicates across workers -> exactly 1 accepted")
+
+        victim = next(iter(worker_pids))
+        os.kill(victim, signal.SIGKILL)
+        deadline = time.time() + 10
+        replaced = False
+        while time.time() < deadline and not replaced:
+            try:
+                replaced = requests.get(f'{url}/health', timeout=1).json()['pid'] not in worker_pids
+            except requests.exceptions.RequestException:
+                pass
+            time.sleep(0.05)
+        assert replaced
+        print(f"✅ Worker {victim} killed and replaced")
+    finally:
+        proc.send_signal(signal.SIGTERM)
+        proc.wait(timeout=10)
+
+    print("\n" + "=" * 50)
+    print("✅ All prefork tests completed!")
+
+
+if __name__ == "__main__":
+    test_prefork()
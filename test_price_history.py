@@ -0,0 +1,119 @@
+"""
+Test script for ring-buffer price history and rolling move alerts.
+Tests rolling statistics against brute force and the TradingBot alert types.
+"""
+
+import math
+import os
+import random
+import sys
+import tracemalloc
+
+# Fix Windows console encoding
+if sys.platform == 'win32':
+    try:
+        sys.stdout.reconfigure(encoding='utf-8')
+        sys.stderr.reconfigure(encoding='utf-8')
+    except (AttributeError, ValueError):
+        import io
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+        sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+
+from price_history import PriceHistory
+
+
+def test_price_history():
+    """Test rolling windows and move alerts."""
+    print("🧪 Testing Price History")
+    print("=" * 50)
+
+    # Test 1: Rolling stats match brute force, including ring wrap-around
+    print("\n📊 Test 1: Rolling Statistics")
+    print("-" * 50)
+
+    rng = random.Random(7)
+    history = PriceHistory(capacity=50, windows=(30, 120))
+    ticks = []
+    ts, price = 0.0, 100.0
+    for _ in range(2000):
+        ts += rng.choice((1, 2, 5))
+        price *= math.exp(rng.gauss(0, 0.01))
+        history.update(price, ts)
+        ticks.append((ts, price))
+        for seconds in (30, 120):
+            window = [p for t, p in ticks[-50:] if t >= ts - seconds]
+            assert history.max(seconds) == max(window)
+            assert history.min(seconds) == min(window)
+            assert abs(history.change(seconds) - (window[-1] / window[0] - 1)) < 1e-12
+            rets = [math.log(b / a) for a, b in zip(window, window[1:])]
+            if len(rets) >= 2:
+                mean = sum(rets) / len(rets)
+                expected = math.sqrt(sum((r - mean) ** 2 for r in rets) / (len(rets) - 1))
+                assert abs(history.volatility(seconds) - expected) < 1e-9
+    print("✅ 2000 ticks match brute-force min/max/change/volatility")
+
+    # Test 2: Constant memory
+    print("\n📊 Test 2: Constant Memory")
+    print("-" * 50)
+
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    for _ in range(50000):
+        ts += 1
+        history.update(100.0 + (ts % 17), ts)
+    growth = sum(s.size_diff for s in tracemalloc.take_snapshot().compare_to(before, 'filename'))
+    tracemalloc.stop()
+    assert growth < 20000, growth
+    print(f"✅ 50k more ticks grew memory by {growth} bytes")
+
+    # Test 3: TradingBot alert types
+    print("\n📊 Test 3: Move, Breakout and Volatility Alerts")
+    print("-" * 50)
+
+    settings = {
+        'MOVE_ALERT_PCT': '3',
+        'MOVE_ALERT_WINDOWS': '300',
+        'BREAKOUT_WINDOW': '600',
+        'VOLATILITY_SPIKE_RATIO': '3',
+        'VOLATILITY_WINDOWS': '300,3600',
+    }
+    previous = {name: os.environ.get(name) for name in settings}
+    os.environ.update(settings)
+    try:
+        from main import TradingBot
+        bot = TradingBot()
+    finally:
+        for name, value in previous.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+    alerts = []
+    for i in range(3600 // 60 + 1):
+        alerts += bot.check_move_alerts(100000 + (i % 2) * 10, i * 60)
+    assert alerts == [], alerts
+
+    ts = 3600
+    alerts = []
+    for price in (101500, 99000, 97000):
+        ts += 60
+        alerts += bot.check_move_alerts(price, ts)
+    kinds = {alert.split(':')[0] for alert in alerts}
+    assert any('BREAKOUT' in k for k in kinds), alerts
+    assert any('BREAKDOWN' in k for k in kinds), alerts
+    assert any('MOVE' in k for k in kinds), alerts
+    assert any('VOLATILITY' in k for k in kinds), alerts
+    for alert in alerts:
+        print(f"✅ {alert.splitlines()[0]}")
+
+    # Cooldown suppresses repeats
+    assert not any('MOVE' in a for a in bot.check_move_alerts(96000, ts + 60))
+    print("✅ Repeated moves within the cooldown are suppressed")
+
+    print("\n" + "=" * 50)
+    print("✅ All price history tests completed!")
+
+
+if __name__ == "__main__":
+    test_price_history()
@@ -0,0 +1,96 @@
+"""
+Test script for the sampling profiler.
+Tests sampling, aggregation, dumps and the /debug/profile endpoint.
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+
+# Fix Windows console encoding
+if sys.platform == 'win32':
+    try:
+        sys.stdout.reconfigure(encoding='utf-8')
+        sys.stderr.reconfigure(encoding='utf-8')
+    except (AttributeError, ValueError):
+        import io
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+        sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+
+from profiling import SamplingProfiler
+
+
+def _workload():
+    return [str(i) * 10 for i in range(2000)]
+
+
+def test_profiling():
+    """Test profiler sampling and reporting."""
+    print("🧪 Testing Sampling Profiler")
+    print("=" * 50)
+
+    # Test 1: Disabled profiler collects nothing
+    print("\n📊 Test 1: Disabled Overhead")
+    print("-" * 50)
+
+    profiler = SamplingProfiler(sample_rate=0, output_dir=tempfile.mkdtemp())
+    start = time.perf_counter()
+    for _ in range(100000):
+        with profiler.profile('webhook'):
+            pass
+    elapsed = time.perf_counter() - start
+    assert profiler.summary()['sections'] == {}
+    print(f"✅ 100k disabled calls in {elapsed * 1000:.1f}ms")
+
+    # Test 2: Sampled sections are aggregated
+    print("\n📊 Test 2: Aggregation")
+    print("-" * 50)
+
+    profiler.set_sample_rate(1.0)
+    retained = []
+    for _ in range(5):
+        with profiler.profile('webhook'):
+            retained.append(_workload())
+    section = profiler.summary(n=5)['sections']['webhook']
+    assert section['samples'] == 5
+    assert any('_workload' in row['function'] for row in section['top_functions'])
+    assert section['top_allocations'] and 'test_profiling.py' in section['top_allocations'][0]['site']
+    print(f"✅ Hottest function: {section['top_functions'][0]['function']}")
+    print(f"✅ Top allocation site: {section['top_allocations'][0]['site']}")
+
+    # Test 3: Dump to disk
+    print("\n📊 Test 3: Dump")
+    print("-" * 50)
+
+    written = profiler.dump()
+    assert all(os.path.exists(path) for path in written)
+    with open(os.path.join(profiler.output_dir, 'webhook.alloc.json')) as f:
+        assert json.load(f)
+    print(f"✅ Wrote {', '.join(os.path.basename(p) for p in written)}")
+
+    # Test 4: Debug endpoint
+    print("\n📊 Test 4: /debug/profile Endpoint")
+    print("-" * 50)
+
+    import webhook_server
+    client = webhook_server.app.test_client()
+    response = client.post('/debug/profile', json={'sample_rate': 1.0},
+                           environ_base={'REMOTE_ADDR': '127.0.0.1'})
+    assert response.status_code == 200
+    client.post('/webhook', json={'ticker': 'BTCUSDT'}, environ_base={'REMOTE_ADDR': '127.0.0.1'})
+    summary = client.get('/debug/profile', environ_base={'REMOTE_ADDR': '127.0.0.1'}).get_json()
+    assert summary['sections']['webhook']['samples'] >= 1
+    remote = client.get('/debug/profile', environ_base={'REMOTE_ADDR': '10.1.2.3'})
+    assert remote.status_code == 404
+    client.post('/debug/profile', json={'sample_rate': 0, 'reset': True},
+                environ_base={'REMOTE_ADDR': '127.0.0.1'})
+    print("✅ Endpoint toggles sampling and is local-only without a token")
+
+    print("\n" + "=" * 50)
+    print("✅ All profiling tests completed!")
+
+
+if __name__ == "__main__":
+    test_profiling()
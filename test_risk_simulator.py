@@ -0,0 +1,110 @@
+"""
+Test script for the Monte Carlo risk simulator.
+Tests drawdowns against brute force, risk of ruin edge cases, history
+loading and that results don't depend on the worker count.
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+# Fix Windows console encoding
+if sys.platform == 'win32':
+    try:
+        sys.stdout.reconfigure(encoding='utf-8')
+        sys.stderr.reconfigure(encoding='utf-8')
+    except (AttributeError, ValueError):
+        import io
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+        sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+
+import numpy as np
+
+from risk_simulator import _simulate_chunk, binary_outcomes, load_r_multiples, parse_risks, simulate
+
+
+def _reference_drawdown(r_multiples, fraction, compounding):
+    equity = peak = 1.0
+    worst = 0.0
+    for r in r_multiples:
+        equity = max(equity * (1 + fraction * r), 0.0) if compounding else equity + fraction * r
+        peak = max(peak, equity)
+        worst = max(worst, 1 - max(equity, 0.0) / peak)
+    return min(worst, 1.0), equity
+
+
+def test_risk_simulator():
+    """Test the risk simulator."""
+    print("🧪 Testing Risk Simulator")
+    print("=" * 50)
+
+    # Test 1: Vectorized paths match a per-trade loop
+    print("\n📊 Test 1: Drawdowns vs Brute Force")
+    print("-" * 50)
+
+    outcomes = np.array([3.0, 1.0, -1.0, -1.0, -0.5])
+    for compounding in (False, True):
+        results = _simulate_chunk(np.random.SeedSequence(1), 200, 50, outcomes, None, (1.0, 10.0), 0.5, compounding)
+        draws = np.random.default_rng(np.random.SeedSequence(1)).integers(0, len(outcomes), size=(50, 200))
+        for risk, (max_drawdown, final, ruined) in results.items():
+            for path in range(200):
+                expected_dd, expected_final = _reference_drawdown(outcomes[draws[:, path]], risk / 100, compounding)
+                assert abs(max_drawdown[path] - expected_dd) < 1e-4
+                assert abs(final[path] - expected_final) < 1e-3 * max(1.0, expected_final)
+                assert ruined[path] == (max_drawdown[path] >= 0.5)
+        print(f"✅ {'Compounding' if compounding else 'Fixed'} risk: 400 paths match brute force")
+
+    # Test 2: Edge cases and monotonicity
+    print("\n📊 Test 2: Risk of Ruin")
+    print("-" * 50)
+
+    winners = simulate([1.0], [1, 5], paths=1000, trades=100, workers=1)
+    assert all(r['risk_of_ruin'] == 0 and r['drawdown_percentiles'][99] == 0 for r in winners)
+    losers = simulate([-1.0], [1], paths=1000, trades=100, workers=1)[0]
+    assert losers['risk_of_ruin'] == 1.0 and abs(losers['median_return'] + 1.0) < 1e-6
+
+    outcomes, probabilities = binary_outcomes(0.4, 2.0)
+    reports = simulate(outcomes, [1, 2, 5, 10], paths=20000, trades=100, probabilities=probabilities, workers=1)
+    ruin = [r['risk_of_ruin'] for r in reports]
+    p95 = [r['drawdown_percentiles'][95] for r in reports]
+    assert ruin == sorted(ruin) and p95 == sorted(p95) and ruin[-1] > 0.1
+    print(f"✅ Ruin rises with risk: {', '.join(f'{r:.1%}' for r in ruin)}")
+
+    assert parse_risks('0.5, 1,2') == [0.5, 1.0, 2.0]
+    for bad in ('1,0', '-1', 'abc', 'nan'):
+        try:
+            parse_risks(bad)
+            assert False, bad
+        except ValueError:
+            pass
+    try:
+        simulate([1.0], [0], paths=10, trades=10, workers=1)
+        assert False, "risk 0 accepted"
+    except ValueError:
+        pass
+    print("✅ Zero, negative and non-numeric risk settings are rejected")
+
+    # Test 3: History file and reproducibility across worker counts
+    print("\n📊 Test 3: History and Process Pool")
+    print("-" * 50)
+
+    path = os.path.join(tempfile.mkdtemp(), 'trades.csv')
+    with open(path, 'w') as f:
+        f.write("ticker,r\nBTCUSDT,2.1\nETHUSDT,-1\nBTCUSDT,-1\nSOLUSDT,0.5\n")
+    history = load_r_multiples(path)
+    assert list(history) == [2.1, -1.0, -1.0, 0.5]
+
+    start = time.perf_counter()
+    pooled = simulate(history, [1, 3], paths=120000, trades=100, workers=2, seed=5)
+    elapsed = time.perf_counter() - start
+    inline = simulate(history, [1, 3], paths=120000, trades=100, workers=1, seed=5)
+    assert pooled == inline
+    print(f"✅ 120,000 paths x 2 risks in {elapsed:.2f}s, identical with 1 or 2 workers")
+
+    print("\n" + "=" * 50)
+    print("✅ All risk simulator tests completed!")
+
+
+if __name__ == "__main__":
+    test_risk_simulator()
@@ -0,0 +1,207 @@
+"""
+Test script for the subscriber registry and fan-out.
+Tests the (ticker, action) index against brute force, shared rendering,
+per-destination rate limits with batching, retries, relaying from prefork
+workers and delivery to each subscriber's own chat through the simulators.
+"""
+
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from types import SimpleNamespace
+
+# Fix Windows console encoding
+if sys.platform == 'win32':
+    try:
+        sys.stdout.reconfigure(encoding='utf-8')
+        sys.stderr.reconfigure(encoding='utf-8')
+    except (AttributeError, ValueError):
+        import io
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+        sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+
+from signal_model import Signal
+from simulators import running_simulators
+from subscribers import Subscriber, SubscriberFanout, SubscriberRegistry, parse_rate_limits
+from worker_relay import SignalRelay
+
+
+def _signal(ticker, action):
+    return SimpleNamespace(ticker=ticker, action=action)
+
+
+class _Recorder:
+    """deliver() stand-in recording (time, channel, body, destination)."""
+
+    def __init__(self):
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def __call__(self, channel, body, destination):
+        with self._lock:
+            self.calls.append((time.monotonic(), channel, body, destination))
+        return True
+
+
+def test_subscribers():
+    """Test subscriber routing and delivery."""
+    print("🧪 Testing Subscribers")
+    print("=" * 50)
+
+    # Test 1: Index
+    print("\n📊 Test 1: Subscriber Index")
+    print("-" * 50)
+
+    tickers = [f"T{i}USDT" for i in range(40)]
+    rng = random.Random(5)
+    subscribers = []
+    for i in range(500):
+        subscribers.append(Subscriber(
+            f"trader{i}",
+            tickers=None if rng.random() < 0.1 else rng.sample(tickers, rng.randint(1, 5)),
+            actions=rng.choice([None, ['buy'], ['sell'], ['BUY', 'sell']]),
+            destinations={'telegram': str(1000 + i)},
+        ))
+    registry = SubscriberRegistry(subscribers)
+    for ticker in tickers:
+        for action in ('buy', 'sell'):
+            expected = {
+                s.id for s in subscribers
+                if (s.tickers == ('*',) or ticker in s.tickers) and (s.actions == ('*',) or action in s.actions)
+            }
+            matches = [s.id for s in registry.match(ticker, action)]
+            assert len(matches) == len(expected) and set(matches) == expected, ticker
+    print("✅ 500 subscribers: every (ticker, action) lookup matches brute force")
+
+    registry.add(Subscriber('trader0', tickers=['BINANCE:T0USDT.P'], actions=['buy'], destinations={'email': 'a@x'}))
+    assert len(registry) == 500 and registry.get('trader0').tickers == ('T0USDT',)
+    assert [s.id for s in registry.match('T0USDT', 'buy')].count('trader0') == 1
+    assert 'trader0' not in [s.id for s in registry.match('T1USDT', 'buy')]
+    assert registry.remove('trader0') and not registry.remove('trader0')
+    assert 'trader0' not in [s.id for s in registry.match('T0USDT', 'buy')]
+    try:
+        Subscriber('x', destinations={'pager': '1'})
+        assert False, "expected ValueError"
+    except ValueError:
+        pass
+    print("✅ Replacing and removing subscribers updates the index")
+
+    path = os.path.join(tempfile.mkdtemp(), 'subscribers.json')
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump([{'id': 'alice', 'tickers': ['BTCUSDT'], 'actions': ['buy'], 'telegram': 42,
+                    'email': 'alice@example.com'}, {'id': 'desk', 'discord': 'https://example.com/hook'}], f)
+    loaded = SubscriberRegistry.load(path)
+    assert sorted(s.id for s in loaded.match('BTCUSDT', 'buy')) == ['alice', 'desk']
+    assert sorted(s.id for s in loaded.match('BINANCE:BTCUSDT.P', 'BUY')) == ['alice', 'desk']
+    assert loaded.get('alice').destinations == {'telegram': '42', 'email': 'alice@example.com'}
+    assert parse_rate_limits('telegram=1/1, discord=5/2,email=3') == {
+        'telegram': (1, 1.0), 'discord': (5, 2.0), 'email': (3, 1.0)
+    }
+    print("✅ Subscribers file and rate limit parsing")
+
+    # Test 2: Shared rendering and rate limits
+    print("\n📊 Test 2: Fan-out")
+    print("-" * 50)
+
+    registry = SubscriberRegistry(
+        Subscriber(f"t{i}", tickers=['BTCUSDT'], destinations={'telegram': str(i)}) for i in range(300)
+    )
+    registry.add(Subscriber('eth-only', tickers=['ETHUSDT'], destinations={'telegram': 'eth'}))
+    deliver = _Recorder()
+    fanout = SubscriberFanout(registry, deliver=deliver, rate_limits={'telegram': (1, 0.3)}, workers=8)
+    assert fanout.publish(_signal('BTCUSDT', 'buy'), 'BTC buy') == 300
+    fanout.start()
+    assert fanout.flush(5)
+    assert len(deliver.calls) == 300 and {call[3] for call in deliver.calls} == {str(i) for i in range(300)}
+    assert fanout.stats()['renders'] == 1
+    print("✅ One signal to 300 destinations rendered once")
+
+    # A burst to one destination: the first goes out, the rest wait for a token as one digest
+    deliver.calls.clear()
+    fanout.publish(_signal('ETHUSDT', 'sell'), "ETH sell #0")
+    assert fanout.flush(5)
+    for i in range(1, 4):
+        fanout.publish(_signal('ETHUSDT', 'sell'), f"ETH sell #{i}")
+    assert fanout.flush(5)
+    bodies = [call[2] for call in deliver.calls]
+    assert len(bodies) == 2, bodies
+    assert bodies[0] == 'ETH sell #0' and bodies[1].startswith('📦 SUPREMO DIGEST - 3 signals (ETHUSDT)')
+    gap = deliver.calls[1][0] - deliver.calls[0][0]
+    assert gap >= 0.25, gap
+    print(f"✅ Burst of 4 delivered as 1 + digest of 3, {gap:.2f}s apart (limit 1 per 0.3s)")
+
+    # Failed sends are retried with backoff, then counted as failed
+    attempts = []
+
+    def flaky(channel, body, destination):
+        attempts.append(time.monotonic())
+        return destination == 'eth' and len(attempts) >= 3
+
+    fanout = SubscriberFanout(registry, deliver=flaky, workers=2, retries=2, retry_backoff=0.05).start()
+    fanout.publish(_signal('ETHUSDT', 'sell'), 'ETH sell')
+    assert fanout.flush(5)
+    assert len(attempts) == 3 and attempts[2] - attempts[1] >= 0.09
+    assert fanout.stats()['sent'] == 1 and fanout.stats()['retried'] == 2
+    attempts.clear()
+    registry.add(Subscriber('down', tickers=['SOLUSDT'], destinations={'telegram': 'down'}))
+    fanout.publish(_signal('SOLUSDT', 'buy'), 'SOL buy')
+    assert fanout.flush(5)
+    assert len(attempts) == 3 and fanout.stats()['failed'] == 1
+    print(f"✅ Failed sends retried with backoff: {fanout.stats()}")
+
+    # Prefork workers relay to the primary worker's fan-out, which owns the rate limits
+    deliver = _Recorder()
+    primary = SubscriberFanout(registry, deliver=deliver, rate_limits={'telegram': (1, 0.3)}).start()
+    relay = SignalRelay().serve({'subscribers': primary.publish})
+    worker = SubscriberFanout(registry, deliver=deliver)
+    worker.relay = relay
+    primary.publish(_signal('ETHUSDT', 'sell'), 'ETH sell')  # takes the destination's token
+    assert primary.flush(5)
+    for i in range(3):
+        signal = Signal('ETHUSDT', 'sell', 1.0, 0.9, 1.1, 1.2, '', 'ML', 1.0, 1.0, '1700000000', '', 'entry')
+        assert worker.publish(signal, f"ETH sell #{i}") == 1
+    deadline = time.monotonic() + 5
+    while primary.stats()['routed'] < 4 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert primary.flush(5) and worker.stats()['routed'] == 0
+    bodies = [call[2] for call in deliver.calls]
+    assert len(bodies) == 2 and bodies[1].startswith('📦 SUPREMO DIGEST - 3 signals (ETHUSDT)'), bodies
+    assert deliver.calls[1][0] - deliver.calls[0][0] >= 0.25
+    print("✅ Signals relayed from a worker wait for the primary's rate limit")
+
+    # Test 3: Delivery to subscribers' own chats
+    print("\n📊 Test 3: Simulated Delivery")
+    print("-" * 50)
+
+    with running_simulators() as suite:
+        registry = SubscriberRegistry([
+            Subscriber('alice', tickers=['BTCUSDT'], actions=['buy'], destinations={'telegram': '111'}),
+            Subscriber('bob', tickers=['BTCUSDT', 'ETHUSDT'], destinations={'telegram': '222'}),
+            Subscriber('carol', tickers=['SOLUSDT'], destinations={'telegram': '333'}),
+        ])
+        fanout = SubscriberFanout(registry).start()
+        assert fanout.publish(_signal('BTCUSDT', 'sell'), 'BTC sell') == 1
+        assert fanout.publish(_signal('ETHUSDT', 'buy'), 'ETH buy') == 1
+        assert fanout.flush(5)
+        time.sleep(1.1)  # bob's chat is limited to 1 message per second
+        assert fanout.publish(_signal('BTCUSDT', 'buy'), 'BTC buy') == 2
+        assert fanout.flush(5)
+        received = {}
+        for message in suite.telegram.stats.messages:
+            received.setdefault(message['chat_id'], []).append(message['text'])
+        assert received['111'] == ['BTC buy'], received
+        bob = '\n'.join(received['222'])
+        assert bob.index('BTC sell') < bob.index('BTC buy') and 'ETH buy' in bob and '333' not in received
+        assert fanout.stats()['failed'] == 0
+    print(f"✅ Each subscriber got only their tickers in their own chat: {fanout.stats()}")
+
+    print("\n" + "=" * 50)
+    print("✅ All subscriber tests completed!")
+
+
+if __name__ == "__main__":
+    test_subscribers()
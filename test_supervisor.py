@@ -0,0 +1,112 @@
+"""
+Test script for supervisor mode.
+Tests the shared price table, restarting crashed or unhealthy services and
+the price monitor health check.
+"""
+
+import os
+import sys
+import threading
+import time
+
+# Fix Windows console encoding
+if sys.platform == 'win32':
+    try:
+        sys.stdout.reconfigure(encoding='utf-8')
+        sys.stderr.reconfigure(encoding='utf-8')
+    except (AttributeError, ValueError):
+        import io
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+        sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+
+from shm_table import SharedPriceTable
+from supervisor import Service, ServiceSupervisor
+from supremo_integrated import monitor_health_check
+
+
+def test_supervisor():
+    """Test shared prices and service restarts."""
+    print("🧪 Testing Supervisor Mode")
+    print("=" * 50)
+
+    if not hasattr(os, 'fork'):
+        print("⚠️  Supervisor mode requires fork, skipping")
+        return
+
+    prices = SharedPriceTable(capacity=64)
+
+    # Test 1: Prices published in a child are visible to the parent
+    print("\n📊 Test 1: Shared Price Table")
+    print("-" * 50)
+
+    pid = os.fork()
+    if pid == 0:
+        prices.publish('BTCUSDT', 43210.123456789, 1700000000.5)
+        prices.heartbeat('monitor', 1700000000.5)
+        os._exit(0)
+    os.waitpid(pid, 0)
+    assert prices.latest('BTCUSDT') == (43210.123456789, 1700000000.5)
+    assert list(prices.prices()) == [('BTCUSDT', 43210.123456789, 1700000000.5)]
+    assert prices.last_heartbeat('monitor') == 1700000000.5
+    print(f"✅ Child published BTCUSDT @ {prices.latest('BTCUSDT')[0]}")
+
+    # Test 2: Crashed and unhealthy services are restarted
+    print("\n📊 Test 2: Restart on Crash and Failed Health Check")
+    print("-" * 50)
+
+    def crashing():
+        prices.heartbeat('crashing')
+        time.sleep(0.2)
+        os._exit(3)
+
+    def hanging():
+        prices.heartbeat('hanging')
+        time.sleep(60)
+
+    starts = {'crashing': [], 'hanging': []}
+    services = [
+        Service('crashing', crashing, startup_grace=0),
+        Service('hanging', hanging, health_check=lambda: False, startup_grace=0.3),
+    ]
+    supervisor = ServiceSupervisor(services, check_interval=0.2, failure_threshold=2, max_backoff=0.5)
+    original_start = supervisor.start_service
+
+    def recording_start(service):
+        starts[service.name].append(service)
+        original_start(service)
+
+    supervisor.start_service = recording_start
+    runner = threading.Thread(target=supervisor.run, kwargs={'install_signals': False})
+    runner.start()
+    time.sleep(4)
+    supervisor.stop()
+    runner.join(15)
+    assert not runner.is_alive()
+    assert len(starts['crashing']) >= 3, starts
+    assert len(starts['hanging']) >= 2, starts
+    assert not any(s.process.is_alive() for s in services)
+    print(f"✅ Crashing service started {len(starts['crashing'])}x, "
+          f"unhealthy service started {len(starts['hanging'])}x")
+
+    # Test 3: Monitor health follows its loop, not the exchange
+    print("\n📊 Test 3: Monitor Health Check")
+    print("-" * 50)
+
+    monitor_healthy = monitor_health_check(prices, stale_after=30)
+    now = time.time()
+    prices.heartbeat('monitor', now - 60)
+    prices.heartbeat('monitor_price', now - 60)
+    assert not monitor_healthy()
+    print("✅ Stalled monitor loop is unhealthy")
+    prices.heartbeat('monitor', now)
+    assert monitor_healthy()
+    print("✅ Monitor whose loop keeps running stays healthy while price fetches fail")
+    prices.heartbeat('monitor_price', now)
+    assert monitor_healthy()
+
+    print("\n" + "=" * 50)
+    print("✅ All supervisor tests completed!")
+
+
+if __name__ == "__main__":
+    test_supervisor()
@@ -4,6 +4,7 @@ Tests signal processing and risk management calculations.
 """
 
 import sys
+import time
 from datetime import datetime
 
 # Fix Windows console encoding
@@ -17,6 +18,8 @@ if sys.platform == 'win32':
         sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
 
 from supremo_strategy import SupremoStrategy
+from signal_model import Signal, SignalPayload, SignalParseError
+from weekly_levels import DAY, WEEK, week_start
 
 
 def test_signal_processing():
@@ -93,6 +96,12 @@ def test_signal_processing():
     else:
         print("✅ Deduplication working - duplicate signal ignored")
     
+    # An undelivered signal is released so the sender's retry goes through
+    strategy.release_signal(signal1)
+    retried = strategy.process_signal(payload1.copy())
+    assert retried is not None and strategy.process_signal(payload1.copy()) is None
+    print("✅ Released signal accepted on retry")
+    
     # Test 4: Trend filter
     print("\n📊 Test 4: Trend Filter Logic")
     print("-" * 50)
@@ -122,6 +131,130 @@ def test_signal_processing():
     print(f"   Total risk (1% of $10,000): $100")
     print(f"   Calculated size: {position_size:.8f} units")
     
+    # Test 6: Payload validation
+    print("\n📊 Test 6: Payload Validation")
+    print("-" * 50)
+    
+    malformed = [
+        ({"action": "buy", "price": "100"}, 'ticker'),
+        ({"ticker": "BTCUSDT", "action": "hold", "price": "100"}, 'action'),
+        ({"ticker": "BTCUSDT", "action": "buy", "price": "abc"}, 'price'),
+        ({"ticker": "BTCUSDT", "action": "buy", "price": "100", "sl": "n/a"}, 'sl'),
+    ]
+    for bad_payload, field in malformed:
+        try:
+            SignalPayload.parse(bad_payload)
+            print(f"❌ Malformed '{field}' was accepted")
+        except SignalParseError as e:
+            assert e.field == field, e
+            print(f"✅ Rejected: {e}")
+    assert strategy.process_signal({"ticker": "BTCUSDT", "action": "buy", "price": "abc"}) is None
+    neutral = SignalPayload.parse({"ticker": "BTCUSDT", "action": "buy", "price": "100", "trend_bias": "Neutral"})
+    assert neutral.trend_bias == ''
+    print("✅ Unknown trend bias accepted as no bias")
+    
+    # Test 7: Signal serialization round trip
+    print("\n📊 Test 7: Signal Serialization")
+    print("-" * 50)
+    
+    restored = Signal.from_json(signal1.to_json())
+    assert restored == signal1
+    assert Signal.from_dict(signal1.to_dict()) == signal1
+    assert strategy.format_signal_message(signal1.to_dict()) == strategy.format_signal_message(signal1)
+    print(f"✅ Round trip preserved {restored!r}")
+    
+    # Test 8: Weekly levels and entry-zone enforcement
+    print("\n📊 Test 8: Weekly Levels and Entry Zones")
+    print("-" * 50)
+    
+    zone_strategy = SupremoStrategy()
+    zone_strategy.enforce_entry_zones = True
+    monday = week_start(1700000000)
+    
+    # Previous week, seen from its open: high of 47000
+    for offset, price in ((-WEEK, 46000), (-3 * DAY, 47000), (-3600, 46500)):
+        zone_strategy.on_price("BTCUSDT", price, monday + offset)
+    # This week: open 45500, Monday range 45000-46000, then Tuesday trading
+    for offset, price in ((0, 45500), (3600, 45000), (7200, 46000), (90000, 45800)):
+        zone_strategy.on_price("BTCUSDT", price, monday + offset)
+    
+    levels = zone_strategy.level_engine.levels("BTCUSDT")
+    assert levels == {'ML': 45000, 'MM': 45500, 'MH': 46000, 'WO': 45500, 'PWH': 47000}, levels
+    print(f"   Levels: {levels}")
+    assert sorted(zone_strategy.level_engine.match_zones("BTCUSDT", 45510)) == ['MM', 'WO']
+    
+    base = {"ticker": "BTCUSDT", "timestamp": str(monday + 100000)}
+    at_ml = zone_strategy.process_signal(dict(base, action="buy", price="45020", trend_bias="bullish"))
+    assert at_ml and at_ml.entry_level == 'ML' and at_ml.tp1 == 45500 and at_ml.tp2 == 46000, at_ml
+    print(f"✅ Long at ML accepted (TP1 {at_ml.tp1}, TP2 {at_ml.tp2})")
+    
+    off_zone = zone_strategy.process_signal(
+        dict(base, action="sell", price="46500", trend_bias="bearish",
+             timestamp=str(monday + 200000))
+    )
+    assert off_zone is None
+    print("✅ Short between MH and PWH rejected")
+    
+    at_mh = zone_strategy.process_signal(
+        dict(base, action="sell", price="46010", trend_bias="bearish",
+             timestamp=str(monday + 200060))
+    )
+    assert at_mh and at_mh.entry_level == 'MH', at_mh
+    print("✅ Rejected entry doesn't take the dedup slot: short at MH a minute later accepted")
+    
+    # Started mid-week: WO and Monday levels unknown until next week, PWH for a week after that
+    late = SupremoStrategy()
+    late.enforce_entry_zones = True
+    late.on_price("BTCUSDT", 70000, monday + 2 * DAY)
+    assert late.level_engine.levels("BTCUSDT") == dict.fromkeys(['ML', 'MM', 'MH', 'WO', 'PWH'])
+    blind = late.process_signal(dict(base, action="buy", price="69000", trend_bias="bullish", entry_level="ML",
+                                     timestamp=str(monday + 2 * DAY + 60)))
+    assert blind and blind.entry_level == 'ML', blind
+    for offset, price in ((WEEK + 30, 71000), (WEEK + 3600, 70500), (WEEK + DAY + 60, 72000)):
+        late.on_price("BTCUSDT", price, monday + offset)
+    assert late.level_engine.levels("BTCUSDT") == {'ML': 70500, 'MM': 70750, 'MH': 71000, 'WO': 71000, 'PWH': None}
+    at_pwh = late.process_signal(dict(base, action="sell", price="72000", trend_bias="bearish", entry_level="PWH",
+                                      timestamp=str(monday + WEEK + DAY + 120)))
+    assert at_pwh and at_pwh.entry_level == 'PWH', at_pwh  # PWH unknown: fails open
+    assert late.process_signal(dict(base, action="buy", price="72000", trend_bias="bullish", entry_level="ML",
+                                    timestamp=str(monday + WEEK + DAY + 180))) is None  # ML known: enforced
+    late.on_price("BTCUSDT", 71500, monday + 2 * WEEK)
+    assert late.level_engine.levels("BTCUSDT")['PWH'] == 72000
+    print("✅ Mid-week start: unseen levels stay unknown and fail open one by one")
+    
+    assert zone_strategy.validate_entry_zone('sell', 'bearish', 'PWH', 46600, pwh=47000, tolerance=0.01)
+    assert not zone_strategy.validate_entry_zone('sell', 'bearish', 'PWH', 46600, pwh=47000)
+    print("✅ Zone tolerance is configurable")
+    
+    # Test 9: Signal age and stale-entry dropping
+    print("\n📊 Test 9: Signal Age")
+    print("-" * 50)
+    
+    now = int(time.time())
+    fresh = SignalPayload.parse({"ticker": "ETHUSDT", "action": "buy", "price": "2500",
+                                 "timestamp": str(now)})
+    assert 0 <= fresh.age() < 2, fresh.age()
+    queued = SignalPayload.parse({"ticker": "ETHUSDT", "action": "buy", "price": "2500",
+                                  "timestamp": str(now - 600)}, ingress_at=time.monotonic() - 5)
+    assert 599 < queued.age() < 602, queued.age()
+    assert 594 < queued.age_at_ingress < 597, queued.age_at_ingress
+    print(f"✅ Age {queued.age():.1f}s, {queued.age_at_ingress:.1f}s at ingress")
+    
+    age_strategy = SupremoStrategy()
+    age_strategy.max_signal_age = 120
+    assert not age_strategy.is_stale(fresh)
+    assert age_strategy.is_stale(queued)
+    stale_exit = SignalPayload.parse({"ticker": "ETHUSDT", "action": "sell", "price": "2500",
+                                      "timestamp": str(now - 600), "signal_type": "sl"})
+    assert not age_strategy.is_stale(stale_exit)
+    print("✅ Stale entries are dropped, stale stop-losses are not")
+    
+    signal = age_strategy.process_signal(fresh)
+    delivered_age = signal.mark_delivered()
+    assert delivered_age >= fresh.age_at_ingress and signal.delivered_at >= signal.ingress_at
+    assert 'delivered_at' not in signal.to_dict()
+    print(f"✅ Delivery age {delivered_age:.3f}s")
+    
     print("\n" + "=" * 50)
     print("✅ All tests completed!")
 
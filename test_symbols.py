@@ -0,0 +1,156 @@
+"""
+Test script for the exchange symbol registry.
+Tests ticker normalization, Coinbase mapping, tick/step rounding, the disk
+cache and rejection of unknown tickers at the webhook.
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+
+# Fix Windows console encoding
+if sys.platform == 'win32':
+    try:
+        sys.stdout.reconfigure(encoding='utf-8')
+        sys.stderr.reconfigure(encoding='utf-8')
+    except (AttributeError, ValueError):
+        import io
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+        sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+
+from simulators import running_simulators
+from symbols import SymbolInfo, SymbolRegistry, split_symbol, symbol_registry
+
+
+SAMPLE_SYMBOLS = [
+    SymbolInfo('BTCUSDT', 'BTC', 'USDT', 'TRADING', 0.01, 0.00001),
+    SymbolInfo('ETHBTC', 'ETH', 'BTC', 'TRADING', 0.00001, 0.0001),
+    SymbolInfo('LUNAUSDT', 'LUNA', 'USDT', 'BREAK', 0.0001, 0.1),
+]
+
+
+def test_symbols():
+    """Test the symbol registry."""
+    print("🧪 Testing Symbol Registry")
+    print("=" * 50)
+
+    # Test 1: Normalization and cross-exchange mapping
+    print("\n📊 Test 1: Normalization")
+    print("-" * 50)
+
+    registry = SymbolRegistry(cache_path=os.path.join(tempfile.mkdtemp(), 'symbols.json'))
+    assert not registry.loaded and registry.lookup('BTCUSDT') is None
+    registry.install(SAMPLE_SYMBOLS)
+    for ticker in ('BTCUSDT', 'BINANCE:BTCUSDT.P', 'btcusdt', 'BTC-USDT', 'BTC/USDT', 'BINANCE:BTCUSDT.PERP'):
+        assert registry.normalize(ticker) == 'BTCUSDT', ticker
+    assert registry.normalize('DOGEUSDT') is None
+    assert registry.is_valid('ETHBTC') and not registry.is_valid('LUNAUSDT')
+    assert registry.coinbase_product('BTCUSDT') == 'BTC-USDT'
+    assert registry.coinbase_product('ETHBTC') == 'ETH-BTC'
+    assert registry.coinbase_product('SOLUSD') == 'SOL-USD'
+    assert split_symbol('ETH-USD') == ('ETH', 'USD')
+    print("✅ BINANCE:BTCUSDT.P -> BTCUSDT, BTCUSDT -> BTC-USDT on Coinbase (USDT kept)")
+
+    # Test 2: Tick and step rounding
+    print("\n📊 Test 2: Price/Quantity Rounding")
+    print("-" * 50)
+
+    btc = registry.lookup('BTCUSDT')
+    assert btc.round_price(45123.456789) == 45123.46
+    assert btc.round_quantity(0.123456789) == 0.12345
+    eth = registry.lookup('ETHBTC')
+    assert eth.round_price(0.0531234) == 0.05312
+    assert eth.round_quantity(1.99999) == 1.9999
+    print("✅ Prices round to tick size, quantities floor to step size")
+
+    # Test 3: Disk cache, refresh and stale fallback
+    print("\n📊 Test 3: Disk Cache")
+    print("-" * 50)
+
+    cache_path = os.path.join(tempfile.mkdtemp(), 'symbols.json')
+    with running_simulators() as suite:
+        fetched = SymbolRegistry(cache_path=cache_path, ttl=3600)
+        assert fetched.load()
+        assert fetched.normalize('BINANCE:ETHUSDT.P') == 'ETHUSDT'
+        pepe = fetched.lookup('BINANCE:1000PEPEUSDT.P')
+        assert pepe is not None and pepe.perpetual and pepe.round_quantity(1500.7) == 1500
+        assert fetched.lookup('BINANCE:BTCUSDT.P').tick_size == 0.1 and fetched.lookup('BTCUSDT').tick_size == 0.01
+        assert fetched.lookup('BTCUSDT_250328') is None
+        print("✅ Futures-only perpetuals resolve; .P tickers use the contract's tick size")
+        requests_made = suite.exchange.stats.snapshot()['requests']
+
+        cached = SymbolRegistry(cache_path=cache_path, ttl=3600)
+        assert cached.load() and len(cached) == len(fetched)
+        assert cached.lookup('BINANCE:1000PEPEUSDT.P').perpetual
+        assert suite.exchange.stats.snapshot()['requests'] == requests_made
+    print(f"✅ {len(fetched)} symbols fetched once, then served from {os.path.basename(cache_path)}")
+
+    with open(cache_path) as f:
+        data = json.load(f)
+    data['fetched_at'] = time.time() - 7200
+    with open(cache_path, 'w') as f:
+        json.dump(data, f)
+    os.environ['BINANCE_API_URL'] = 'http://127.0.0.1:9'
+    try:
+        stale = SymbolRegistry(cache_path=cache_path, ttl=3600)
+        assert stale.load() and stale.normalize('SOLUSDT') == 'SOLUSDT'
+    finally:
+        os.environ.pop('BINANCE_API_URL')
+    print("✅ Stale cache is used when the exchange is unreachable")
+
+    # Test 4: Webhook ingress rejects unknown tickers
+    print("\n📊 Test 4: Webhook Validation")
+    print("-" * 50)
+
+    from webhook_server import app
+    client = app.test_client()
+    symbol_registry.install(SAMPLE_SYMBOLS)
+    try:
+        payload = {'ticker': 'BINANCE:DOGEUSDT.P', 'action': 'buy', 'price': '0.1',
+                   'timestamp': str(int(time.time()))}
+        response = client.post('/webhook', json=payload)
+        assert response.status_code == 400 and response.get_json()['field'] == 'ticker'
+
+        payload = dict(payload, ticker='BINANCE:BTCUSDT.P', price='45000.123', sl='44500.1234')
+        response = client.post('/webhook', json=payload)
+        signal = response.get_json()['signal']
+        assert response.status_code == 200
+        assert signal['ticker'] == 'BTCUSDT' and signal['entry_price'] == 45000.12
+        assert signal['stop_loss'] == 44500.12
+        assert signal['position_size'] == round(signal['position_size'], 5)
+
+        symbol_registry.install(SAMPLE_SYMBOLS + [
+            SymbolInfo('1000PEPEUSDT', '1000PEPE', 'USDT', tick_size=0.0000001, step_size=1, perpetual=True)
+        ])
+        payload = dict(payload, ticker='BINANCE:1000PEPEUSDT.P', price='0.0123456789', sl='0.012')
+        response = client.post('/webhook', json=payload)
+        assert response.status_code == 200, response.get_json()
+        assert response.get_json()['signal']['ticker'] == '1000PEPEUSDT'
+
+        # Only Binance listings are loaded: other exchanges' tickers pass through
+        payload = dict(payload, ticker='COINBASE:SOLUSD', price='150.5', sl='148')
+        response = client.post('/webhook', json=payload)
+        assert response.status_code == 200, response.get_json()
+        previous_exchange = os.environ.get('EXCHANGE')
+        os.environ['EXCHANGE'] = 'coinbase'
+        try:
+            response = client.post('/webhook', json=dict(payload, ticker='AVAXUSD', price='30'))
+            assert response.status_code == 200, response.get_json()
+        finally:
+            if previous_exchange is None:
+                os.environ.pop('EXCHANGE')
+            else:
+                os.environ['EXCHANGE'] = previous_exchange
+    finally:
+        symbol_registry.install([])
+    print("✅ Unknown Binance tickers get 400, known spot and perpetual ones are normalized and rounded; "
+          "other exchanges aren't validated")
+
+    print("\n" + "=" * 50)
+    print("✅ All symbol registry tests completed!")
+
+
+if __name__ == "__main__":
+    test_symbols()
@@ -0,0 +1,160 @@
+"""
+Test script for binary TCP signal ingestion.
+Tests framing round trips, pipelined throughput and the webhook pipeline
+behind the TCP listener.
+"""
+
+import os
+import sys
+import time
+
+# Fix Windows console encoding
+if sys.platform == 'win32':
+    try:
+        sys.stdout.reconfigure(encoding='utf-8')
+        sys.stderr.reconfigure(encoding='utf-8')
+    except (AttributeError, ValueError):
+        import io
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+        sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+
+from signal_model import SignalParseError
+from tcp_ingest import (ACK_INVALID, ACK_OK, ACK_REJECTED, ACK_STALE, FRAME_HEADER, SignalClient,
+                        SignalIngestServer, create_ingest_server_from_env, decode_signal, encode_signal)
+
+
+def test_tcp_ingest():
+    """Test TCP signal ingestion."""
+    print("🧪 Testing TCP Signal Ingestion")
+    print("=" * 50)
+
+    # Test 1: Encode/decode round trip
+    print("\n📊 Test 1: Binary Framing")
+    print("-" * 50)
+
+    now = int(time.time())
+    signal = {'ticker': 'BTCUSDT', 'action': 'sell', 'price': 45123.5, 'sl': 45500, 'atr': 120.5,
+              'trend_bias': 'bearish', 'entry_level': 'mh', 'signal_type': 'entry', 'timestamp': now}
+    frame = encode_signal(7, signal)
+    payload = decode_signal(frame, FRAME_HEADER.size, len(frame) - FRAME_HEADER.size)
+    assert (payload.ticker, payload.action, payload.price, payload.sl, payload.tp, payload.atr) == \
+        ('BTCUSDT', 'sell', 45123.5, 45500.0, None, 120.5)
+    assert payload.trend_bias == 'bearish' and payload.entry_level == 'MH' and payload.signal_time == now
+    print(f"✅ {len(frame)}-byte frame round trips (vs {len(str(signal))} bytes of JSON)")
+
+    for bad in (dict(signal, price=0), dict(signal, sl=float('nan'))):
+        frame = encode_signal(1, bad)
+        try:
+            decode_signal(frame, FRAME_HEADER.size, len(frame) - FRAME_HEADER.size)
+            assert False, bad
+        except SignalParseError:
+            pass
+    print("✅ Non-positive prices and non-finite levels are rejected")
+
+    frame = bytearray(encode_signal(1, signal))
+    frame[-1] = 0xff  # last byte of the entry level
+    try:
+        decode_signal(frame, FRAME_HEADER.size, len(frame) - FRAME_HEADER.size)
+        assert False, "expected SignalParseError"
+    except SignalParseError as e:
+        assert e.field == 'entry_level', e.field
+    print("✅ Bad UTF-8 is reported on the field it's in")
+
+    # Test 2: Pipelined throughput on one connection
+    print("\n📊 Test 2: Pipelined Throughput")
+    print("-" * 50)
+
+    received = []
+
+    def record(payload):
+        received.append(payload.price)
+        return ACK_OK if payload.price < 30000 else ACK_REJECTED
+
+    server = SignalIngestServer(record, host='127.0.0.1', port=0).start()
+    try:
+        signals = [dict(signal, price=20000 + i % 20000) for i in range(50000)]
+        with SignalClient(*server.address) as client:
+            start = time.perf_counter()
+            statuses = client.send_many(signals)
+            elapsed = time.perf_counter() - start
+        assert received == [s['price'] for s in signals]
+        assert statuses == [ACK_OK if s['price'] < 30000 else ACK_REJECTED for s in signals]
+        rate = len(signals) / elapsed
+        assert rate > 5000, rate
+        print(f"✅ {len(signals):,} signals acked in order at {rate:,.0f}/s")
+
+        # Oversized frames close the connection
+        with SignalClient(*server.address) as client:
+            client.sock.sendall(FRAME_HEADER.pack(1 << 20))
+            assert client.sock.recv(16) == b''
+        print("✅ Oversized frame closes the connection")
+    finally:
+        server.stop()
+
+    # Test 3: Webhook pipeline behind the TCP listener
+    print("\n📊 Test 3: Strategy Pipeline")
+    print("-" * 50)
+
+    from webhook_server import ingest_signal, strategy
+    server = SignalIngestServer(ingest_signal, host='127.0.0.1', port=0, secret='s3cret').start()
+    max_age = strategy.max_signal_age
+    try:
+        entry = {'ticker': 'TCPUSDT', 'action': 'buy', 'price': 100.0, 'timestamp': now}
+        with SignalClient(*server.address, secret='s3cret') as client:
+            assert client.send(entry) == ACK_OK
+            assert client.send(entry) == ACK_REJECTED
+            strategy.max_signal_age = 60
+            assert client.send(dict(entry, ticker='OLDUSDT', timestamp=now - 600)) == ACK_STALE
+
+            # Malformed body: valid frame, bad action code
+            body = bytearray(encode_signal(99, entry)[FRAME_HEADER.size:])
+            body[4] = 9
+            client.sock.sendall(FRAME_HEADER.pack(len(body)) + body)
+            assert client._read_acks(1) == [(99, ACK_INVALID)]
+        print("✅ New entry ok, duplicate rejected, stale entry dropped, malformed frame invalid")
+
+        with SignalClient(*server.address, secret='wrong') as client:
+            client.sock.sendall(encode_signal(1, entry))
+            try:
+                assert client.sock.recv(16) == b''
+            except ConnectionResetError:
+                pass
+        print("✅ Wrong secret is refused")
+
+        for make in (lambda: SignalClient(*server.address, secret='x' * 256),
+                     lambda: SignalIngestServer(ingest_signal, host='127.0.0.1', port=0, secret='x' * 256)):
+            try:
+                make()
+                assert False, "expected ValueError"
+            except ValueError as e:
+                assert 'at most 255' in str(e), e
+        names = ('TCP_INGEST_PORT', 'TCP_INGEST_HOST', 'TCP_INGEST_SECRET', 'WEBHOOK_SECRET')
+        previous = {name: os.environ.pop(name, None) for name in names}
+        os.environ.update({'TCP_INGEST_PORT': '0', 'TCP_INGEST_HOST': '127.0.0.1'})
+        try:
+            try:
+                create_ingest_server_from_env(ingest_signal)
+                assert False, "expected ValueError"
+            except ValueError:
+                pass
+            os.environ['WEBHOOK_SECRET'] = 'hook-secret'
+            fallback = create_ingest_server_from_env(ingest_signal)
+            assert fallback.secret == b'hook-secret'
+            fallback.server_close()
+        finally:
+            for name, value in previous.items():
+                if value is None:
+                    os.environ.pop(name, None)
+                else:
+                    os.environ[name] = value
+        print("✅ Secrets over 255 bytes are refused; ingestion needs a secret, falling back to WEBHOOK_SECRET")
+    finally:
+        strategy.max_signal_age = max_age
+        server.stop()
+
+    print("\n" + "=" * 50)
+    print("✅ All TCP ingestion tests completed!")
+
+
+if __name__ == "__main__":
+    test_tcp_ingest()
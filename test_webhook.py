@@ -19,6 +19,8 @@ if sys.platform == 'win32':
         sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
         sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
 
+import webhook_server
+from shm_table import SharedRateLimiter
 from webhook_server import app
 
 
@@ -156,6 +158,39 @@ def test_webhook_server():
     except Exception as e:
         print(f"❌ Error: {e}")
     
+    # Test 6: Signal age metrics
+    print("\n📊 Test 6: Metrics Endpoint")
+    print("-" * 50)
+    
+    try:
+        response = requests.get('http://127.0.0.1:5000/metrics', timeout=5)
+        
+        if response.status_code == 200 and 'signal_ingress_age_seconds' in response.text:
+            print("✅ Signal age histograms exported")
+        else:
+            print(f"❌ Metrics endpoint failed: {response.status_code}")
+    except Exception as e:
+        print(f"❌ Error: {e}")
+    
+    # Test 7: Rate limiting spares urgent signals
+    print("\n📊 Test 7: Rate Limit Exemptions")
+    print("-" * 50)
+    
+    webhook_server.rate_limiter = SharedRateLimiter(limit=1, window=60)
+    try:
+        entry = {"ticker": "SOLUSDT", "action": "buy", "price": "100", "timestamp": str(int(time.time()))}
+        statuses = [
+            requests.post('http://127.0.0.1:5000/webhook', json=dict(entry, ticker=ticker), timeout=5).status_code
+            for ticker in ("SOLUSDT", "ADAUSDT")
+        ]
+        assert statuses == [200, 429], statuses
+        stop = dict(entry, action="sell", signal_type="sl")
+        response = requests.post('http://127.0.0.1:5000/webhook', json=stop, timeout=5)
+        assert response.status_code == 200, response.text
+        print("✅ Entries throttled, stop-loss from the same client delivered")
+    finally:
+        webhook_server.rate_limiter = None
+    
     print("\n" + "=" * 50)
     print("✅ Webhook server tests completed!")
     print("\n💡 Note: Server will continue running in background.")
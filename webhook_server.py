@@ -3,12 +3,51 @@ Webhook Server for TradingView Alerts
 Receives JSON payloads from TradingView and processes them through Supremo strategy.
 """
 
+import atexit
 import os
 import sys
-from flask import Flask, request, jsonify
+import threading
+import time
+import uuid
+from flask import Flask, Response, request, jsonify
 from dotenv import load_dotenv
 from supremo_strategy import SupremoStrategy
+from signal_model import SignalPayload, SignalParseError, URGENT_SIGNAL_TYPES, is_urgent
+from symbols import symbol_registry, ticker_exchange
+from admission import AdmissionController, PRIORITY_URGENT, PRIORITY_ENTRY
+from outbox import create_outbox_from_env
+from capture import create_recorder_from_env
+from digest import DigestBatcher
 from notification import send_notification
+from channel_health import channel_health
+from http_transport import transport
+from cluster import FORWARDED_HEADER, create_cluster_from_env
+from checkpoint import create_checkpointer_from_env
+from subscribers import create_fanout_from_env
+from tcp_ingest import (
+    ACK_OK,
+    ACK_OVERLOADED,
+    ACK_REJECTED,
+    ACK_STALE,
+    create_ingest_server_from_env,
+)
+from shm_table import (
+    create_rate_limiter_from_env,
+    get_shared_dedup,
+    get_shared_membership,
+    get_shared_prices,
+    get_shared_rate_limiter,
+)
+from worker_relay import get_signal_relay
+from profiling import profiler
+from log_setup import StageTimer, get_logger
+from metrics import (
+    SIGNAL_DELIVERY_AGE,
+    SIGNAL_INGRESS_AGE,
+    SIGNAL_PIPELINE_SECONDS,
+    SIGNALS_DROPPED_STALE,
+    registry as metrics_registry,
+)
 
 # Fix Windows console encoding
 if sys.platform == 'win32':
@@ -22,12 +61,65 @@ if sys.platform == 'win32':
 
 load_dotenv()
 
+log = get_logger('webhook')
+
 app = Flask(__name__)
 strategy = SupremoStrategy()
+admission = AdmissionController()
+
+# Prefork workers share one dedup table and rate limiter in shared memory
+if get_shared_dedup() is not None:
+    strategy.last_signal_time = get_shared_dedup()
+# (tables define __len__, so test against None: an empty table is falsy)
+rate_limiter = get_shared_rate_limiter()
+if rate_limiter is None:
+    rate_limiter = create_rate_limiter_from_env()
+
+# Crash-safe outbox (optional): notifications are persisted before delivery
+_outbox_services = create_outbox_from_env()
+outbox, outbox_dispatcher = _outbox_services if _outbox_services else (None, None)
+
+
+def _record_delivery(signal):
+    """Stamp a signal as handed off and record its age metrics."""
+    age = signal.mark_delivered()
+    if signal.ingress_at is not None:
+        SIGNAL_PIPELINE_SECONDS.observe(signal.delivered_at - signal.ingress_at)
+    if age is not None:
+        SIGNAL_DELIVERY_AGE.observe(max(age, 0.0), signal.signal_type)
+
+
+# Digest batching (optional): signals arriving together share one notification per channel.
+# Batches wait in memory, so batching is off when the outbox must persist every signal.
+batcher = DigestBatcher(
+    window=0 if outbox else None, embed_renderer=strategy.format_signal_embed, on_delivered=_record_delivery
+)
+if outbox and float(os.getenv('NOTIFY_BATCH_WINDOW_MS', '0')) > 0:
+    log.warning("⚠️  NOTIFY_BATCH_WINDOW_MS is ignored while OUTBOX_ENABLED is on")
+
+# Per-trader subscriptions (optional): signals fan out to subscribers' own destinations
+subscriber_fanout = create_fanout_from_env(embed_renderer=strategy.format_signal_embed)
+
+# Traffic capture (optional): raw requests are recorded for replay_webhook.py
+recorder = create_recorder_from_env()
+
+# Cluster mode (optional): tickers are partitioned across webhook nodes
+cluster = create_cluster_from_env(strategy.last_signal_time, get_shared_membership())
+
+# Warm restart (optional): dedup table, weekly levels and candles are checkpointed
+checkpointer = create_checkpointer_from_env('webhook')
+if checkpointer:
+    strategy.register_checkpoint(checkpointer)
 
 # Webhook secret for security (optional)
 WEBHOOK_SECRET = os.getenv('WEBHOOK_SECRET', '')
 
+# Token guarding /debug/profile (optional, localhost-only without it)
+PROFILE_TOKEN = os.getenv('PROFILE_TOKEN', '')
+
+# Validate and normalize tickers against exchange metadata (loaded at startup)
+SYMBOL_VALIDATION = os.getenv('SYMBOL_VALIDATION', 'true').lower() == 'true'
+
 
 @app.route('/webhook', methods=['POST'])
 def webhook():
@@ -44,58 +136,367 @@ def webhook():
         "trend_bias": "bullish/bearish",
         "timestamp": "{{timenow}}",
         "entry_level": "ML/WO/MH/PWH",
-        "atr": "{{atr_value}}"
+        "atr": "{{atr_value}}",
+        "signal_type": "entry/exit/sl/tp"
     }
     """
+    with profiler.profile('webhook'):
+        return _handle_webhook()
+
+
+def _handle_webhook():
+    """Handle one /webhook request (see webhook())."""
+    ingress_at = time.monotonic()
     try:
+        if recorder:
+            recorder.record(request.get_data(cache=True), request.content_type)
+        
         # Get JSON payload
         data = request.get_json()
         
         if not data:
             return jsonify({'error': 'No JSON data received'}), 400
         
+        # Per-client rate limit (shared across prefork workers); exits/SL and
+        # signals routed here by a cluster peer are never throttled
+        if (rate_limiter is not None and not is_urgent(data) and not _is_forwarded(request.headers)
+                and not rate_limiter.allow(request.remote_addr or 'unknown')):
+            response = jsonify({'error': 'Rate limit exceeded'})
+            response.headers['Retry-After'] = str(rate_limiter.window)
+            return response, 429
+        
         # Optional: Verify webhook secret
         if WEBHOOK_SECRET:
             received_secret = data.get('secret')
             if received_secret != WEBHOOK_SECRET:
-                print("⚠️  Invalid webhook secret")
+                log.warning("⚠️  Invalid webhook secret", extra={'sample_key': 'invalid_secret'})
                 return jsonify({'error': 'Invalid secret'}), 401
         
         # Log received signal
-        print(f"\n📥 Received signal: {data.get('ticker')} - {data.get('action')}")
+        signal_id = uuid.uuid4().hex[:12]
+        timer = StageTimer(ingress_at)
+        log.info(f"📥 Received signal: {data.get('ticker')} - {data.get('action')}",
+                 extra={'signal_id': signal_id})
         
-        # Process signal through strategy
-        signal = strategy.process_signal(data)
+        # Validate payload
+        try:
+            payload = SignalPayload.parse(data, ingress_at)
+        except SignalParseError as e:
+            log.warning(f"❌ Invalid signal: {e}", extra={'signal_id': signal_id, 'field': e.field})
+            return jsonify({'error': f'Invalid signal: {e}', 'field': e.field}), 400
         
-        if not signal:
-            return jsonify({'error': 'Signal processing failed or duplicate'}), 400
+        # Reject unknown tickers before any exchange call
+        if not _resolve_symbol(payload):
+            log.warning(f"❌ Unknown ticker: {payload.ticker}",
+                        extra={'signal_id': signal_id, 'sample_key': 'unknown_ticker'})
+            return jsonify({'error': f'Unknown ticker {payload.ticker!r}', 'field': 'ticker'}), 400
+        timer.mark('parse')
         
-        # Format and send notification
-        message = strategy.format_signal_message(signal)
-        send_notification(message)
+        # Cluster mode: route the signal to the node that owns its ticker
+        # (unless a peer, authenticated by the cluster secret, already did)
+        if cluster and not _is_forwarded(request.headers):
+            owner = cluster.owner_of(payload.ticker)
+            if owner != cluster.self_url:
+                forwarded = cluster.forward(owner, request.get_data(cache=True), request.content_type)
+                if forwarded:
+                    body, status, content_type = forwarded
+                    return Response(body, status=status, content_type=content_type)
+                log.warning(f"⚠️  Owner {owner} unreachable, processing {payload.ticker} locally",
+                            extra={'signal_id': signal_id})
         
-        # Log success
-        print(f"✅ Signal processed and notification sent")
-        print(f"   {signal['ticker']} {signal['action'].upper()} @ ${signal['entry_price']:,.2f}")
+        age = payload.age()
+        if age is not None:
+            SIGNAL_INGRESS_AGE.observe(max(age, 0.0), payload.signal_type)
         
-        # Return success response
-        return jsonify({
-            'status': 'success',
-            'signal': signal
-        }), 200
+        # Admission control: exits/SL go ahead of new entries, excess load is shed
+        priority = PRIORITY_URGENT if payload.signal_type in URGENT_SIGNAL_TYPES else PRIORITY_ENTRY
+        with admission.admit(priority) as admitted:
+            if not admitted:
+                log.warning(f"⚠️  Overloaded, shedding signal for {payload.ticker}",
+                            extra={'signal_id': signal_id, 'sample_key': 'shed'})
+                response = jsonify({'error': 'Server overloaded, retry later'})
+                response.headers['Retry-After'] = str(admission.retry_after)
+                return response, 429
+            
+            timer.mark('admission')
+            body, status = handle_signal(payload, signal_id, timer)
+            return jsonify(body), status
         
     except Exception as e:
         error_msg = f"Error processing webhook: {str(e)}"
-        print(f"❌ {error_msg}")
+        log.exception(f"❌ {error_msg}")
         return jsonify({'error': error_msg}), 500
 
 
+def _is_forwarded(headers) -> bool:
+    """True for a request routed here by an authenticated cluster peer."""
+    return bool(cluster and headers.get(FORWARDED_HEADER) and cluster.is_authorized(headers))
+
+
+def _resolve_symbol(payload: SignalPayload) -> bool:
+    """
+    Normalize a payload's ticker and price to the exchange symbol.
+    
+    Returns:
+        False if the ticker isn't a listed, trading symbol (always True
+        until symbol metadata is loaded, and for exchanges other than
+        Binance, whose listings aren't loaded)
+    """
+    if not symbol_registry.loaded or ticker_exchange(payload.ticker) != 'binance':
+        return True
+    info = symbol_registry.lookup(payload.ticker)
+    if info is None or not info.trading:
+        return False
+    payload.ticker = info.symbol
+    payload.price = info.round_price(payload.price)
+    return True
+
+
+def ingest_signal(payload: SignalPayload) -> int:
+    """
+    Run a signal received over TCP ingestion through the webhook pipeline.
+    
+    Applies the same ticker validation, admission control and processing
+    as /webhook (signals are processed on this node, without cluster routing).
+    
+    Returns:
+        tcp_ingest ACK_* status
+    """
+    if not _resolve_symbol(payload):
+        return ACK_REJECTED
+    age = payload.age()
+    if age is not None:
+        SIGNAL_INGRESS_AGE.observe(max(age, 0.0), payload.signal_type)
+    priority = PRIORITY_URGENT if payload.signal_type in URGENT_SIGNAL_TYPES else PRIORITY_ENTRY
+    with admission.admit(priority) as admitted:
+        if not admitted:
+            return ACK_OVERLOADED
+        body, status = handle_signal(payload)
+    if status == 200:
+        return ACK_STALE if body.get('status') == 'dropped' else ACK_OK
+    return ACK_OVERLOADED if status == 503 else ACK_REJECTED
+
+
+def handle_signal(payload: SignalPayload, signal_id: str = None, timer: StageTimer = None):
+    """
+    Process a validated signal and send its notification.
+    
+    Args:
+        payload: Validated signal payload
+        signal_id: Correlation id for log records (generated if omitted)
+        timer: Stage timer started at ingress (started now if omitted)
+        
+    Returns:
+        Tuple of (response body dict, HTTP status code)
+    """
+    signal_id = signal_id or uuid.uuid4().hex[:12]
+    timer = timer or StageTimer()
+    
+    # Shed entries that are too old to act on (age includes any admission queueing)
+    if strategy.is_stale(payload):
+        age = payload.age()
+        SIGNALS_DROPPED_STALE.inc()
+        log.warning(f"⚠️  Dropping stale {payload.ticker} entry ({age:.1f}s old)",
+                    extra={'signal_id': signal_id, 'age': round(age, 3), 'sample_key': 'stale'})
+        return {'status': 'dropped', 'reason': 'stale', 'age_seconds': round(age, 3)}, 200
+    
+    # Process signal through strategy
+    signal = strategy.process_signal(payload)
+    timer.mark('process')
+    
+    if not signal:
+        return {'error': 'Signal processing failed or duplicate'}, 400
+    
+    # Format and send notification
+    message = strategy.format_signal_message(signal)
+    timer.mark('format')
+    if batcher.enabled:
+        batcher.submit(signal, message, urgent=signal.urgent)
+    elif outbox:
+        if not outbox.enqueue(message):
+            # Nothing was persisted: let TradingView's retry through dedup
+            strategy.release_signal(signal)
+            return {'error': 'Notification could not be persisted'}, 503
+        _record_delivery(signal)
+    else:
+        send_notification(message)
+        _record_delivery(signal)
+    if subscriber_fanout:
+        subscriber_fanout.publish(signal, message)
+    timer.mark('notify')
+    
+    # Log success
+    log.info(
+        f"✅ Signal processed and notification sent\n"
+        f"   {signal.ticker} {signal.action.upper()} @ ${signal.entry_price:,.2f}",
+        extra={
+            'signal_id': signal_id, 'ticker': signal.ticker, 'action': signal.action,
+            'signal_type': signal.signal_type, 'age': signal.age(), 'stages_ms': timer.stages
+        }
+    )
+    
+    return {'status': 'success', 'signal': signal.to_dict()}, 200
+
+
+def _follow_shared_prices(prices, interval):
+    """Feed prices published by the monitor process into the strategy."""
+    seen = {}
+    while True:
+        for symbol, price, ts in prices.prices():
+            if seen.get(symbol) != ts:
+                seen[symbol] = ts
+                strategy.on_price(symbol, price, ts)
+        time.sleep(interval)
+
+
+def start_background_services(primary: bool = True):
+    """
+    Start background workers (outbox delivery) before serving requests.
+    
+    Args:
+        primary: Run the once-per-server services too (False for all but one
+            prefork worker; the others relay batched and subscriber signals to it)
+    """
+    if checkpointer:
+        checkpointer.restore()
+        if primary:
+            checkpointer.start()
+    relay = get_signal_relay()
+    if relay and primary:
+        handlers = {'digest': batcher.submit}
+        if subscriber_fanout:
+            handlers['subscribers'] = subscriber_fanout.publish
+        relay.serve(handlers)
+    elif relay:
+        batcher.relay = relay
+        if subscriber_fanout:
+            subscriber_fanout.relay = relay
+    if outbox_dispatcher:
+        outbox_dispatcher.start()
+        print(f"📬 Outbox enabled: {outbox.path}")
+    if subscriber_fanout:
+        subscriber_fanout.start()
+        print(f"👥 Fanning signals out to {len(subscriber_fanout.registry)} subscribers")
+    if recorder:
+        print(f"🎥 Capturing webhook traffic to {recorder.path}")
+    prices = get_shared_prices()
+    if prices is not None:
+        interval = float(os.getenv('PRICE_FOLLOW_INTERVAL', '1'))
+        threading.Thread(
+            target=_follow_shared_prices, args=(prices, interval), daemon=True, name='price-follower'
+        ).start()
+    if SYMBOL_VALIDATION:
+        symbol_registry.start()
+    if profiler.enabled:
+        print(f"🔬 Profiling {profiler.sample_rate:.1%} of requests to {profiler.output_dir}")
+    tcp_ingest = create_ingest_server_from_env(ingest_signal)
+    if tcp_ingest:
+        tcp_ingest.start()
+        print(f"🔌 TCP signal ingestion on {tcp_ingest.address[0]}:{tcp_ingest.address[1]}")
+    if cluster:
+        cluster.start(primary=primary)
+        if primary:
+            atexit.register(cluster.leave)
+        print(f"🧩 Cluster mode: {cluster.self_url} with peers {sorted(cluster.peers)}")
+
+
+@app.route('/cluster/join', methods=['POST'])
+def cluster_join():
+    """Internal: a node joined the cluster."""
+    if not cluster or not cluster.is_authorized(request.headers):
+        return jsonify({'error': 'Not found'}), 404
+    node = (request.get_json(silent=True) or {}).get('node')
+    if not isinstance(node, str):
+        return jsonify({'error': 'Missing node'}), 400
+    cluster.add_member(node)
+    return jsonify(cluster.members()), 200
+
+
+@app.route('/cluster/leave', methods=['POST'])
+def cluster_leave():
+    """Internal: a node left the cluster gracefully."""
+    if not cluster or not cluster.is_authorized(request.headers):
+        return jsonify({'error': 'Not found'}), 404
+    node = (request.get_json(silent=True) or {}).get('node')
+    if not isinstance(node, str):
+        return jsonify({'error': 'Missing node'}), 400
+    cluster.remove_member(node, forget=True)
+    return jsonify(cluster.members()), 200
+
+
+@app.route('/cluster/state', methods=['POST'])
+def cluster_state():
+    """Internal: receive dedup state for tickers this node now owns."""
+    if not cluster or not cluster.is_authorized(request.headers):
+        return jsonify({'error': 'Not found'}), 404
+    entries = (request.get_json(silent=True) or {}).get('entries')
+    if not isinstance(entries, dict):
+        return jsonify({'error': 'Missing entries'}), 400
+    cluster.merge_state(entries)
+    return jsonify({'status': 'merged'}), 200
+
+
+@app.route('/cluster/members', methods=['GET'])
+def cluster_members():
+    """Cluster membership and ring."""
+    if not cluster:
+        return jsonify({'error': 'Cluster mode disabled'}), 404
+    return jsonify(cluster.members()), 200
+
+
+@app.route('/debug/profile', methods=['GET', 'POST'])
+def debug_profile():
+    """
+    Sampling profiler control.
+
+    GET returns the aggregated top-N summary (``?n=``, ``?dump=1`` also writes
+    pstats files to PROFILE_DIR). POST ``{"sample_rate": 0.05}`` changes the
+    rate at runtime, ``{"reset": true}`` discards collected samples.
+    Requires the X-Profile-Token header when PROFILE_TOKEN is set, otherwise
+    only local requests are served.
+    """
+    if PROFILE_TOKEN:
+        if request.headers.get('X-Profile-Token') != PROFILE_TOKEN:
+            return jsonify({'error': 'Not found'}), 404
+    elif request.remote_addr not in ('127.0.0.1', '::1'):
+        return jsonify({'error': 'Not found'}), 404
+
+    if request.method == 'POST':
+        data = request.get_json(silent=True) or {}
+        if data.get('reset'):
+            profiler.reset()
+        if 'sample_rate' in data:
+            try:
+                profiler.set_sample_rate(float(data['sample_rate']))
+            except (TypeError, ValueError):
+                return jsonify({'error': 'Invalid sample_rate'}), 400
+        print(f"🔬 Profiler sample rate: {profiler.sample_rate}")
+        return jsonify({'sample_rate': profiler.sample_rate}), 200
+
+    summary = profiler.summary(request.args.get('n', type=int))
+    if request.args.get('dump'):
+        summary['written'] = profiler.dump()
+    return jsonify(summary), 200
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus metrics (signal age histograms, stale drops, outbox lag)."""
+    return Response(metrics_registry.render(), mimetype='text/plain; version=0.0.4')
+
+
 @app.route('/health', methods=['GET'])
 def health():
-    """Health check endpoint."""
+    """Health check endpoint (never subject to admission control)."""
     return jsonify({
         'status': 'healthy',
-        'service': 'Supremo Trading Bot Webhook Server'
+        'service': 'Supremo Trading Bot Webhook Server',
+        'pid': os.getpid(),
+        'admission': admission.stats(),
+        'outbox': outbox.stats() if outbox else None,
+        'channels': channel_health.snapshot(),
+        'http': transport.stats(),
+        'subscribers': subscriber_fanout.stats() if subscriber_fanout else None
     }), 200
 
 
@@ -106,7 +507,8 @@ def index():
         'service': 'Supremo Trading Bot Webhook Server',
         'endpoints': {
             '/webhook': 'POST - Receive TradingView alerts',
-            '/health': 'GET - Health check'
+            '/health': 'GET - Health check',
+            '/metrics': 'GET - Prometheus metrics'
         },
         'usage': 'Send POST requests to /webhook with TradingView alert JSON payload'
     }), 200
@@ -121,6 +523,8 @@ if __name__ == '__main__':
     print(f"🔗 Webhook URL: http://{host}:{port}/webhook")
     print("-" * 50)
     
+    start_background_services()
+    
     # Run Flask app
     app.run(host=host, port=port, debug=False)
 
@@ -0,0 +1,180 @@
+"""
+Streaming weekly level engine for Supremo entry zones.
+Maintains Monday High/Low/Mid, Weekly Open and Previous Week High per ticker
+from a price stream, with O(1) work per tick.
+
+Levels are only reported once they were actually observed: after starting
+mid-week, WO and the Monday levels stay unknown until the next week opens,
+and PWH until a whole week has been seen.
+"""
+
+import math
+import os
+import struct
+import time
+from typing import Dict, List, Optional
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+DAY = 86400
+WEEK = 7 * DAY
+# 1970-01-05 00:00 UTC was the first Monday after the Unix epoch
+MONDAY_EPOCH = 4 * DAY
+
+# Level identifiers (match the Pine script / entry_level payload field)
+LEVEL_NAMES = ('ML', 'MM', 'MH', 'WO', 'PWH')
+
+# Checkpoint record: ticker length + TickerLevels fields (NaN = None)
+_STATE_RECORD = struct.Struct('<B6d')
+
+
+def week_start(ts: float) -> int:
+    """Return the Monday 00:00 UTC that starts the week containing ``ts``."""
+    ts = int(ts)
+    return ts - (ts - MONDAY_EPOCH) % WEEK
+
+
+class TickerLevels:
+    """Per-ticker weekly state (weekly_open is None while the week's open wasn't seen)."""
+
+    __slots__ = ('week_start', 'monday_high', 'monday_low', 'weekly_open', 'week_high', 'prev_week_high')
+
+    def __init__(self):
+        self.week_start = None
+        self.monday_high = None
+        self.monday_low = None
+        self.weekly_open = None
+        self.week_high = None
+        self.prev_week_high = None
+
+    def as_dict(self) -> Dict[str, Optional[float]]:
+        """Return levels keyed by identifier (None where not yet known)."""
+        mid = None
+        if self.monday_high is not None and self.monday_low is not None:
+            mid = (self.monday_high + self.monday_low) / 2
+        return {
+            'ML': self.monday_low,
+            'MM': mid,
+            'MH': self.monday_high,
+            'WO': self.weekly_open,
+            'PWH': self.prev_week_high
+        }
+
+
+class WeeklyLevelEngine:
+    """Computes Supremo weekly levels for many tickers from streaming prices."""
+
+    def __init__(self, tolerance: float = None, open_grace: float = None):
+        """
+        Initialize engine.
+
+        Args:
+            tolerance: Default zone tolerance as a fraction of the level
+                (0.001 = 0.1%), falls back to ENTRY_ZONE_TOLERANCE
+            open_grace: Seconds after Monday 00:00 UTC within which the first
+                tick of a week still counts as its open, falls back to WEEKLY_OPEN_GRACE
+        """
+        if tolerance is None:
+            tolerance = float(os.getenv('ENTRY_ZONE_TOLERANCE', '0.001'))
+        if open_grace is None:
+            open_grace = float(os.getenv('WEEKLY_OPEN_GRACE', '3600'))
+        self.tolerance = tolerance
+        self.open_grace = open_grace
+        self._tickers: Dict[str, TickerLevels] = {}
+
+    def update(self, ticker: str, price: float, ts: float = None):
+        """
+        Feed one price tick.
+
+        Args:
+            ticker: Trading symbol
+            price: Last traded price
+            ts: Tick time as Unix seconds (defaults to now)
+        """
+        if ts is None:
+            ts = time.time()
+        state = self._tickers.get(ticker)
+        if state is None:
+            state = self._tickers[ticker] = TickerLevels()
+
+        start = week_start(ts)
+        if state.week_start != start:
+            if state.week_start is not None and start < state.week_start:
+                return  # Late tick from a week we already rolled over
+            # Weekly rollover. The previous week's high only counts if that whole
+            # week was seen, and this tick is only the open if it's near the start.
+            complete = state.weekly_open is not None and start - state.week_start == WEEK
+            state.prev_week_high = state.week_high if complete else None
+            state.week_start = start
+            state.weekly_open = price if ts - start <= self.open_grace else None
+            state.week_high = price
+            state.monday_high = None
+            state.monday_low = None
+        elif price > state.week_high:
+            state.week_high = price
+
+        if ts - start < DAY and state.weekly_open is not None:
+            if state.monday_high is None or price > state.monday_high:
+                state.monday_high = price
+            if state.monday_low is None or price < state.monday_low:
+                state.monday_low = price
+
+    def levels(self, ticker: str) -> Dict[str, Optional[float]]:
+        """
+        Return current levels for a ticker.
+
+        Returns:
+            Dict with ML, MM, MH, WO, PWH (values None if unknown)
+        """
+        state = self._tickers.get(ticker)
+        if state is None:
+            return dict.fromkeys(LEVEL_NAMES)
+        return state.as_dict()
+
+    def match_zones(self, ticker: str, price: float, tolerance: float = None) -> List[str]:
+        """
+        Find every level the price is currently at, in one pass.
+
+        Args:
+            ticker: Trading symbol
+            price: Price to test
+            tolerance: Fraction of the level (defaults to engine tolerance)
+
+        Returns:
+            List of matching level identifiers
+        """
+        if tolerance is None:
+            tolerance = self.tolerance
+        return [
+            name for name, level in self.levels(ticker).items()
+            if level and abs(price - level) <= level * tolerance
+        ]
+
+    def tickers(self) -> List[str]:
+        """Return tickers with state."""
+        return list(self._tickers)
+
+    def dump_state(self) -> bytes:
+        """Serialize per-ticker state for a checkpoint."""
+        parts = []
+        for ticker, state in list(self._tickers.items()):
+            data = ticker.encode('utf-8')[:255]
+            values = [getattr(state, slot) for slot in TickerLevels.__slots__]
+            values = [math.nan if value is None else value for value in values]
+            parts.append(_STATE_RECORD.pack(len(data), *values) + data)
+        return b''.join(parts)
+
+    def load_state(self, buffer):
+        """Restore state written by dump_state."""
+        offset = 0
+        while offset + _STATE_RECORD.size <= len(buffer):
+            length, *values = _STATE_RECORD.unpack_from(buffer, offset)
+            offset += _STATE_RECORD.size
+            ticker = bytes(buffer[offset:offset + length]).decode('utf-8')
+            offset += length
+            state = self._tickers[ticker] = TickerLevels()
+            for slot, value in zip(TickerLevels.__slots__, values):
+                setattr(state, slot, None if math.isnan(value) else value)
+            state.week_start = None if state.week_start is None else int(state.week_start)
@@ -0,0 +1,85 @@
+"""
+Signal relay between prefork webhook workers.
+Workers hand processed signals to the primary worker, which runs the
+services that must exist once per server (digest batching, subscriber
+fan-out) instead of once per worker.
+"""
+
+import json
+import socket
+import threading
+from typing import Callable, Dict, Optional
+from signal_model import Signal
+from log_setup import get_logger
+
+log = get_logger('relay')
+
+
+class SignalRelay:
+    """
+    Unix datagram channel created by the prefork supervisor before forking.
+
+    Every worker inherits both ends: workers send, the primary worker reads.
+    One datagram carries one signal, so concurrent senders never interleave,
+    and datagrams queue in the kernel while the primary restarts.
+    """
+
+    def __init__(self):
+        self._reader, self._writer = socket.socketpair(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._thread: Optional[threading.Thread] = None
+
+    def send(self, topic: str, signal: Signal, message: str) -> bool:
+        """
+        Hand a signal to the primary worker without blocking.
+
+        Args:
+            topic: Handler name on the primary (e.g. 'digest')
+            signal: Processed Signal
+            message: Formatted text message for the signal
+
+        Returns:
+            False if the datagram could not be queued (buffer full or too
+            large); the caller should handle the signal itself
+        """
+        data = json.dumps({'topic': topic, 'signal': signal.to_dict(), 'message': message}).encode()
+        try:
+            self._writer.send(data, socket.MSG_DONTWAIT)
+        except OSError as e:
+            log.warning(f"⚠️  Relay to primary worker failed: {e}", extra={'sample_key': 'relay'})
+            return False
+        return True
+
+    def serve(self, handlers: Dict[str, Callable[[Signal, str], None]]) -> 'SignalRelay':
+        """
+        Dispatch relayed signals to ``handlers`` by topic in a background thread.
+
+        Args:
+            handlers: topic -> handler(signal, message)
+        """
+        def run():
+            while True:
+                data = self._reader.recv(1 << 20)
+                try:
+                    item = json.loads(data)
+                    handlers[item['topic']](Signal.from_dict(item['signal']), item['message'])
+                except Exception as e:
+                    log.exception(f"❌ Relayed signal failed: {e}")
+
+        self._thread = threading.Thread(target=run, daemon=True, name='signal-relay')
+        self._thread.start()
+        return self
+
+
+# Relay created by the prefork launcher before forking, picked up by workers
+_signal_relay: Optional[SignalRelay] = None
+
+
+def install_signal_relay(relay: SignalRelay):
+    """Register the pre-fork signal relay for worker processes."""
+    global _signal_relay
+    _signal_relay = relay
+
+
+def get_signal_relay() -> Optional[SignalRelay]:
+    """Return the installed signal relay, if any."""
+    return _signal_relay